@@ -21,6 +21,7 @@ from zac.core.services import (
     get_zaak,
     get_zaaktypen,
 )
+from zac.elasticsearch.permission_index import sync_permission_documents
 from zgw.models.zrc import Zaak
 
 from ..constants import (
@@ -39,6 +40,7 @@ from ..models import (
     UserAtomicPermission,
     UserAuthorizationProfile,
 )
+from ..permission_snapshot import invalidate_permission_snapshots
 from ..permissions import object_type_registry, registry
 
 
@@ -461,6 +463,11 @@ class HandleAccessRequestSerializer(serializers.HyperlinkedModelSerializer):
                     )
                 )
             UserAtomicPermission.objects.bulk_create(user_atomic_permissions)
+            # bulk_create does not send signals
+            invalidate_permission_snapshots()
+            transaction.on_commit(
+                lambda: sync_permission_documents([access_request.requester_id])
+            )
 
         # send email
         request = self.context.get("request")
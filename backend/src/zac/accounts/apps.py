@@ -1,5 +1,40 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class AccountsConfig(AppConfig):
     name = "zac.accounts"
+
+    def ready(self):
+        from .models import (
+            ApplicationToken,
+            ApplicationTokenAuthorizationProfile,
+            AtomicPermission,
+            AuthorizationProfile,
+            BlueprintPermission,
+            Role,
+            User,
+            UserAtomicPermission,
+            UserAuthorizationProfile,
+        )
+        from .permission_snapshot import invalidate_permission_snapshots
+
+        for sender in (
+            AtomicPermission,
+            BlueprintPermission,
+            Role,
+            AuthorizationProfile,
+            UserAtomicPermission,
+            UserAuthorizationProfile,
+            ApplicationTokenAuthorizationProfile,
+        ):
+            post_save.connect(invalidate_permission_snapshots, sender=sender)
+            post_delete.connect(invalidate_permission_snapshots, sender=sender)
+
+        for through in (
+            User.atomic_permissions.through,
+            User.auth_profiles.through,
+            ApplicationToken.auth_profiles.through,
+            AuthorizationProfile.blueprint_permissions.through,
+        ):
+            m2m_changed.connect(invalidate_permission_snapshots, sender=through)
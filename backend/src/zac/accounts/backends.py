@@ -2,7 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth.hashers import check_password
 
-from zac.accounts.models import BlueprintPermission, UserAtomicPermission
+from zac.accounts.permission_snapshot import get_user_permission_snapshot
 
 
 class UserModelEmailBackend(ModelBackend):
@@ -31,24 +31,20 @@ class PermissionsBackend:
         if not user_obj.is_active:
             return False
 
-        blueprint_permissions = BlueprintPermission.objects.for_user(
-            user_obj, actual=True
-        ).filter(role__permissions__contains=[perm])
-
-        user_atomic_permissions = (
-            UserAtomicPermission.objects.select_related("atomic_permission")
-            .filter(user=user_obj, atomic_permission__permission=perm)
-            .actual()
-        )
+        snapshot = get_user_permission_snapshot(user_obj)
+        blueprint_permissions = [
+            blueprint
+            for (permission, _object_type), blueprints in snapshot.blueprints.items()
+            if permission == perm
+            for blueprint in blueprints
+        ]
 
         # similar to DefinitionBasePermission.has_permission
         if not obj:
-            return blueprint_permissions.exists() or user_atomic_permissions.exists()
+            return bool(blueprint_permissions) or bool(snapshot.atomic.get(perm))
 
         # similar to DefinitionBasePermission.has_object_permission
-        if user_atomic_permissions.filter(
-            atomic_permission__object_url=obj.url
-        ).exists():
+        if snapshot.has_atomic_permission(perm, object_url=obj.url):
             return True
 
         for permission in blueprint_permissions:
@@ -0,0 +1,261 @@
+"""
+Compiled snapshot of the permissions of a user or application.
+
+The permission checks of a single request - the DRF permission classes, the search
+filters, the zaaktypen filtering - each used to query the (blueprint) permissions
+again. The snapshot holds everything they need: the atomic permissions by permission
+and object type, the blueprint permissions by permission and object type, and the
+maximum VA per zaaktype (catalogus and omschrijving).
+
+Snapshots are built with three queries, kept in Redis and shared by all processes.
+Any change to permissions, roles or authorization profiles invalidates all snapshots
+at once, see :mod:`zac.utils.cache_tags`. Permissions that start or end in the
+future are taken into account by expiring the snapshot at that moment.
+"""
+import hashlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from elasticsearch_dsl.query import Query
+from zgw_consumers.api_models.catalogi import ZaakType
+
+from zac.utils.cache_tags import (
+    ensure_versions,
+    get_tag_keys,
+    get_tagged,
+    invalidate_tags,
+    set_tagged,
+)
+from zac.utils.decorators import memoize
+from zac.utils.memoization import get_memoization_scope
+
+from .constants import PermissionObjectTypeChoices
+from .datastructures import VA_ORDER
+from .permissions import object_type_registry
+
+CACHE_KEY_PREFIX = "permission-snapshot"
+PERMISSIONS_TAG = "permissions"
+
+
+@dataclass(frozen=True)
+class BlueprintPolicy:
+    """
+    A blueprint permission granted through an authorization profile.
+    """
+
+    object_type: str
+    policy: dict
+
+    def get_blueprint_class(self):
+        return object_type_registry[self.object_type].blueprint_class
+
+    def has_access(self, obj, user=None, permission=None) -> bool:
+        blueprint = self.get_blueprint_class()(self.policy, context={"user": user})
+        return blueprint.has_access(obj, permission)
+
+    def get_search_query(self, on_nested_field: Optional[str] = "") -> Query:
+        blueprint = self.get_blueprint_class()(self.policy)
+        return blueprint.search_query(on_nested_field=on_nested_field)
+
+
+@dataclass(frozen=True)
+class PermissionSnapshot:
+    # the names of all permissions, including the ones that are not active (yet)
+    permission_names: FrozenSet[str] = frozenset()
+    # permission -> object type -> object URLs
+    atomic: Dict[str, Dict[str, FrozenSet[str]]] = field(default_factory=dict)
+    # (permission, object type) -> policies
+    blueprints: Dict[Tuple[str, str], Tuple[BlueprintPolicy, ...]] = field(
+        default_factory=dict
+    )
+    # (catalogus, zaaktype omschrijving) -> highest VA order of any permission
+    zaaktype_max_va: Dict[Tuple[str, str], int] = field(default_factory=dict)
+    # the first moment a permission starts or ends
+    valid_until: Optional[datetime] = None
+
+    def has_atomic_permission(
+        self,
+        permission: str,
+        object_type: Optional[str] = None,
+        object_url: Optional[str] = None,
+    ) -> bool:
+        by_object_type = self.atomic.get(permission, {})
+        if object_url:
+            return any(object_url in urls for urls in by_object_type.values())
+        return bool(by_object_type.get(object_type))
+
+    def get_atomic_urls(self, permission: str, object_type: str) -> FrozenSet[str]:
+        return self.atomic.get(permission, {}).get(object_type, frozenset())
+
+    def get_blueprints(
+        self, permission: str, object_type: str
+    ) -> Tuple[BlueprintPolicy, ...]:
+        return self.blueprints.get((permission, object_type), ())
+
+    def allows_zaaktype(self, zaaktype: ZaakType) -> bool:
+        max_va = self.zaaktype_max_va.get((zaaktype.catalogus, zaaktype.omschrijving))
+        return (
+            max_va is not None
+            and max_va >= VA_ORDER[zaaktype.vertrouwelijkheidaanduiding]
+        )
+
+
+def _is_active(start: datetime, end: Optional[datetime], now: datetime) -> bool:
+    return start <= now and (end is None or end >= now)
+
+
+def _get_transitions(
+    periods: Iterable[Tuple[datetime, Optional[datetime]]], now: datetime
+) -> List[datetime]:
+    return [
+        moment
+        for start, end in periods
+        for moment in (start, end)
+        if moment is not None and moment > now
+    ]
+
+
+def build_snapshot(user=None, application=None) -> PermissionSnapshot:
+    from .models import (
+        ApplicationTokenAuthorizationProfile,
+        BlueprintPermission,
+        UserAtomicPermission,
+        UserAuthorizationProfile,
+    )
+
+    now = timezone.now()
+
+    if user is not None:
+        profile_periods = UserAuthorizationProfile.objects.filter(
+            user=user
+        ).values_list("auth_profile_id", "start", "end")
+        atomic_rows = UserAtomicPermission.objects.filter(user=user).values_list(
+            "atomic_permission__permission",
+            "atomic_permission__object_type",
+            "atomic_permission__object_url",
+            "start_date",
+            "end_date",
+        )
+    else:
+        profile_periods = ApplicationTokenAuthorizationProfile.objects.filter(
+            application=application
+        ).values_list("auth_profile_id", "start", "end")
+        atomic_rows = []
+
+    profile_periods = list(profile_periods)
+    atomic_rows = list(atomic_rows)
+    active_profiles = {
+        profile_id
+        for profile_id, start, end in profile_periods
+        if _is_active(start, end, now)
+    }
+    blueprint_rows = BlueprintPermission.objects.filter(
+        auth_profiles__in={profile_id for profile_id, _, _ in profile_periods}
+    ).values_list("auth_profiles", "object_type", "policy", "role__permissions")
+
+    permission_names = set()
+    atomic = defaultdict(lambda: defaultdict(set))
+    for permission, object_type, object_url, start, end in atomic_rows:
+        permission_names.add(permission)
+        if _is_active(start, end, now):
+            atomic[permission][object_type].add(object_url)
+
+    blueprints = defaultdict(list)
+    zaaktype_max_va = {}
+    for profile_id, object_type, policy, role_permissions in blueprint_rows:
+        permission_names.update(role_permissions)
+        if profile_id not in active_profiles:
+            continue
+
+        blueprint = BlueprintPolicy(object_type=object_type, policy=policy)
+        for permission in role_permissions:
+            if blueprint not in blueprints[(permission, object_type)]:
+                blueprints[(permission, object_type)].append(blueprint)
+
+        if object_type == PermissionObjectTypeChoices.zaak and policy.get("max_va"):
+            key = (policy.get("catalogus"), policy.get("zaaktype_omschrijving"))
+            zaaktype_max_va[key] = max(
+                zaaktype_max_va.get(key, -1), VA_ORDER[policy["max_va"]]
+            )
+
+    transitions = _get_transitions(
+        [(start, end) for _, start, end in profile_periods]
+        + [(start, end) for *_, start, end in atomic_rows],
+        now,
+    )
+    return PermissionSnapshot(
+        permission_names=frozenset(permission_names),
+        atomic={
+            permission: {
+                object_type: frozenset(urls)
+                for object_type, urls in by_object_type.items()
+            }
+            for permission, by_object_type in atomic.items()
+        },
+        blueprints={key: tuple(policies) for key, policies in blueprints.items()},
+        zaaktype_max_va=zaaktype_max_va,
+        valid_until=min(transitions) if transitions else None,
+    )
+
+
+@memoize("{cache_key}")
+def _get_snapshot(cache_key: str, user=None, application=None) -> PermissionSnapshot:
+    snapshot = get_tagged(cache_key, [PERMISSIONS_TAG])
+    if snapshot is not None:
+        return snapshot
+
+    # the version from before the queries - a change in the meantime invalidates
+    # the snapshot right away
+    versions = ensure_versions(get_tag_keys([PERMISSIONS_TAG]))
+    snapshot = build_snapshot(user=user, application=application)
+
+    timeout = settings.PERMISSION_SNAPSHOT_TIMEOUT
+    if snapshot.valid_until is not None:
+        timeout = min(timeout, (snapshot.valid_until - timezone.now()).total_seconds())
+    if timeout > 0:
+        set_tagged(
+            cache_key, snapshot, [PERMISSIONS_TAG], timeout=timeout, versions=versions
+        )
+    return snapshot
+
+
+def get_user_permission_snapshot(user) -> PermissionSnapshot:
+    return _get_snapshot(f"{CACHE_KEY_PREFIX}:user:{user.pk}", user=user)
+
+
+def get_permission_snapshot(request) -> PermissionSnapshot:
+    """
+    Return the snapshot of the user or application token of the request.
+    """
+    if request.user:
+        return get_user_permission_snapshot(request.user)
+
+    if request.auth is None:
+        return PermissionSnapshot()
+
+    # the token is a secret, keep it out of the cache keys
+    token_hash = hashlib.sha256(request.auth.pk.encode()).hexdigest()
+    return _get_snapshot(
+        f"{CACHE_KEY_PREFIX}:application:{token_hash}", application=request.auth
+    )
+
+
+def invalidate_permission_snapshots(**kwargs) -> None:
+    """
+    Invalidate the snapshots of all users and applications.
+
+    Suitable as a signal receiver.
+    """
+    invalidate_tags(PERMISSIONS_TAG)
+    scope = get_memoization_scope()
+    if scope is not None:
+        scope.forget(f"{CACHE_KEY_PREFIX}:")
+    # a snapshot built from the state before the transaction is committed, could be
+    # cached with the new version
+    transaction.on_commit(lambda: invalidate_tags(PERMISSIONS_TAG))
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from zgw_consumers.api_models.catalogi import ZaakType
+from zgw_consumers.api_models.constants import VertrouwelijkheidsAanduidingen
+
+from zac.core.tests.utils import ClearCachesMixin
+
+from ..constants import PermissionObjectTypeChoices
+from ..datastructures import VA_ORDER
+from ..permission_snapshot import get_permission_snapshot
+from .factories import (
+    ApplicationTokenFactory,
+    AtomicPermissionFactory,
+    BlueprintPermissionFactory,
+    UserAtomicPermissionFactory,
+    UserFactory,
+)
+
+CATALOGUS = "https://catalogi.nl/api/v1/catalogussen/1"
+
+
+def _zaaktype(omschrijving: str, va: str) -> ZaakType:
+    zaaktype = MagicMock(spec=ZaakType)
+    zaaktype.catalogus = CATALOGUS
+    zaaktype.omschrijving = omschrijving
+    zaaktype.vertrouwelijkheidaanduiding = va
+    return zaaktype
+
+
+class PermissionSnapshotTests(ClearCachesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = UserFactory.create()
+        cls.request = MagicMock(user=cls.user, auth=None)
+        BlueprintPermissionFactory.create(
+            role__permissions=["zaken:inzien", "zaken:wijzigen"],
+            for_user=cls.user,
+            policy={
+                "catalogus": CATALOGUS,
+                "zaaktype_omschrijving": "ZT1",
+                "max_va": VertrouwelijkheidsAanduidingen.zaakvertrouwelijk,
+            },
+        )
+        UserAtomicPermissionFactory.create(
+            user=cls.user,
+            atomic_permission__permission="zaken:inzien",
+            atomic_permission__object_url="https://zaken.nl/api/v1/zaken/1",
+        )
+        UserAtomicPermissionFactory.create(
+            user=cls.user,
+            atomic_permission__permission="zaken:download-documents",
+            atomic_permission__object_url="https://zaken.nl/api/v1/zaken/2",
+            end_date=timezone.now() - timedelta(days=1),
+        )
+
+    def test_snapshot(self):
+        snapshot = get_permission_snapshot(self.request)
+
+        self.assertEqual(
+            snapshot.permission_names,
+            {"zaken:inzien", "zaken:wijzigen", "zaken:download-documents"},
+        )
+        self.assertEqual(
+            snapshot.get_atomic_urls("zaken:inzien", PermissionObjectTypeChoices.zaak),
+            {"https://zaken.nl/api/v1/zaken/1"},
+        )
+        # expired
+        self.assertFalse(
+            snapshot.has_atomic_permission(
+                "zaken:download-documents",
+                object_url="https://zaken.nl/api/v1/zaken/2",
+            )
+        )
+        self.assertEqual(
+            len(
+                snapshot.get_blueprints(
+                    "zaken:wijzigen", PermissionObjectTypeChoices.zaak
+                )
+            ),
+            1,
+        )
+        self.assertEqual(
+            snapshot.zaaktype_max_va,
+            {
+                (CATALOGUS, "ZT1"): VA_ORDER[
+                    VertrouwelijkheidsAanduidingen.zaakvertrouwelijk
+                ]
+            },
+        )
+        self.assertTrue(
+            snapshot.allows_zaaktype(
+                _zaaktype("ZT1", VertrouwelijkheidsAanduidingen.openbaar)
+            )
+        )
+        self.assertFalse(
+            snapshot.allows_zaaktype(
+                _zaaktype("ZT1", VertrouwelijkheidsAanduidingen.geheim)
+            )
+        )
+        self.assertFalse(
+            snapshot.allows_zaaktype(
+                _zaaktype("ZT2", VertrouwelijkheidsAanduidingen.openbaar)
+            )
+        )
+
+    @override_settings(PERMISSION_SNAPSHOT_TIMEOUT=60)
+    def test_snapshot_is_cached_until_permissions_change(self):
+        get_permission_snapshot(self.request)
+
+        with self.assertNumQueries(0):
+            get_permission_snapshot(self.request)
+
+        AtomicPermissionFactory.create(
+            permission="zaken:inzien",
+            object_url="https://zaken.nl/api/v1/zaken/3",
+            for_user=self.user,
+        )
+
+        self.assertEqual(
+            get_permission_snapshot(self.request).get_atomic_urls(
+                "zaken:inzien", PermissionObjectTypeChoices.zaak
+            ),
+            {"https://zaken.nl/api/v1/zaken/1", "https://zaken.nl/api/v1/zaken/3"},
+        )
+
+    @override_settings(PERMISSION_SNAPSHOT_TIMEOUT=60)
+    def test_snapshot_expires_when_permission_starts(self):
+        start = timezone.now() + timedelta(hours=1)
+        UserAtomicPermissionFactory.create(
+            user=self.user,
+            atomic_permission__permission="zaken:inzien",
+            atomic_permission__object_url="https://zaken.nl/api/v1/zaken/4",
+            start_date=start,
+        )
+
+        snapshot = get_permission_snapshot(self.request)
+
+        self.assertEqual(snapshot.valid_until, start)
+        self.assertFalse(
+            snapshot.has_atomic_permission(
+                "zaken:inzien", object_url="https://zaken.nl/api/v1/zaken/4"
+            )
+        )
+
+    def test_application_snapshot(self):
+        application = ApplicationTokenFactory.create()
+        BlueprintPermissionFactory.create(
+            role__permissions=["zaken:inzien"],
+            for_application=application,
+            policy={
+                "catalogus": CATALOGUS,
+                "zaaktype_omschrijving": "ZT2",
+                "max_va": VertrouwelijkheidsAanduidingen.openbaar,
+            },
+        )
+
+        snapshot = get_permission_snapshot(MagicMock(user=None, auth=application))
+
+        self.assertEqual(snapshot.permission_names, {"zaken:inzien"})
+        self.assertEqual(snapshot.atomic, {})
+        self.assertEqual(list(snapshot.zaaktype_max_va), [(CATALOGUS, "ZT2")])
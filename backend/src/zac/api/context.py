@@ -1,14 +1,13 @@
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 
 from zgw_consumers.api_models.catalogi import ZaakType
 from zgw_consumers.api_models.documenten import Document
 
 from zac.camunda.data import Task
-from zac.camunda.process_instances import get_process_instance
 from zac.camunda.user_tasks import Context
-from zac.core.camunda.utils import get_process_zaak_url
+from zac.core.camunda.utils import get_process_zaak_urls
 from zac.core.services import fetch_zaaktype, get_documenten, get_zaak
 from zgw.models.zrc import Zaak
 
@@ -20,13 +19,29 @@ class ZaakContext(Context):
     zaaktype: Optional[ZaakType] = None
 
 
+def get_zaak_urls_from_context(
+    tasks: List[Task], zaak_url_variable: str = "zaakUrl"
+) -> Dict[UUID, Optional[str]]:
+    """
+    Get the zaak URLs of the tasks, with ``None`` for tasks without a zaak.
+    """
+    zaak_urls = get_process_zaak_urls(
+        {task.process_instance_id for task in tasks},
+        zaak_url_variable=zaak_url_variable,
+    )
+    return {task.id: zaak_urls[task.process_instance_id] for task in tasks}
+
+
 def get_zaak_url_from_context(
     task: Task, zaak_url_variable: str = "zaakUrl"
 ) -> Tuple[UUID, str]:
-    process_instance = get_process_instance(task.process_instance_id)
-    zaak_url = get_process_zaak_url(
-        process_instance, zaak_url_variable=zaak_url_variable
-    )
+    zaak_url = get_zaak_urls_from_context([task], zaak_url_variable=zaak_url_variable)[
+        task.id
+    ]
+    if zaak_url is None:
+        raise RuntimeError(
+            f"None of the (parent) processes had a {zaak_url_variable} process variable!"
+        )
     return task.id, zaak_url
 
 
@@ -1,7 +1,5 @@
 import logging
-from typing import Optional
-
-from django.db.models import QuerySet
+from typing import Optional, Tuple
 
 from rest_framework import permissions
 from rest_framework.request import Request
@@ -9,7 +7,7 @@ from rest_framework.views import APIView
 from zds_client import ClientError
 
 from zac.accounts.constants import PermissionObjectTypeChoices
-from zac.accounts.models import BlueprintPermission, UserAtomicPermission
+from zac.accounts.permission_snapshot import BlueprintPolicy, get_permission_snapshot
 from zac.core.permissions import Permission
 from zac.core.services import get_document, get_informatieobjecttype, get_zaak
 
@@ -28,29 +26,20 @@ class DefinitionBasePermission(permissions.BasePermission):
 
         return self.permission
 
-    def get_blueprint_permissions(self, request, permission_name) -> QuerySet:
-        return BlueprintPermission.objects.for_requester(request, actual=True).filter(
-            role__permissions__contains=[permission_name],
-            object_type=self.object_type,
+    def get_blueprint_permissions(
+        self, request, permission_name
+    ) -> Tuple[BlueprintPolicy, ...]:
+        return get_permission_snapshot(request).get_blueprints(
+            permission_name, self.object_type
         )
 
     def user_atomic_permissions_exists(
         self, request, permission_name, obj_url: Optional[str] = ""
     ) -> bool:
-        filters = {
-            "user": request.user,
-            "atomic_permission__permission": permission_name,
-        }
-        if obj_url:
-            filters["atomic_permission__object_url"] = obj_url
-        else:
-            filters["atomic_permission__object_type"] = self.object_type
-
-        return (
-            UserAtomicPermission.objects.select_related("atomic_permission")
-            .filter(**filters)
-            .actual()
-            .exists()
+        if not request.user:
+            return False
+        return get_permission_snapshot(request).has_atomic_permission(
+            permission_name, object_type=self.object_type, object_url=obj_url
         )
 
     def has_object_permission(self, request: Request, view: APIView, obj):
@@ -78,7 +67,7 @@ class DefinitionBasePermission(permissions.BasePermission):
 
         permission_name = self.get_permission(request).name
         # check if the user has permissions for any object
-        if (not self.get_blueprint_permissions(request, permission_name).exists()) and (
+        if (not self.get_blueprint_permissions(request, permission_name)) and (
             not self.user_atomic_permissions_exists(request, permission_name)
         ):
             return False
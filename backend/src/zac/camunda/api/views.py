@@ -29,6 +29,7 @@ from zac.core.services import (
     get_roltypen,
     get_zaak,
 )
+from zac.utils.memoization import forget_memoized
 from zgw.models import Zaak
 
 from ..data import Task
@@ -515,6 +516,7 @@ class SetTaskAssigneeView(APIView):
             "betrokkeneIdentificatie": betrokkene_identificatie,
         }
         zrc_client.create("rol", data)
+        forget_memoized("rollen:")
 
     @extend_schema(
         summary=_("Set task assignee or delegate."),
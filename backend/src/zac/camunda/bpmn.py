@@ -1,9 +1,92 @@
-from defusedxml import ElementTree as ET
-from django_camunda.bpmn import get_bpmn as _get_bpmn
+"""
+Metadata of the BPMN process definitions.
+
+Parsing the BPMN XML and searching it for every task is relatively expensive, so
+the metadata the ZAC needs - the message names and the forms of the user tasks - is
+extracted once per process definition. Process definitions are immutable per id,
+which makes the compiled metadata safe to cache for a long time, both in the shared
+cache and in process memory.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from xml.etree.ElementTree import Element
+
+from django_camunda.bpmn import CAMUNDA_NS, get_bpmn
 
 from zac.utils.decorators import cache
 
+FORM_KEY_ATTRIBUTE = "{" + CAMUNDA_NS["camunda"] + "}formKey"
+
+
+@dataclass
+class FormField:
+    id: str
+    type: str
+    label: str
+    default: Optional[str] = None
+    # (value, label) of the options of enum fields
+    choices: List[Tuple[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class UserTaskDefinition:
+    form_key: Optional[str] = None
+    form_fields: List[FormField] = field(default_factory=list)
+
+
+@dataclass
+class ProcessDefinitionMetadata:
+    messages: List[str] = field(default_factory=list)
+    # task definition key -> user task
+    user_tasks: Dict[str, UserTaskDefinition] = field(default_factory=dict)
+
+    def get_user_task(self, task_definition_key: str) -> UserTaskDefinition:
+        return self.user_tasks.get(task_definition_key, UserTaskDefinition())
+
+
+def get_form_field(element: Element) -> FormField:
+    field_id = element.attrib["id"]
+    field_type = element.attrib["type"]
+    choices = []
+    if field_type == "enum":
+        for value in element.findall("camunda:value", CAMUNDA_NS):
+            choices.append(
+                (value.attrib["id"], value.attrib.get("name", value.attrib["id"]))
+            )
+
+    return FormField(
+        id=field_id,
+        type=field_type,
+        label=element.attrib.get("label", field_id),
+        default=element.attrib.get("defaultValue"),
+        choices=choices,
+    )
+
+
+def compile_metadata(tree: Element) -> ProcessDefinitionMetadata:
+    messages = tree.findall(".//bpmn:message", CAMUNDA_NS)
+    user_tasks = {
+        user_task.attrib["id"]: UserTaskDefinition(
+            form_key=user_task.attrib.get(FORM_KEY_ATTRIBUTE),
+            form_fields=[
+                get_form_field(element)
+                for element in user_task.findall(".//camunda:formField", CAMUNDA_NS)
+            ],
+        )
+        for user_task in tree.findall(".//bpmn:userTask", CAMUNDA_NS)
+    }
+    return ProcessDefinitionMetadata(
+        messages=[message.attrib["name"] for message in messages],
+        user_tasks=user_tasks,
+    )
+
 
-@cache("bpmn:{process_definition_id}", timeout=60 * 60 * 24)
-def get_bpmn(process_definition_id: str) -> ET:
-    return _get_bpmn(process_definition_id)
+@cache(
+    "bpmn-metadata:{process_definition_id}",
+    timeout=60 * 60 * 24 * 7,
+    local=True,
+)
+def get_process_definition_metadata(
+    process_definition_id: str,
+) -> ProcessDefinitionMetadata:
+    return compile_metadata(get_bpmn(process_definition_id))
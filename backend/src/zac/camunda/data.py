@@ -21,6 +21,7 @@ class ProcessInstance(Model):
     business_key: str = ""
     case_instance_id: str = ""
     suspended: bool = False
+    ended: bool = False
     tenant_id: str = ""
 
     definition: str = None
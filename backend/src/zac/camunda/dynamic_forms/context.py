@@ -1,10 +1,10 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
-from xml.etree.ElementTree import Element
+from typing import Any, Dict, List
 
 from djangorestframework_camel_case.render import CamelCaseJSONRenderer
 from rest_framework import parsers
 
+from ..bpmn import FormField
 from ..data import Task
 from ..user_tasks import Context, register
 from .serializers import (
@@ -20,31 +20,22 @@ class DynamicFormContext(Context):
     form_fields: List[Dict[str, Any]]
 
 
-def get_choice(value: Element) -> Tuple[str, str]:
-    val = value.attrib["id"]
-    label = value.attrib.get("name", val)
-    return (val, label)
-
-
-def get_field_definition(field: Element) -> Dict[str, Any]:
-    field_id = field.attrib["id"]
-    default = field.attrib.get("defaultValue")
-    field_type = field.attrib["type"]
+def get_field_definition(field: FormField) -> Dict[str, Any]:
+    field_type = field.type
     if field_type not in FIELD_TYPE_MAP:
         raise NotImplementedError(f"Unknown field type '{field_type}'")
 
     input_type = INPUT_TYPE_MAP[field_type]
 
     field_definition = {
-        "name": field_id,
-        "label": field.attrib.get("label", field_id),
+        "name": field.id,
+        "label": field.label,
         "input_type": input_type,
-        "value": default,
+        "value": field.default,
     }
 
     if field_type == "enum":
-        choices = [get_choice(value) for value in list(field)]
-        field_definition["enum"] = choices
+        field_definition["enum"] = field.choices
 
     return field_definition
 
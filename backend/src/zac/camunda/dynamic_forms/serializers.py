@@ -142,9 +142,8 @@ def get_dynamic_form_serializer_fields(task: Task) -> Dict[str, fields.Field]:
 
     fields = {}
     for field in formfields:
-        field_type = field.attrib["type"]
         field_definition = get_field_definition(field)
-        field_cls, get_kwargs = FIELD_TYPE_MAP[field_type]
+        field_cls, get_kwargs = FIELD_TYPE_MAP[field.type]
         name = field_definition.pop("name")
         fields[name] = field_cls(**get_kwargs(field_definition))
 
@@ -1,13 +1,11 @@
 from typing import Any, Dict, List, Optional
-from xml.etree.ElementTree import Element
 
 from django import forms
 from django.utils.translation import gettext_lazy as _
 
-from django_camunda.bpmn import CAMUNDA_NS
 from django_camunda.camunda_models import Task
 
-from .bpmn import get_bpmn
+from .bpmn import FormField, get_process_definition_metadata
 from .user_tasks.context import REGISTRY
 
 
@@ -102,7 +100,7 @@ class DummyForm(TaskFormMixin, forms.Form):
     pass
 
 
-def extract_task_form_fields(task: Task) -> Optional[List[Element]]:
+def extract_task_form_fields(task: Task) -> Optional[List[FormField]]:
     """
     Get the Camunda form fields definition from the BPMN definition.
 
@@ -112,32 +110,19 @@ def extract_task_form_fields(task: Task) -> Optional[List[Element]]:
     if task.form_key and task.form_key in REGISTRY:
         return None
 
-    tree = get_bpmn(task.process_definition_id)
-
-    task_id = task.task_definition_key
-    task_definition = tree.find(f".//bpmn:userTask[@id='{task_id}']", CAMUNDA_NS)
-    formfields = task_definition.findall(".//camunda:formField", CAMUNDA_NS)
-    if not formfields:
-        return None
-
-    return formfields
+    metadata = get_process_definition_metadata(task.process_definition_id)
+    user_task = metadata.get_user_task(task.task_definition_key)
+    return user_task.form_fields or None
 
 
-def extract_task_form_key(task: Task) -> str:
+def extract_task_form_key(task: Task) -> Optional[str]:
     """
     Get the Camunda form key of a user task from the BPMN definition.
 
     Camunda embeds the form key as an attribute into the BPMN definition.
     """
-
-    tree = get_bpmn(task.process_definition_id)
-
-    task_id = task.task_definition_key
-    task_definition = tree.find(f".//bpmn:userTask[@id='{task_id}']", CAMUNDA_NS)
-    form_key = task_definition.attrib.get(
-        "{" + CAMUNDA_NS["camunda"] + "}formKey", None
-    )
-    return form_key
+    metadata = get_process_definition_metadata(task.process_definition_id)
+    return metadata.get_user_task(task.task_definition_key).form_key
 
 
 def extract_task_form(task: Task, form_key_mapping: dict) -> bool:
@@ -1,10 +1,9 @@
 from dataclasses import dataclass, field
 from typing import List
 
-from django_camunda.bpmn import CAMUNDA_NS
 from django_camunda.types import CamundaId
 
-from .bpmn import get_bpmn
+from .bpmn import get_process_definition_metadata
 from .forms import MessageForm
 
 
@@ -24,7 +23,4 @@ class DefinitionMessages:
 
 
 def get_messages(definition_id: str) -> List[str]:
-    tree = get_bpmn(definition_id)
-    messages = tree.findall(".//bpmn:message", CAMUNDA_NS)
-
-    return [message.attrib["name"] for message in messages]
+    return get_process_definition_metadata(definition_id).messages
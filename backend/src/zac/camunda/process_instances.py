@@ -10,7 +10,7 @@ from zac.utils.decorators import cache
 from .data import ProcessInstance
 
 
-@cache("process-instance:{instance_id}", timeout=2)
+@cache("process-instance:{instance_id}", timeout=2, negative_timeout=2)
 def get_process_instance(instance_id: CamundaId) -> Optional[ProcessInstance]:
     client = get_client()
     try:
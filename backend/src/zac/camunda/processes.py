@@ -1,4 +1,5 @@
-from typing import Dict, List
+import logging
+from typing import Dict, List, Optional
 
 from django.conf import settings
 
@@ -8,9 +9,11 @@ from django_camunda.types import CamundaId
 from zgw_consumers.api_models.base import factory
 from zgw_consumers.concurrent import parallel
 
-from zac.camunda.data import ProcessInstance
+from zac.camunda.data import ProcessInstance, Task
 from zac.camunda.messages import get_messages
-from zac.core.camunda.utils import get_process_tasks
+from zac.core.camunda.utils import PROCESS_INSTANCE_BATCH_SIZE, add_task_details
+
+logger = logging.getLogger(__name__)
 
 
 def get_process_definitions(definition_ids: list) -> List[ProcessDefinition]:
@@ -21,113 +24,138 @@ def get_process_definitions(definition_ids: list) -> List[ProcessDefinition]:
     return factory(ProcessDefinition, response)
 
 
-def add_subprocesses(
-    process_instance: ProcessInstance,
-    process_instances: Dict[str, ProcessInstance],
-    client: Camunda,
-    historic: bool = False,
-    zaak_url: str = "",
-):
-    if process_instance.sub_processes:
-        return
-
-    if historic:
-        url = "history/process-instance"
-        query_params = {"superProcessInstanceId": process_instance.id}
-    else:
-        url = "process-instance"
-        query_params = {"superProcessInstance": process_instance.id}
-
-    # If zaak_url is given ONLY include process instances with that zaak url
-    if zaak_url:
-        query_params["variables"] = f"zaakUrl_eq_{zaak_url}"
-
-    response = client.get(url, query_params)
-
-    # todo restrict for other zaakUrls
-    for data in response:
-        sub_process_instance = process_instances.get(
-            data["id"], factory(ProcessInstance, {**data, "historical": historic})
-        )
+def _to_process_instance(data: dict, historic: bool) -> ProcessInstance:
+    # the historic process instances have a different shape than the runtime ones
+    return ProcessInstance(
+        id=data["id"],
+        definition_id=data.get("process_definition_id") or "",
+        business_key=data.get("business_key") or "",
+        case_instance_id=data.get("case_instance_id") or "",
+        suspended=data.get("state") == "SUSPENDED",
+        ended=bool(data.get("end_time")),
+        tenant_id=data.get("tenant_id") or "",
+        historical=historic,
+    )
 
-        sub_process_instance.parent_process = process_instance
-        process_instance.sub_processes.append(sub_process_instance)
-        if (
-            sub_process_instance.id not in process_instances
-            or sub_process_instance != process_instances[sub_process_instance.id]
-        ):
-            process_instances[sub_process_instance.id] = sub_process_instance
-            add_subprocesses(
-                sub_process_instance,
-                process_instances,
-                client,
-                historic=historic,
-                zaak_url=zaak_url,
-            )
+
+class ProcessTreeLoader:
+    """
+    Load the process instances of a ZAAK with their sub processes and user tasks.
+
+    The tree is loaded breadth-first: the sub processes of all process instances of a
+    level are fetched with a single query (per batch of process instances), and the
+    user tasks of all process instances with a single query as well. The process
+    instances are queried from the history, as only the historic process instances
+    include their parent - the ``unfinished`` filter limits them to the active ones.
+
+    ``calls`` holds the number of Camunda requests made by the loader.
+    """
+
+    def __init__(self, historic: bool = False, client: Optional[Camunda] = None):
+        self.historic = historic
+        self.client = client or get_client()
+        self.calls = 0
+
+    def _query_process_instances(self, query: dict) -> List[dict]:
+        if not self.historic:
+            query = {**query, "unfinished": True}
+        self.calls += 1
+        return self.client.post("history/process-instance", json=query)
+
+    def get_process_instances(
+        self, zaak_url: str, include_bijdragezaak: bool = False
+    ) -> Dict[CamundaId, ProcessInstance]:
+        zaak_query = {
+            "variables": [{"name": "zaakUrl", "operator": "eq", "value": zaak_url}]
+        }
+        process_instances = {
+            data["id"]: _to_process_instance(data, self.historic)
+            for data in self._query_process_instances(zaak_query)
+        }
+
+        # If include_bijdragezaak is not set ONLY include sub processes with the
+        # zaak url
+        sub_process_query = {} if include_bijdragezaak else zaak_query
+        level = list(process_instances)
+        while level:
+            next_level = []
+            for start in range(0, len(level), PROCESS_INSTANCE_BATCH_SIZE):
+                batch = level[start : start + PROCESS_INSTANCE_BATCH_SIZE]
+                query = {
+                    **sub_process_query,
+                    "orQueries": [{"superProcessInstanceId": pid} for pid in batch],
+                }
+                for data in self._query_process_instances(query):
+                    sub_process_instance = process_instances.get(data["id"])
+                    # sub processes with the zaak url are already known from the
+                    # first query
+                    if sub_process_instance is None:
+                        sub_process_instance = _to_process_instance(data, self.historic)
+                        process_instances[data["id"]] = sub_process_instance
+                        next_level.append(data["id"])
+
+                    if sub_process_instance.parent_process is None:
+                        parent = process_instances[data["super_process_instance_id"]]
+                        sub_process_instance.parent_process = parent
+                        parent.sub_processes.append(sub_process_instance)
+            level = next_level
+
+        return process_instances
+
+    def add_definitions(self, process_instances: Dict[CamundaId, ProcessInstance]):
+        definition_ids = list(
+            dict.fromkeys(p.definition_id for p in process_instances.values())
+        )
+        if not definition_ids:
+            return
+
+        self.calls += 1
+        definitions = {
+            definition.id: definition
+            for definition in get_process_definitions(definition_ids)
+        }
+        for process_instance in process_instances.values():
+            process_instance.definition = definitions[process_instance.definition_id]
+
+    def add_tasks(self, process_instances: Dict[CamundaId, ProcessInstance]):
+        process_instance_ids = [str(pid) for pid in process_instances]
+        tasks = []
+        for start in range(0, len(process_instance_ids), PROCESS_INSTANCE_BATCH_SIZE):
+            batch = process_instance_ids[start : start + PROCESS_INSTANCE_BATCH_SIZE]
+            self.calls += 1
+            tasks += self.client.post("task", json={"processInstanceIdIn": batch})
+
+        by_process_instance = {str(pid): p for pid, p in process_instances.items()}
+        for task in add_task_details(factory(Task, tasks)):
+            process_instance = by_process_instance[str(task.process_instance_id)]
+            process_instance.tasks.append(task)
 
 
 def get_process_instances(
     zaak_url: str, historic: bool = False, include_bijdragezaak: bool = False
 ) -> Dict[CamundaId, ProcessInstance]:
-    client = get_client()
-
-    #  get (historical) process-instances for particular zaak
-    if historic:
-        url = "history/process-instance"
-    else:
-        url = "process-instance"
-
-    response = client.get(url, {"variables": f"zaakUrl_eq_{zaak_url}"})
-
-    process_instances = {
-        data["id"]: factory(ProcessInstance, {**data, "historical": historic})
-        for data in response
-    }
-
-    # fill in all subprocesses into the dict
-    pids = [process_instance for id, process_instance in process_instances.items()]
-
-    def _add_subprocesses(pid: ProcessInstance):
-        nonlocal process_instances, client, historic, include_bijdragezaak, zaak_url
-        add_subprocesses(
-            pid,
-            process_instances,
-            client,
-            historic=historic,
-            zaak_url="" if include_bijdragezaak else zaak_url,
-        )
-
-    with parallel() as executor:
-        list(executor.map(_add_subprocesses, pids))
-
-    return process_instances
+    loader = ProcessTreeLoader(historic=historic)
+    return loader.get_process_instances(
+        zaak_url, include_bijdragezaak=include_bijdragezaak
+    )
 
 
 def get_top_level_process_instances(
     zaak_url: str, include_bijdragezaak: bool = False, exclude_zaak_creation=False
 ) -> List[ProcessInstance]:
-    process_instances = get_process_instances(
+    loader = ProcessTreeLoader()
+    process_instances = loader.get_process_instances(
         zaak_url, include_bijdragezaak=include_bijdragezaak
     )
     # add definitions add user tasks
-    definition_ids = [p.definition_id for p in process_instances.values()]
-    definitions = {
-        definition.id: definition
-        for definition in get_process_definitions(definition_ids)
-    }
-    process_instances_without_task = []
-    for id, process_instance in process_instances.items():
-        process_instance.definition = definitions[process_instance.definition_id]
-        if not process_instance.tasks:
-            process_instances_without_task.append(process_instance)
-
-    with parallel() as executor:
-        results = executor.map(get_process_tasks, process_instances_without_task)
-
-    tasks = {str(_tasks[0].process_instance_id): _tasks for _tasks in results if _tasks}
-    for id, process_instance in process_instances.items():
-        if not process_instance.tasks:
-            process_instance.tasks = tasks.get(str(process_instance.id), [])
+    loader.add_definitions(process_instances)
+    loader.add_tasks(process_instances)
+    logger.debug(
+        "Loaded %d process instances for %s with %d Camunda calls",
+        len(process_instances),
+        zaak_url,
+        loader.calls,
+    )
 
     # get messages only for top level processes
     top_level_processes = [
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from django.test import SimpleTestCase, TestCase
+
+import requests_mock
+from defusedxml import ElementTree as ET
+from django_camunda.models import CamundaConfig
+
+from zac.core.tests.utils import ClearCachesMixin
+
+from ..bpmn import (
+    FormField,
+    UserTaskDefinition,
+    compile_metadata,
+    get_process_definition_metadata,
+)
+from ..messages import get_messages
+from .files.harvo_behandelen import HARVO_BEHANDELEN_BPMN
+
+FILES_DIR = Path(__file__).parent / "files"
+CAMUNDA_ROOT = "https://camunda.example.com/"
+CAMUNDA_API_PATH = "engine-rest/"
+CAMUNDA_URL = f"{CAMUNDA_ROOT}{CAMUNDA_API_PATH}"
+
+
+class CompileMetadataTests(SimpleTestCase):
+    def test_user_task_forms(self):
+        with open(FILES_DIR / "dynamic-form.bpmn", "r") as bpmn:
+            tree = ET.fromstring(bpmn.read())
+
+        metadata = compile_metadata(tree)
+
+        user_task = metadata.get_user_task("aTaskDefinitionKey")
+        self.assertEqual(
+            user_task.form_fields[0],
+            FormField(
+                id="stringField",
+                type="string",
+                label="Some label",
+                default="aDefaultValue",
+            ),
+        )
+        self.assertEqual(user_task.form_fields[1].label, "intField")
+        enum_field = next(
+            field for field in user_task.form_fields if field.type == "enum"
+        )
+        self.assertEqual(enum_field.choices, [("first", "First"), ("second", "second")])
+
+    def test_unknown_user_task(self):
+        with open(FILES_DIR / "no-form.bpmn", "r") as bpmn:
+            tree = ET.fromstring(bpmn.read())
+
+        metadata = compile_metadata(tree)
+
+        self.assertEqual(metadata.get_user_task("unknown"), UserTaskDefinition())
+
+    def test_messages(self):
+        metadata = compile_metadata(ET.fromstring(HARVO_BEHANDELEN_BPMN))
+
+        self.assertIn("Annuleer behandeling", metadata.messages)
+        self.assertIn("Advies vragen", metadata.messages)
+
+
+@requests_mock.Mocker()
+class ProcessDefinitionMetadataTests(ClearCachesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        config = CamundaConfig.get_solo()
+        config.root_url = CAMUNDA_ROOT
+        config.rest_api_path = CAMUNDA_API_PATH
+        config.save()
+
+    def test_compiled_once_per_definition(self, m):
+        m.get(
+            f"{CAMUNDA_URL}process-definition/HARVO_behandelen:61/xml",
+            json={"bpmn20_xml": HARVO_BEHANDELEN_BPMN},
+        )
+
+        metadata = get_process_definition_metadata("HARVO_behandelen:61")
+        messages = get_messages("HARVO_behandelen:61")
+
+        self.assertEqual(messages, metadata.messages)
+        self.assertEqual(m.call_count, 1)
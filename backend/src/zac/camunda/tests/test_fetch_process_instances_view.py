@@ -14,6 +14,7 @@ from zgw_consumers.models import Service
 from zgw_consumers.test import generate_oas_component, mock_service_oas_get
 
 from zac.accounts.tests.factories import GroupFactory, SuperUserFactory, UserFactory
+from zac.camunda.processes import ProcessTreeLoader
 from zac.tests.utils import mock_resource_get
 
 ZAKEN_ROOT = "https://some.zrc.nl/api/v1/"
@@ -65,27 +66,30 @@ class ProcessInstanceTests(APITransactionTestCase):
         process_instance_data = [
             {
                 "id": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[0]["id"],
+                "processDefinitionId": process_definition_data[0]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": None,
             },
             {
                 "id": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[1]["id"],
+                "processDefinitionId": process_definition_data[1]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
             },
             {
                 "id": "010fe90d-c122-11ea-a817-b6551116eb32",
-                "definitionId": process_definition_data[2]["id"],
+                "processDefinitionId": process_definition_data[2]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
             },
         ]
         task_data = [
@@ -128,7 +132,7 @@ class ProcessInstanceTests(APITransactionTestCase):
                     "parent_task_id": None,
                     "priority": 50,
                     "process_definition_id": "accorderen:8:c76c8200-c766-11ea-86dc-e22fafe5f404",
-                    "process_instance_id": "905abd5f-d26f-11ea-86dc-e22fafe5f404",
+                    "process_instance_id": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
                     "task_definition_key": "Activity_0iwp63d",
                     "case_execution_id": None,
                     "case_instance_id": None,
@@ -151,7 +155,7 @@ class ProcessInstanceTests(APITransactionTestCase):
                     "parent_task_id": None,
                     "priority": 50,
                     "process_definition_id": "accorderen:8:c76c8200-c766-11ea-86dc-e22fafe5f403",
-                    "process_instance_id": "905abd5f-d26f-11ea-86dc-e22fafe5f403",
+                    "process_instance_id": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
                     "task_definition_key": "Activity_0iwp63g",
                     "case_execution_id": None,
                     "case_instance_id": None,
@@ -163,23 +167,21 @@ class ProcessInstanceTests(APITransactionTestCase):
             ],
             [],
         ]
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[process_instance_data[0]],
+        # the process instances of the zaak, then one level of sub processes each
+        m_request.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            [
+                {"json": [process_instance_data[0]]},
+                {"json": [process_instance_data[1]]},
+                {"json": [process_instance_data[2]]},
+                {"json": []},
+            ],
         )
         m_request.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={','.join([d['id'] for d in process_definition_data])}",
             json=process_definition_data,
         )
-        for i, process in enumerate(process_instance_data):
-            m_request.get(
-                f"{CAMUNDA_URL}process-instance?superProcessInstance={process['id']}",
-                json=[process_instance_data[i + 1]] if i < 2 else [],
-            )
-            m_request.get(
-                f"{CAMUNDA_URL}task?processInstanceId={process['id']}",
-                json=task_data[i],
-            )
+        m_request.post(f"{CAMUNDA_URL}task", json=task_data[1])
 
         url = reverse("fetch-process-instances")
         response = self.client.get(
@@ -191,14 +193,14 @@ class ProcessInstanceTests(APITransactionTestCase):
         expected_data = [
             {
                 "id": process_instance_data[0]["id"],
-                "definitionId": process_instance_data[0]["definitionId"],
+                "definitionId": process_instance_data[0]["processDefinitionId"],
                 "title": process_definition_data[0]["key"],
                 "messages": ["Annuleer behandeling", "Advies vragen"],
                 "tasks": [],
                 "subProcesses": [
                     {
                         "id": process_instance_data[1]["id"],
-                        "definitionId": process_instance_data[1]["definitionId"],
+                        "definitionId": process_instance_data[1]["processDefinitionId"],
                         "title": process_definition_data[1]["key"],
                         "messages": [],
                         "tasks": [
@@ -250,7 +252,7 @@ class ProcessInstanceTests(APITransactionTestCase):
                             {
                                 "id": process_instance_data[2]["id"],
                                 "definitionId": process_instance_data[2][
-                                    "definitionId"
+                                    "processDefinitionId"
                                 ],
                                 "title": process_definition_data[2]["key"],
                                 "messages": [],
@@ -265,6 +267,36 @@ class ProcessInstanceTests(APITransactionTestCase):
 
         self.assertEqual(data, expected_data)
 
+        process_instance_queries = [
+            request.json()
+            for request in m_request.request_history
+            if request.path.endswith("history/process-instance")
+        ]
+        self.assertEqual(
+            process_instance_queries[1],
+            {
+                "orQueries": [
+                    {"superProcessInstanceId": process_instance_data[0]["id"]}
+                ],
+                "unfinished": True,
+            },
+        )
+        task_query = [
+            request.json()
+            for request in m_request.request_history
+            if request.path.endswith("engine-rest/task")
+        ]
+        self.assertEqual(
+            task_query,
+            [
+                {
+                    "processInstanceIdIn": [
+                        process["id"] for process in process_instance_data
+                    ]
+                }
+            ],
+        )
+
     def test_fetch_process_instances_exclude_bijdragezaak(
         self, m_messages, m_task_from, m_request
     ):
@@ -290,27 +322,30 @@ class ProcessInstanceTests(APITransactionTestCase):
         process_instance_data = [
             {
                 "id": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[0]["id"],
+                "processDefinitionId": process_definition_data[0]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": None,
             },
             {
                 "id": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[1]["id"],
+                "processDefinitionId": process_definition_data[1]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
             },
             {
                 "id": "010fe90d-c122-11ea-a817-b6551116eb32",
-                "definitionId": process_definition_data[2]["id"],
+                "processDefinitionId": process_definition_data[2]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
             },
         ]
         task_data = [
@@ -342,30 +377,19 @@ class ProcessInstanceTests(APITransactionTestCase):
             ],
             [],
         ]
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[process_instance_data[0]],
+        m_request.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            [
+                {"json": [process_instance_data[0]]},
+                {"json": [process_instance_data[1]]},
+                {"json": []},
+            ],
         )
         m_request.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn=Aanvraag_behandelen:8:c76c8200-c766-11ea-86dc-e22fafe5f405,accorderen:8:c76c8200-c766-11ea-86dc-e22fafe5f405",
             json=process_definition_data[0:2],
         )
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={process_instance_data[0]['id']}&variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[process_instance_data[1]],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={process_instance_data[1]['id']}&variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}task?processInstanceId={process_instance_data[0]['id']}",
-            json=task_data[0],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}task?processInstanceId={process_instance_data[1]['id']}",
-            json=task_data[1],
-        )
+        m_request.post(f"{CAMUNDA_URL}task", json=task_data[1])
 
         url = reverse("fetch-process-instances")
         response = self.client.get(
@@ -495,61 +519,41 @@ class ProcessInstanceTests(APITransactionTestCase):
         process_instance_data = [
             {
                 "id": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[0]["id"],
+                "processDefinitionId": process_definition_data[0]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": None,
             },
             {
                 "id": "905abd5f-d26f-11ea-86dc-e22fafe5f405",
-                "definitionId": process_definition_data[1]["id"],
+                "processDefinitionId": process_definition_data[1]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": None,
             },
             {
                 "id": "010fe90d-c122-11ea-a817-b6551116eb32",
-                "definitionId": process_definition_data[2]["id"],
+                "processDefinitionId": process_definition_data[2]["id"],
                 "businessKey": "",
                 "caseInstanceId": "",
-                "suspended": False,
+                "state": "ACTIVE",
                 "tenantId": "",
+                "superProcessInstanceId": None,
             },
         ]
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=process_instance_data,
+        m_request.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            [{"json": process_instance_data}, {"json": []}],
         )
         m_request.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn=some-zaak-creation-process%3A8%3Ac76c8200-c766-11ea-86dc-e22fafe5f405%2Caccorderen%3A8%3Ac76c8200-c766-11ea-86dc-e22fafe5f405%2CBezwaar_indienen%3A8%3Ac76c8200-c766-11ea-86dc-e22fafe5f405",
             json=process_definition_data,
         )
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={process_instance_data[0]['id']}&variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={process_instance_data[1]['id']}&variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={process_instance_data[2]['id']}&variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}task?processInstanceId={process_instance_data[0]['id']}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}task?processInstanceId={process_instance_data[1]['id']}",
-            json=[],
-        )
-        m_request.get(
-            f"{CAMUNDA_URL}task?processInstanceId={process_instance_data[2]['id']}",
-            json=[],
-        )
+        m_request.post(f"{CAMUNDA_URL}task", json=[])
 
         url = reverse("fetch-process-instances")
         response = self.client.get(
@@ -579,3 +583,84 @@ class ProcessInstanceTests(APITransactionTestCase):
                 },
             ],
         )
+
+
+@requests_mock.Mocker()
+class ProcessTreeLoaderTests(APITransactionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        config = CamundaConfig.get_solo()
+        config.root_url = CAMUNDA_ROOT
+        config.rest_api_path = CAMUNDA_API_PATH
+        config.save()
+
+    def test_load_parallel_sub_processes(self, m_request):
+        def _process_instance(id: str, parent: str = None) -> dict:
+            return {
+                "id": id,
+                "processDefinitionId": "accorderen:8:c76c8200",
+                "state": "ACTIVE",
+                "superProcessInstanceId": parent,
+            }
+
+        nested_id = "4ed2e4d4-d270-11ea-86dc-e22fafe5f405"
+        m_request.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            [
+                {"json": [_process_instance("main")]},
+                {
+                    "json": [
+                        _process_instance(f"bijdragezaak-{i}", parent="main")
+                        for i in range(5)
+                    ]
+                },
+                {"json": [_process_instance(nested_id, parent="bijdragezaak-3")]},
+                {"json": []},
+            ],
+        )
+        m_request.post(
+            f"{CAMUNDA_URL}task",
+            json=[
+                {
+                    "id": "a0555196-d26f-11ea-86dc-e22fafe5f405",
+                    "name": "Accorderen",
+                    "assignee": "",
+                    "created": "2020-07-30T14:19:06.000+0000",
+                    "due": None,
+                    "followUp": None,
+                    "delegationState": None,
+                    "description": None,
+                    "executionId": "a055518b-d26f-11ea-86dc-e22fafe5f405",
+                    "owner": None,
+                    "parentTaskId": None,
+                    "priority": 50,
+                    "processDefinitionId": "accorderen:8:c76c8200",
+                    "processInstanceId": nested_id,
+                    "taskDefinitionKey": "Activity_0iwp63s",
+                    "caseExecutionId": None,
+                    "caseInstanceId": None,
+                    "caseDefinitionId": None,
+                    "suspended": False,
+                    "formKey": "zac:doRedirect",
+                    "tenantId": None,
+                }
+            ],
+        )
+
+        loader = ProcessTreeLoader()
+        process_instances = loader.get_process_instances(
+            ZAAK_URL, include_bijdragezaak=True
+        )
+        loader.add_tasks(process_instances)
+
+        self.assertEqual(len(process_instances), 7)
+        main = process_instances["main"]
+        self.assertIsNone(main.parent_process)
+        self.assertEqual(len(main.sub_processes), 5)
+        nested = process_instances[nested_id]
+        self.assertEqual(nested.parent_process.id, "bijdragezaak-3")
+        self.assertEqual(len(nested.tasks), 1)
+        # one query per level and one for the tasks, regardless of the number of
+        # process instances
+        self.assertEqual(loader.calls, 5)
+        self.assertEqual(m_request.call_count, 5)
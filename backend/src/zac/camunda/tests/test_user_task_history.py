@@ -8,7 +8,6 @@ from django_camunda.utils import underscoreize
 from furl import furl
 from requests.exceptions import HTTPError
 from rest_framework.test import APITestCase, APITransactionTestCase
-from zgw_consumers.api_models.base import factory
 from zgw_consumers.api_models.constants import VertrouwelijkheidsAanduidingen
 
 from zac.accounts.tests.factories import (
@@ -20,10 +19,11 @@ from zac.accounts.tests.factories import (
 from zac.camunda.data import Task
 from zac.camunda.user_tasks.history import (
     get_completed_user_tasks_for_zaak,
-    get_historic_activity_variables_from_task,
     get_task_history,
+    get_variable_updates,
 )
 from zac.core.permissions import zaken_inzien
+from zac.core.tests.utils import ClearCachesMixin
 
 from .files.harvo_behandelen import HARVO_BEHANDELEN_BPMN
 
@@ -67,6 +67,14 @@ COMPLETED_TASK_DATA = {
 }
 
 
+def get_process_instances_response(request, context):
+    # a single historic process instance for the zaak, without sub processes
+    query = request.json()
+    if "unfinished" in query or "orQueries" in query:
+        return []
+    return [{"id": COMPLETED_TASK_DATA["processInstanceId"]}]
+
+
 @requests_mock.Mocker()
 class UserTaskHistoryTests(APITransactionTestCase):
     def setUp(self) -> None:
@@ -108,25 +116,14 @@ class UserTaskHistoryTests(APITransactionTestCase):
         self.assertEqual(exc.exception.response.status_code, 500)
 
     def test_success_get_completed_user_tasks_for_zaak(self, m):
-        # Mock historic process instances
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?variables=zaakUrl_eq_https%3A%2F%2Fsome.zrc.nl%2Fapi%2Fv1%2Fzaken%2Fa955573e-ce3f-4cf3-8ae0-87853d61f47a",
-            json=[{"id": COMPLETED_TASK_DATA["processInstanceId"]}],
-        )
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?superProcessInstanceId={COMPLETED_TASK_DATA['processInstanceId']}",
-            json=[],
-        )
-        # Mock current process instances
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_https%3A%2F%2Fsome.zrc.nl%2Fapi%2Fv1%2Fzaken%2Fa955573e-ce3f-4cf3-8ae0-87853d61f47a",
-            json=[],
+        # Mock historic and current process instances
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         # Mock completed tasks from historic process instances
-        m.get(
-            f"{CAMUNDA_URL}history/task?processInstanceId={COMPLETED_TASK_DATA['processInstanceId']}&finished=true",
-            json=[COMPLETED_TASK_DATA],
-        )
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA])
+        m.post(f"{CAMUNDA_URL}history/detail", json=[])
         tasks = get_completed_user_tasks_for_zaak(ZAAK_URL)
         self.assertEqual(
             str(list(tasks.keys())[0]), "1790e564-8b57-11ec-baad-6ed7f836cf1f"
@@ -135,11 +132,9 @@ class UserTaskHistoryTests(APITransactionTestCase):
             isinstance(list(tasks.values())[0], Task),
         )
 
-    def test_success_get_historic_activity_variables_from_task(self, m):
-        # Mock historic activity details
-        m.get(
-            f"{CAMUNDA_URL}history/detail?activityInstanceId={COMPLETED_TASK_DATA['activityInstanceId']}&deserializeValues=False",
-            json=[
+    def test_get_variable_updates(self, m):
+        details = underscoreize(
+            [
                 {
                     "type": "variableUpdate",
                     "id": "1e653f89-8b57-11ec-baad-6ed7f836cf1f",
@@ -166,28 +161,14 @@ class UserTaskHistoryTests(APITransactionTestCase):
                     "revision": 0,
                     "errorMessage": None,
                 }
-            ],
-        )
-        historic_activity_details = get_historic_activity_variables_from_task(
-            factory(
-                Task,
-                underscoreize(
-                    {
-                        **COMPLETED_TASK_DATA,
-                        "created": COMPLETED_TASK_DATA["startTime"],
-                        "delegationState": None,
-                        "suspended": True,
-                        "formKey": None,
-                    }
-                ),
-            )
-        )
-        self.assertEqual(len(historic_activity_details), 1)
-        self.assertEqual(
-            historic_activity_details[0]["variable_name"],
-            "checkIntegriteit",
+            ]
         )
-        self.assertEqual(historic_activity_details[0]["value"], "Ja")
+
+        variable_updates = get_variable_updates(details)
+
+        self.assertEqual(len(variable_updates), 1)
+        self.assertEqual(variable_updates[0]["variable_name"], "checkIntegriteit")
+        self.assertEqual(variable_updates[0]["value"], "Ja")
 
     def test_fail_get_user_task_history_missing_query_parameter(self, m):
         self.client.force_authenticate(self.user)
@@ -198,24 +179,12 @@ class UserTaskHistoryTests(APITransactionTestCase):
 
     def test_success_get_user_task_history(self, m):
         # Mocks for get_completed_user_tasks_for_zaak
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[{"id": COMPLETED_TASK_DATA["processInstanceId"]}],
-        )
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?superProcessInstanceId={COMPLETED_TASK_DATA['processInstanceId']}",
-            json=[],
-        )
-        # Mock current process instances
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         # Mock completed tasks from historic process instances
-        m.get(
-            f"{CAMUNDA_URL}history/task?processInstanceId={COMPLETED_TASK_DATA['processInstanceId']}&finished=true",
-            json=[COMPLETED_TASK_DATA],
-        )
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA])
 
         # Mock for extract_task_form_key
         m.get(
@@ -223,9 +192,9 @@ class UserTaskHistoryTests(APITransactionTestCase):
             json={"bpmn20_xml": HARVO_BEHANDELEN_BPMN},
         )
 
-        # Mock historic activity details
-        m.get(
-            f"{CAMUNDA_URL}history/detail?activityInstanceId={COMPLETED_TASK_DATA['activityInstanceId']}&deserializeValues=False",
+        # Mock historic variable updates of the process instances
+        m.post(
+            f"{CAMUNDA_URL}history/detail",
             json=[
                 {
                     "type": "variableUpdate",
@@ -282,23 +251,14 @@ class UserTaskHistoryTests(APITransactionTestCase):
 
     def test_success_get_user_task_history_if_group(self, m):
         # Mocks for get_completed_user_tasks_for_zaak
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[{"id": COMPLETED_TASK_DATA["processInstanceId"]}],
-        )
-        m.get(
-            f"{CAMUNDA_URL}history/process-instance?superProcessInstanceId={COMPLETED_TASK_DATA['processInstanceId']}",
-            json=[],
-        )
-        # Mock current process instances
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{ZAAK_URL}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         # Mock completed tasks from historic process instances
         group = GroupFactory.create(name="some-group")
-        m.get(
-            f"{CAMUNDA_URL}history/task?processInstanceId={COMPLETED_TASK_DATA['processInstanceId']}&finished=true",
+        m.post(
+            f"{CAMUNDA_URL}history/task",
             json=[{**COMPLETED_TASK_DATA, "assignee": f"group:{group.name}"}],
         )
 
@@ -308,9 +268,9 @@ class UserTaskHistoryTests(APITransactionTestCase):
             json={"bpmn20_xml": HARVO_BEHANDELEN_BPMN},
         )
 
-        # Mock historic activity details
-        m.get(
-            f"{CAMUNDA_URL}history/detail?activityInstanceId={COMPLETED_TASK_DATA['activityInstanceId']}&deserializeValues=False",
+        # Mock historic variable updates of the process instances
+        m.post(
+            f"{CAMUNDA_URL}history/detail",
             json=[
                 {
                     "type": "variableUpdate",
@@ -366,6 +326,93 @@ class UserTaskHistoryTests(APITransactionTestCase):
         )
 
 
+@requests_mock.Mocker()
+class ProcessInstanceHistoryTests(ClearCachesMixin, APITestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        config = CamundaConfig.get_solo()
+        config.root_url = CAMUNDA_ROOT
+        config.rest_api_path = CAMUNDA_API_PATH
+        config.save()
+
+    def _mock_process_instances(self, m, **extra):
+        def process_instances_response(request, context):
+            if "orQueries" in request.json():
+                return []
+            return [{"id": COMPLETED_TASK_DATA["processInstanceId"], **extra}]
+
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=process_instances_response,
+        )
+
+    def test_history_fetched_in_bulk(self, m):
+        self._mock_process_instances(m)
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA])
+        m.post(f"{CAMUNDA_URL}history/detail", json=[])
+
+        get_completed_user_tasks_for_zaak(ZAAK_URL)
+
+        task_query = next(
+            request for request in m.request_history if request.path.endswith("task")
+        )
+        self.assertEqual(
+            task_query.json(),
+            {
+                "finished": True,
+                "orQueries": [
+                    {"processInstanceId": COMPLETED_TASK_DATA["processInstanceId"]}
+                ],
+            },
+        )
+
+    def test_history_of_other_process_instances_ignored(self, m):
+        self._mock_process_instances(m)
+        other_task = {
+            **COMPLETED_TASK_DATA,
+            "id": "5c6e8ca1-8b57-11ec-baad-6ed7f836cf1f",
+            "processInstanceId": "4a1f9b0e-8b57-11ec-baad-6ed7f836cf1f",
+        }
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA, other_task])
+        m.post(
+            f"{CAMUNDA_URL}history/detail",
+            json=[{"processInstanceId": other_task["processInstanceId"]}],
+        )
+
+        tasks = get_completed_user_tasks_for_zaak(ZAAK_URL)
+
+        self.assertEqual(
+            [str(task_id) for task_id in tasks], [COMPLETED_TASK_DATA["id"]]
+        )
+
+    def test_history_of_finished_process_instance_cached(self, m):
+        self._mock_process_instances(m, endTime="2022-02-11T16:30:00.000+0000")
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA])
+        m.post(f"{CAMUNDA_URL}history/detail", json=[])
+
+        get_completed_user_tasks_for_zaak(ZAAK_URL)
+        tasks = get_completed_user_tasks_for_zaak(ZAAK_URL)
+
+        self.assertEqual(len(tasks), 1)
+        task_queries = [
+            request for request in m.request_history if request.path.endswith("task")
+        ]
+        self.assertEqual(len(task_queries), 1)
+
+    def test_history_of_ongoing_process_instance_not_cached(self, m):
+        self._mock_process_instances(m, endTime=None)
+        m.post(f"{CAMUNDA_URL}history/task", json=[COMPLETED_TASK_DATA])
+        m.post(f"{CAMUNDA_URL}history/detail", json=[])
+
+        get_completed_user_tasks_for_zaak(ZAAK_URL)
+        get_completed_user_tasks_for_zaak(ZAAK_URL)
+
+        task_queries = [
+            request for request in m.request_history if request.path.endswith("task")
+        ]
+        self.assertEqual(len(task_queries), 2)
+
+
 @requests_mock.Mocker()
 class UserTaskHistoryPermissionTests(APITestCase):
     def test_no_user_logged_in(self, m):
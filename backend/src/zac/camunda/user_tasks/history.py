@@ -1,16 +1,21 @@
+from collections import defaultdict
 from typing import Dict, List, Optional
 
+from django.core.cache import caches
+
 from django_camunda.client import Camunda, get_client
 from django_camunda.types import CamundaId
 from django_camunda.utils import deserialize_variable
 from zgw_consumers.api_models.base import factory
-from zgw_consumers.concurrent import parallel
 
 from zac.camunda.api.data import HistoricUserTask
-from zac.camunda.data import Task
-from zac.camunda.dynamic_forms.context import get_field_definition
+from zac.camunda.data import ProcessInstance, Task
 from zac.camunda.forms import extract_task_form_fields, extract_task_form_key
 from zac.camunda.processes import get_process_instances
+from zac.core.camunda.utils import PROCESS_INSTANCE_BATCH_SIZE
+
+# the history of finished process instances does not change
+HISTORY_CACHE_TIMEOUT = 60 * 60 * 24 * 7
 
 
 def get_task_history(
@@ -26,94 +31,117 @@ def get_task_history(
     return tasks
 
 
-def get_completed_user_tasks_for_zaak(
-    zaak_url: str, client: Optional[Camunda] = None
-) -> Dict[CamundaId, Task]:
+def _to_task(task: dict) -> Task:
+    # Abuse for factory purposes
+    return factory(
+        Task,
+        {
+            **task,
+            "created": task["start_time"],
+            "delegation_state": None,
+            "suspended": True,
+            "form_key": None,
+        },
+    )
+
+
+def get_process_instance_history(
+    process_instances: Dict[CamundaId, ProcessInstance],
+    client: Optional[Camunda] = None,
+) -> Dict[CamundaId, dict]:
     """
-    The camunda rest api exposes the historic (i.e., completed) user tasks
-    of completed and ongoing process instances.
+    Get the completed user tasks and the variable updates per process instance.
 
-    We use the historic user tasks data to show who submitted what at
-    which date.
+    Both are fetched for all process instances at once, with one query each per
+    batch of process instances. The history of a finished process instance can't
+    change anymore, so it is cached.
     """
     if not client:
         client = get_client()
 
-    historic_process_instances = get_process_instances(zaak_url, historic=True)
-    active_process_instances = get_process_instances(zaak_url)
-    all_process_instances = {**historic_process_instances, **active_process_instances}
-
-    tasks = {}
-
-    def _get_historic_tasks(pid: CamundaId):
-        nonlocal client, tasks
-        tasks.update(
-            **get_task_history(
-                {"processInstanceId": pid, "finished": "true"}, client=client
-            )
-        )
-
-    with parallel() as executor:
-        list(executor.map(_get_historic_tasks, all_process_instances.keys()))
-
-    # Abuse for factory purposes
-    tasks = [
-        factory(
-            Task,
-            {
-                **task,
-                "created": task["start_time"],
-                "delegation_state": None,
-                "suspended": True,
-                "form_key": None,
+    _cache = caches["default"]
+    cache_keys = {
+        f"camunda-history:{pid}": pid
+        for pid, process_instance in process_instances.items()
+        if process_instance.ended
+    }
+    history = {
+        cache_keys[key]: cached
+        for key, cached in _cache.get_many(list(cache_keys)).items()
+    }
+
+    missing = [pid for pid in process_instances if pid not in history]
+    fetched = {pid: {"tasks": [], "details": []} for pid in missing}
+    for start in range(0, len(missing), PROCESS_INSTANCE_BATCH_SIZE):
+        batch = missing[start : start + PROCESS_INSTANCE_BATCH_SIZE]
+        # the historic task query can't filter on a list of process instances
+        tasks = client.post(
+            "history/task",
+            json={
+                "finished": True,
+                "orQueries": [{"processInstanceId": pid} for pid in batch],
             },
         )
-        for task in tasks.values()
-    ]
-    return {task.id: task for task in tasks}
-
-
-def get_historic_activity_details(
-    activity_instance_id: str, client: Optional[Camunda] = None
-) -> List[dict]:
-    if not client:
-        client = get_client()
-
-    historic_activity_details = client.get(
-        "history/detail",
-        {"activityInstanceId": activity_instance_id, "deserializeValues": False},
+        for task in tasks:
+            if task["process_instance_id"] in fetched:
+                fetched[task["process_instance_id"]]["tasks"].append(task)
+
+        details = client.post(
+            "history/detail",
+            params={"deserializeValues": "false"},
+            json={"processInstanceIdIn": batch, "variableUpdates": True},
+        )
+        for detail in details:
+            if detail["process_instance_id"] in fetched:
+                fetched[detail["process_instance_id"]]["details"].append(detail)
+
+    _cache.set_many(
+        {
+            f"camunda-history:{pid}": fetched[pid]
+            for pid in missing
+            if process_instances[pid].ended
+        },
+        timeout=HISTORY_CACHE_TIMEOUT,
     )
-    return historic_activity_details
+    history.update(fetched)
+    return history
 
 
-def get_historic_activity_variables_from_task(
-    task: Task, client: Optional[Camunda] = None
-) -> List[dict]:
+def get_completed_user_tasks_for_zaak(
+    zaak_url: str, client: Optional[Camunda] = None
+) -> Dict[CamundaId, Task]:
     """
-    The camunda rest api exposes the historic details of a process.
+    The camunda rest api exposes the historic (i.e., completed) user tasks
+    of completed and ongoing process instances.
 
-    We use the historic details to match variable instances
-    to a particular activity instance. The activity instance
-    is then related to the user task that has the same activity
-    instance.
+    We use the historic user tasks data to show who submitted what at
+    which date.
     """
-    if not client:
-        client = get_client()
+    # the historic process instances include the ongoing ones
+    process_instances = get_process_instances(zaak_url, historic=True)
+    history = get_process_instance_history(process_instances, client=client)
+    tasks = [
+        _to_task(task)
+        for process_instance_history in history.values()
+        for task in process_instance_history["tasks"]
+    ]
+    return {task.id: task for task in tasks}
 
-    historic_activity_details = get_historic_activity_details(
-        task.activity_instance_id, client=client
-    )
+
+def get_variable_updates(historic_activity_details: List[dict]) -> List[dict]:
     # If variable_name is not none, the information for now is deemed irrelevant.
-    historic_activity_details = [
-        detail for detail in historic_activity_details if detail.get("variable_name")
+    variable_updates = [
+        {**detail}
+        for detail in historic_activity_details
+        if detail.get("variable_name")
     ]
 
-    for detail in historic_activity_details:
+    for detail in variable_updates:
         # func deserialize_variable requires the `type` key - not `variable_type`.
         detail["type"] = detail["variable_type"]
         detail["value"] = deserialize_variable(detail)
 
-    return sorted(historic_activity_details, key=lambda obj: obj["variable_name"])
+    return sorted(variable_updates, key=lambda obj: obj["variable_name"])
 
 
 def get_historic_form_labels_from_task(task: Task) -> Dict[str, str]:
@@ -125,72 +153,46 @@ def get_historic_form_labels_from_task(task: Task) -> Dict[str, str]:
     """
 
     formfields = extract_task_form_fields(task) or []
-    form_fields = [get_field_definition(field) for field in formfields]
-
-    # Aggregate variable values
-    form_variables = {}
-    for form_field in form_fields:
-        form_variables[form_field["name"]] = form_field["label"]
-
-    return form_variables
+    return {field.id: field.label for field in formfields}
 
 
 def get_camunda_history_for_zaak(
     zaak_url: str,
 ) -> List[HistoricUserTask]:
     """
-    The completed camunda user tasks are fetched here and returned in reverse order based
-    on creation date.
+    The completed camunda user tasks are fetched here.
 
-    First the completed user tasks for a zaak_url are fetched from the camunda rest api
-    based on the (historical) process instances that have the zaak_url as a process variable.
+    First the (historical) process instances that have the zaak_url as a process
+    variable are fetched from the camunda rest api. The completed user tasks and the
+    variable updates of all these process instances are then fetched in bulk, and
+    joined on the activity instance of the task.
 
-    Based on the task activity instance, the historical variable instances are then fetched.
-    Finally, the variable instance is enriched with form labels in case the user task has a
-    camunda user form. The form key of the user task is not returned from the camunda rest
-    api and so it needs to be fetched separately from the BPMN file.
+    Finally, the variable updates are enriched with form labels in case the user task
+    has a camunda user form. The form key of the user task is not returned from the
+    camunda rest api and so it needs to be taken from the BPMN definition.
     """
-    tasks = get_completed_user_tasks_for_zaak(zaak_url)
-
-    def _extract_task_form_key(task: Task):
-        nonlocal tasks
-        tasks[task.id].form_key = extract_task_form_key(task)
-
-    # Get task form_keys
-    with parallel() as executor:
-        list(
-            executor.map(
-                _extract_task_form_key,
-                [task for task in tasks.values()],
+    process_instances = get_process_instances(zaak_url, historic=True)
+    history = get_process_instance_history(process_instances)
+
+    details_by_activity = defaultdict(list)
+    for process_instance_history in history.values():
+        for detail in process_instance_history["details"]:
+            details_by_activity[detail["activity_instance_id"]].append(detail)
+
+    user_task_history = []
+    for process_instance_history in history.values():
+        for task_data in process_instance_history["tasks"]:
+            task = _to_task(task_data)
+            task.form_key = extract_task_form_key(task)
+
+            variables = get_variable_updates(
+                details_by_activity[task_data["activity_instance_id"]]
             )
-        )
+            form_labels = get_historic_form_labels_from_task(task)
+            for var in variables:
+                if form_label := form_labels.get(var["variable_name"]):
+                    var["label"] = form_label
+
+            user_task_history.append({"task": task, "history": variables})
 
-    # Declare zaak_history for non-local use in _get_historic_activity_variables_from_task
-    user_task_history = {}
-    client = get_client()
-
-    # Get all variables that are set in activity instance of task
-    def _get_historic_activity_variables_from_task(task: Task):
-        nonlocal client, user_task_history
-        history = get_historic_activity_variables_from_task(task, client=client)
-        user_task_history[task.id] = {
-            "task": task,
-            "history": history,
-        }
-
-    tasks = tasks.values()
-    with parallel() as executor:
-        list(executor.map(_get_historic_activity_variables_from_task, tasks))
-
-    # Add camunda form labels to zaak_history if task has a camunda form
-    def _add_camunda_form_labels_to_user_task_history(task: Task):
-        nonlocal user_task_history
-        form_labels = get_historic_form_labels_from_task(task)
-        for var in user_task_history[task.id]["history"]:
-            if form_label := form_labels.get(var["variable_name"]):
-                var["label"] = form_label
-
-    with parallel() as executor:
-        list(executor.map(_add_camunda_form_labels_to_user_task_history, tasks))
-
-    return factory(HistoricUserTask, [h for h in user_task_history.values()])
+    return factory(HistoricUserTask, user_task_history)
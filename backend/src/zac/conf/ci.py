@@ -21,6 +21,16 @@ CACHES = {
     },
 }
 
+# the process-local caches are not cleared between tests
+LOCAL_CACHE_TIMEOUT = 0
+SERVICE_RESOLVER_TIMEOUT = 0
+# test data is rolled back without invalidating the permission snapshots
+PERMISSION_SNAPSHOT_TIMEOUT = 0
+ASSIGNEE_CACHE_TIMEOUT = 0
+
+# handle notifications inline, the queue itself is tested explicitly
+NOTIFICATIONS_QUEUE_ENABLED = False
+
 LOGGING = None  # Quiet is nice
 logging.disable(logging.CRITICAL)
 
@@ -110,6 +110,7 @@ if "test" in sys.argv:
     ES_INDEX_ZAKEN = "zaken_test"
     ES_INDEX_DOCUMENTEN = "documenten_test"
     ES_INDEX_OBJECTEN = "objecten_test"
+    ES_INDEX_PERMISSIONS = "permissions_test"
 
 
 # Override settings with local settings.
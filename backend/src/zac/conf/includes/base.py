@@ -176,6 +176,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "zac.accounts.middleware.HijackMiddleware",
     "zac.utils.middleware.ReleaseHeaderMiddleware",
+    "zac.utils.middleware.MemoizationMiddleware",
 ]
 
 ROOT_URLCONF = "zac.urls"
@@ -561,10 +562,73 @@ ELASTICSEARCH_DSL = {
 ES_INDEX_ZAKEN = "zaken"
 ES_INDEX_DOCUMENTEN = "documenten"
 ES_INDEX_OBJECTEN = "objecten"
+# the atomic permissions of the users, see zac.elasticsearch.permission_index
+ES_INDEX_PERMISSIONS = "permissions"
 # USED FOR INDEXING EDGE NGRAM ANALYZER
 MAX_GRAM = config("MAX_GRAM", 16)
 MIN_GRAM = config("MIN_GRAM", 3)
 
+# NOTIFICATIONS
+# Incoming notifications are persisted and handled by the ``process_notifications``
+# worker. Disable the queue to handle them inline in the callback request.
+NOTIFICATIONS_QUEUE_ENABLED = config("NOTIFICATIONS_QUEUE_ENABLED", default=True)
+NOTIFICATIONS_QUEUE_CONCURRENCY = config("NOTIFICATIONS_QUEUE_CONCURRENCY", default=4)
+NOTIFICATIONS_QUEUE_MAX_ATTEMPTS = config("NOTIFICATIONS_QUEUE_MAX_ATTEMPTS", default=5)
+# seconds, doubled for every next attempt
+NOTIFICATIONS_QUEUE_RETRY_BACKOFF = config(
+    "NOTIFICATIONS_QUEUE_RETRY_BACKOFF", default=30
+)
+# seconds to wait for more notifications about the same object, which are then
+# handled together
+NOTIFICATIONS_QUEUE_COALESCE_WINDOW = config(
+    "NOTIFICATIONS_QUEUE_COALESCE_WINDOW", default=2
+)
+# maximum seconds a burst of notifications about the same object is held back,
+# counted from the oldest notification
+NOTIFICATIONS_QUEUE_COALESCE_MAX_DELAY = config(
+    "NOTIFICATIONS_QUEUE_COALESCE_MAX_DELAY", default=10
+)
+# seconds after which a notification claimed by a worker is considered abandoned
+NOTIFICATIONS_QUEUE_PROCESSING_TIMEOUT = config(
+    "NOTIFICATIONS_QUEUE_PROCESSING_TIMEOUT", default=15 * 60
+)
+
+# CACHING
+# Process-local cache in front of Redis for catalog data, see zac.utils.local_cache
+LOCAL_CACHE_MAX_ENTRIES = config("LOCAL_CACHE_MAX_ENTRIES", default=2048)
+LOCAL_CACHE_TIMEOUT = config("LOCAL_CACHE_TIMEOUT", default=5 * 60)
+# seconds between flushes of the cache hit/miss counts of a process to Redis
+LOCAL_CACHE_STATS_INTERVAL = config("LOCAL_CACHE_STATS_INTERVAL", default=60)
+# seconds to keep the versions of the cache tags, see zac.utils.cache_tags. Must be
+# at least the longest timeout of a tagged cache entry.
+CACHE_TAG_TIMEOUT = config("CACHE_TAG_TIMEOUT", default=60 * 60 * 24 * 7)
+# seconds after which the configured services and their clients are reloaded, see
+# zac.utils.service_resolver
+SERVICE_RESOLVER_TIMEOUT = config("SERVICE_RESOLVER_TIMEOUT", default=10 * 60)
+# seconds to keep the permission snapshot of a user or application, see
+# zac.accounts.permission_snapshot. Permission changes invalidate them right away.
+PERMISSION_SNAPSHOT_TIMEOUT = config("PERMISSION_SNAPSHOT_TIMEOUT", default=60 * 60)
+# seconds to keep the users and groups of Camunda assignees in process memory, see
+# zac.core.camunda.utils.resolve_assignees
+ASSIGNEE_CACHE_TIMEOUT = config("ASSIGNEE_CACHE_TIMEOUT", default=5 * 60)
+# Detail resources of the ZRC and DRC kept with their ETag for conditional GETs, see
+# zac.utils.revalidation. Seconds to keep them, and the maximum size in bytes of a
+# kept body.
+ETAG_CACHE_TIMEOUT = config("ETAG_CACHE_TIMEOUT", default=60 * 60 * 24)
+ETAG_CACHE_MAX_SIZE = config("ETAG_CACHE_MAX_SIZE", default=64 * 1024)
+
+# OUTBOUND HTTP
+# Connections to the APIs are kept alive and shared by the threads of a process, see
+# zac.utils.http. The pools can be sized per host with entries "<host>=<size>".
+HTTP_POOL_MAXSIZE = config("HTTP_POOL_MAXSIZE", default=10)
+HTTP_POOL_MAXSIZE_PER_HOST = config(
+    "HTTP_POOL_MAXSIZE_PER_HOST", default="", split=True
+)
+# wait for a free connection instead of opening one outside of the pool
+HTTP_POOL_BLOCK = config("HTTP_POOL_BLOCK", default=False)
+# seconds between flushes of the connection pool counts of a process to Redis
+HTTP_POOL_STATS_INTERVAL = config("HTTP_POOL_STATS_INTERVAL", default=60)
+
 # SCIM
 SCIM_SERVICE_PROVIDER = {
     "NETLOC": config(
@@ -4,12 +4,12 @@ from typing import Optional
 
 import requests
 from zds_client import ClientError
-from zds_client.schema import get_operation_url
 from zgw_consumers.api_models.base import factory
 from zgw_consumers.client import ZGWClient
 from zgw_consumers.constants import AuthTypes
 
 from zac.utils.decorators import cache as cache_result
+from zac.utils.oas_index import get_operation_url
 
 from .data import (
     ExtraInformatieIngeschrevenNatuurlijkPersoon,
@@ -112,7 +112,7 @@ def fetch_extrainfo_np(
 ) -> ExtraInformatieIngeschrevenNatuurlijkPersoon:
     """Function that calls:
          get_client(),
-         zds_client.schema.get_operation_url(),
+         zac.utils.oas_index.get_operation_url(),
          call_halclient_retrieve().
 
     Args:
@@ -5,13 +5,13 @@ from django.http import Http404
 from furl import furl
 from rest_framework import status
 from zds_client.client import ClientError
-from zds_client.schema import get_operation_url
 from zgw_consumers.api_models.base import factory
 from zgw_consumers.api_models.documenten import Document
 
 from zac.accounts.models import User
 from zac.client import Client
 from zac.utils.decorators import optional_service
+from zac.utils.oas_index import get_operation_url
 
 from .constants import DocFileTypes
 from .data import DowcResponse
@@ -4,11 +4,11 @@ from django.utils.translation import gettext_lazy as _
 
 from rest_framework import status
 from rest_framework.exceptions import NotFound
-from zds_client.schema import get_operation_url
 from zgw_consumers.api_models.base import factory
 from zgw_consumers.client import ZGWClient
 
 from zac.utils.decorators import cache, optional_service
+from zac.utils.oas_index import get_operation_url
 
 from .bag import A_DAY, LocationServer
 from .data import AddressSearchResponse, Pand, Verblijfsobject
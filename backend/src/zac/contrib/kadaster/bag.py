@@ -1,8 +1,8 @@
 from typing import Any, Dict
 
-import requests
 from zgw_consumers.concurrent import parallel
 
+from zac.utils import http
 from zac.utils.decorators import cache
 
 from .decorators import catch_httperror
@@ -18,13 +18,13 @@ class Bag:
         self.headers = config.service.get_auth_header(self.url)
 
     def retrieve(self, url: str, *args, **kwargs):
-        response = requests.get(url, headers=self.headers, *args, **kwargs)
+        response = http.get(url, headers=self.headers, *args, **kwargs)
         response.raise_for_status()
         return response.json()
 
     def get(self, path: str, *args, **kwargs):
         full_url = f"{self.url}{path}"
-        response = requests.get(full_url, headers=self.headers, *args, **kwargs)
+        response = http.get(full_url, headers=self.headers, *args, **kwargs)
         response.raise_for_status()
         return response.json()
 
@@ -37,7 +37,7 @@ class LocationServer:
     @catch_httperror
     def get(self, path: str, *args, **kwargs):
         full_url = f"{self.url}{path}"
-        response = requests.get(full_url, *args, **kwargs)
+        response = http.get(full_url, *args, **kwargs)
         response.raise_for_status()
         return response.json()
 
@@ -21,7 +21,7 @@ from zac.camunda.user_tasks import Context, register, usertask_context_serialize
 from zac.contrib.dowc.constants import DocFileTypes
 from zac.contrib.dowc.fields import DowcUrlFieldReadOnly
 from zac.core.api.fields import SelectDocumentsField
-from zac.core.camunda.utils import resolve_assignee
+from zac.core.camunda.utils import resolve_assignees
 from zac.core.utils import build_absolute_url
 from zgw.models.zrc import Zaak
 
@@ -354,8 +354,9 @@ def get_camunda_assigned_users(task: Task) -> Dict[str, List]:
         "user_assignees": [],
         "group_assignees": [],
     }
+    assignees = resolve_assignees(camunda_assigned_users)
     for assignee in camunda_assigned_users:
-        assignee = resolve_assignee(assignee)
+        assignee = assignees[assignee]
         if isinstance(assignee, Group):
             assigned_users["group_assignees"].append(assignee)
         else:
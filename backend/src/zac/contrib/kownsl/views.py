@@ -15,7 +15,6 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from zgw_consumers.api_models.base import factory
 from zgw_consumers.concurrent import parallel
-from zgw_consumers.models import Service
 
 from zac.camunda.api.utils import set_assignee_and_complete_task
 from zac.camunda.constants import AssigneeTypeChoices
@@ -25,6 +24,7 @@ from zac.core.api.views import GetZaakMixin
 from zac.core.camunda.utils import resolve_assignee
 from zac.core.services import get_document, get_zaak
 from zac.notifications.views import BaseNotificationCallbackView
+from zac.utils.service_resolver import resolver
 
 from .api import (
     get_client,
@@ -54,7 +54,7 @@ logger = logging.getLogger(__name__)
 
 def _get_review_request_for_notification(data: dict) -> dict:
     resource_url = data["hoofd_object"]
-    client = Service.get_client(resource_url)
+    client = resolver.get_client(resource_url)
     if client is None:
         raise RuntimeError(
             f"Could not build an appropriate client for the URL {resource_url}"
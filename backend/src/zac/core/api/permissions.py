@@ -57,9 +57,9 @@ class CanForceEditClosedZaak(ZaakDefinitionPermission):
         atomic_permission_for_obj_type = self.user_atomic_permissions_exists(
             request, zaken_geforceerd_bijwerken.name
         )
-        blueprint_permission = self.get_blueprint_permissions(
-            request, zaken_geforceerd_bijwerken.name
-        ).exists()
+        blueprint_permission = bool(
+            self.get_blueprint_permissions(request, zaken_geforceerd_bijwerken.name)
+        )
         return (
             atomic_permission_for_obj
             or atomic_permission_for_obj_type
@@ -1,7 +1,6 @@
 from unittest import mock
 from unittest.mock import patch
 
-from django.core.cache import cache
 from django.test import override_settings
 from django.urls import reverse
 
@@ -35,6 +34,7 @@ from zac.core.permissions import (
 from zac.core.tests.utils import ClearCachesMixin
 from zac.elasticsearch.tests.utils import ESMixin
 from zac.tests.utils import mock_resource_get, paginated_response
+from zac.utils.cache_tags import get_tagged
 from zgw.models.zrc import Zaak
 
 CATALOGI_ROOT = "http://catalogus.nl/api/v1/"
@@ -270,6 +270,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -310,6 +311,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -330,6 +332,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         m.post(f"{OBJECTS_ROOT}objects/search", json=[])
         mock_resource_get(m, self.catalogus)
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -344,7 +347,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         cache_find_key = (
             f"zaak:{self.zaak['bronorganisatie']}:{self.zaak['identificatie']}"
         )
-        self.assertIsNotNone(cache.get(cache_find_key))
+        self.assertIsNotNone(get_tagged(cache_find_key, [cache_find_key]))
 
         # patch
         response = self.client.patch(
@@ -358,7 +361,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
         #  cache is cleaned
-        self.assertIsNone(cache.get(cache_find_key))
+        self.assertIsNone(get_tagged(cache_find_key, [cache_find_key]))
 
     @freeze_time("2020-12-26T12:00:00Z")
     def test_change_va_without_reden_invalid(self, m):
@@ -366,6 +369,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -391,6 +395,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -421,6 +426,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -449,6 +455,7 @@ class ZaakDetailResponseTests(ESMixin, ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
 
         mock_resource_get(m, self.zaaktype)
+        mock_resource_get(m, self.zaak)
         m.get(
             f"{ZAKEN_ROOT}zaken?bronorganisatie=123456782&identificatie=ZAAK-2020-0010",
             json=paginated_response([self.zaak]),
@@ -992,6 +999,7 @@ class ZaakDetailPermissionTests(ESMixin, ClearCachesMixin, APITestCase):
         )
         self.client.force_authenticate(user=user)
 
+        mock_resource_get(m, self._zaak)
         m.patch(self.zaak.url, status_code=status.HTTP_200_OK)
         response = self.client.patch(
             self.detail_url,
@@ -1095,6 +1103,7 @@ class ZaakDetailPermissionTests(ESMixin, ClearCachesMixin, APITestCase):
             vertrouwelijkheidaanduiding=VertrouwelijkheidsAanduidingen.beperkt_openbaar,
             einddatum="2020-01-01",
         )
+        mock_resource_get(m, zaak)
         zaak = factory(Zaak, zaak)
         m.patch(zaak.url, status_code=status.HTTP_200_OK)
         with patch("zac.core.api.views.find_zaak", return_value=zaak):
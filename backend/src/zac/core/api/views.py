@@ -33,7 +33,6 @@ from zgw_consumers.api_models.base import factory
 from zgw_consumers.api_models.constants import VertrouwelijkheidsAanduidingen
 from zgw_consumers.api_models.documenten import Document
 from zgw_consumers.concurrent import parallel
-from zgw_consumers.models import Service
 
 from zac.accounts.api.permissions import HasTokenAuth
 from zac.accounts.authentication import ApplicationTokenAuthentication
@@ -54,6 +53,7 @@ from zac.core.services import (
 )
 from zac.utils.exceptions import PermissionDeniedSerializer
 from zac.utils.filters import ApiFilterBackend
+from zac.utils.service_resolver import resolver
 from zgw.models.zrc import Zaak
 
 from ..cache import invalidate_zaak_cache, invalidate_zaakobjecten_cache
@@ -256,7 +256,13 @@ class CreateZaakView(views.APIView):
 
 
 class GetZaakMixin:
-    def get_object(self):
+    def get_object(self, revalidate: bool = False):
+        """
+        Get the zaak from the cache.
+
+        With ``revalidate``, the cached zaak is checked against the ZRC with a
+        conditional GET - updates need to be validated against the current state.
+        """
         if not self.kwargs:  # shut up drf-spectular
             return None
         try:
@@ -264,6 +270,12 @@ class GetZaakMixin:
         except ObjectDoesNotExist:
             raise Http404("No ZAAK matches the given query.")
         self.check_object_permissions(self.request, zaak)
+        if revalidate:
+            zaaktype = zaak.zaaktype
+            zaak = get_zaak(zaak_url=zaak.url, skip_cache=True)
+            zaak.zaaktype = zaaktype
+            # the zaak may have been closed or its VA changed in the meantime
+            self.check_object_permissions(self.request, zaak)
         return zaak
 
 
@@ -327,13 +339,12 @@ class ZaakDetailView(GetZaakMixin, views.APIView):
         },
     )
     def patch(self, request: Request, bronorganisatie: str, identificatie) -> Response:
-        zaak = self.get_object()
-        service = Service.get_service(zaak.url)
-        client = service.build_client()
+        zaak = self.get_object(revalidate=True)
+        client = resolver.get_client(zaak.url)
 
         serializer = self.get_serializer(
             data=request.data,
-            context={"zaak": self.get_object(), "request": self.request},
+            context={"zaak": zaak, "request": self.request},
         )
         serializer.is_valid(raise_exception=True)
 
@@ -557,7 +568,7 @@ class CreateZaakRelationView(views.APIView):
         # Retrieving the main and bijdrage zaak
         main_zaak_url = serializer.validated_data["main_zaak"]
         bijdrage_zaak_url = serializer.validated_data["relation_zaak"]
-        client = Service.get_client(main_zaak_url)
+        client = resolver.get_client(main_zaak_url)
         main_zaak = client.retrieve("zaak", url=main_zaak_url)
         bijdrage_zaak = client.retrieve("zaak", url=bijdrage_zaak_url)
 
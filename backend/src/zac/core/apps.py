@@ -1,6 +1,7 @@
 from django.apps import AppConfig
 from django.core.cache import caches
 from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -9,12 +10,21 @@ class CoreConfig(AppConfig):
     verbose_name = _("zaakafhandelcomponent")
 
     def ready(self):
+        from django.contrib.auth.models import Group
+
+        from zac.accounts.models import User
+
         from . import blueprints  # noqa
         from .camunda.select_documents import context  # noqa
+        from .camunda.utils import invalidate_assignee_caches
         from .camunda.zet_resultaat import context  # noqa
 
         request_finished.connect(clear_request_cache)
 
+        for sender in (User, Group):
+            post_save.connect(invalidate_assignee_caches, sender=sender)
+            post_delete.connect(invalidate_assignee_caches, sender=sender)
+
 
 def clear_request_cache(sender, **kwargs):
     cache = caches["request"]
@@ -1,17 +1,17 @@
-import itertools
 from typing import List, Optional
 
 from django.core.cache import cache, caches
 
 from furl import furl
-from zgw_consumers.api_models.catalogi import ZaakType
-from zgw_consumers.api_models.constants import VertrouwelijkheidsAanduidingen
 from zgw_consumers.api_models.documenten import Document
-from zgw_consumers.client import Client
 
+from zac.utils.cache_tags import invalidate_tags
 from zgw.models.zrc import Zaak
 
-ALL_VAS_SORTED = list(VertrouwelijkheidsAanduidingen.values.keys())
+
+def get_document_tag(url: str) -> str:
+    # the versions of a document share the tag
+    return f"document:{furl(url).remove(query=True).url}"
 
 
 def invalidate_zaaktypen_cache(catalogus: str = ""):
@@ -24,70 +24,32 @@ def invalidate_informatieobjecttypen_cache(catalogus: str = ""):
     cache.delete(key)
 
 
-def invalidate_zaak_cache(zaak: Zaak):
-    zaak_uuids = (None, zaak.uuid)
-    zaak_urls = (None, zaak.url)
-    products = itertools.product(zaak_uuids, zaak_urls)
-    kwargs = ["zaak_uuid", "zaak_url"]
-
-    keys = [f"zaak:{zaak.bronorganisatie}:{zaak.identificatie}"] + [
-        "get_zaak:{zaak_uuid}:{zaak_url}".format(**dict(zip(kwargs, product)))
-        for product in products
-    ]
-
-    cache.delete_many(keys)
-
-
-def invalidate_zaak_list_cache(client: Client, zaak: Zaak):
-    if isinstance(zaak.zaaktype, ZaakType):
-        zaaktypes = ("", zaak.zaaktype.url)
-    elif isinstance(zaak.zaaktype, dict):
-        zaaktypes = ("", zaak.zaaktype["url"])
-    else:
-        zaaktypes = ("", zaak.zaaktype)
-
-    identificaties = ("", zaak.identificatie)
-    bronorganisaties = ("", zaak.bronorganisatie)
-    relevant_vas = [""] + ALL_VAS_SORTED[
-        ALL_VAS_SORTED.index(zaak.vertrouwelijkheidaanduiding) :
-    ]
-
-    template = (
-        "zaken:{client.base_url}:{zaaktype}:{max_va}:{identificatie}:{bronorganisatie}"
-    )
+def invalidate_zaaktype_cache(url: str):
+    # the zaaktype and the statustypen, eigenschappen... cached for it
+    invalidate_tags(f"zaaktype:{url}")
 
-    cache_keys = [
-        template.format(
-            client=client,
-            **dict(
-                zip(("zaaktype", "max_va", "identificatie", "bronorganisatie"), prod)
-            ),
-        )
-        for prod in itertools.product(
-            zaaktypes, relevant_vas, identificaties, bronorganisaties
-        )
-    ]
 
-    cache.delete_many(cache_keys)
+def invalidate_informatieobjecttype_cache(url: str):
+    cache.delete(f"informatieobjecttype:{url}")
+
+
+def invalidate_zaak_cache(zaak: Zaak):
+    invalidate_tags(
+        f"zaak:{zaak.url}",
+        f"zaak:{zaak.uuid}",
+        f"zaak:{zaak.bronorganisatie}:{zaak.identificatie}",
+    )
 
 
 def invalidate_document_url_cache(document_url: str):
-    key = f"document:{document_url}"
-    cache.delete(key)
+    invalidate_tags(get_document_tag(document_url))
 
 
 def invalidate_document_cache(document: Document):
-    versioned_url = furl(document.url).set({"versie": document.versie}).url
-    alfresco_zero_version_url = furl(document.url).set({"versie": 0}).url
-    keys = [
-        f"document:{document.bronorganisatie}:{document.identificatie}:0",
-        f"document:{document.bronorganisatie}:{document.identificatie}:{document.versie}",
-        f"document:{document.bronorganisatie}:{document.identificatie}:None",
-        f"document:{alfresco_zero_version_url}",
-        f"document:{versioned_url}",
-        f"document:{document.url}",
-    ]
-    cache.delete_many(keys)
+    invalidate_tags(
+        get_document_tag(document.url),
+        f"document:{document.bronorganisatie}:{document.identificatie}",
+    )
 
 
 def invalidate_rollen_cache(zaak: Zaak, rol_urls: Optional[List[str]] = None):
@@ -93,14 +93,22 @@ PROCESS_DEFINITION = {
 
 PROCESS_INSTANCE = {
     "id": "205eae6b-d26f-11ea-86dc-e22fafe5f405",
-    "definitionId": PROCESS_DEFINITION["id"],
+    "processDefinitionId": PROCESS_DEFINITION["id"],
     "businessKey": "",
     "caseInstanceId": "",
-    "suspended": False,
+    "state": "ACTIVE",
     "tenantId": "",
+    "superProcessInstanceId": None,
 }
 
 
+def get_process_instances_response(request, context):
+    # the process instance of the zaak, without sub processes
+    if "orQueries" in request.json():
+        return []
+    return [PROCESS_INSTANCE]
+
+
 @requests_mock.Mocker()
 class StartCamundaProcessViewTests(ClearCachesMixin, APITestCase):
     @classmethod
@@ -167,13 +175,9 @@ class StartCamundaProcessViewTests(ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
         m.post(f"{OBJECTS_ROOT}objects/search", json=[START_CAMUNDA_PROCESS_FORM_OBJ])
         mock_resource_get(m, self.catalogus)
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{self.zaak['url']}",
-            json=[PROCESS_INSTANCE],
-        )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={PROCESS_INSTANCE['id']}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         m.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={PROCESS_DEFINITION['id']}",
@@ -258,13 +262,9 @@ class StartCamundaProcessViewTests(ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
         m.post(f"{OBJECTS_ROOT}objects/search", json=[])
         mock_resource_get(m, self.catalogus)
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{self.zaak['url']}",
-            json=[PROCESS_INSTANCE],
-        )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={PROCESS_INSTANCE['id']}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         m.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={PROCESS_DEFINITION['id']}",
@@ -291,13 +291,9 @@ class StartCamundaProcessViewTests(ClearCachesMixin, APITestCase):
         mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
         m.post(f"{OBJECTS_ROOT}objects/search", json=[START_CAMUNDA_PROCESS_FORM_OBJ])
         mock_resource_get(m, self.catalogus)
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{self.zaak['url']}",
-            json=[PROCESS_INSTANCE],
-        )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={PROCESS_INSTANCE['id']}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         m.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={PROCESS_DEFINITION['id']}",
@@ -454,13 +450,9 @@ class StartCamundaProcessViewPermissionTests(ClearCachesMixin, APITestCase):
                 "max_va": VertrouwelijkheidsAanduidingen.zaakvertrouwelijk,
             },
         )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{self.zaak['url']}",
-            json=[PROCESS_INSTANCE],
-        )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={PROCESS_INSTANCE['id']}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         m.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={PROCESS_DEFINITION['id']}",
@@ -499,13 +491,9 @@ class StartCamundaProcessViewPermissionTests(ClearCachesMixin, APITestCase):
                 "max_va": VertrouwelijkheidsAanduidingen.zaakvertrouwelijk,
             },
         )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?variables=zaakUrl_eq_{self.zaak['url']}",
-            json=[PROCESS_INSTANCE],
-        )
-        m.get(
-            f"{CAMUNDA_URL}process-instance?superProcessInstance={PROCESS_INSTANCE['id']}",
-            json=[],
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=get_process_instances_response,
         )
         m.get(
             f"{CAMUNDA_URL}process-definition?processDefinitionIdIn={PROCESS_DEFINITION['id']}",
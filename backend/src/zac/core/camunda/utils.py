@@ -1,19 +1,32 @@
 import logging
-from typing import List, Union
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
+from django.conf import settings
 from django.contrib.auth.models import Group
 
 import requests
 from django_camunda.camunda_models import factory
-from django_camunda.client import get_client
+from django_camunda.client import Camunda, get_client
+from django_camunda.types import CamundaId
+from django_camunda.utils import deserialize_variable
 
 from zac.accounts.models import User
 from zac.camunda.constants import AssigneeTypeChoices
 from zac.camunda.data import ProcessInstance, Task
 from zac.camunda.forms import extract_task_form
+from zac.utils.local_cache import (
+    LocalCache,
+    broadcast_invalidation,
+    listener,
+    register_invalidation,
+)
 
 logger = logging.getLogger(__name__)
 
+# maximum number of process instance IDs in a single Camunda query
+PROCESS_INSTANCE_BATCH_SIZE = 100
+
 
 # FIXME: cleanup
 FORM_KEYS = {
@@ -26,43 +39,141 @@ FORM_KEYS = {
 }
 
 
-def resolve_assignee(name: str) -> Union[Group, User]:
-    try:  # Encapsulate in a try-except to not cause breaking changes
-        user_or_group, _name = name.split(":", 1)
-        if user_or_group == AssigneeTypeChoices.group:
-            try:
-                group = Group.objects.get(name=_name)
-            except Group.DoesNotExist:
-                group = Group.objects.create(name=_name)
-                logger.info(f"Created group {group.name}.")
-            return group
+ASSIGNEE_INVALIDATION_MESSAGE = "assignees"
+
+# assignee string -> User or Group, see resolve_assignees
+assignee_cache = LocalCache(
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+    timeout=settings.ASSIGNEE_CACHE_TIMEOUT,
+)
+
+register_invalidation(ASSIGNEE_INVALIDATION_MESSAGE, assignee_cache.clear)
+
+
+def invalidate_assignee_caches(sender, instance, update_fields=None, **kwargs) -> None:
+    """
+    Clear the assignee caches of all processes, connected to the ``User`` and
+    ``Group`` signals.
+    """
+    # every login saves the user - that does not change the assignee
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    broadcast_invalidation(ASSIGNEE_INVALIDATION_MESSAGE)
+
+
+def _parse_assignee(name: str) -> Tuple[str, str]:
+    # names without a type are usernames, to not cause breaking changes
+    if ":" not in name:
+        return AssigneeTypeChoices.user, name
+    user_or_group, _name = name.split(":", 1)
+    if user_or_group == AssigneeTypeChoices.group:
+        return AssigneeTypeChoices.group, _name
+    return AssigneeTypeChoices.user, _name
+
+
+def _get_or_create_users(usernames: Set[str]) -> Dict[str, User]:
+    users = {
+        user.username: user for user in User.objects.filter(username__in=usernames)
+    }
+    missing = usernames - set(users)
+    if not missing:
+        return users
+
+    new_users = []
+    for username in missing:
+        user = User(username=username)
+        user.set_unusable_password()
+        new_users.append(user)
+    # another request may have created some of the users in the meantime
+    User.objects.bulk_create(new_users, ignore_conflicts=True)
+    users.update(
+        {user.username: user for user in User.objects.filter(username__in=missing)}
+    )
+    return users
+
+
+def _get_or_create_groups(names: Set[str]) -> Dict[str, Group]:
+    groups = {group.name: group for group in Group.objects.filter(name__in=names)}
+    missing = names - set(groups)
+    if not missing:
+        return groups
+
+    Group.objects.bulk_create(
+        [Group(name=name) for name in missing], ignore_conflicts=True
+    )
+    groups.update(
+        {group.name: group for group in Group.objects.filter(name__in=missing)}
+    )
+    logger.info(f"Created groups {', '.join(sorted(missing))}.")
+    return groups
+
+
+def resolve_assignees(names: Iterable[str]) -> Dict[str, Union[Group, User]]:
+    """
+    Resolve the Camunda assignees to users and groups.
+
+    All users are fetched in one query and all groups in another, and the users and
+    groups that do not exist yet are created in bulk. The results are kept in a
+    process-local cache for ``settings.ASSIGNEE_CACHE_TIMEOUT`` seconds.
+    """
+    listener.ensure_started()
+    resolved = {}
+    parsed = {}
+    for name in set(names):
+        cached = assignee_cache.get(name)
+        if cached is not None:
+            resolved[name] = cached
         else:
-            try:
-                user = User.objects.get(username=_name)
-            except User.DoesNotExist:
-                user = User.objects.create_user(username=_name)
-            return user
-    except ValueError:
-        try:
-            user = User.objects.get(username=name)
-        except User.DoesNotExist:
-            user = User.objects.create_user(username=name)
-        return user
+            parsed[name] = _parse_assignee(name)
+    if not parsed:
+        return resolved
 
+    users = _get_or_create_users(
+        {
+            User.normalize_username(_name)
+            for assignee_type, _name in parsed.values()
+            if assignee_type == AssigneeTypeChoices.user
+        }
+    )
+    groups = _get_or_create_groups(
+        {
+            _name
+            for assignee_type, _name in parsed.values()
+            if assignee_type == AssigneeTypeChoices.group
+        }
+    )
+    for name, (assignee_type, _name) in parsed.items():
+        if assignee_type == AssigneeTypeChoices.group:
+            resolved[name] = groups[_name]
+        else:
+            resolved[name] = users[User.normalize_username(_name)]
+        assignee_cache.set(name, resolved[name])
+    return resolved
 
-def get_process_tasks(process: ProcessInstance) -> List[Task]:
-    client = get_client()
-    tasks = client.get("task", {"processInstanceId": process.id})
-    tasks = factory(Task, tasks)
 
+def resolve_assignee(name: str) -> Union[Group, User]:
+    return resolve_assignees([name])[name]
+
+
+def add_task_details(tasks: List[Task]) -> List[Task]:
+    """
+    Resolve the assignees of the tasks and add their forms.
+    """
+    assignees = resolve_assignees(task.assignee for task in tasks if task.assignee)
     for task in tasks:
         if task.assignee:
-            task.assignee = resolve_assignee(task.assignee)
+            task.assignee = assignees[task.assignee]
 
         task.form = extract_task_form(task, FORM_KEYS)
     return tasks
 
 
+def get_process_tasks(process: ProcessInstance) -> List[Task]:
+    client = get_client()
+    tasks = client.get("task", {"processInstanceId": process.id})
+    return add_task_details(factory(Task, tasks))
+
+
 def get_process_zaak_url(
     process: ProcessInstance, zaak_url_variable: str = "zaakUrl"
 ) -> str:
@@ -84,3 +195,82 @@ def get_process_zaak_url(
 
     parent_process = factory(ProcessInstance, parent_processes_response[0])
     return get_process_zaak_url(parent_process)
+
+
+def _batched(ids: List[CamundaId]) -> Iterable[List[CamundaId]]:
+    for start in range(0, len(ids), PROCESS_INSTANCE_BATCH_SIZE):
+        yield ids[start : start + PROCESS_INSTANCE_BATCH_SIZE]
+
+
+def _get_variable_values(
+    client: Camunda, process_instance_ids: List[CamundaId], name: str
+) -> Dict[CamundaId, Any]:
+    values = {}
+    for batch in _batched(process_instance_ids):
+        variables = client.post(
+            "variable-instance",
+            params={"deserializeValues": "false"},
+            json={"processInstanceIdIn": batch, "variableName": name},
+        )
+        for variable in variables:
+            process_instance_id = variable["process_instance_id"]
+            # prefer the process variable over local variables with the same name
+            if (
+                process_instance_id not in values
+                or variable["activity_instance_id"] == process_instance_id
+            ):
+                values[process_instance_id] = deserialize_variable(variable)
+    return values
+
+
+def _get_parent_process_instance_ids(
+    client: Camunda, process_instance_ids: List[CamundaId]
+) -> Dict[CamundaId, Optional[CamundaId]]:
+    parents = {}
+    for batch in _batched(process_instance_ids):
+        process_instances = client.post(
+            "history/process-instance", json={"processInstanceIds": batch}
+        )
+        for process_instance in process_instances:
+            parents[process_instance["id"]] = process_instance[
+                "super_process_instance_id"
+            ]
+    return parents
+
+
+def get_process_zaak_urls(
+    process_instance_ids: Iterable[CamundaId], zaak_url_variable: str = "zaakUrl"
+) -> Dict[CamundaId, Optional[str]]:
+    """
+    Get the zaak URLs of many process instances at once.
+
+    Like :func:`get_process_zaak_url`, the variable is looked up in the parent
+    processes if a process instance does not have it. The variables and parents of
+    all process instances of one level are fetched together, so the number of
+    requests depends on the depth of the process hierarchy instead of the number of
+    process instances. Process instances without the variable map to ``None``.
+    """
+    client = get_client()
+    # process instance ID -> the process instances that take their zaak URL from it
+    origins: Dict[CamundaId, Set[CamundaId]] = {
+        process_instance_id: {process_instance_id}
+        for process_instance_id in process_instance_ids
+    }
+    zaak_urls = {process_instance_id: None for process_instance_id in origins}
+
+    while origins:
+        values = _get_variable_values(client, list(origins), zaak_url_variable)
+        for process_instance_id, value in values.items():
+            for origin in origins.pop(process_instance_id):
+                zaak_urls[origin] = value
+        if not origins:
+            break
+
+        parents = _get_parent_process_instance_ids(client, list(origins))
+        parent_origins = defaultdict(set)
+        for process_instance_id, instance_origins in origins.items():
+            if parent_id := parents.get(process_instance_id):
+                parent_origins[parent_id].update(instance_origins)
+        origins = parent_origins
+
+    return zaak_urls
@@ -0,0 +1,106 @@
+import glob
+import os
+import pickle
+import time
+import tracemalloc
+from typing import Callable
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+import yaml
+from zds_client import schema as zds_schema
+
+from zac.utils.oas_index import OperationIndex, compact_schema
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """
+    Return the average duration of ``func`` in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def measure_memory(data: bytes) -> int:
+    tracemalloc.start()
+    try:
+        spec = pickle.loads(data)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del spec
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the memory usage, load time and operation lookups of the full OAS "
+        "schemas with the compact schemas and their compiled operation index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "schemas",
+            nargs="*",
+            help="Paths to OAS yaml files. Defaults to the test schemas.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=100,
+            help="Number of times every measurement is repeated. Defaults to 100.",
+        )
+
+    def handle(self, **options):
+        paths = options["schemas"] or sorted(
+            path
+            for directory in settings.ZGW_CONSUMERS_TEST_SCHEMA_DIRS
+            for path in glob.glob(os.path.join(directory, "*.yaml"))
+        )
+        repeat = options["repeat"]
+
+        for path in paths:
+            with open(path) as schema_file:
+                spec = yaml.safe_load(schema_file)
+            compact = compact_schema(spec)
+            index = OperationIndex(compact)
+            # the operations with unsupported headers fail with and without the index
+            operation_ids = []
+            for operation_id in index.operations:
+                try:
+                    index.get_headers(operation_id)
+                except NotImplementedError:  # remote references
+                    continue
+                operation_ids.append(operation_id)
+            if not operation_ids:
+                continue
+
+            full_pickle, compact_pickle = pickle.dumps(spec), pickle.dumps(compact)
+
+            def lookup_full():
+                for operation_id in operation_ids:
+                    zds_schema.get_operation_url(spec, operation_id, pattern_only=True)
+                    zds_schema.get_headers(spec, operation_id)
+
+            def lookup_indexed():
+                for operation_id in operation_ids:
+                    index.get_operation_url(operation_id, pattern_only=True)
+                    index.get_headers(operation_id)
+
+            self.stdout.write(
+                f"{os.path.basename(path)} ({len(operation_ids)} operations)\n"
+                f"  memory: {measure_memory(full_pickle) / 1024:.0f}KiB full, "
+                f"{measure_memory(compact_pickle) / 1024:.0f}KiB compact\n"
+                "  load from cache: "
+                f"{measure(lambda: pickle.loads(full_pickle), repeat):.0f}us full, "
+                f"{measure(lambda: pickle.loads(compact_pickle), repeat):.0f}us "
+                "compact, "
+                f"{measure(lambda: OperationIndex(compact), repeat):.0f}us to compile "
+                "the index\n"
+                "  lookup (url + headers) per call: "
+                f"{measure(lookup_full, repeat) / len(operation_ids):.1f}us full, "
+                f"{measure(lookup_indexed, repeat) / len(operation_ids):.1f}us indexed"
+            )
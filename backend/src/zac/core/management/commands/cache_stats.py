@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from zac.utils.local_cache import get_hit_ratios
+
+
+def format_ratio(hits: int, misses: int) -> str:
+    total = hits + misses
+    if not total:
+        return "-"
+    return f"{hits / total:.1%} of {total}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the hit ratios of the process-local and shared caches per key prefix, "
+        "aggregated over all processes."
+    )
+
+    def handle(self, **options):
+        hit_ratios = get_hit_ratios()
+        if not hit_ratios:
+            self.stdout.write("No cache statistics have been recorded yet.")
+            return
+
+        for prefix, tiers in hit_ratios.items():
+            self.stdout.write(
+                f"{prefix}: local {format_ratio(*tiers['local'])}, "
+                f"shared {format_ratio(*tiers['shared'])}"
+            )
@@ -0,0 +1,31 @@
+from django.core.management import BaseCommand
+
+from zac.utils.http import get_pool_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the connection reuse and waits for a free connection of the outbound "
+        "HTTP connection pools per host, aggregated over all processes."
+    )
+
+    def handle(self, **options):
+        pool_stats = get_pool_stats()
+        if not pool_stats:
+            self.stdout.write("No connection pool statistics have been recorded yet.")
+            return
+
+        for host, counts in pool_stats.items():
+            requests, connections = counts["requests"], counts["connections"]
+            reuse = (
+                f"{max(requests - connections, 0) / requests:.1%}" if requests else "-"
+            )
+            wait = (
+                f"{counts['wait_ms'] / counts['waits']:.0f}ms"
+                if counts["waits"]
+                else "-"
+            )
+            self.stdout.write(
+                f"{host}: {requests} requests, {connections} connections opened "
+                f"(reuse {reuse}), {counts['waits']} waits (average {wait})"
+            )
@@ -5,12 +5,10 @@ from urllib.parse import parse_qs, urljoin, urlparse
 from urllib.request import Request
 
 from django.contrib.auth.models import Group
-from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-import requests
 from furl import furl
 from requests.models import Response
 from zds_client import ClientError
@@ -35,20 +33,23 @@ from zgw_consumers.constants import APITypes
 from zgw_consumers.models import Service
 from zgw_consumers.service import get_paginated_results
 
-from zac.accounts.constants import PermissionObjectTypeChoices
-from zac.accounts.datastructures import VA_ORDER
-from zac.accounts.models import BlueprintPermission, User
+from zac.accounts.models import User
+from zac.accounts.permission_snapshot import get_permission_snapshot
 from zac.client import Client
 from zac.contrib.brp.models import BRPConfig
 from zac.elasticsearch.searches import search_zaken
-from zac.utils.decorators import cache as cache_result
+from zac.utils import http
+from zac.utils.cache_tags import get_tagged, set_tagged
+from zac.utils.decorators import cache as cache_result, memoize
 from zac.utils.exceptions import ServiceConfigError
+from zac.utils.memoization import forget_memoized
+from zac.utils.service_resolver import resolver
 from zgw.models import Zaak
 from zgw.models.zrc import ZaakInformatieObject
 
 from .api.data import AuditTrailData
 from .api.utils import convert_eigenschap_spec_to_json_schema
-from .cache import invalidate_document_cache, invalidate_zaak_cache
+from .cache import get_document_tag, invalidate_document_cache, invalidate_zaak_cache
 from .models import CoreConfig
 from .rollen import Rol
 
@@ -60,13 +61,12 @@ A_DAY = AN_HOUR * 24
 
 
 def _client_from_url(url: str):
-    service = Service.get_service(url)
-    if not service:
+    client = resolver.get_client(url)
+    if not client:
         raise ServiceConfigError(
             _("The service for the url %(url)s is not configured in the admin.")
             % {"url": url}
         )
-    client = service.build_client()
     return client
 
 
@@ -86,7 +86,7 @@ def fetch_besluittype(url: str) -> BesluitType:
     return factory(BesluitType, result)
 
 
-@cache_result("catalogus:{url}", timeout=A_DAY)
+@cache_result("catalogus:{url}", timeout=A_DAY, local=True)
 def fetch_catalogus(url: str) -> Catalogus:
     client = _client_from_url(url)
     result = client.retrieve("catalogus", url=url)
@@ -113,7 +113,7 @@ def _get_from_catalogus(resource: str, catalogus: str = "", **extra_query) -> Li
     return result
 
 
-@cache_result("zaaktypen:{catalogus}", timeout=AN_HOUR)
+@cache_result("zaaktypen:{catalogus}", timeout=AN_HOUR, stale_ttl=AN_HOUR)
 def _get_zaaktypen(catalogus: str = "") -> List[ZaakType]:
     """
     Retrieve all the zaaktypen from all catalogi in the configured APIs.
@@ -122,7 +122,7 @@ def _get_zaaktypen(catalogus: str = "") -> List[ZaakType]:
     return factory(ZaakType, results)
 
 
-@cache_result("informatieobjecttypen:{catalogus}", timeout=AN_HOUR)
+@cache_result("informatieobjecttypen:{catalogus}", timeout=AN_HOUR, stale_ttl=AN_HOUR)
 def get_informatieobjecttypen(catalogus: str = "") -> List[InformatieObjectType]:
     """
     Retrieve all the specified informatieobjecttypen from all catalogi in the configured APIs.
@@ -158,29 +158,18 @@ def get_zaaktypen(
         return zaaktypen
 
     # filter out zaaktypen from permissions
-    zaaktypen_policies = (
-        BlueprintPermission.objects.for_requester(request, actual=True)
-        .filter(object_type=PermissionObjectTypeChoices.zaak)
-        .distinct()
-        .values_list("policy", flat=True)
-    )
-    zaaktypen_policies = list(zaaktypen_policies)
-
-    return [
-        zaaktype
-        for zaaktype in zaaktypen
-        if [
-            policy
-            for policy in zaaktypen_policies
-            if policy["catalogus"] == zaaktype.catalogus
-            and policy["zaaktype_omschrijving"] == zaaktype.omschrijving
-            and VA_ORDER[policy["max_va"]]
-            >= VA_ORDER[zaaktype.vertrouwelijkheidaanduiding]
-        ]
-    ]
+    snapshot = get_permission_snapshot(request)
+    return [zaaktype for zaaktype in zaaktypen if snapshot.allows_zaaktype(zaaktype)]
 
 
-@cache_result("zaaktype:{url}", timeout=A_DAY)
+@memoize("zaaktype:{url}")
+@cache_result(
+    "zaaktype:{url}",
+    timeout=A_DAY,
+    stale_ttl=AN_HOUR,
+    local=True,
+    tags=("zaaktype:{url}",),
+)
 def fetch_zaaktype(url: str) -> ZaakType:
     client = _client_from_url(url)
     result = client.retrieve("zaaktype", url=url)
@@ -201,28 +190,13 @@ def get_zaaktype(url: str, request: Optional[Request] = None) -> Optional[ZaakTy
         return zaaktype
 
     # filter out zaaktypen from permissions
-    zaaktypen_policies = (
-        BlueprintPermission.objects.for_requester(request, actual=True)
-        .filter(object_type=PermissionObjectTypeChoices.zaak)
-        .distinct()
-        .values_list("policy", flat=True)
-    )
-    zaaktypen_policies = list(zaaktypen_policies)
-    return (
-        zaaktype
-        if [
-            policy
-            for policy in zaaktypen_policies
-            if policy["catalogus"] == zaaktype.catalogus
-            and policy["zaaktype_omschrijving"] == zaaktype.omschrijving
-            and VA_ORDER[policy["max_va"]]
-            >= VA_ORDER[zaaktype.vertrouwelijkheidaanduiding]
-        ]
-        else None
-    )
+    snapshot = get_permission_snapshot(request)
+    return zaaktype if snapshot.allows_zaaktype(zaaktype) else None
 
 
-@cache_result("zt:statustypen:{zaaktype.url}", timeout=A_DAY)
+@cache_result(
+    "zt:statustypen:{zaaktype.url}", timeout=A_DAY, tags=("zaaktype:{zaaktype.url}",)
+)
 def get_statustypen(zaaktype: ZaakType) -> List[StatusType]:
     client = _client_from_object(zaaktype)
     _statustypen = get_paginated_results(
@@ -232,7 +206,7 @@ def get_statustypen(zaaktype: ZaakType) -> List[StatusType]:
     return statustypen
 
 
-@cache_result("statustype:{url}", timeout=A_DAY)
+@cache_result("statustype:{url}", timeout=A_DAY, local=True)
 def get_statustype(url: str) -> StatusType:
     client = _client_from_url(url)
     status_type = client.retrieve("statustype", url=url)
@@ -240,7 +214,9 @@ def get_statustype(url: str) -> StatusType:
     return status_type
 
 
-@cache_result("zt:resultaattypen:{zaaktype.url}", timeout=A_DAY)
+@cache_result(
+    "zt:resultaattypen:{zaaktype.url}", timeout=A_DAY, tags=("zaaktype:{zaaktype.url}",)
+)
 def get_resultaattypen(zaaktype: ZaakType) -> List[ResultaatType]:
     client = _client_from_object(zaaktype)
     resultaattypen = get_paginated_results(
@@ -258,7 +234,9 @@ def get_resultaattypen(zaaktype: ZaakType) -> List[ResultaatType]:
     return resultaattypen
 
 
-@cache_result("zt:eigenschappen:{zaaktype.url}", timeout=A_DAY)
+@cache_result(
+    "zt:eigenschappen:{zaaktype.url}", timeout=A_DAY, tags=("zaaktype:{zaaktype.url}",)
+)
 def get_eigenschappen(zaaktype: ZaakType) -> List[Eigenschap]:
     client = _client_from_object(zaaktype)
     eigenschappen = get_paginated_results(
@@ -276,7 +254,7 @@ def get_eigenschappen(zaaktype: ZaakType) -> List[Eigenschap]:
     return eigenschappen
 
 
-@cache_result("eigenschap:{url}", timeout=A_DAY)
+@cache_result("eigenschap:{url}", timeout=A_DAY, local=True)
 def get_eigenschap(url: str) -> Eigenschap:
     client = _client_from_url(url)
     result = client.retrieve("eigenschap", url)
@@ -325,14 +303,18 @@ def get_eigenschappen_for_zaaktypen(zaaktypen: List[ZaakType]) -> List[Eigenscha
     return eigenschappen_aggregated
 
 
-@cache_result("roltype:{url}", timeout=A_DAY)
+@cache_result("roltype:{url}", timeout=A_DAY, local=True)
 def get_roltype(url: str) -> RolType:
     client = _client_from_url(url)
     result = client.retrieve("roltype", url)
     return factory(RolType, result)
 
 
-@cache_result("zt:roltypen:{zaaktype.url}:{omschrijving_generiek}", timeout=A_DAY)
+@cache_result(
+    "zt:roltypen:{zaaktype.url}:{omschrijving_generiek}",
+    timeout=A_DAY,
+    tags=("zaaktype:{zaaktype.url}",),
+)
 def get_roltypen(zaaktype: ZaakType, omschrijving_generiek: str = "") -> list:
     query_params = {"zaaktype": zaaktype.url}
     if omschrijving_generiek:
@@ -343,7 +325,7 @@ def get_roltypen(zaaktype: ZaakType, omschrijving_generiek: str = "") -> list:
     return roltypen
 
 
-@cache_result("ziot:{zaaktype.url}", timeout=A_DAY)
+@cache_result("ziot:{zaaktype.url}", timeout=A_DAY, tags=("zaaktype:{zaaktype.url}",))
 def get_informatieobjecttypen_for_zaaktype(
     zaaktype: ZaakType,
 ) -> List[InformatieObjectType]:
@@ -363,21 +345,21 @@ def get_informatieobjecttypen_for_zaaktype(
     return list(results)
 
 
-@cache_result("informatieobjecttype:{url}", timeout=A_DAY)
+@cache_result("informatieobjecttype:{url}", timeout=A_DAY, local=True)
 def get_informatieobjecttype(url: str) -> InformatieObjectType:
     client = _client_from_url(url)
     data = client.retrieve("informatieobjecttype", url=url)
     return factory(InformatieObjectType, data)
 
 
-@cache_result("zt:besluittypen:{zaaktype.url}")
+@cache_result("zt:besluittypen:{zaaktype.url}", tags=("zaaktype:{zaaktype.url}",))
 def get_besluittypen_for_zaaktype(zaaktype: ZaakType) -> List[BesluitType]:
     with parallel() as executor:
         results = executor.map(fetch_besluittype, zaaktype.besluittypen)
     return list(results)
 
 
-@cache_result("zts:catalogi", timeout=AN_HOUR)
+@cache_result("zts:catalogi", timeout=AN_HOUR, stale_ttl=AN_HOUR)
 def get_catalogi() -> List[Catalogus]:
     """
     Fetch all catalogi from the ZTCs.
@@ -553,8 +535,13 @@ def search_zaken_for_bsn(bsn: str) -> List[Zaak]:
     return search_zaak_for_related_object(queries, "rol")
 
 
-# TODO: listen for notifiations to invalidate cache OR look into ETag when it's available
-@cache_result("zaak:{bronorganisatie}:{identificatie}", timeout=AN_HOUR / 2)
+# the zaak is revalidated with its ETag where the current state is required, see
+# zac.core.api.views.GetZaakMixin
+@cache_result(
+    "zaak:{bronorganisatie}:{identificatie}",
+    timeout=AN_HOUR / 2,
+    tags=("zaak:{bronorganisatie}:{identificatie}",),
+)
 def find_zaak(bronorganisatie: str, identificatie: str) -> Zaak:
     """
     Find the Zaak, uniquely identified by bronorganisatie & identificatie.
@@ -730,7 +717,11 @@ def delete_zaak_eigenschap(zaak_eigenschap_url: str):
     client.delete("zaakeigenschap", url=zaak_eigenschap_url)
 
 
-@cache_result("get_zaak:{zaak_uuid}:{zaak_url}", timeout=AN_HOUR)
+@cache_result(
+    "get_zaak:{zaak_uuid}:{zaak_url}",
+    timeout=AN_HOUR,
+    tags=("zaak:{zaak_uuid}", "zaak:{zaak_url}"),
+)
 def get_zaak(zaak_uuid=None, zaak_url=None, client=None) -> Zaak:
     """
     Retrieve zaak with uuid or url
@@ -790,6 +781,7 @@ def get_related_zaken(zaak: Zaak) -> List[Tuple[str, Zaak]]:
     return results
 
 
+@memoize("zaakobjecten:{zaak.url}")
 @cache_result("get_zaak_objecten:{zaak.url}", timeout=AN_HOUR)
 def get_zaakobjecten(zaak: Zaak) -> List[ZaakObject]:
     client = _client_from_url(zaak.url)
@@ -837,7 +829,7 @@ def get_resultaat(zaak: Zaak) -> Optional[Resultaat]:
     return resultaat
 
 
-# @cache_result("rollen:{zaak.url}", alias="request", timeout=10)
+@memoize("rollen:{zaak.url}")
 def get_rollen(zaak: Zaak) -> List[Rol]:
     perf_logger.info("      Fetching rollen for zaak %s", zaak.identificatie)
     # fetch the rollen
@@ -862,12 +854,14 @@ def fetch_rol(rol_url: str) -> Rol:
 def create_rol(rol: Dict) -> Rol:
     zrc_client = _client_from_url(rol["zaak"])
     rol = zrc_client.create("rol", rol)
+    forget_memoized("rollen:")
     return factory(Rol, rol)
 
 
 def delete_rol(rol_url: str):
     zrc_client = _client_from_url(rol_url)
     zrc_client.delete("rol", url=rol_url)
+    forget_memoized("rollen:")
 
 
 def update_rol(rol_url: str, new_rol: Dict) -> Rol:
@@ -944,6 +938,7 @@ def get_zaakinformatieobjecten_related_to_informatieobject(
     return factory(ZaakInformatieObject, results)
 
 
+@memoize("zaakinformatieobjecten:{zaak.url}")
 def get_zaak_informatieobjecten(zaak: Zaak) -> List[ZaakInformatieObject]:
     client = _client_from_object(zaak)
     zaak_informatieobjecten = client.list(
@@ -1013,38 +1008,44 @@ def cache_document(
         document = factory(Document, response.json())
         document_furl = furl(url)
         versie = document_furl.args.get("versie")
+        # invalidated together, see zac.core.cache.invalidate_document_cache
+        url_tags = [get_document_tag(url)]
+        identificatie_tags = [
+            f"document:{document.bronorganisatie}:{document.identificatie}"
+        ]
 
-        cache_key = (
-            f"document:{document.bronorganisatie}:{document.identificatie}:{versie}"
+        set_tagged(
+            f"document:{document.bronorganisatie}:{document.identificatie}:{versie}",
+            document,
+            identificatie_tags,
+            timeout=timeout,
         )
-        if cache_key not in cache:
-            cache.set(cache_key, document, timeout=timeout)
-
-        cache_key_url = f"document:{url}"
-        if cache_key_url not in cache:
-            cache.set(cache_key_url, response, timeout=timeout)
+        set_tagged(f"document:{url}", response, url_tags, timeout=timeout)
 
         if not versie:
-            cache_key_versie = f"document:{document.bronorganisatie}:{document.identificatie}:{document.versie}"
-            if cache_key_versie not in cache:
-                cache.set(cache_key_versie, document, timeout=AN_HOUR / 2)
+            set_tagged(
+                f"document:{document.bronorganisatie}:{document.identificatie}:{document.versie}",
+                document,
+                identificatie_tags,
+                timeout=AN_HOUR / 2,
+            )
 
             document_furl.args["versie"] = document.versie
-            cache_key_version_url = f"document:{document_furl.url}"
-            if cache_key_version_url not in cache:
-                cache.set(cache_key_version_url, response, timeout=A_DAY)
+            set_tagged(
+                f"document:{document_furl.url}", response, url_tags, timeout=A_DAY
+            )
 
 
 def _fetch_document(url: str) -> Response:
     """
     Retrieve document by URL from DRC or cache.
     """
-    cache_key = f"document:{url}"
-    if cache_key in cache:
-        return cache.get(cache_key)
+    response = get_tagged(f"document:{url}", [get_document_tag(url)])
+    if response is not None:
+        return response
     client = _client_from_url(url)
     headers = client.auth.credentials()
-    response = requests.get(url, headers=headers)
+    response = http.get(url, headers=headers)
     cache_document(url, response)
     return response
 
@@ -1127,7 +1128,10 @@ def get_documenten(
     return found, gone
 
 
-@cache_result("document:{bronorganisatie}:{identificatie}:{versie}")
+@cache_result(
+    "document:{bronorganisatie}:{identificatie}:{versie}",
+    tags=("document:{bronorganisatie}:{identificatie}",),
+)
 def find_document(
     bronorganisatie: str, identificatie: str, versie: Optional[int] = None
 ) -> Document:
@@ -1198,7 +1202,7 @@ def get_document(url: str) -> Document:
 
 def download_document(document: Document) -> Tuple[Document, bytes]:
     client = _client_from_object(document)
-    response = requests.get(document.inhoud, headers=client.auth.credentials())
+    response = http.get(document.inhoud, headers=client.auth.credentials())
     response.raise_for_status()
     return document, response.content
 
@@ -1253,7 +1257,7 @@ def relate_document_to_zaak(document_url: str, zaak_url: str) -> Dict[str, str]:
     Relate a document to a case.
 
     """
-    zrc_client = Service.get_client(zaak_url)
+    zrc_client = resolver.get_client(zaak_url)
     response = zrc_client.create(
         "zaakinformatieobject",
         {
@@ -1261,6 +1265,7 @@ def relate_document_to_zaak(document_url: str, zaak_url: str) -> Dict[str, str]:
             "zaak": zaak_url,
         },
     )
+    forget_memoized(f"zaakinformatieobjecten:{zaak_url}")
     return response
 
 
@@ -1392,6 +1397,32 @@ def fetch_object(url: str, client: Optional[Client] = None) -> dict:
     return retrieved_item
 
 
+def get_objects_all_paginated(
+    client: ZGWClient,
+    query_params: dict = {},
+) -> Tuple[List[dict], dict]:
+    """
+    Fetch all objects from the Objects API in batches.
+    Used to index objects in ES.
+
+    The Objects API v1 is not paginated, all objects are returned at once.
+    """
+    response = client.list("object", query_params=query_params)
+    if isinstance(response, list):
+        query_params["page"] = None
+        return response, query_params
+
+    if response["next"]:
+        next_url = urlparse(response["next"])
+        query = parse_qs(next_url.query)
+        new_page = int(query["page"][0])
+        query_params["page"] = [new_page]
+    else:
+        query_params["page"] = None
+
+    return response["results"], query_params
+
+
 def fetch_objects(urls: List[str]) -> List[Dict]:
     object_api_client = get_objects_client()
 
@@ -1456,13 +1487,14 @@ def search_objects(filters: dict) -> List[dict]:
 
 
 def relate_object_to_zaak(relation_data: dict) -> dict:
-    zrc_client = Service.get_client(relation_data["zaak"])
+    zrc_client = resolver.get_client(relation_data["zaak"])
     assert zrc_client is not None, "ZRC client not found"
 
     response = zrc_client.create(
         "zaakobject",
         relation_data,
     )
+    forget_memoized(f"zaakobjecten:{relation_data['zaak']}")
     return response
 
 
@@ -1476,3 +1508,4 @@ def fetch_zaak_object(zaak_object_url: str):
 def delete_zaak_object(zaak_object_url: str):
     client = _client_from_url(zaak_object_url)
     client.delete("zaakobject", url=zaak_object_url)
+    forget_memoized("zaakobjecten:")
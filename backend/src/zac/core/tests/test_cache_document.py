@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 from django.core.cache import cache
 
@@ -14,6 +14,7 @@ from zgw_consumers.test import generate_oas_component, mock_service_oas_get
 from zac.core.cache import invalidate_document_cache
 from zac.core.services import _fetch_document, find_document, get_document
 from zac.core.tests.utils import ClearCachesMixin
+from zac.utils.cache_tags import get_tagged
 
 CATALOGI_ROOT = "http://catalogus.nl/api/v1/"
 DOCUMENTS_ROOT = "http://documents.nl/api/v1/"
@@ -100,15 +101,24 @@ class TestCacheDocuments(ClearCachesMixin, APITransactionTestCase):
         invalidate_document_cache(document)
 
         # Cache got cleared
-        self.assertFalse(cache.get(f"document:{document_url}"))
-        self.assertFalse(
-            cache.get(
-                f"document:{document.bronorganisatie}:{document.identificatie}:None"
+        self.assertIsNone(
+            get_tagged(f"document:{document_url}", [f"document:{document_url}"])
+        )
+        self.assertIsNone(
+            get_tagged(
+                f"document:{document.bronorganisatie}:{document.identificatie}:None",
+                [f"document:{document.bronorganisatie}:{document.identificatie}"],
+            )
+        )
+        # ... including the other versions
+        self.assertIsNone(
+            get_tagged(
+                f"document:{document_url}?versie=110", [f"document:{document_url}"]
             )
         )
 
-    @patch("zac.core.services.cache")
-    def test_fetch_document_cached(self, m, mock_cache):
+    @patch("zac.core.services.get_tagged")
+    def test_fetch_document_cached(self, m, mock_get_tagged):
         Service.objects.create(api_type=APITypes.drc, api_root=DOCUMENTS_ROOT)
         mock_service_oas_get(m, DOCUMENTS_ROOT, "drc")
         document_url = f"{DOCUMENTS_ROOT}enkelvoudiginformatieobjecten/0c47fe5e-4fe1-4781-8583-168e0730c9b6"
@@ -121,16 +131,18 @@ class TestCacheDocuments(ClearCachesMixin, APITransactionTestCase):
             versie="110",
         )
         m.get(document_url, json=document)
+        mock_get_tagged.return_value = None
         _fetch_document(document_url)
 
-        mock_cache.__contains__ = lambda *args: True
-        mock_cache.get = MagicMock()
-        mock_cache.get.return_value = document
+        mock_get_tagged.reset_mock()
+        mock_get_tagged.return_value = document
         # See if cache is used in a second call
         _fetch_document(document_url)
 
-        self.assertEqual(mock_cache.get.call_count, 1)
-        mock_cache.get.assert_called_with(f"document:{document_url}")
+        self.assertEqual(mock_get_tagged.call_count, 1)
+        mock_get_tagged.assert_called_with(
+            f"document:{document_url}", [f"document:{document_url}"]
+        )
 
     def test_find_document_cached_latest_version(self, m):
         Service.objects.create(api_type=APITypes.drc, api_root=DOCUMENTS_ROOT)
@@ -1,13 +1,25 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
 from django.test import TestCase
 
 import requests_mock
 from django_camunda.utils import serialize_variable
 
+from zac.accounts.models import User
+from zac.accounts.tests.factories import GroupFactory, UserFactory
 from zac.camunda.data import ProcessInstance
 
-from ..camunda.utils import get_process_zaak_url
+from ..camunda.utils import (
+    assignee_cache,
+    get_process_zaak_url,
+    get_process_zaak_urls,
+    resolve_assignee,
+    resolve_assignees,
+)
 
-PI_URL = "https://camunda.example.com/engine-rest/process-instance"
+CAMUNDA_URL = "https://camunda.example.com/engine-rest/"
+PI_URL = f"{CAMUNDA_URL}process-instance"
 
 
 @requests_mock.Mocker()
@@ -63,3 +75,125 @@ class GetProcessZaakUrlTests(TestCase):
 
         with self.assertRaises(RuntimeError):
             get_process_zaak_url(process)
+
+
+def _variable_instance(process_instance_id: str, value: str) -> dict:
+    return {
+        "name": "zaakUrl",
+        "processInstanceId": process_instance_id,
+        "activityInstanceId": process_instance_id,
+        **serialize_variable(value),
+    }
+
+
+@requests_mock.Mocker()
+class GetProcessZaakUrlsTests(TestCase):
+    def test_variables_on_processes(self, m):
+        m.post(
+            f"{CAMUNDA_URL}variable-instance?deserializeValues=false",
+            json=[
+                _variable_instance("pi-1", "zaak-1"),
+                _variable_instance("pi-2", "zaak-2"),
+            ],
+        )
+
+        zaak_urls = get_process_zaak_urls(["pi-1", "pi-2"])
+
+        self.assertEqual(zaak_urls, {"pi-1": "zaak-1", "pi-2": "zaak-2"})
+        self.assertEqual(m.call_count, 1)
+        self.assertEqual(
+            m.last_request.json(),
+            {"processInstanceIdIn": ["pi-1", "pi-2"], "variableName": "zaakUrl"},
+        )
+
+    def test_variables_on_parent_processes(self, m):
+        m.post(
+            f"{CAMUNDA_URL}variable-instance?deserializeValues=false",
+            [
+                {"json": [_variable_instance("pi-1", "zaak-1")]},
+                {"json": [_variable_instance("parent", "zaak-2")]},
+            ],
+        )
+        m.post(
+            f"{CAMUNDA_URL}history/process-instance",
+            json=[
+                {"id": "sub-1", "superProcessInstanceId": "parent"},
+                {"id": "sub-2", "superProcessInstanceId": "parent"},
+                {"id": "pi-3", "superProcessInstanceId": None},
+            ],
+        )
+
+        zaak_urls = get_process_zaak_urls(["pi-1", "sub-1", "sub-2", "pi-3"])
+
+        self.assertEqual(
+            zaak_urls,
+            {"pi-1": "zaak-1", "sub-1": "zaak-2", "sub-2": "zaak-2", "pi-3": None},
+        )
+        # two levels, independent of the number of process instances
+        self.assertEqual(m.call_count, 3)
+        self.assertEqual(m.request_history[2].json()["processInstanceIdIn"], ["parent"])
+
+
+class ResolveAssigneesTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        assignee_cache.clear()
+        self.addCleanup(assignee_cache.clear)
+
+    def test_resolve_existing(self):
+        user = UserFactory.create(username="jdoe")
+        group = GroupFactory.create(name="behandelaars")
+
+        with self.assertNumQueries(2):
+            assignees = resolve_assignees(
+                ["user:jdoe", "jdoe", "group:behandelaars", "user:jdoe"]
+            )
+
+        self.assertEqual(
+            assignees,
+            {"user:jdoe": user, "jdoe": user, "group:behandelaars": group},
+        )
+
+    def test_create_missing(self):
+        UserFactory.create(username="jdoe")
+
+        # one select and one insert for each of the users and groups, and one
+        # select for each to fetch the created ones
+        with self.assertNumQueries(6):
+            assignees = resolve_assignees(
+                ["user:jdoe", "user:new-1", "user:new-2", "group:new"]
+            )
+
+        self.assertEqual(
+            User.objects.filter(username__in=["new-1", "new-2"]).count(), 2
+        )
+        self.assertFalse(assignees["user:new-1"].has_usable_password())
+        self.assertEqual(assignees["group:new"], Group.objects.get(name="new"))
+
+    def test_resolve_single(self):
+        group = GroupFactory.create(name="behandelaars")
+
+        self.assertEqual(resolve_assignee("group:behandelaars"), group)
+
+    @patch.object(assignee_cache, "timeout", 60)
+    def test_cached(self):
+        user = UserFactory.create(username="jdoe")
+        resolve_assignees(["user:jdoe"])
+
+        with self.assertNumQueries(0):
+            assignees = resolve_assignees(["user:jdoe"])
+
+        self.assertEqual(assignees, {"user:jdoe": user})
+
+    @patch.object(assignee_cache, "timeout", 60)
+    def test_deleting_user_clears_cache(self):
+        user = UserFactory.create(username="jdoe")
+        resolve_assignees(["user:jdoe"])
+
+        with patch(
+            "zac.core.camunda.utils.broadcast_invalidation",
+            side_effect=lambda message: assignee_cache.clear(),
+        ):
+            user.delete()
+
+        self.assertIsNone(assignee_cache.get("user:jdoe"))
@@ -2,6 +2,9 @@ from django.core.cache import caches
 
 from zds_client.oas import schema_fetcher
 
+from zac.utils.local_cache import local_cache
+from zac.utils.service_resolver import resolver
+
 
 class ClearCachesMixin:
     def setUp(self):
@@ -12,3 +15,5 @@ class ClearCachesMixin:
             self.addCleanup(cache.clear)
 
         schema_fetcher.cache._local_cache = {}
+        local_cache.clear()
+        resolver.clear()
@@ -1,12 +1,12 @@
 from dataclasses import dataclass
 from typing import Iterator
 
-import requests
 from zgw_consumers.api_models.zaken import ZaakObject
 
 from zac.contrib.kadaster.bag import fetch_pand, fetch_verblijfsobject
 from zac.core.models import CoreConfig, MetaObjectTypesConfig
 from zac.core.services import fetch_objects
+from zac.utils import http
 
 
 def noop(url: str) -> str:
@@ -21,7 +21,7 @@ class ZaakObjectGroup:
 
     object_type: str
     label: str
-    retriever: callable = requests.get
+    retriever: callable = http.get
     template: str = "core/includes/zaakobjecten/default.html"
     items: list = None
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SearchReport
+from .models import FailedIndexPage, IndexCheckpoint, IndexHighWaterMark, SearchReport
 
 
 @admin.register(SearchReport)
@@ -9,3 +9,27 @@ class SearchReportAdmin(admin.ModelAdmin):
         "name",
         "query",
     )
+
+
+@admin.register(IndexCheckpoint)
+class IndexCheckpointAdmin(admin.ModelAdmin):
+    list_display = (
+        "target_index",
+        "service",
+        "pages_indexed",
+        "documents_indexed",
+        "finished",
+        "modified",
+    )
+    list_filter = ("index", "finished")
+
+
+@admin.register(FailedIndexPage)
+class FailedIndexPageAdmin(admin.ModelAdmin):
+    list_display = ("index", "service", "query_params", "attempts", "modified")
+    list_filter = ("index",)
+
+
+@admin.register(IndexHighWaterMark)
+class IndexHighWaterMarkAdmin(admin.ModelAdmin):
+    list_display = ("index", "indexed_until", "modified")
@@ -1,6 +1,6 @@
 import logging
 from collections import defaultdict
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 
 from elasticsearch import exceptions
 from elasticsearch_dsl.query import Bool, Nested, Term
@@ -94,26 +94,29 @@ def get_zaak_document(zaak_url: str):
     return _get_zaak_document(zaak_uuid, zaak_url)
 
 
+def _get_zaak_document_fields(zaak: Zaak) -> dict:
+    # Don't include zaaktype and identificatie since they are immutable.
+    return {
+        "bronorganisatie": zaak.bronorganisatie,
+        "vertrouwelijkheidaanduiding": zaak.vertrouwelijkheidaanduiding,
+        "va_order": VA_ORDER[zaak.vertrouwelijkheidaanduiding],
+        "startdatum": zaak.startdatum,
+        "einddatum": zaak.einddatum,
+        "registratiedatum": zaak.registratiedatum,
+        "deadline": zaak.deadline,
+        "toelichting": zaak.toelichting,
+        "zaakgeometrie": zaak.zaakgeometrie,
+        "omschrijving": zaak.omschrijving,
+        "identificatie_suggest": zaak.identificatie,
+    }
+
+
 def update_zaak_document(zaak: Zaak) -> ZaakDocument:
     zaak_document = _get_zaak_document(zaak.uuid, zaak.url, create_zaak=zaak)
 
-    # Don't include zaaktype and identificatie since they are immutable.
     # Don't include status or objecten as those are handled through a
     # different handler in the notifications api.
-    zaak_document.update(
-        refresh=True,
-        bronorganisatie=zaak.bronorganisatie,
-        vertrouwelijkheidaanduiding=zaak.vertrouwelijkheidaanduiding,
-        va_order=VA_ORDER[zaak.vertrouwelijkheidaanduiding],
-        startdatum=zaak.startdatum,
-        einddatum=zaak.einddatum,
-        registratiedatum=zaak.registratiedatum,
-        deadline=zaak.deadline,
-        toelichting=zaak.toelichting,
-        zaakgeometrie=zaak.zaakgeometrie,
-        omschrijving=zaak.omschrijving,
-        identificatie_suggest=zaak.identificatie,
-    )
+    zaak_document.update(refresh=True, **_get_zaak_document_fields(zaak))
     return zaak_document
 
 
@@ -242,6 +245,81 @@ def update_zaakinformatieobjecten_in_zaak_document(zaak: Zaak) -> None:
     return
 
 
+def _create_status_part(zaak: Zaak) -> Optional[StatusDocument]:
+    if not zaak.status:
+        return None
+    status = get_status(zaak) if isinstance(zaak.status, str) else zaak.status
+    return create_status_document(status)
+
+
+def _create_rollen_part(zaak: Zaak) -> List[RolDocument]:
+    return [create_rol_document(rol) for rol in get_rollen(zaak)]
+
+
+def _create_eigenschappen_part(zaak: Zaak) -> dict:
+    return create_eigenschappen_document(get_zaak_eigenschappen(zaak))
+
+
+def _create_zaakobjecten_part(zaak: Zaak) -> List[ZaakObjectDocument]:
+    return [create_zaakobject_document(zo) for zo in get_zaakobjecten(zaak)]
+
+
+def _create_zaakinformatieobjecten_part(zaak: Zaak) -> List[ZaakObjectDocument]:
+    return [
+        create_zaakinformatieobject_document(zio)
+        for zio in get_zaak_informatieobjecten(zaak)
+    ]
+
+
+ZAAK_DOCUMENT_PARTS = {
+    "status": _create_status_part,
+    "rollen": _create_rollen_part,
+    "eigenschappen": _create_eigenschappen_part,
+    "zaakobjecten": _create_zaakobjecten_part,
+    "zaakinformatieobjecten": _create_zaakinformatieobjecten_part,
+}
+
+
+def reindex_zaak_document(
+    zaak: Zaak,
+    parts: Iterable[str] = (),
+    update_zaak: bool = False,
+    create: bool = False,
+) -> ZaakDocument:
+    """
+    Rebuild the given parts of the zaak document and store it with a single write.
+
+    The related resources of the parts are fetched concurrently. With ``create`` the
+    document is built from scratch, with ``update_zaak`` the attributes of the zaak
+    itself are refreshed as well.
+    """
+    zaak_document = None
+    if not create:
+        try:
+            zaak_document = ZaakDocument.get(id=zaak.uuid)
+        except exceptions.NotFoundError:
+            logger.warning("zaak %s hasn't been indexed in ES", zaak.url)
+
+    if zaak_document is None:
+        zaak_document = create_zaak_document(zaak)
+        zaak_document.zaaktype = create_zaaktype_document(zaak.zaaktype)
+        parts = set(parts) | {"status"}
+    elif update_zaak:
+        for field_name, value in _get_zaak_document_fields(zaak).items():
+            setattr(zaak_document, field_name, value)
+
+    with parallel() as executor:
+        results = {
+            part: executor.submit(ZAAK_DOCUMENT_PARTS[part], zaak) for part in parts
+        }
+
+    for part, result in results.items():
+        setattr(zaak_document, part, result.result())
+
+    zaak_document.save(refresh=True)
+    return zaak_document
+
+
 ###################################################
 #                    OBJECTEN                     #
 ###################################################
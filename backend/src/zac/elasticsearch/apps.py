@@ -1,5 +1,6 @@
 from django.apps import AppConfig
 from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.utils.translation import ugettext_lazy as _
 
 from elasticsearch_dsl.connections import connections
@@ -11,3 +12,18 @@ class EsConfig(AppConfig):
 
     def ready(self):
         connections.configure(**settings.ELASTICSEARCH_DSL)
+
+        from zac.accounts.models import AtomicPermission, User, UserAtomicPermission
+
+        from .permission_index import (
+            atomic_permission_changed,
+            user_atomic_permission_changed,
+            user_atomic_permissions_changed,
+        )
+
+        post_save.connect(user_atomic_permission_changed, sender=UserAtomicPermission)
+        post_delete.connect(user_atomic_permission_changed, sender=UserAtomicPermission)
+        post_save.connect(atomic_permission_changed, sender=AtomicPermission)
+        m2m_changed.connect(
+            user_atomic_permissions_changed, sender=User.atomic_permissions.through
+        )
@@ -209,6 +209,19 @@ class ObjectDocument(Document):
         )
 
 
+class PermissionDocument(Document):
+    """
+    The object URLs of the active atomic permissions of a user, by permission and
+    object type. Only used as the source of terms lookups, so nothing is indexed.
+    """
+
+    username = field.Keyword()
+    permissions = field.Object(enabled=False)
+
+    class Index:
+        name = settings.ES_INDEX_PERMISSIONS
+
+
 class InformatieObjectDocument(Document):
     url = field.Keyword()
     titel = field.Text(
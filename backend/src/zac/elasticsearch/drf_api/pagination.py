@@ -1,6 +1,14 @@
-from typing import List
+import base64
+import json
+from typing import List, Optional
 
+from django.utils.translation import gettext_lazy as _
+
+from elasticsearch_dsl import Search
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from zac.core.api.pagination import BffPagination
 
@@ -8,13 +16,106 @@ from .serializers import DEFAULT_ES_FIELDS
 
 
 class ESPagination(BffPagination):
+    """
+    Paginate searches in Elasticsearch itself.
+
+    Pages are fetched with ``from``/``size``, which Elasticsearch limits to the first
+    ``max_result_window`` hits. The next link carries a cursor with the sort values
+    of the last hit instead, so the next page is fetched with ``search_after`` and
+    paging through all results costs one page of hits per request.
+    """
+
+    cursor_query_param = "cursor"
+    # the default index.max_result_window
+    max_result_window = 10000
+    # makes the sort unique, as required by search_after
+    tiebreaker = "url"
+    invalid_cursor_message = _("Invalid cursor.")
+    result_window_message = _(
+        "Only the first {max_result_window} results can be retrieved by page "
+        "number, follow the next links instead."
+    )
+
+    def paginate_search(self, search: Search, request: Request, view=None) -> list:
+        self.request = request
+        page_size = self.get_page_size(request)
+        search = search.sort(*search.to_dict().get("sort", []), self.tiebreaker)
+        search = search.extra(track_total_hits=True)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            self.page_number = cursor["page"]
+            search = search.extra(search_after=cursor["after"])[:page_size]
+        else:
+            self.page_number = self.get_page_number(request)
+            start = (self.page_number - 1) * page_size
+            if start + page_size > self.max_result_window:
+                raise NotFound(
+                    self.result_window_message.format(
+                        max_result_window=self.max_result_window
+                    )
+                )
+            search = search[start : start + page_size]
+
+        response = search.execute()
+        self.count = response.hits.total.value
+        self.results = list(response.hits)
+        self.has_next = self.page_number * page_size < self.count and bool(self.results)
+        return self.results
+
+    def get_page_number(self, request: Request) -> int:
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            page_number = int(page_number)
+        except ValueError:
+            page_number = 0
+        if page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number))
+        return page_number
+
+    def decode_cursor(self, request: Request) -> Optional[dict]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return {"page": int(cursor["page"]), "after": list(cursor["after"])}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def encode_cursor(page_number: int, after: list) -> str:
+        cursor = json.dumps({"page": page_number, "after": after})
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        cursor = self.encode_cursor(
+            self.page_number + 1, list(self.results[-1].meta.sort)
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_previous_link(self) -> Optional[str]:
+        previous_page = self.page_number - 1
+        page_size = self.get_page_size(self.request)
+        if previous_page < 1 or previous_page * page_size > self.max_result_window:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.cursor_query_param)
+        if previous_page == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, previous_page)
+
     def get_paginated_response(self, data, fields: List[str]):
         return Response(
             {
                 "fields": fields,
                 "next": self.get_next_link(),
                 "previous": self.get_previous_link(),
-                "count": self.page.paginator.count,
+                "count": self.count,
                 "results": data,
             }
         )
@@ -4,7 +4,12 @@ from typing import Any, Dict, Iterator, Optional, Tuple
 from django.utils.translation import gettext_lazy as _
 
 from drf_spectacular.openapi import OpenApiParameter
-from elasticsearch_dsl import Document, field
+from elasticsearch_dsl import Document, Search, field
+from rest_framework.request import Request
+
+from zac.core.services import get_zaaktypen
+
+from ..searches import get_zaken_search
 
 
 def get_document_fields(
@@ -73,3 +78,37 @@ def es_document_to_ordering_parameters(
             ),
             enum=enum,
         )
+
+
+def get_search_for_query(request: Request, search_query: dict) -> Search:
+    """
+    Build the search for the input of the search endpoint or a search report.
+    """
+    if search_query.get("zaaktype"):
+        zaaktype_data = search_query.pop("zaaktype")
+
+        # First get zaaktypen based on omschrijving...
+        zaaktypen = get_zaaktypen(
+            request,
+            catalogus=zaaktype_data["catalogus"],
+            omschrijving=zaaktype_data["omschrijving"],
+        )
+
+        # ...because omschrijving can change, we will then also
+        # fetch all the zaaktypen with the same identificatie(s) as the
+        # zaaktypen which matched the omschrijving.
+        urls = []
+        identificaties = {zt.identificatie for zt in zaaktypen}
+        for identificatie in identificaties:
+            urls += [
+                zt.url
+                for zt in get_zaaktypen(
+                    request,
+                    catalogus=zaaktype_data["catalogus"],
+                    identificatie=identificatie,
+                )
+            ]
+
+        search_query["zaaktypen"] = [url for url in set(urls)]
+
+    return get_zaken_search(**search_query, request=request)
@@ -1,10 +1,15 @@
+import tempfile
 from typing import List
 
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import views
 from rest_framework.decorators import action
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
@@ -15,11 +20,11 @@ from zac.accounts.api.permissions import HasTokenAuth
 from zac.accounts.authentication import ApplicationTokenAuthentication
 from zac.api.drf_spectacular.utils import input_serializer_to_parameters
 from zac.core.api.serializers import ZaakSerializer
-from zac.core.services import get_zaaktypen
 
 from ..documents import ZaakDocument
+from ..export import EXPORT_FORMATS, write_export
 from ..models import SearchReport
-from ..searches import autocomplete_zaak_search, quick_search, search_zaken
+from ..searches import autocomplete_zaak_search, quick_search
 from .filters import ESOrderingFilter
 from .pagination import ESPagination
 from .parsers import IgnoreCamelCaseJSONParser
@@ -31,7 +36,7 @@ from .serializers import (
     ZaakDocumentSerializer,
     ZaakIdentificatieSerializer,
 )
-from .utils import es_document_to_ordering_parameters
+from .utils import es_document_to_ordering_parameters, get_search_for_query
 
 
 class GetZakenView(views.APIView):
@@ -63,37 +68,21 @@ class GetZakenView(views.APIView):
         return Response(data=zaak_serializer.data)
 
 
-class PerformSearchMixin:
-    def perform_search(self, search_query):
-        if search_query.get("zaaktype"):
-            zaaktype_data = search_query.pop("zaaktype")
-
-            # First get zaaktypen based on omschrijving...
-            zaaktypen = get_zaaktypen(
-                self.request,
-                catalogus=zaaktype_data["catalogus"],
-                omschrijving=zaaktype_data["omschrijving"],
-            )
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    Accept any content type for views that return files instead of rendered data.
+    """
 
-            # ...because omschrijving can change, we will then also
-            # fetch all the zaaktypen with the same identificatie(s) as the
-            # zaaktypen which matched the omschrijving.
-            urls = []
-            identificaties = {zt.identificatie for zt in zaaktypen}
-            for identificatie in identificaties:
-                urls += [
-                    zt.url
-                    for zt in get_zaaktypen(
-                        self.request,
-                        catalogus=zaaktype_data["catalogus"],
-                        identificatie=identificatie,
-                    )
-                ]
+    def select_parser(self, request, parsers):
+        return parsers[0]
 
-            search_query["zaaktypen"] = [url for url in set(urls)]
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
 
-        results = search_zaken(**search_query, request=self.request)
-        return results
+
+class PerformSearchMixin:
+    def perform_search(self, search_query):
+        return get_search_for_query(self.request, search_query)
 
 
 class SearchView(PerformSearchMixin, views.APIView):
@@ -119,8 +108,8 @@ class SearchView(PerformSearchMixin, views.APIView):
                 self._paginator = self.pagination_class()
         return self._paginator
 
-    def paginate_results(self, results):
-        return self.paginator.paginate_queryset(results, self.request, view=self)
+    def paginate_search(self, search):
+        return self.paginator.paginate_search(search, self.request, view=self)
 
     def get_paginated_response(self, data, fields: List[str]):
         """
@@ -140,6 +129,16 @@ class SearchView(PerformSearchMixin, views.APIView):
                 required=False,
                 description=_("Page of paginated response."),
             ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description=_(
+                    "Position in the results, taken from the `next` link of the "
+                    "previous page."
+                ),
+            ),
         ],
         responses=ZaakDocumentSerializer(many=True),
     )
@@ -160,8 +159,8 @@ class SearchView(PerformSearchMixin, views.APIView):
             "ordering": ordering,
         }
 
-        results = self.perform_search(search_query)
-        page = self.paginate_results(results)
+        search = self.perform_search(search_query)
+        page = self.paginate_search(search)
         serializer = ZaakDocumentSerializer(page, many=True)
         return self.get_paginated_response(
             serializer.data, input_serializer.validated_data["fields"]
@@ -218,9 +217,25 @@ class QuickSearchView(views.APIView):
                 required=False,
                 description=_("Page of paginated response."),
             ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description=_(
+                    "Position in the results, taken from the `next` link of the "
+                    "previous page."
+                ),
+            ),
         ],
         responses=ZaakDocumentSerializer(many=True),
     ),
+    export=extend_schema(
+        operation_id="search_reports_export",
+        summary=_("Export search report results."),
+        parameters=[es_document_to_ordering_parameters(ZaakDocument)],
+        responses={(200, "application/octet-stream"): OpenApiTypes.BINARY},
+    ),
 )
 class SearchReportViewSet(PerformSearchMixin, ModelViewSet):
     ordering = ("-identificatie.keyword",)
@@ -243,9 +258,45 @@ class SearchReportViewSet(PerformSearchMixin, ModelViewSet):
         if ordering:
             search_report.query = {**search_report.query, "ordering": ordering}
 
-        results = self.perform_search(search_report.query)
-        page = self.paginate_queryset(results)
+        search = self.perform_search(search_report.query)
+        page = self.paginator.paginate_search(search, self.request, view=self)
         serializer = ZaakDocumentSerializer(page, many=True)
         return self.get_paginated_response(
             serializer.data, search_report.query["fields"]
         )
+
+    @action(
+        detail=True,
+        url_path=r"export/(?P<file_format>csv|ndjson|xlsx)",
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request, file_format: str, *args, **kwargs):
+        """
+        Export all results of the search report, with the fields of the report.
+        """
+        search_report = self.get_object()
+        query = {**search_report.query}
+        if ordering := ESOrderingFilter().get_ordering(self.request, self):
+            query["ordering"] = ordering
+        search = self.perform_search(query)
+        fields = search_report.query["fields"]
+        filename = f"{slugify(search_report.name)}.{file_format}"
+
+        content_type, stream = EXPORT_FORMATS[file_format]
+        if stream is None:
+            output = tempfile.TemporaryFile()
+            try:
+                write_export(search, fields, file_format, output)
+            except Exception:
+                output.close()
+                raise
+            output.seek(0)
+            return FileResponse(
+                output, as_attachment=True, filename=filename, content_type=content_type
+            )
+
+        response = StreamingHttpResponse(
+            stream(search, fields), content_type=content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,130 @@
+"""
+Export the results of a search to a file.
+
+All hits are read with a scroll, so the size of the export is not limited by the
+result window of the index, and the rows are written as they are read - the file
+is never held in memory as a whole.
+"""
+import csv
+import json
+from datetime import date, datetime
+from typing import Any, BinaryIO, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from elasticsearch_dsl import Search
+from openpyxl import Workbook
+
+EXPORT_CHUNK_SIZE = 500
+
+# text starting with these characters is evaluated as a formula by spreadsheets
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    """
+    File-like object that returns the written value instead of storing it.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_documents(search: Search, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator:
+    # preserve the ordering of the search
+    search = search.params(preserve_order=True, size=chunk_size)
+    for hit in search.scan():
+        yield hit.to_dict()
+
+
+def get_value(document: dict, field: str) -> Any:
+    """
+    Get the value of a (dotted) field, with a list for fields of nested documents.
+    """
+    value = document
+    for part in field.split("."):
+        if isinstance(value, list):
+            value = [item.get(part) for item in value if isinstance(item, dict)]
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(format_value(item) for item in value if item is not None)
+    if isinstance(value, dict):
+        return json.dumps(value, cls=DjangoJSONEncoder)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def format_cell(value: Any) -> str:
+    """
+    Format a value for a CSV or XLSX cell.
+
+    Text that would be evaluated as a formula is prefixed with a quote - the free
+    text fields of a zaak are entered by its initiator.
+    """
+    formatted = format_value(value)
+    if isinstance(value, (int, float)):
+        return formatted
+    if formatted.startswith(FORMULA_PREFIXES):
+        return f"'{formatted}"
+    return formatted
+
+
+def iter_rows(search: Search, fields: List[str]) -> Iterator[List[str]]:
+    for document in iter_documents(search):
+        yield [format_cell(get_value(document, field)) for field in fields]
+
+
+def stream_csv(search: Search, fields: List[str]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in iter_rows(search, fields):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(search: Search, fields: List[str]) -> Iterator[str]:
+    for document in iter_documents(search):
+        line = {field: get_value(document, field) for field in fields}
+        yield json.dumps(line, cls=DjangoJSONEncoder) + "\n"
+
+
+def write_xlsx(search: Search, fields: List[str], output: BinaryIO) -> None:
+    # write-only workbooks keep the rows in a temporary file instead of memory
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(fields)
+    for row in iter_rows(search, fields):
+        worksheet.append(row)
+    workbook.save(output)
+
+
+# file format -> (content type, streaming writer)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        None,
+    ),
+}
+
+
+def write_export(
+    search: Search, fields: List[str], file_format: str, output: BinaryIO
+) -> None:
+    content_type, stream = EXPORT_FORMATS[file_format]
+    if stream is None:
+        write_xlsx(search, fields, output)
+        return
+
+    for chunk in stream(search, fields):
+        output.write(chunk.encode("utf-8"))
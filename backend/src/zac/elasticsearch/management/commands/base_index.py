@@ -1,14 +1,33 @@
+import logging
+import time
+import traceback
 from abc import ABC, abstractmethod
-from typing import Iterator
+from collections import deque
+from datetime import date
+from typing import Callable, Iterator, Optional
 
-from django.core.management.base import CommandParser
+from django.core.management.base import CommandError, CommandParser
+from django.utils import timezone
 
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
 from elasticsearch_dsl import Index
 from elasticsearch_dsl.connections import connections
+from zgw_consumers.models import Service
 
-from ...utils import check_if_index_exists
-from ..utils import ProgressOutputWrapper
+from ...models import FailedIndexPage, IndexCheckpoint, IndexHighWaterMark
+from ...utils import (
+    IndexValidationError,
+    activate_index_version,
+    check_if_index_exists,
+    create_index_version,
+    delete_old_index_versions,
+    swap_alias,
+    validate_index_version,
+)
+from ..utils import ProgressOutputWrapper, ThroughputMeter
+
+logger = logging.getLogger(__name__)
+perf_logger = logging.getLogger("performance")
 
 NOTIMPLEMENTED_MSG = "Child classes must declare {field}."
 
@@ -72,6 +91,66 @@ class IndexCommand(ABC):
             type=int,
             help="Indicates the number of the most recent documents to be reindexed.",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Indicates the number of documents sent to ES per bulk request. Defaults to 500.",
+            default=500,
+        )
+        parser.add_argument(
+            "--bulk-workers",
+            type=int,
+            help=(
+                "Indicates the number of parallel bulk requests to ES. With more than "
+                "one worker, documents are indexed while the next ones are being "
+                "prepared. Defaults to 1."
+            ),
+            default=1,
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "Only index what changed since the last index run that completed. "
+                "The documents are written to the live index."
+            ),
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            help=(
+                "Date (YYYY-MM-DD) to index the changes from with --incremental, "
+                "instead of the start of the last index run that completed."
+            ),
+        )
+        parser.add_argument(
+            "--min-count-ratio",
+            type=float,
+            help=(
+                "Indicates the minimum number of documents in the new index, relative "
+                "to the current index, for the new index to go live. Defaults to 0.9."
+            ),
+            default=0.9,
+        )
+        parser.add_argument(
+            "--keep-old-indices",
+            type=int,
+            help="Indicates the number of previous versions of the index to keep. Defaults to 0.",
+            default=0,
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help=(
+                "Resume the last full index run that did not complete, from the "
+                "checkpoints that were saved per service."
+            ),
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Only index the pages that failed in earlier runs.",
+        )
         parser.add_argument(
             "--progress",
             "--show-progress",
@@ -89,11 +168,29 @@ class IndexCommand(ABC):
         self.stdout = ProgressOutputWrapper(show_progress, out=self.stdout._out)
         self.max_workers = options["max_workers"]
         self.reindex_last = options["reindex_last"]
+        self.chunk_size = options["chunk_size"]
+        self.bulk_workers = options["bulk_workers"]
+        self.min_count_ratio = options["min_count_ratio"]
+        self.keep_old_indices = options["keep_old_indices"]
+        self.resume = options["resume"]
+        # the index the documents are written to
+        self.target_index = self.index
+        # checkpoints are only kept for full index runs
+        self.checkpoints = None
+        # only the changes since this date are indexed in incremental runs
+        self.since = None
+        self.started = timezone.now()
         self.es_client = connections.get_connection()
-        if self.reindex_last:
+        self.throughput = ThroughputMeter(self.verbose_name_plural)
+        if options["retry_failed"]:
+            self.handle_retrying()
+        elif options["incremental"]:
+            self.handle_incremental_indexing(options["since"])
+        elif self.reindex_last:
             self.handle_reindexing()
         else:
             self.handle_indexing()
+        self.report_throughput()
 
     def handle_reindexing(self):
         # Make sure the index exists...
@@ -107,30 +204,264 @@ class IndexCommand(ABC):
         )
 
     def handle_indexing(self):
-        # If we're indexing everything - clear the index.
-        self.clear_index()
-        self.document.init()
-        self.bulk_upsert()
-        index = Index(self.index)
-        index.refresh()
-        count = index.search().count()
+        # If we're indexing everything - build a new version of the index while the
+        # current version stays available, and switch the alias once it's complete.
+        checkpoints = IndexCheckpoint.objects.filter(index=self.index)
+        if self.resume:
+            checkpoint = checkpoints.first()
+            if not checkpoint or not Index(checkpoint.target_index).exists():
+                raise CommandError(f"There is no index run of {self.index} to resume.")
+            self.target_index = checkpoint.target_index
+            self.stdout.write(f"Resuming indexing into {self.target_index}.")
+        else:
+            # a new run supersedes the runs that didn't complete and their failures
+            for target_index in set(checkpoints.values_list("target_index", flat=True)):
+                Index(target_index).delete(ignore=404)
+            checkpoints.delete()
+            FailedIndexPage.objects.filter(index=self.index).delete()
+            self.target_index = create_index_version(self.document)
+            self.stdout.write(f"Indexing into {self.target_index}.")
+        self.checkpoints = {
+            checkpoint.service_id: checkpoint for checkpoint in checkpoints
+        }
+
+        try:
+            self.bulk_upsert()
+        except BaseException:
+            self.stdout.write(
+                f"Indexing into {self.target_index} was interrupted. Run the command "
+                "with --resume to continue from the last checkpoint."
+            )
+            raise
+
+        try:
+            activate_index_version(self.document, self.target_index)
+            count = validate_index_version(
+                self.index, self.target_index, self.min_count_ratio
+            )
+        except IndexValidationError as exc:
+            self.discard_index_run()
+            raise CommandError(f"{exc} The current index is kept.") from exc
+
+        swap_alias(self.index, self.target_index)
+        IndexCheckpoint.objects.filter(index=self.index).delete()
+        self.update_high_water_mark()
+        deleted = delete_old_index_versions(self.index, keep=self.keep_old_indices)
+        self.stdout.write(f"{self.index} now points to {self.target_index}.")
+        if deleted:
+            self.stdout.write(f"Deleted old indices: {', '.join(deleted)}.")
         self.stdout.write(f"{count} {self.verbose_name_plural} are received.")
 
-    def bulk_upsert(self):
-        bulk(
-            self.es_client,
-            self.batch_index(),
+        num_failed = FailedIndexPage.objects.filter(index=self.index).count()
+        if num_failed:
+            self.stdout.write(
+                f"{num_failed} pages failed to be indexed. Run the command with "
+                "--retry-failed to retry them."
+            )
+
+    def handle_incremental_indexing(self, since: Optional[date]):
+        check_if_index_exists(index=self.index)
+        if since is None:
+            high_water_mark = IndexHighWaterMark.objects.filter(
+                index=self.index
+            ).first()
+            if not high_water_mark:
+                raise CommandError(
+                    f"{self.index} has not been indexed completely yet. Run a full "
+                    "index first or pass --since."
+                )
+            # the changes are filtered on dates, so start on the day of the last run
+            since = timezone.localdate(high_water_mark.indexed_until)
+        self.since = since
+        self.stdout.write(
+            f"Indexing the {self.verbose_name_plural} changed since {self.since}."
         )
 
+        self.bulk_upsert()
+        Index(self.index).refresh()
+        self.update_high_water_mark()
+        self.stdout.write(
+            f"{self.throughput.get_count('index')} {self.verbose_name_plural} "
+            "are reindexed."
+        )
+
+    def update_high_water_mark(self):
+        IndexHighWaterMark.objects.update_or_create(
+            index=self.index, defaults={"indexed_until": self.started}
+        )
+
+    def handle_retrying(self):
+        check_if_index_exists(index=self.index)
+        failed_pages = list(FailedIndexPage.objects.filter(index=self.index))
+        self.stdout.write(f"Retrying {len(failed_pages)} failed pages.")
+        self.bulk_upsert(self.retry_batch_index(failed_pages))
+
+        num_failed = FailedIndexPage.objects.filter(index=self.index).count()
+        self.stdout.write(
+            f"{len(failed_pages) - num_failed} pages are indexed, {num_failed} "
+            "pages failed again."
+        )
+
+    def retry_batch_index(self, failed_pages) -> Iterator:
+        for failed_page in failed_pages:
+            try:
+                yield from self.retry_page(
+                    failed_page.service, dict(failed_page.query_params)
+                )
+            except Exception:
+                logger.warning("Retrying page %s failed.", failed_page, exc_info=True)
+                failed_page.attempts += 1
+                failed_page.error = traceback.format_exc()
+                failed_page.save()
+                continue
+            self.on_indexed(failed_page.delete)
+
+    def retry_page(self, service: Service, query_params: dict) -> Iterator:
+        raise CommandError(f"Retrying failed pages is not supported for {self.index}.")
+
+    def discard_index_run(self):
+        Index(self.target_index).delete(ignore=404)
+        IndexCheckpoint.objects.filter(index=self.index).delete()
+
+    def get_start_query_params(
+        self, service: Service, query_params: dict
+    ) -> Optional[dict]:
+        """
+        Return the query parameters of the first page to fetch from the service.
+
+        Returns ``None`` if the service was indexed completely in the resumed run.
+        """
+        checkpoint = (self.checkpoints or {}).get(service.id)
+        if not self.resume or not checkpoint:
+            return query_params
+        if checkpoint.finished:
+            return None
+        return checkpoint.query_params
+
+    def page_indexed(
+        self,
+        service: Service,
+        next_query_params: Optional[dict],
+        num_documents: int,
+        last_key: str = "",
+    ) -> None:
+        """
+        Save the checkpoint of the service once the documents of the page are in ES.
+        """
+        if self.checkpoints is None:
+            return
+
+        next_query_params = dict(next_query_params) if next_query_params else None
+
+        def save_checkpoint():
+            checkpoint = self.checkpoints.get(service.id)
+            if checkpoint is None:
+                checkpoint = self.checkpoints[service.id] = IndexCheckpoint(
+                    index=self.index, target_index=self.target_index, service=service
+                )
+            checkpoint.query_params = next_query_params or {}
+            checkpoint.finished = next_query_params is None
+            checkpoint.pages_indexed += 1
+            checkpoint.documents_indexed += num_documents
+            if last_key:
+                checkpoint.last_key = last_key
+            checkpoint.save()
+
+        self.on_indexed(save_checkpoint)
+
+    def page_failed(
+        self,
+        service: Service,
+        query_params: dict,
+        next_query_params: Optional[dict],
+        error: str,
+    ) -> None:
+        """
+        Record a page that could not be indexed and carry on with the next page.
+        """
+        logger.warning(
+            "Indexing page %r of %s failed:\n%s", query_params, service, error
+        )
+        FailedIndexPage.objects.create(
+            index=self.index, service=service, query_params=query_params, error=error
+        )
+        self.page_indexed(service, next_query_params, 0)
+
+    def on_indexed(self, callback: Callable[[], None]) -> None:
+        """
+        Call the callback once all the documents generated so far are indexed.
+        """
+        self.pending_callbacks.append((self.generated, callback))
+
+    def bulk_upsert(self, actions: Optional[Iterator] = None):
+        self.generating_duration = 0.0
+        self.generated = 0
+        self.pending_callbacks = deque()
+        if actions is None:
+            actions = self.batch_index()
+        actions = self.measure_generating(actions)
+        actions = self.set_target_index(actions)
+        if self.bulk_workers > 1:
+            results = parallel_bulk(
+                self.es_client,
+                actions,
+                thread_count=self.bulk_workers,
+                chunk_size=self.chunk_size,
+            )
+        else:
+            results = streaming_bulk(
+                self.es_client, actions, chunk_size=self.chunk_size
+            )
+
+        indexed = 0
+        start = time.monotonic()
+        for _ok, _info in results:
+            indexed += 1
+            self.run_pending_callbacks(indexed)
+        # the callbacks registered after the last document
+        self.run_pending_callbacks(indexed)
+        duration = time.monotonic() - start
+        # with streaming bulk the documents are generated in between the bulk requests
+        if self.bulk_workers <= 1:
+            duration -= self.generating_duration
+        self.throughput.record("index", indexed, duration)
+
+    def measure_generating(self, actions: Iterator) -> Iterator:
+        """
+        Keep track of the time spent in generating the documents to index.
+        """
+        actions = iter(actions)
+        while True:
+            start = time.monotonic()
+            try:
+                action = next(actions)
+            except StopIteration:
+                return
+            finally:
+                self.generating_duration += time.monotonic() - start
+            yield action
+
+    def run_pending_callbacks(self, indexed: int) -> None:
+        while self.pending_callbacks and self.pending_callbacks[0][0] <= indexed:
+            _generated, callback = self.pending_callbacks.popleft()
+            callback()
+
+    def set_target_index(self, actions: Iterator[dict]) -> Iterator[dict]:
+        for action in actions:
+            action["_index"] = self.target_index
+            self.generated += 1
+            yield action
+
+    def report_throughput(self):
+        for line in self.throughput.report():
+            perf_logger.info("Throughput %s", line)
+            self.stdout.write(f"Throughput {line}")
+
     def check_if_done_batching(self) -> bool:
         if self.reindex_last and self.reindex_last - self.reindexed == 0:
             return True
         return False
 
-    def clear_index(self):
-        index = Index(self.index)
-        index.delete(ignore=404)
-
     @abstractmethod
     def batch_index(self) -> Iterator:
         pass
@@ -1,37 +1,199 @@
 import logging
-from typing import Iterator
+from typing import Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+from uuid import UUID
 
 from django.conf import settings
 from django.core.management import BaseCommand
+from django.core.management.base import CommandParser
 
 from elasticsearch.helpers import bulk, scan
+from elasticsearch_dsl import Index
 from elasticsearch_dsl.connections import connections
+from requests import RequestException
+from zds_client import Client, ClientError
+from zgw_consumers.concurrent import parallel
+from zgw_consumers.constants import APITypes
+from zgw_consumers.models import Service
 
-from zac.core.services import get_zaken_all
+from zac.core.models import CoreConfig
+from zac.core.services import _client_from_url
 
 from ...utils import check_if_index_exists
 
+logger = logging.getLogger(__name__)
+
+# index name -> (ES index, API resource)
+INDICES = {
+    "zaken": (settings.ES_INDEX_ZAKEN, "zaak"),
+    "documenten": (settings.ES_INDEX_DOCUMENTEN, "enkelvoudiginformatieobject"),
+    "objecten": (settings.ES_INDEX_OBJECTEN, "object"),
+}
+
+
+def iter_api_uuids(client: Client, resource: str) -> Iterator[int]:
+    """
+    Page through the resource in the API and yield the UUIDs as integers.
+    """
+    query_params = {}
+    while True:
+        response = client.list(resource, query_params=query_params)
+        # the Objects API v1 is not paginated
+        results = response if isinstance(response, list) else response["results"]
+        for result in results:
+            yield UUID(result["url"].rstrip("/").rsplit("/", 1)[1]).int
+
+        if isinstance(response, list) or not response["next"]:
+            return
+        query = parse_qs(urlparse(response["next"]).query)
+        query_params["page"] = query["page"][0]
+
+
+def exists_in_api(resource: str, url: Optional[str]) -> Optional[bool]:
+    """
+    Check if the resource still exists, or ``None`` if that can't be determined.
+    """
+    if not url:
+        return None
+    client = _client_from_url(url)
+    if client is None:
+        return None
+
+    try:
+        client.retrieve(resource, url=url)
+    except ClientError as exc:
+        response = getattr(exc.__cause__, "response", None)
+        if response is not None and response.status_code in (404, 410):
+            return False
+        return None
+    except RequestException:
+        return None
+    return True
+
 
 class Command(BaseCommand):
-    help = "Delete documents from ES by checking if they exist in the ZAKEN API"
+    help = (
+        "Delete documents from ES by checking if they exist in the APIs they were "
+        "indexed from."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--index",
+            action="append",
+            dest="indices",
+            choices=list(INDICES),
+            help="Indicates the index to check, can be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the stale documents, don't delete them.",
+        )
+        parser.add_argument(
+            "--max-workers",
+            type=int,
+            help="Indicates the max number of parallel workers. Defaults to 4.",
+            default=4,
+        )
 
     def handle(self, **options):
         check_if_index_exists()
-        self.zaken_uuids = [str(zaak.uuid) for zaak in get_zaken_all()]
-        self.stdout.write("Found %d zaken in Open Zaak API." % len(self.zaken_uuids))
-        self.bulk_delete_zaken()
+        self.dry_run = options["dry_run"]
+        self.max_workers = options["max_workers"]
+
+        for name in options["indices"] or list(INDICES):
+            index, resource = INDICES[name]
+            if not Index(index).exists():
+                self.stdout.write(f"Index {index} does not exist, skipping.")
+                continue
 
-    def find_deleted_zaken(self) -> Iterator[dict]:
-        for zd in scan(
+            clients = self.get_clients(name)
+            if not clients:
+                self.stdout.write(f"No API is configured for {index}, skipping.")
+                continue
+
+            self.reconcile(index, resource, clients)
+
+    def get_clients(self, name: str) -> List[Client]:
+        if name == "objecten":
+            objects_api = CoreConfig.get_solo().primary_objects_api
+            return [objects_api.build_client()] if objects_api else []
+
+        api_type = APITypes.zrc if name == "zaken" else APITypes.drc
+        return [
+            service.build_client()
+            for service in Service.objects.filter(api_type=api_type)
+        ]
+
+    def reconcile(self, index: str, resource: str, clients: List[Client]) -> None:
+        # the UUIDs are kept as integers, which is a lot more compact than strings
+        api_uuids: Set[int] = set()
+        for client in clients:
+            api_uuids.update(iter_api_uuids(client, resource))
+        num_api = len(api_uuids)
+
+        # Every document that is found in the API is removed from the set, so what's
+        # left are the objects that are missing from the index.
+        num_indexed = 0
+        candidates = []
+        for hit in scan(
             connections.get_connection(),
-            index=settings.ES_INDEX_ZAKEN,
-            _source=False,
+            index=index,
+            _source=["url"],
         ):
-            if zd["_id"] not in self.zaken_uuids:
-                logging.info("Zaak with uuid %s has been deleted.", zd["_id"])
-                zd["_op_type"] = "delete"
-                del zd["_type"]  # To shutup ElasticsearchDeprecation warnings
-                yield zd
-
-    def bulk_delete_zaken(self):
-        bulk(connections.get_connection(), self.find_deleted_zaken())
+            num_indexed += 1
+            try:
+                api_uuids.remove(UUID(hit["_id"]).int)
+            except (KeyError, ValueError):
+                candidates.append((hit["_id"], hit["_source"].get("url")))
+        num_missing = len(api_uuids)
+        del api_uuids
+
+        stale, num_created, num_unverified = self.verify_candidates(
+            resource, candidates
+        )
+        for _id, url in stale:
+            logger.info("%s %s (%s) has been deleted.", resource, _id, url)
+
+        self.stdout.write(
+            f"{index}: {num_api} in the APIs, {num_indexed} indexed, "
+            f"{num_missing} missing from the index, {len(stale)} stale, "
+            f"{num_created} created during the check, {num_unverified} could not "
+            "be verified."
+        )
+        if stale and not self.dry_run:
+            bulk(
+                connections.get_connection(),
+                (
+                    {"_op_type": "delete", "_index": index, "_id": _id}
+                    for _id, _url in stale
+                ),
+            )
+            self.stdout.write(f"Deleted {len(stale)} stale documents from {index}.")
+
+    def verify_candidates(
+        self, resource: str, candidates: List[Tuple[str, Optional[str]]]
+    ) -> Tuple[List[Tuple[str, Optional[str]]], int, int]:
+        """
+        Check the documents that were not found in the API one by one.
+
+        Objects created after the API was paged through are indexed, but not part of
+        the UUIDs fetched from the API - they must not be deleted.
+        """
+        with parallel(max_workers=self.max_workers) as executor:
+            results = list(
+                executor.map(
+                    lambda candidate: exists_in_api(resource, candidate[1]), candidates
+                )
+            )
+
+        stale = [
+            candidate
+            for candidate, exists in zip(candidates, results)
+            if exists is False
+        ]
+        num_created = sum(1 for exists in results if exists is True)
+        num_unverified = sum(1 for exists in results if exists is None)
+        return stale, num_created, num_unverified
@@ -0,0 +1,66 @@
+from django.core.management import BaseCommand
+from django.core.management.base import CommandError, CommandParser
+from django.http import HttpRequest
+
+from zac.accounts.models import User
+
+from ...drf_api.utils import get_search_for_query
+from ...export import EXPORT_FORMATS, write_export
+from ...models import SearchReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Export all results of a search report, limited to the zaken the given "
+        "user is allowed to see."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument("report", type=int, help="ID of the search report.")
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Username of the user whose permissions are applied.",
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=sorted(EXPORT_FORMATS),
+            default="csv",
+            help="File format of the export. Defaults to csv.",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write the export to. Defaults to stdout.",
+        )
+
+    def handle(self, **options):
+        try:
+            search_report = SearchReport.objects.get(pk=options["report"])
+        except SearchReport.DoesNotExist:
+            raise CommandError(f"Search report {options['report']} does not exist.")
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        file_format = options["file_format"]
+        if file_format == "xlsx" and not options["output"]:
+            raise CommandError("An xlsx export needs an --output file.")
+
+        request = HttpRequest()
+        request.user = user
+        request.auth = None
+        search = get_search_for_query(request, {**search_report.query})
+        fields = search_report.query["fields"]
+
+        if not options["output"]:
+            stream = EXPORT_FORMATS[file_format][1]
+            for chunk in stream(search, fields):
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "wb") as output:
+            write_export(search, fields, file_format, output)
+        self.stdout.write(f"Exported search report '{search_report}'.")
@@ -20,6 +20,18 @@ class Command(BaseCommand):
             type=int,
             help="Indicates the number of the most recent documents to be reindexed.",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Indicates the number of documents sent to ES per bulk request. Defaults to 500.",
+            default=500,
+        )
+        parser.add_argument(
+            "--bulk-workers",
+            type=int,
+            help="Indicates the number of parallel bulk requests to ES. Defaults to 1.",
+            default=1,
+        )
         parser.add_argument(
             "--progress",
             "--show-progress",
@@ -49,12 +61,18 @@ class Command(BaseCommand):
         if max_workers := options.get("max_workers"):
             args.append(f"--max-workers={max_workers}")
 
+        if chunk_size := options.get("chunk_size"):
+            args.append(f"--chunk-size={chunk_size}")
+
+        if bulk_workers := options.get("bulk_workers"):
+            args.append(f"--bulk-workers={bulk_workers}")
+
         self.stdout.write(f"Calling index_zaken {' '.join(args)}")
         call_command("index_zaken", *args)
         self.stdout.write("Done indexing zaken.")
         self.stdout.write(f"Calling index_documenten {' '.join(args)}")
         call_command("index_documenten", *args)
         self.stdout.write("Done indexing documenten.")
-        self.stdout.write(f"Calling index_objecten")
-        call_command("index_objecten")
+        self.stdout.write(f"Calling index_objecten {' '.join(args)}")
+        call_command("index_objecten", *args)
         self.stdout.write("Done indexing objecten.")
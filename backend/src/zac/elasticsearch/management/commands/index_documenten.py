@@ -1,26 +1,41 @@
 import logging
-from typing import Dict, Iterator, List
+import traceback
+from typing import Dict, Iterator, List, Optional
 
 from django.conf import settings
 from django.core.management import BaseCommand
 
 import click
-from elasticsearch_dsl.query import Bool, Nested, Terms
+from elasticsearch_dsl.query import Bool, Nested, Range, Terms
+from zds_client import ClientError
+from zgw_consumers.api_models.base import factory
 from zgw_consumers.api_models.documenten import Document
+from zgw_consumers.concurrent import parallel
 from zgw_consumers.constants import APITypes
 from zgw_consumers.models import Service
 
-from zac.core.services import get_documenten_all_paginated
+from zac.core.services import _client_from_url, get_documenten_all_paginated
+from zac.utils.memoization import memoization_scope
 
 from ...api import create_informatieobject_document, create_related_zaak_document
 from ...documents import InformatieObjectDocument, RelatedZaakDocument, ZaakDocument
 from ...utils import check_if_index_exists
-from ..utils import get_memory_usage
+from ..utils import get_memory_usage, get_page_number
 from .base_index import IndexCommand
 
 perf_logger = logging.getLogger("performance")
 
 
+def fetch_informatieobject(url: str) -> Optional[Document]:
+    client = _client_from_url(url)
+    try:
+        response = client.retrieve("enkelvoudiginformatieobject", url=url)
+    except ClientError:
+        # the informatieobject was destroyed
+        return None
+    return factory(Document, response)
+
+
 class Command(IndexCommand, BaseCommand):
     help = "Create documents in ES by indexing all informatieobjects from DRC APIs. Requires zaken to already be indexed."
     _index = settings.ES_INDEX_DOCUMENTEN
@@ -33,19 +48,26 @@ class Command(IndexCommand, BaseCommand):
 
     def batch_index(self) -> Iterator[InformatieObjectDocument]:
         self.zaken_index_exists()
+        if self.since:
+            yield from self.changed_batch_index()
+            return
+
         self.stdout.write(
             f"Starting {self.verbose_name_plural} retrieval from the configured APIs."
         )
 
-        drcs = Service.objects.filter(api_type=APITypes.drc)
+        drcs = list(Service.objects.filter(api_type=APITypes.drc))
         clients = [drc.build_client() for drc in drcs]
 
         # report back which clients will be iterated over and how many zaken each has
         total_expected = 0
+        last_pages = []
         for client in clients:
             # fetch the first page so we get the total count from the backend
             response = client.list(self.type)
             client_total_num = response["count"]
+            page_size = len(response["results"]) or 1
+            last_pages.append(-(-client_total_num // page_size))
             total_expected += client_total_num
             self.stdout.write(
                 f"Number of {self.verbose_name_plural} in {client.base_url}:\n  {client_total_num}."
@@ -62,30 +84,64 @@ class Command(IndexCommand, BaseCommand):
             label="Indexing ",
             file=self.stdout.progress_file(),
         ) as bar:
-            for client in clients:
+            for drc, client, last_page in zip(drcs, clients, last_pages):
+                query_params = self.get_start_query_params(drc, {})
+                if query_params is None:
+                    self.stdout.write(
+                        f"{self.verbose_name_plural} in {client.base_url} are already indexed."
+                    )
+                    continue
+
                 perf_logger.info("Starting indexing for client %s.", client)
                 perf_logger.info("Memory usage: %s.", get_memory_usage())
-                get_more = True
-                query_params = {}
-                while get_more:
+                while query_params is not None:
                     # if this is running for 1h+, DRC expires the token
                     client.refresh_auth()
                     perf_logger.info(
                         "Fetching indexable objects for client, query params: %r.",
                         query_params,
                     )
-                    documenten, query_params = get_documenten_all_paginated(
-                        client, query_params=query_params
-                    )
-                    # Make sure we're not retrieving more information than necessary on the zaken
-                    if self.reindex_last and self.reindex_last - self.reindexed <= len(
-                        documenten
-                    ):
-                        documenten = documenten[: self.reindex_last - self.reindexed]
+                    try:
+                        documenten, next_query_params = get_documenten_all_paginated(
+                            client, query_params=dict(query_params)
+                        )
+                        if not next_query_params.get("page", None):
+                            next_query_params = None
+                        # Make sure we're not retrieving more information than necessary on the zaken
+                        if (
+                            self.reindex_last
+                            and self.reindex_last - self.reindexed <= len(documenten)
+                        ):
+                            documenten = documenten[
+                                : self.reindex_last - self.reindexed
+                            ]
+
+                        yield from self.documenten_generator(documenten)
+                    except Exception:
+                        # only a full index run can carry on without the page
+                        if self.checkpoints is None:
+                            raise
+                        page_number = get_page_number(query_params)
+                        next_query_params = (
+                            {**query_params, "page": [page_number + 1]}
+                            if page_number < last_page
+                            else None
+                        )
+                        self.page_failed(
+                            drc, query_params, next_query_params, traceback.format_exc()
+                        )
+                    else:
+                        self.page_indexed(
+                            drc,
+                            next_query_params,
+                            len(documenten),
+                            last_key=documenten[-1].url if documenten else "",
+                        )
+                        bar.update(len(documenten))
 
-                    get_more = query_params.get("page", None)
-                    yield from self.documenten_generator(documenten)
-                    bar.update(len(documenten))
+                    query_params = next_query_params
+                    if self.check_if_done_batching():
+                        break
 
                 if self.check_if_done_batching():
                     self.stdout.end_progress()
@@ -93,6 +149,53 @@ class Command(IndexCommand, BaseCommand):
 
         self.stdout.end_progress()
 
+    def changed_batch_index(self) -> Iterator[InformatieObjectDocument]:
+        # The Documenten API can't filter on modification dates - in incremental runs
+        # the informatieobjecten of the zaken that started since the last run are
+        # indexed.
+        zaken = (
+            ZaakDocument.search()
+            .filter(
+                Bool(
+                    should=[
+                        Range(startdatum={"gte": self.since}),
+                        Range(registratiedatum={"gte": self.since}),
+                    ],
+                    minimum_should_match=1,
+                )
+            )
+            .source(["zaakinformatieobjecten.informatieobject"])
+        )
+        urls = sorted(
+            {
+                zio.informatieobject
+                for zaak in zaken.scan()
+                for zio in zaak.zaakinformatieobjecten
+            }
+        )
+        self.stdout.write(
+            f"{len(urls)} {self.verbose_name_plural} are related to changed zaken."
+        )
+
+        with parallel(max_workers=self.max_workers) as executor:
+            for start in range(0, len(urls), self.chunk_size):
+                chunk = urls[start : start + self.chunk_size]
+                # the threads of the executor share the scope of the chunk
+                with memoization_scope(f"index_documenten: {len(chunk)} documenten"):
+                    documenten = [
+                        document
+                        for document in executor.map(fetch_informatieobject, chunk)
+                        if document
+                    ]
+                yield from self.documenten_generator(documenten)
+
+    def retry_page(
+        self, service: Service, query_params: dict
+    ) -> Iterator[InformatieObjectDocument]:
+        client = service.build_client()
+        documenten, _ = get_documenten_all_paginated(client, query_params=query_params)
+        yield from self.documenten_generator(documenten)
+
     def documenten_generator(
         self, documenten: List[Document]
     ) -> Iterator[InformatieObjectDocument]:
@@ -1,151 +1,276 @@
 import logging
-from typing import Dict, Iterator, List
+import time
+import traceback
+from typing import Dict, Iterator, List, Optional
 
 from django.conf import settings
 from django.core.management import BaseCommand
-from django.core.management.base import CommandParser
+from django.core.management.base import CommandError
 
-from elasticsearch.helpers import bulk
-from elasticsearch_dsl import Index
-from elasticsearch_dsl.connections import connections
-from elasticsearch_dsl.query import Bool, Nested, Terms
+import click
+from elasticsearch_dsl.query import Bool, Nested, Range, Terms
+from zds_client import Client, ClientError
+from zgw_consumers.concurrent import parallel
+from zgw_consumers.models import Service
 
 from zac.core.models import CoreConfig
-from zac.core.services import fetch_objecttypes
+from zac.core.services import (
+    fetch_objecttype,
+    fetch_objecttypes,
+    get_objects_all_paginated,
+)
 
 from ...api import (
     create_object_document,
     create_objecttype_document,
     create_related_zaak_document,
 )
-from ...documents import (
-    ObjectDocument,
-    ObjectTypeDocument,
-    RelatedZaakDocument,
-    ZaakDocument,
-)
+from ...documents import ObjectDocument, RelatedZaakDocument, ZaakDocument
 from ...utils import check_if_index_exists
-from ..utils import ProgressOutputWrapper
+from ..utils import get_memory_usage, get_page_number
+from .base_index import IndexCommand
 
 perf_logger = logging.getLogger("performance")
 
 
-class Command(BaseCommand):
-    """
-    Based on the OBJECTS V1 API - TODO migrate to V2 for pagination support.
+def fetch_object(client: Client, url: str) -> Optional[dict]:
+    try:
+        return client.retrieve("object", url=url)
+    except ClientError:
+        # the object was destroyed
+        return None
 
-    """
 
+class Command(IndexCommand, BaseCommand):
     help = "Create documents in ES by indexing all objecten from OBJECTS API. Requires zaken to be indexed already."
-    index = settings.ES_INDEX_OBJECTEN
-
-    def add_arguments(self, parser: CommandParser) -> None:
-        super().add_arguments(parser)
-        parser.add_argument(
-            "--max-workers",
-            type=int,
-            help="Indicates the max number of parallel workers (for memory management). Defaults to 4.",
-            default=4,
-        )
-        parser.add_argument(
-            "--progress",
-            "--show-progress",
-            action="store_true",
-            help=(
-                "Show a progress bar. Showing a progress bar disables other "
-                "fine-grained feedback."
-            ),
-        )
-
-    def handle(self, **options):
-        # redefine self.stdout as ProgressOutputWrapper cause logging is dependent whether
-        # we have a progress bar
-        show_progress = options["progress"]
-        self.stdout = ProgressOutputWrapper(show_progress, out=self.stdout._out)
-
-        self.max_workers = options["max_workers"]
-        self.es_client = connections.get_connection()
-        self.handle_indexing()
-
-    def handle_indexing(self):
-        # If we're indexing everything - clear the index.
-        self.clear_index()
-        ObjectDocument.init()
-        self.bulk_upsert()
-        index = Index(settings.ES_INDEX_OBJECTEN)
-        index.refresh()
-        count = index.search().count()
-        self.stdout.write(f"{count} objects are received from OBJECTS API.")
-
-    def bulk_upsert(self):
-        bulk(
-            self.es_client,
-            self.batch_index(),
-        )
+    _index = settings.ES_INDEX_OBJECTEN
+    _type = "object"
+    _document = ObjectDocument
+    _verbose_name_plural = "objecten"
 
     def zaken_index_exists(self) -> bool:
-        check_if_index_exists(index=settings.ES_INDEX_ZAKEN)
+        return check_if_index_exists(index=settings.ES_INDEX_ZAKEN)
+
+    def get_service(self) -> Service:
+        service = CoreConfig.get_solo().primary_objects_api
+        if not service:
+            raise CommandError("No objects API has been configured yet.")
+        return service
 
     def batch_index(self) -> Iterator[ObjectDocument]:
         self.zaken_index_exists()
         self.stdout.write("Preloading all object types...")
-        ots = {ot["url"]: ot for ot in fetch_objecttypes()}
-        self.stdout.write(f"Fetched {len(ots)} object types.")
-        self.stdout.write("Starting object retrieval from the configured OBJECTs API.")
+        self.objecttypes = {ot["url"]: ot for ot in fetch_objecttypes()}
+        self.stdout.write(f"Fetched {len(self.objecttypes)} object types.")
+        if self.since:
+            yield from self.changed_batch_index()
+            return
 
-        conf = CoreConfig.get_solo()
-        object_service = conf.primary_objects_api
-        client = object_service.build_client()
+        service = self.get_service()
+        client = service.build_client()
+        self.stdout.write(
+            f"Starting {self.verbose_name_plural} retrieval from {client.base_url}."
+        )
 
-        objects = client.list("object")
-        for obj in objects:
-            obj["type"] = ots[obj["type"]]
+        # The Objects API v1 is not paginated and returns all objects at once - they
+        # are processed in batches all the same.
+        response = client.list(self.type, query_params={"pageSize": 1})
+        if isinstance(response, list):
+            total_expected, unpaginated = len(response), response
+        else:
+            total_expected, unpaginated = response["count"], None
+        last_page = -(-total_expected // self.chunk_size)
+        self.stdout.write(
+            f"Number of {self.verbose_name_plural} in {client.base_url}:\n  {total_expected}."
+        )
+        if self.reindex_last:
+            total_expected = min(total_expected, self.reindex_last)
 
-        yield from self.documenten_generator(objects)
+        query_params = self.get_start_query_params(
+            service, {"pageSize": self.chunk_size}
+        )
+        if query_params is None:
+            self.stdout.write(
+                f"{self.verbose_name_plural} in {client.base_url} are already indexed."
+            )
+            return
+
+        self.stdout.write("Now the real work starts, hold on!")
+        self.stdout.start_progress()
+        perf_logger.info("Starting indexing for client %s.", client)
+
+        with click.progressbar(
+            length=total_expected,
+            label="Indexing ",
+            file=self.stdout.progress_file(),
+        ) as bar:
+            while query_params is not None:
+                perf_logger.info(
+                    "Fetching indexable objects for client, query params: %r.",
+                    query_params,
+                )
+                perf_logger.info("Memory usage: %s.", get_memory_usage())
+                try:
+                    start = time.monotonic()
+                    if unpaginated is not None:
+                        objects, next_query_params = unpaginated, {"page": None}
+                        unpaginated = None
+                    else:
+                        objects, next_query_params = get_objects_all_paginated(
+                            client, query_params=dict(query_params)
+                        )
+                    if not next_query_params.get("page", None):
+                        next_query_params = None
+                    self.throughput.record(
+                        "fetch", len(objects), time.monotonic() - start
+                    )
+
+                    # Make sure we're not indexing more than necessary
+                    if self.reindex_last and self.reindex_last - self.reindexed <= len(
+                        objects
+                    ):
+                        objects = objects[: self.reindex_last - self.reindexed]
+
+                    for offset in range(0, len(objects), self.chunk_size):
+                        yield from self.objecten_generator(
+                            objects[offset : offset + self.chunk_size]
+                        )
+                except Exception:
+                    # only a full index run can carry on without the page
+                    if self.checkpoints is None:
+                        raise
+                    page_number = get_page_number(query_params)
+                    next_query_params = (
+                        {**query_params, "page": [page_number + 1]}
+                        if page_number < last_page
+                        else None
+                    )
+                    self.page_failed(
+                        service, query_params, next_query_params, traceback.format_exc()
+                    )
+                else:
+                    self.page_indexed(
+                        service,
+                        next_query_params,
+                        len(objects),
+                        last_key=objects[-1]["url"] if objects else "",
+                    )
+                    bar.update(len(objects))
 
-    def documenten_generator(self, objects: List[Dict]) -> Iterator[ObjectDocument]:
-        object_documenten = self.create_objecten_documenten(objects)
-        objecttype_documenten = self.create_objecttype_documenten(objects)
+                query_params = next_query_params
+                if self.check_if_done_batching():
+                    break
+
+        self.stdout.end_progress()
+
+    def changed_batch_index(self) -> Iterator[ObjectDocument]:
+        # The objects are not filtered on modification dates - in incremental runs
+        # the objecten related to the zaken that started since the last run are
+        # indexed.
+        service = self.get_service()
         zaken = (
             ZaakDocument.search()
             .filter(
-                Nested(
-                    path="zaakobjecten",
-                    query=Bool(
-                        filter=Terms(
-                            zaakobjecten__object=[obj["url"] for obj in objects]
-                        )
-                    ),
+                Bool(
+                    should=[
+                        Range(startdatum={"gte": self.since}),
+                        Range(registratiedatum={"gte": self.since}),
+                    ],
+                    minimum_should_match=1,
                 )
             )
-            .source(
-                [
-                    "identificatie",
-                    "url",
-                    "omschrijving",
-                    "bronorganisatie",
-                    "zaakobjecten.object",
-                    "zaaktype",
-                    "vertrouwelijkheidaanduiding",
+            .source(["zaakobjecten.object"])
+        )
+        urls = sorted(
+            {
+                zaakobject.object
+                for zaak in zaken.scan()
+                for zaakobject in zaak.zaakobjecten
+                if zaakobject.object.startswith(service.api_root)
+            }
+        )
+        self.stdout.write(
+            f"{len(urls)} {self.verbose_name_plural} are related to changed zaken."
+        )
+
+        client = service.build_client()
+        with parallel(max_workers=self.max_workers) as executor:
+            for start in range(0, len(urls), self.chunk_size):
+                objects = [
+                    obj
+                    for obj in executor.map(
+                        lambda url: fetch_object(client, url),
+                        urls[start : start + self.chunk_size],
+                    )
+                    if obj
                 ]
+                yield from self.objecten_generator(objects)
+
+    def retry_page(
+        self, service: Service, query_params: dict
+    ) -> Iterator[ObjectDocument]:
+        client = service.build_client()
+        objects, _ = get_objects_all_paginated(client, query_params=query_params)
+        for offset in range(0, len(objects), self.chunk_size):
+            yield from self.objecten_generator(
+                objects[offset : offset + self.chunk_size]
             )
-            .execute()
-        )
-        related_zaken = self.create_related_zaken(zaken)
-        for obj in objects:
-            object_document = object_documenten[obj["url"]]
-            object_document.type = objecttype_documenten[obj["url"]]
-            object_document.related_zaken = related_zaken.get(obj["url"], [])
-            od = object_document.to_dict(True)
-            yield od
-
-    def clear_index(self):
-        index = Index(self.index)
-        index.delete(ignore=404)
+
+    def get_objecttype(self, url: str) -> dict:
+        if url not in self.objecttypes:
+            self.objecttypes[url] = fetch_objecttype(url)
+        return self.objecttypes[url]
+
+    def objecten_generator(self, objects: List[Dict]) -> Iterator[ObjectDocument]:
+        with self.throughput.measure("enrich", len(objects)):
+            for obj in objects:
+                if isinstance(obj["type"], str):
+                    obj["type"] = self.get_objecttype(obj["type"])
+
+            # The related zaken are looked up per batch, to stay well below the
+            # maximum number of terms in an ES query.
+            zaken = (
+                ZaakDocument.search()
+                .filter(
+                    Nested(
+                        path="zaakobjecten",
+                        query=Bool(
+                            filter=Terms(
+                                zaakobjecten__object=[obj["url"] for obj in objects]
+                            )
+                        ),
+                    )
+                )
+                .source(
+                    [
+                        "identificatie",
+                        "url",
+                        "omschrijving",
+                        "bronorganisatie",
+                        "zaakobjecten.object",
+                        "zaaktype",
+                        "vertrouwelijkheidaanduiding",
+                    ]
+                )
+            )
+            related_zaken = self.create_related_zaken(zaken.scan())
+            object_documenten = []
+            for obj in objects:
+                object_document = create_object_document(obj)
+                object_document.type = create_objecttype_document(obj["type"])
+                object_document.related_zaken = related_zaken.get(obj["url"], [])
+                object_documenten.append(object_document.to_dict(True))
+
+        for object_document in object_documenten:
+            yield object_document
+            if self.reindex_last:
+                self.reindexed += 1
+                if self.check_if_done_batching():
+                    return
 
     def create_related_zaken(
-        self, zaken: List[ZaakDocument]
-    ) -> Dict[str, RelatedZaakDocument]:
+        self, zaken: Iterator[ZaakDocument]
+    ) -> Dict[str, List[RelatedZaakDocument]]:
         obj_to_zaken = {}
         for zaak in zaken:
             related_zaak = create_related_zaak_document(zaak)
@@ -156,13 +281,3 @@ class Command(BaseCommand):
                     obj_to_zaken[obj.object] = [related_zaak]
 
         return obj_to_zaken
-
-    def create_objecten_documenten(
-        self, objects: List[Dict]
-    ) -> Dict[str, ObjectDocument]:
-        return {obj["url"]: create_object_document(obj) for obj in objects}
-
-    def create_objecttype_documenten(
-        self, objects: List[Dict]
-    ) -> Dict[str, ObjectTypeDocument]:
-        return {obj["url"]: create_objecttype_document(obj["type"]) for obj in objects}
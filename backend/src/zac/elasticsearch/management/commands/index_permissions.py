@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+
+from elasticsearch_dsl import Index
+
+from zac.accounts.models import User
+from zac.accounts.permission_snapshot import build_snapshot
+
+from ...documents import PermissionDocument
+from ...permission_index import update_permission_document
+from ...utils import delete_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the index with the atomic permissions of the users."
+
+    def handle(self, **options):
+        index_name = PermissionDocument._index._name
+        delete_index(index_name)
+        PermissionDocument.init()
+
+        users = User.objects.filter(atomic_permissions__isnull=False).distinct()
+        for user in users.iterator():
+            update_permission_document(user, build_snapshot(user=user))
+
+        Index(index_name).refresh()
+        self.stdout.write(f"Indexed the atomic permissions of {users.count()} users.")
@@ -1,10 +1,15 @@
 import logging
-from typing import Dict, Iterator, List
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
 
 from django.conf import settings
 from django.core.management import BaseCommand
 
 import click
+from zds_client import Client
 from zgw_consumers.concurrent import parallel
 from zgw_consumers.constants import APITypes
 from zgw_consumers.models import Service
@@ -19,6 +24,7 @@ from zac.core.services import (
     get_zaaktypen,
     get_zaken_all_paginated,
 )
+from zac.utils.memoization import memoization_scope
 from zgw.models import Zaak
 
 from ...api import (
@@ -30,19 +36,25 @@ from ...api import (
     create_zaakobject_document,
     create_zaaktype_document,
 )
-from ...documents import (
-    EigenschapDocument,
-    RolDocument,
-    StatusDocument,
-    ZaakDocument,
-    ZaakObjectDocument,
-    ZaakTypeDocument,
-)
-from ..utils import get_memory_usage
+from ...documents import ZaakDocument, ZaakTypeDocument
+from ..utils import get_memory_usage, get_page_number
+from .base_index import IndexCommand
 
 perf_logger = logging.getLogger("performance")
 
-from .base_index import IndexCommand
+# sentinel put on the pages queue once a client has no more pages
+DONE = object()
+
+# a ZRC that fails this many pages in a row is considered to be down
+MAX_CONSECUTIVE_FAILED_PAGES = 5
+
+
+class Page(NamedTuple):
+    service: Service
+    query_params: dict
+    next_query_params: Optional[dict]
+    zaken: List[Zaak]
+    error: str = ""
 
 
 class Command(IndexCommand, BaseCommand):
@@ -52,6 +64,9 @@ class Command(IndexCommand, BaseCommand):
     _document = ZaakDocument
     _verbose_name_plural = "zaken"
 
+    # number of pages per client that are fetched ahead of the enrichment
+    prefetch_pages = 2
+
     def batch_index(self) -> Iterator[ZaakDocument]:
         self.stdout.write("Preloading all case types...")
         zaaktypen = {zt.url: zt for zt in get_zaaktypen()}
@@ -59,14 +74,22 @@ class Command(IndexCommand, BaseCommand):
 
         self.stdout.write("Starting zaken retrieval from the configured APIs")
 
-        zrcs = Service.objects.filter(api_type=APITypes.zrc)
+        zrcs = list(Service.objects.filter(api_type=APITypes.zrc))
         clients = [zrc.build_client() for zrc in zrcs]
+        if not clients:
+            return
 
         # report back which clients will be iterated over and how many zaken each has
         total_expected_zaken = 0
-        for client in clients:
+        with parallel(max_workers=len(clients)) as executor:
             # fetch the first page so we get the total count from the backend
-            response = client.list("zaak")
+            responses = list(
+                executor.map(
+                    lambda client: client.list("zaak", query_params=self.get_filters()),
+                    clients,
+                )
+            )
+        for client, response in zip(clients, responses):
             client_num_zaken = response["count"]
             total_expected_zaken += client_num_zaken
             self.stdout.write(
@@ -76,97 +99,266 @@ class Command(IndexCommand, BaseCommand):
         if self.reindex_last:
             total_expected_zaken = min(total_expected_zaken, self.reindex_last)
 
+        # Set ordering explicitely
+        # FIXME: this implicitly assumes the generated or created identification
+        # contains some sort of time-stamp and/or increasing number for more recent
+        # cases. This is an assumption that can easily be thwarted, as clients have
+        # the ability to pick a unique identification themselves (such as UUIDs).
+        fetch_jobs = []
+        for zrc, client, response in zip(zrcs, clients, responses):
+            query_params = self.get_start_query_params(
+                zrc, {"ordering": "-identificatie", **self.get_filters()}
+            )
+            if query_params is None:
+                self.stdout.write(f"Cases in {client.base_url} are already indexed.")
+                continue
+            page_size = len(response["results"]) or 1
+            last_page = -(-response["count"] // page_size)
+            fetch_jobs.append((zrc, client, query_params, last_page))
+
+        if not fetch_jobs:
+            return
+
         self.stdout.write("Now the real work starts, hold on!")
 
         self.stdout.start_progress()
 
+        # The clients fetch their pages in the background, so that the next pages
+        # are retrieved while the sub-resources of the current page are fetched and
+        # the documents are indexed.
+        pages = queue.Queue(maxsize=self.prefetch_pages * len(fetch_jobs))
+        stop = threading.Event()
+
         with click.progressbar(
             length=total_expected_zaken,
             label="Indexing ",
             file=self.stdout.progress_file(),
-        ) as bar:
-            for client in clients:
-                perf_logger.info("Starting indexing for client %s", client)
-                perf_logger.info("Memory usage: %s", get_memory_usage())
-                get_more = True
-                # Set ordering explicitely
-                # FIXME: this implicitly assumes the generated or created identification
-                # contains some sort of time-stamp and/or increasing number for more recent
-                # cases. This is an assumption that can easily be thwarted, as clients have
-                # the ability to pick a unique identification themselves (such as UUIDs).
-                query_params = {"ordering": "-identificatie"}
-                while get_more:
-                    # if this is running for 1h+, Open Zaak expires the token
-                    client.refresh_auth()
-                    perf_logger.info(
-                        "Fetching cases for client, query params: %r", query_params
-                    )
-                    perf_logger.info("Memory usage: %s", get_memory_usage())
-                    zaken, query_params = get_zaken_all_paginated(
-                        client, query_params=query_params
-                    )
-                    perf_logger.info("Fetched %d cases", len(zaken))
-                    perf_logger.info("Memory usage: %s", get_memory_usage())
+        ) as bar, parallel(max_workers=len(fetch_jobs)) as fetchers, parallel(
+            max_workers=self.max_workers
+        ) as executor:
+            for fetch_job in fetch_jobs:
+                fetchers.submit(self.fetch_pages, *fetch_job, pages, stop)
+
+            try:
+                active_clients = len(fetch_jobs)
+                while active_clients:
+                    page = pages.get()
+                    if page is DONE:
+                        active_clients -= 1
+                        continue
+                    if isinstance(page, Exception):
+                        raise page
+                    if page.error:
+                        self.page_failed(
+                            page.service,
+                            page.query_params,
+                            page.next_query_params,
+                            page.error,
+                        )
+                        continue
+
+                    zaken = page.zaken
                     # Make sure we're not retrieving more information than necessary on the zaken
                     if self.reindex_last and self.reindex_last - self.reindexed <= len(
                         zaken
                     ):
                         zaken = zaken[: self.reindex_last - self.reindexed]
 
-                    get_more = query_params.get("page", None)
-                    for zaak in zaken:
-                        zaak.zaaktype = zaaktypen[zaak.zaaktype]
-
                     perf_logger.info("Entering ES documents generator")
                     perf_logger.info("Memory usage: %s", get_memory_usage())
-                    yield from self.documenten_generator(zaken)
+                    try:
+                        for zaak in zaken:
+                            zaak.zaaktype = zaaktypen[zaak.zaaktype]
+                        yield from self.documenten_generator(zaken, executor)
+                    except Exception:
+                        # only a full index run can carry on without the page
+                        if self.checkpoints is None:
+                            raise
+                        self.page_failed(
+                            page.service,
+                            page.query_params,
+                            page.next_query_params,
+                            traceback.format_exc(),
+                        )
+                    else:
+                        self.page_indexed(
+                            page.service,
+                            page.next_query_params,
+                            len(zaken),
+                            last_key=zaken[-1].identificatie if zaken else "",
+                        )
                     perf_logger.info("Exited ES documents generator")
                     perf_logger.info("Memory usage: %s", get_memory_usage())
                     bar.update(len(zaken))
 
-                if self.check_if_done_batching():
-                    self.stdout.end_progress()
-                    return
+                    if self.check_if_done_batching():
+                        break
+            finally:
+                # let the clients that are still fetching pages know they can stop
+                stop.set()
 
         self.stdout.end_progress()
 
-    def documenten_generator(self, zaken: List[Zaak]) -> Iterator[ZaakDocument]:
+    def get_filters(self) -> Dict[str, str]:
+        # The Zaken API can't filter on modification dates - in incremental runs the
+        # zaken that started since the last run are indexed, changes to older zaken
+        # are picked up through the notifications.
+        if not self.since:
+            return {}
+        return {"startdatum__gte": self.since.isoformat()}
+
+    def fetch_pages(
+        self,
+        service: Service,
+        client: Client,
+        query_params: dict,
+        last_page: int,
+        pages: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        perf_logger.info("Starting indexing for client %s", client)
+        failed_pages = 0
+        try:
+            while not stop.is_set():
+                # if this is running for 1h+, Open Zaak expires the token
+                client.refresh_auth()
+                perf_logger.info(
+                    "Fetching cases for client, query params: %r", query_params
+                )
+                start = time.monotonic()
+                try:
+                    zaken, next_query_params = get_zaken_all_paginated(
+                        client, query_params=dict(query_params)
+                    )
+                except Exception:
+                    # A full index run records the page and carries on with the next
+                    # one, unless the ZRC seems to be down.
+                    failed_pages += 1
+                    if (
+                        self.checkpoints is None
+                        or failed_pages >= MAX_CONSECUTIVE_FAILED_PAGES
+                    ):
+                        raise
+                    page_number = get_page_number(query_params)
+                    next_query_params = (
+                        {**query_params, "page": [page_number + 1]}
+                        if page_number < last_page
+                        else None
+                    )
+                    page = Page(
+                        service,
+                        query_params,
+                        next_query_params,
+                        [],
+                        error=traceback.format_exc(),
+                    )
+                else:
+                    failed_pages = 0
+                    self.throughput.record(
+                        "fetch", len(zaken), time.monotonic() - start
+                    )
+                    perf_logger.info(
+                        "Fetched %d cases (%.1f zaken/s)",
+                        len(zaken),
+                        self.throughput.get_rate("fetch"),
+                    )
+                    if not next_query_params.get("page", None):
+                        next_query_params = None
+                    page = Page(service, query_params, next_query_params, zaken)
+
+                self.put_page(pages, page, stop)
+                if next_query_params is None:
+                    break
+                query_params = next_query_params
+        except Exception as exc:
+            self.put_page(pages, exc, stop)
+        finally:
+            self.put_page(pages, DONE, stop)
+
+    def retry_page(
+        self, service: Service, query_params: dict
+    ) -> Iterator[ZaakDocument]:
+        client = service.build_client()
+        zaken, _ = get_zaken_all_paginated(client, query_params=query_params)
+        with parallel(max_workers=self.max_workers) as executor:
+            yield from self.documenten_generator(zaken, executor)
+
+    @staticmethod
+    def put_page(pages: queue.Queue, page: Any, stop: threading.Event) -> None:
+        # don't block forever on a full queue if the indexing has been stopped
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def fetch_related(
+        self, zaken: List[Zaak], executor: parallel
+    ) -> Dict[str, Dict[str, Optional[Any]]]:
+        """
+        Fetch all the sub-resources of the zaken in a single parallel run.
+        """
+        fetchers = {
+            "status": get_status,
+            "rollen": get_rollen,
+            "eigenschappen": get_zaak_eigenschappen,
+            "zaakobjecten": get_zaakobjecten,
+            "zaakinformatieobjecten": get_zaak_informatieobjecten,
+        }
+        tasks = [(zaak, name) for zaak in zaken for name in fetchers]
+        results = executor.map(lambda task: fetchers[task[1]](task[0]), tasks)
+
+        related = {zaak.url: {} for zaak in zaken}
+        for (zaak, name), result in zip(tasks, results):
+            related[zaak.url][name] = result
+        return related
+
+    def documenten_generator(
+        self, zaken: List[Zaak], executor: parallel
+    ) -> Iterator[ZaakDocument]:
         perf_logger.info("  In ES documents generator")
-        perf_logger.info("    Create zaak documents...")
-        zaak_documenten = self.create_zaak_documenten(zaken)
-        perf_logger.info("    Create zaak documents finished")
-        perf_logger.info("    Create zaaktype documents...")
-        zaaktype_documenten = self.create_zaaktype_documenten(zaken)
-        perf_logger.info("    Create zaaktype documents finished")
-        perf_logger.info("    Create status documents...")
-        status_documenten = self.create_status_documenten(zaken)
-        perf_logger.info("    Create status documents finished")
-        perf_logger.info("    Create rol documents...")
-        rollen_documenten = self.create_rollen_documenten(zaken)
-        perf_logger.info("    Create rol documents finished")
-        perf_logger.info("    Create eigenschap documents...")
-        eigenschappen_documenten = self.create_eigenschappen_documenten(zaken)
-        perf_logger.info("    Create eigenschap documents finished")
-        perf_logger.info("    Create zaakobject documents...")
-        zaakobjecten_documenten = self.create_zaakobject_documenten(zaken)
-        perf_logger.info("    Create zaakobject documents finished")
-        perf_logger.info("    Create zaakinformatieobject documents...")
-        zaakinformatieobjecten_documenten = self.create_zaakinformatieobject_documenten(
-            zaken
+        start = time.monotonic()
+        # the threads of the executor share the scope of the chunk
+        with memoization_scope(f"index_zaken: {len(zaken)} zaken"):
+            zaaktype_documenten = self.create_zaaktype_documenten(zaken, executor)
+            related = self.fetch_related(zaken, executor)
+        self.throughput.record("enrich", len(zaken), time.monotonic() - start)
+        perf_logger.info(
+            "    Fetched the related resources of %d zaken (%.1f zaken/s)",
+            len(zaken),
+            self.throughput.get_rate("enrich"),
         )
-        perf_logger.info("    Create zaakinformatieobject documents finished")
 
-        perf_logger.info("    Relating all results for every zaak...")
+        num_rollen = num_eigenschappen = num_zaakobjecten = num_zios = 0
         for zaak in zaken:
-            zaakdocument = zaak_documenten[zaak.url]
+            zaak_related = related[zaak.url]
+            rollen = zaak_related["rollen"] or []
+            eigenschappen = zaak_related["eigenschappen"] or []
+            zaakobjecten = zaak_related["zaakobjecten"] or []
+            zios = zaak_related["zaakinformatieobjecten"] or []
+            num_rollen += len(rollen)
+            num_eigenschappen += len(eigenschappen)
+            num_zaakobjecten += len(zaakobjecten)
+            num_zios += len(zios)
+
+            zaakdocument = create_zaak_document(zaak)
             zaakdocument.zaaktype = zaaktype_documenten[zaak.url]
-            zaakdocument.status = status_documenten.get(zaak.url, None)
-            zaakdocument.rollen = rollen_documenten.get(zaak.url, [])
-            zaakdocument.eigenschappen = eigenschappen_documenten.get(zaak.url, {})
-            zaakdocument.zaakobjecten = zaakobjecten_documenten.get(zaak.url, [])
-            zaakdocument.zaakinformatieobjecten = zaakinformatieobjecten_documenten.get(
-                zaak.url, []
+            zaakdocument.status = (
+                create_status_document(zaak_related["status"])
+                if zaak_related["status"]
+                else None
             )
+            zaakdocument.rollen = [create_rol_document(rol) for rol in rollen]
+            zaakdocument.eigenschappen = (
+                create_eigenschappen_document(eigenschappen) if eigenschappen else {}
+            )
+            zaakdocument.zaakobjecten = [
+                create_zaakobject_document(zo) for zo in zaakobjecten
+            ]
+            zaakdocument.zaakinformatieobjecten = [
+                create_zaakinformatieobject_document(zio) for zio in zios
+            ]
             zd = zaakdocument.to_dict(True)
             yield zd
             if self.reindex_last:
@@ -174,19 +366,19 @@ class Command(IndexCommand, BaseCommand):
                 if self.check_if_done_batching():
                     return
 
-    def create_zaak_documenten(self, zaken: List[Zaak]) -> Dict[str, ZaakDocument]:
-        # Build the zaak_documenten
-        zaak_documenten = {zaak.url: create_zaak_document(zaak) for zaak in zaken}
-        return zaak_documenten
+        self.stdout.write_without_progress(
+            f"{num_rollen} rollen, {num_eigenschappen} zaakeigenschappen, "
+            f"{num_zaakobjecten} zaakobjecten and {num_zios} zaakinformatieobjecten "
+            f"are received for {len(zaken)} zaken."
+        )
 
     def create_zaaktype_documenten(
-        self, zaken: List[Zaak]
+        self, zaken: List[Zaak], executor: parallel
     ) -> Dict[str, ZaakTypeDocument]:
         unfetched_zaaktypen = {
             zaak.zaaktype for zaak in zaken if isinstance(zaak.zaaktype, str)
         }
-        with parallel(max_workers=self.max_workers) as executor:
-            results = executor.map(fetch_zaaktype, unfetched_zaaktypen)
+        results = executor.map(fetch_zaaktype, unfetched_zaaktypen)
         zaaktypen = {zaaktype.url: zaaktype for zaaktype in list(results)}
 
         for zaak in zaken:
@@ -197,90 +389,3 @@ class Command(IndexCommand, BaseCommand):
             zaak.url: create_zaaktype_document(zaak.zaaktype) for zaak in zaken
         }
         return zaaktype_documenten
-
-    def create_status_documenten(self, zaken: List[Zaak]) -> Dict[str, StatusDocument]:
-        with parallel(max_workers=self.max_workers) as executor:
-            results = executor.map(get_status, zaken)
-        status_documenten = {
-            status.zaak: create_status_document(status)
-            for status in list(results)
-            if status
-        }
-        self.stdout.write_without_progress(
-            f"{len(status_documenten.keys())} statussen are received from ZAKEN API."
-        )
-        return status_documenten
-
-    def create_rollen_documenten(self, zaken: List[Zaak]) -> Dict[str, RolDocument]:
-        with parallel(max_workers=self.max_workers) as executor:
-            results = list(executor.map(get_rollen, zaken))
-
-        list_of_rollen = [rollen for rollen in results if rollen]
-
-        rollen_documenten = {
-            rollen[0].zaak: [create_rol_document(rol) for rol in rollen]
-            for rollen in list_of_rollen
-        }
-
-        num_roles = sum([len(rollen) for rollen in list_of_rollen])
-        self.stdout.write_without_progress(
-            f"{num_roles} rollen are received for {len(rollen_documenten.keys())} zaken."
-        )
-        return rollen_documenten
-
-    def create_eigenschappen_documenten(
-        self, zaken: List[Zaak]
-    ) -> Dict[str, EigenschapDocument]:
-        # Prefetch zaakeigenschappen
-        with parallel(max_workers=self.max_workers) as executor:
-            list_of_eigenschappen = list(executor.map(get_zaak_eigenschappen, zaken))
-
-        eigenschappen_documenten = {
-            zen[0].zaak: create_eigenschappen_document(zen)
-            for zen in list_of_eigenschappen
-            if zen
-        }
-
-        num_properties = sum([len(zen) for zen in list_of_eigenschappen])
-        self.stdout.write_without_progress(
-            f"{num_properties} zaakeigenschappen are found for {len(eigenschappen_documenten.keys())} zaken."
-        )
-        return eigenschappen_documenten
-
-    def create_zaakobject_documenten(
-        self, zaken: List[Zaak]
-    ) -> Dict[str, ZaakObjectDocument]:
-        # Prefetch zaakobjecten
-        with parallel(max_workers=self.max_workers) as executor:
-            list_of_zon = list(executor.map(get_zaakobjecten, zaken))
-
-        zaakobjecten_documenten = {
-            zon[0].zaak: [create_zaakobject_document(zo) for zo in zon]
-            for zon in list_of_zon
-            if zon
-        }
-
-        num_case_objects = sum([len(zon) for zon in list_of_zon])
-        self.stdout.write_without_progress(
-            f"{num_case_objects} zaakobjecten are found for {len(zaakobjecten_documenten.keys())} zaken."
-        )
-        return zaakobjecten_documenten
-
-    def create_zaakinformatieobject_documenten(
-        self, zaken: List[Zaak]
-    ) -> Dict[str, ZaakObjectDocument]:
-        # Prefetch zaakinformatieobjecten
-        with parallel(max_workers=self.max_workers) as executor:
-            list_of_zios = list(executor.map(get_zaak_informatieobjecten, zaken))
-
-        zaakinformatieobject_documenten = {
-            zios[0].zaak: [create_zaakinformatieobject_document(zio) for zio in zios]
-            for zios in list_of_zios
-            if zios
-        }
-
-        num_case_zios = sum([len(zio) for zio in list_of_zios])
-        self.stdout.write_without_progress(
-            f"{num_case_zios} zaakinformatieobjecten are found for {len(zaakinformatieobject_documenten.keys())} zaken."
-        )
-        return zaakinformatieobject_documenten
@@ -1,5 +1,9 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 from io import StringIO
+from typing import Dict, List
 
 from django.core.management.base import OutputWrapper
 
@@ -36,3 +40,70 @@ class ProgressOutputWrapper(OutputWrapper):
     def end_progress(self):
         if self.show_progress:
             self.ending = "\n"
+
+
+class ThroughputMeter:
+    """
+    Keep track of the number of items processed and the time spent per stage.
+
+    Stages can be recorded from multiple threads.
+    """
+
+    def __init__(self, verbose_name_plural: str):
+        self.verbose_name_plural = verbose_name_plural
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._durations: Dict[str, float] = {}
+
+    def record(self, stage: str, count: int, duration: float) -> None:
+        with self._lock:
+            self._counts[stage] = self._counts.get(stage, 0) + count
+            self._durations[stage] = self._durations.get(stage, 0.0) + duration
+
+    @contextmanager
+    def measure(self, stage: str, count: int = 0):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, count, time.monotonic() - start)
+
+    def get_count(self, stage: str) -> int:
+        with self._lock:
+            return self._counts.get(stage, 0)
+
+    def get_rate(self, stage: str) -> float:
+        with self._lock:
+            duration = self._durations.get(stage, 0.0)
+            return self._counts.get(stage, 0) / duration if duration else 0.0
+
+    def report(self) -> List[str]:
+        with self._lock:
+            stages = list(self._counts.items())
+            durations = dict(self._durations)
+        elapsed = time.monotonic() - self.started
+
+        lines = []
+        for stage, count in stages:
+            duration = durations[stage]
+            rate = count / duration if duration else 0.0
+            lines.append(
+                f"{stage}: {count} {self.verbose_name_plural} in {duration:.1f}s "
+                f"({rate:.1f} {self.verbose_name_plural}/s)"
+            )
+        indexed = self._counts.get("index", 0)
+        overall = indexed / elapsed if elapsed else 0.0
+        lines.append(
+            f"overall: {indexed} {self.verbose_name_plural} in {elapsed:.1f}s "
+            f"({overall:.1f} {self.verbose_name_plural}/s)"
+        )
+        return lines
+
+
+def get_page_number(query_params: dict) -> int:
+    page = query_params.get("page") or 1
+    # the paginated service functions put the page number in a list
+    if isinstance(page, list):
+        page = page[0]
+    return int(page)
@@ -0,0 +1,145 @@
+# Generated by Django 3.2.12 on 2026-10-18 10:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("zgw_consumers", "0013_oas_field"),
+        ("elasticsearch", "0003_alter_searchreport_query"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedIndexPage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("index", models.CharField(max_length=100, verbose_name="index")),
+                (
+                    "query_params",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Query parameters of the page that failed.",
+                        verbose_name="query parameters",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=1, verbose_name="attempts"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created"),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(auto_now=True, verbose_name="modified"),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="zgw_consumers.service",
+                        verbose_name="service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "failed index page",
+                "verbose_name_plural": "failed index pages",
+            },
+        ),
+        migrations.CreateModel(
+            name="IndexCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "index",
+                    models.CharField(
+                        help_text="Name of the alias the index run is building a new index for.",
+                        max_length=100,
+                        verbose_name="index",
+                    ),
+                ),
+                (
+                    "target_index",
+                    models.CharField(
+                        help_text="Name of the (versioned) index the documents are written to.",
+                        max_length=200,
+                        verbose_name="target index",
+                    ),
+                ),
+                (
+                    "query_params",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Query parameters of the next page to fetch from the service.",
+                        verbose_name="query parameters",
+                    ),
+                ),
+                (
+                    "last_key",
+                    models.CharField(
+                        blank=True,
+                        help_text="Ordering key of the last document that was indexed.",
+                        max_length=1000,
+                        verbose_name="last key",
+                    ),
+                ),
+                (
+                    "pages_indexed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="pages indexed"
+                    ),
+                ),
+                (
+                    "documents_indexed",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="documents indexed"
+                    ),
+                ),
+                (
+                    "finished",
+                    models.BooleanField(default=False, verbose_name="finished"),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(auto_now=True, verbose_name="modified"),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="zgw_consumers.service",
+                        verbose_name="service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "index checkpoint",
+                "verbose_name_plural": "index checkpoints",
+                "unique_together": {("index", "service")},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.12 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("elasticsearch", "0004_failedindexpage_indexcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexHighWaterMark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "index",
+                    models.CharField(max_length=100, unique=True, verbose_name="index"),
+                ),
+                (
+                    "indexed_until",
+                    models.DateTimeField(
+                        help_text="Start of the last index run that completed.",
+                        verbose_name="indexed until",
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(auto_now=True, verbose_name="modified"),
+                ),
+            ],
+            options={
+                "verbose_name": "index high-water mark",
+                "verbose_name_plural": "index high-water marks",
+            },
+        ),
+    ]
@@ -13,3 +13,101 @@ class SearchReport(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class IndexCheckpoint(models.Model):
+    """
+    The progress of a full index run for one service, to be able to resume the run.
+    """
+
+    index = models.CharField(
+        _("index"),
+        max_length=100,
+        help_text=_("Name of the alias the index run is building a new index for."),
+    )
+    target_index = models.CharField(
+        _("target index"),
+        max_length=200,
+        help_text=_("Name of the (versioned) index the documents are written to."),
+    )
+    service = models.ForeignKey(
+        "zgw_consumers.Service",
+        on_delete=models.CASCADE,
+        verbose_name=_("service"),
+        related_name="+",
+    )
+    query_params = JSONField(
+        _("query parameters"),
+        default=dict,
+        help_text=_("Query parameters of the next page to fetch from the service."),
+    )
+    last_key = models.CharField(
+        _("last key"),
+        max_length=1000,
+        blank=True,
+        help_text=_("Ordering key of the last document that was indexed."),
+    )
+    pages_indexed = models.PositiveIntegerField(_("pages indexed"), default=0)
+    documents_indexed = models.PositiveIntegerField(_("documents indexed"), default=0)
+    finished = models.BooleanField(_("finished"), default=False)
+    modified = models.DateTimeField(_("modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("index checkpoint")
+        verbose_name_plural = _("index checkpoints")
+        unique_together = ("index", "service")
+
+    def __str__(self):
+        return f"{self.target_index}: {self.service}"
+
+
+class FailedIndexPage(models.Model):
+    """
+    A page that could not be indexed, to be retried with ``--retry-failed``.
+    """
+
+    index = models.CharField(_("index"), max_length=100)
+    service = models.ForeignKey(
+        "zgw_consumers.Service",
+        on_delete=models.CASCADE,
+        verbose_name=_("service"),
+        related_name="+",
+    )
+    query_params = JSONField(
+        _("query parameters"),
+        default=dict,
+        help_text=_("Query parameters of the page that failed."),
+    )
+    error = models.TextField(_("error"), blank=True)
+    attempts = models.PositiveIntegerField(_("attempts"), default=1)
+    created = models.DateTimeField(_("created"), auto_now_add=True)
+    modified = models.DateTimeField(_("modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("failed index page")
+        verbose_name_plural = _("failed index pages")
+
+    def __str__(self):
+        return f"{self.index}: {self.service} {self.query_params}"
+
+
+class IndexHighWaterMark(models.Model):
+    """
+    The moment up to which an index is known to be complete.
+
+    Incremental index runs only index the data that changed since then.
+    """
+
+    index = models.CharField(_("index"), max_length=100, unique=True)
+    indexed_until = models.DateTimeField(
+        _("indexed until"),
+        help_text=_("Start of the last index run that completed."),
+    )
+    modified = models.DateTimeField(_("modified"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("index high-water mark")
+        verbose_name_plural = _("index high-water marks")
+
+    def __str__(self):
+        return f"{self.index}: {self.indexed_until}"
@@ -0,0 +1,129 @@
+"""
+Keep the atomic permissions of users in a dedicated index.
+
+Behandelaars and advisors get an atomic permission for every zaak they work on, and
+inlining all those object URLs in every search request results in huge queries that
+run into ``index.max_terms_count``. Instead, the active atomic permissions of a user
+are kept in a single document, and searches filter with a terms lookup on that
+document - a query of constant size.
+
+The document is updated when the atomic permissions of a user change. Since
+permissions can also start or end over time, the fingerprint of the synced URLs is
+kept in the cache and compared with the permission snapshot before searching.
+"""
+import hashlib
+import logging
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from elasticsearch import exceptions
+from elasticsearch_dsl.query import Terms
+
+from zac.accounts.models import User
+from zac.accounts.permission_snapshot import PermissionSnapshot, build_snapshot
+
+from .documents import PermissionDocument
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "permission-document:{user_id}"
+
+
+def get_fingerprint(snapshot: PermissionSnapshot) -> str:
+    digest = hashlib.sha1()
+    for permission, by_object_type in sorted(snapshot.atomic.items()):
+        for object_type, urls in sorted(by_object_type.items()):
+            digest.update(f"{permission}:{object_type}".encode())
+            for url in sorted(urls):
+                digest.update(url.encode())
+    return digest.hexdigest()
+
+
+def update_permission_document(user: User, snapshot: PermissionSnapshot) -> None:
+    if not PermissionDocument._index.exists():
+        PermissionDocument.init()
+
+    document = PermissionDocument(
+        meta={"id": user.pk},
+        username=user.username,
+        permissions={
+            permission: {
+                object_type: sorted(urls)
+                for object_type, urls in by_object_type.items()
+            }
+            for permission, by_object_type in snapshot.atomic.items()
+        },
+    )
+    document.save()
+    cache.set(
+        CACHE_KEY.format(user_id=user.pk),
+        get_fingerprint(snapshot),
+        timeout=settings.PERMISSION_SNAPSHOT_TIMEOUT,
+    )
+
+
+def ensure_permission_document(user: User, snapshot: PermissionSnapshot) -> None:
+    """
+    Update the document of the user if it does not match the snapshot.
+    """
+    if cache.get(CACHE_KEY.format(user_id=user.pk)) != get_fingerprint(snapshot):
+        update_permission_document(user, snapshot)
+
+
+def get_atomic_permission_lookup(
+    user: User,
+    snapshot: PermissionSnapshot,
+    permission: str,
+    object_type: str,
+    field: str = "url",
+) -> Terms:
+    """
+    Build the terms lookup matching ``field`` with the object URLs of the user.
+    """
+    ensure_permission_document(user, snapshot)
+    lookup = {
+        "index": PermissionDocument._index._name,
+        "id": str(user.pk),
+        "path": f"permissions.{permission}.{object_type}",
+    }
+    return Terms(**{field: lookup})
+
+
+def sync_permission_documents(user_ids: Iterable[int]) -> None:
+    for user in User.objects.filter(pk__in=set(user_ids)):
+        try:
+            update_permission_document(user, build_snapshot(user=user))
+        except exceptions.ElasticsearchException:
+            # the document is updated before the next search of the user
+            logger.warning(
+                "Could not update the permission document of user %s",
+                user,
+                exc_info=True,
+            )
+
+
+def _sync_on_commit(user_ids: Iterable[int]) -> None:
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: sync_permission_documents(user_ids))
+
+
+def user_atomic_permission_changed(instance, **kwargs) -> None:
+    _sync_on_commit([instance.user_id])
+
+
+def atomic_permission_changed(instance, **kwargs) -> None:
+    _sync_on_commit(instance.useratomicpermission_set.values_list("user_id", flat=True))
+
+
+def user_atomic_permissions_changed(instance, action, pk_set, reverse, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            _sync_on_commit([instance.pk])
+    elif action == "pre_clear":
+        _sync_on_commit(instance.users.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove"):
+        _sync_on_commit(pk_set)
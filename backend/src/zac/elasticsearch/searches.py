@@ -3,7 +3,7 @@ from functools import reduce
 from typing import List, Optional, Union
 from urllib.request import Request
 
-from elasticsearch_dsl import Q
+from elasticsearch_dsl import Q, Search
 from elasticsearch_dsl.query import (
     Bool,
     Exists,
@@ -17,11 +17,12 @@ from elasticsearch_dsl.query import (
 )
 
 from zac.accounts.constants import PermissionObjectTypeChoices
-from zac.accounts.models import BlueprintPermission, UserAtomicPermission
+from zac.accounts.permission_snapshot import get_permission_snapshot
 from zac.camunda.constants import AssigneeTypeChoices
 from zac.core.permissions import zaken_inzien
 
 from .documents import InformatieObjectDocument, ObjectDocument, ZaakDocument
+from .permission_index import get_atomic_permission_lookup
 
 
 def query_allowed_for_requester(
@@ -38,32 +39,33 @@ def query_allowed_for_requester(
         if user.is_superuser:
             return Q("match_all")
 
-        # atomic permissions
-        object_urls = (
-            UserAtomicPermission.objects.filter(
-                user=user,
-                atomic_permission__object_type=object_type,
-                atomic_permission__permission=permission,
-            )
-            .actual()
-            .values_list("atomic_permission__object_url", flat=True)
-        )
-        if object_urls.count():
+        # atomic permissions - looked up in the permission index instead of listing
+        # the URLs in the query
+        snapshot = get_permission_snapshot(request)
+        if snapshot.get_atomic_urls(permission, object_type):
             if on_nested_field:
-                terms = {f"{on_nested_field}__url": list(object_urls)}
-                allowed.append(
-                    Nested(path=on_nested_field, query=Bool(filter=(Terms(**terms))))
+                terms = get_atomic_permission_lookup(
+                    user,
+                    snapshot,
+                    permission,
+                    object_type,
+                    field=f"{on_nested_field}__url",
                 )
+                allowed.append(Nested(path=on_nested_field, query=Bool(filter=terms)))
             else:
-                allowed.append(Terms(url=list(object_urls)))
+                allowed.append(
+                    get_atomic_permission_lookup(
+                        user, snapshot, permission, object_type
+                    )
+                )
 
     if getattr(request.auth, "has_all_reading_rights", False):
         return Q("match_all")
 
     # blueprint permissions
-    for blueprint_permission in BlueprintPermission.objects.for_requester(
-        request, actual=True
-    ).filter(object_type=object_type, role__permissions__contains=[permission]):
+    for blueprint_permission in get_permission_snapshot(request).get_blueprints(
+        permission, object_type
+    ):
         if on_nested_field:
             allowed.append(
                 Nested(
@@ -84,9 +86,8 @@ def query_allowed_for_requester(
     return reduce(operator.or_, allowed)
 
 
-def search_zaken(
+def get_zaken_search(
     request=None,
-    size=None,
     identificatie=None,
     identificatie_keyword=None,
     bronorganisatie=None,
@@ -100,10 +101,11 @@ def search_zaken(
     ordering=("-identificatie.keyword", "-startdatum", "-registratiedatum"),
     fields=None,
     object=None,
-) -> List[ZaakDocument]:
-
-    size = size or 10000
-    s = ZaakDocument.search()[:size]
+) -> Search:
+    """
+    Build the search for zaken, leaving the pagination to the caller.
+    """
+    s = ZaakDocument.search()
 
     if identificatie:
         s = s.query(Match(identificatie={"query": identificatie}))
@@ -166,6 +168,12 @@ def search_zaken(
     if fields:
         s = s.source(fields)
 
+    return s
+
+
+def search_zaken(request=None, size=None, **kwargs) -> List[ZaakDocument]:
+    size = size or 10000
+    s = get_zaken_search(request=request, **kwargs)[:size]
     response = s.execute()
     return response.hits
 
@@ -144,7 +144,7 @@ class ResponseTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
         endpoint = reverse("searchreport-list")
 
         with patch(
-            "zac.elasticsearch.drf_api.views.get_zaaktypen", return_value=zaaktypen
+            "zac.elasticsearch.drf_api.utils.get_zaaktypen", return_value=zaaktypen
         ):
             response = self.client.get(endpoint)
         self.assertEqual(response.status_code, 200)
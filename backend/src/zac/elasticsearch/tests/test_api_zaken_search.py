@@ -26,6 +26,7 @@ from zac.elasticsearch.api import (
     update_eigenschappen_in_zaak_document,
     update_zaakobjecten_in_zaak_document,
 )
+from zac.elasticsearch.drf_api.pagination import ESPagination
 from zac.elasticsearch.tests.utils import ESMixin
 from zac.tests.utils import mock_resource_get, paginated_response
 from zgw.models.zrc import Zaak
@@ -512,6 +513,28 @@ class SearchResponseTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
             self.assertEqual(data["results"][1]["url"], zaak2["url"])
             self.assertEqual(data["results"][2]["url"], zaak3["url"])
 
+        with self.subTest("Paginate with cursor"):
+            with patch.object(ESPagination, "page_size", 1):
+                response = self.client.post(self.endpoint + "?ordering=deadline")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                data = response.json()
+                self.assertEqual(data["count"], 3)
+                self.assertEqual(data["results"][0]["url"], zaak1["url"])
+                self.assertIsNone(data["previous"])
+                self.assertIn("cursor=", data["next"])
+
+                response = self.client.post(data["next"])
+                data = response.json()
+                self.assertEqual(data["count"], 3)
+                self.assertEqual(data["results"][0]["url"], zaak2["url"])
+                self.assertIn("ordering=deadline", data["previous"])
+
+                response = self.client.post(data["next"])
+                data = response.json()
+                self.assertEqual(data["results"][0]["url"], zaak3["url"])
+                self.assertIsNone(data["next"])
+                self.assertIn("page=2", data["previous"])
+
         with self.subTest("Search on object"):
             data = {"object": zaakobject["object"]}
             response = self.client.post(self.endpoint, data=data)
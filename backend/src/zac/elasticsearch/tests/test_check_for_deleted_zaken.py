@@ -115,6 +115,7 @@ class IndexZakenTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
             f"{ZAKEN_ROOT}zaken",
             json={"count": 1, "previous": None, "next": None, "results": [zaak]},
         )
+        m.get(zaak2["url"], status_code=404, json={"status": 404})
         call_command("check_for_deleted_zaken", stdout=StringIO())
         self.refresh_index()
         self.assertEqual(zaken.search().count(), 1)
@@ -125,3 +126,77 @@ class IndexZakenTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
 
         with self.assertRaises(NotFoundError):
             zaak_document2 = ZaakDocument.get(id="b321d30c-6c10-47fe-82e3-e9f524c14ca9")
+
+    def _index_zaken(self, m, zaken):
+        mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
+        mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
+        zaaktype = generate_oas_component(
+            "ztc",
+            "schemas/ZaakType",
+            url=f"{CATALOGI_ROOT}zaaktypen/a8c8bc90-defa-4548-bacd-793874c013aa",
+        )
+        for zaak in zaken:
+            zaak_document = self.create_zaak_document(
+                generate_oas_component(
+                    "zrc",
+                    "schemas/Zaak",
+                    url=zaak["url"],
+                    zaaktype=zaaktype["url"],
+                    identificatie=zaak["identificatie"],
+                    vertrouwelijkheidaanduiding="zaakvertrouwelijk",
+                )
+            )
+            zaak_document.zaaktype = self.create_zaaktype_document(zaaktype)
+            zaak_document.save()
+        self.refresh_index()
+
+    def test_check_for_deleted_zaken_dry_run(self, m):
+        zaak = {"url": f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8"}
+        deleted_zaak = {
+            "url": f"{ZAKEN_ROOT}zaken/b321d30c-6c10-47fe-82e3-e9f524c14ca9"
+        }
+        self._index_zaken(
+            m,
+            [
+                {**zaak, "identificatie": "ZAAK1"},
+                {**deleted_zaak, "identificatie": "ZAAK2"},
+            ],
+        )
+        m.get(f"{ZAKEN_ROOT}zaken", json=paginated_response([zaak]))
+        m.get(deleted_zaak["url"], status_code=404, json={"status": 404})
+        stdout = StringIO()
+
+        call_command(
+            "check_for_deleted_zaken", "--dry-run", "--index=zaken", stdout=stdout
+        )
+
+        self.assertIn("1 stale", stdout.getvalue())
+        self.refresh_index()
+        self.assertEqual(ZaakDocument.search().count(), 2)
+
+    def test_check_for_deleted_zaken_keeps_created_zaken(self, m):
+        zaak = {"url": f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8"}
+        new_zaak = {"url": f"{ZAKEN_ROOT}zaken/b321d30c-6c10-47fe-82e3-e9f524c14ca9"}
+        self._index_zaken(
+            m,
+            [
+                {**zaak, "identificatie": "ZAAK1"},
+                {**new_zaak, "identificatie": "ZAAK2"},
+            ],
+        )
+        unindexed_zaak = {
+            "url": f"{ZAKEN_ROOT}zaken/0c79c41d-72ef-4ea2-8c4c-03c9945da2a2"
+        }
+        # the new zaak was created after the zaken were listed
+        m.get(f"{ZAKEN_ROOT}zaken", json=paginated_response([zaak, unindexed_zaak]))
+        m.get(new_zaak["url"], json=new_zaak)
+        stdout = StringIO()
+
+        call_command("check_for_deleted_zaken", "--index=zaken", stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("1 missing from the index", output)
+        self.assertIn("0 stale", output)
+        self.assertIn("1 created during the check", output)
+        self.refresh_index()
+        self.assertEqual(ZaakDocument.search().count(), 2)
@@ -0,0 +1,183 @@
+import datetime
+import json
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from openpyxl import load_workbook
+from rest_framework.test import APITransactionTestCase
+
+from zac.accounts.tests.factories import SuperUserFactory, UserFactory
+from zac.core.tests.utils import ClearCachesMixin
+
+from ..documents import ZaakDocument, ZaakTypeDocument
+from ..export import format_cell, format_value, get_value
+from .factories import SearchReportFactory
+from .utils import ESMixin
+
+ZAKEN_ROOT = "https://api.zaken.nl/api/v1/"
+CATALOGI_ROOT = "https://api.catalogi.nl/api/v1/"
+
+
+class ExportValueTests(SimpleTestCase):
+    def test_get_value(self):
+        document = {
+            "identificatie": "ZAAK-1",
+            "zaaktype": {"omschrijving": "ZT1"},
+            "rollen": [{"url": "rol-1"}, {"url": "rol-2"}],
+        }
+
+        self.assertEqual(get_value(document, "identificatie"), "ZAAK-1")
+        self.assertEqual(get_value(document, "zaaktype.omschrijving"), "ZT1")
+        self.assertEqual(get_value(document, "rollen.url"), ["rol-1", "rol-2"])
+        self.assertIsNone(get_value(document, "status.url"))
+        self.assertIsNone(get_value(document, "identificatie.keyword"))
+
+    def test_format_value(self):
+        self.assertEqual(format_value(None), "")
+        self.assertEqual(format_value(["rol-1", None, "rol-2"]), "rol-1, rol-2")
+        self.assertEqual(format_value({"a": 1}), '{"a": 1}')
+        self.assertEqual(
+            format_value(datetime.date(2021, 12, 31)),
+            "2021-12-31",
+        )
+        self.assertEqual(format_value(16), "16")
+
+    def test_format_cell_neutralises_formulas(self):
+        for value in ("=HYPERLINK()", "+1", "-1+1", "@SUM(A1)", "\tx", "\rx"):
+            with self.subTest(value=value):
+                self.assertEqual(format_cell(value), f"'{value}")
+
+        self.assertEqual(format_cell("Aanvraag"), "Aanvraag")
+        self.assertEqual(format_cell(-16), "-16")
+        self.assertEqual(format_cell(["=a", "b"]), "'=a, b")
+
+
+class ExportSearchReportTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+
+        zaaktype_document = ZaakTypeDocument(
+            url=f"{CATALOGI_ROOT}zaaktypen/a8c8bc90-defa-4548-bacd-793874c013aa",
+            catalogus=f"{CATALOGI_ROOT}catalogussen/a522d30c-6c10-47fe-82e3-e9f524c14ca8",
+            omschrijving="zaaktype1",
+        )
+        for identificatie in ("ZAAK-1", "ZAAK-2"):
+            ZaakDocument(
+                meta={"id": identificatie},
+                url=f"{ZAKEN_ROOT}zaken/{identificatie}",
+                zaaktype=zaaktype_document,
+                identificatie=identificatie,
+                bronorganisatie="123456",
+                rollen=[],
+            ).save()
+        self.refresh_index()
+
+        self.report = SearchReportFactory.create(
+            name="Zaken report",
+            query={"fields": ["identificatie", "zaaktype.omschrijving"]},
+        )
+
+    def _get_endpoint(self, file_format: str) -> str:
+        return reverse(
+            "searchreport-export",
+            kwargs={"pk": self.report.pk, "file_format": file_format},
+        )
+
+    def test_export_csv(self):
+        self.client.force_authenticate(SuperUserFactory.create())
+
+        response = self.client.get(
+            self._get_endpoint("csv") + "?ordering=identificatie"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="zaken-report.csv"'
+        )
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(
+            content.splitlines(),
+            [
+                "identificatie,zaaktype.omschrijving",
+                "ZAAK-1,zaaktype1",
+                "ZAAK-2,zaaktype1",
+            ],
+        )
+
+    def test_export_ndjson(self):
+        self.client.force_authenticate(SuperUserFactory.create())
+
+        response = self.client.get(
+            self._get_endpoint("ndjson") + "?ordering=-identificatie"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {"identificatie": "ZAAK-2", "zaaktype.omschrijving": "zaaktype1"},
+                {"identificatie": "ZAAK-1", "zaaktype.omschrijving": "zaaktype1"},
+            ],
+        )
+
+    def test_export_xlsx(self):
+        self.client.force_authenticate(SuperUserFactory.create())
+
+        response = self.client.get(
+            self._get_endpoint("xlsx") + "?ordering=identificatie"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
+        rows = list(workbook.active.values)
+        self.assertEqual(
+            rows,
+            [
+                ("identificatie", "zaaktype.omschrijving"),
+                ("ZAAK-1", "zaaktype1"),
+                ("ZAAK-2", "zaaktype1"),
+            ],
+        )
+
+    @patch("zac.elasticsearch.drf_api.views.write_export", side_effect=RuntimeError)
+    @patch("zac.elasticsearch.drf_api.views.tempfile.TemporaryFile")
+    def test_export_xlsx_closes_file_on_error(self, mock_temporary_file, *mocks):
+        self.client.force_authenticate(SuperUserFactory.create())
+
+        with self.assertRaises(RuntimeError):
+            self.client.get(self._get_endpoint("xlsx"))
+
+        mock_temporary_file.return_value.close.assert_called_once_with()
+
+    def test_export_only_allowed(self):
+        self.client.force_authenticate(UserFactory.create())
+
+        response = self.client.get(self._get_endpoint("csv"))
+
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        self.assertEqual(content.splitlines(), ["identificatie,zaaktype.omschrijving"])
+
+    def test_export_command(self):
+        user = SuperUserFactory.create()
+        stdout = StringIO()
+
+        call_command(
+            "export_search_report",
+            self.report.pk,
+            user=user.username,
+            file_format="ndjson",
+            stdout=stdout,
+        )
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            {json.loads(line)["identificatie"] for line in lines}, {"ZAAK-1", "ZAAK-2"}
+        )
@@ -0,0 +1,154 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management import call_command
+
+import requests_mock
+from rest_framework.test import APITransactionTestCase
+from zgw_consumers.constants import APITypes
+from zgw_consumers.models import Service
+from zgw_consumers.test import generate_oas_component, mock_service_oas_get
+
+from zac.core.tests.utils import ClearCachesMixin
+from zac.tests.utils import paginated_response
+
+from ..documents import ZaakDocument
+from ..models import FailedIndexPage, IndexCheckpoint
+from ..utils import create_index_version, get_aliased_indices
+from .utils import ESMixin
+
+CATALOGI_ROOT = "https://api.catalogi.nl/api/v1/"
+ZAKEN_ROOT = "https://api.zaken.nl/api/v1/"
+
+ZAAK_1 = f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8"
+ZAAK_2 = f"{ZAKEN_ROOT}zaken/f3ff2713-2f53-42ff-a154-16842309ad60"
+
+
+@requests_mock.Mocker()
+@patch(
+    "zac.elasticsearch.management.commands.index_zaken.get_zaak_eigenschappen",
+    return_value=[],
+)
+class IndexCheckpointTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        Service.objects.create(api_type=APITypes.ztc, api_root=CATALOGI_ROOT)
+        self.zrc = Service.objects.create(api_type=APITypes.zrc, api_root=ZAKEN_ROOT)
+
+    def _mock_zaken(self, m):
+        mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
+        mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
+        zaaktype = generate_oas_component(
+            "ztc",
+            "schemas/ZaakType",
+            url=f"{CATALOGI_ROOT}zaaktypen/a8c8bc90-defa-4548-bacd-793874c013aa",
+        )
+        m.get(f"{CATALOGI_ROOT}zaaktypen", json=paginated_response([zaaktype]))
+        m.get(zaaktype["url"], json=zaaktype)
+        zaken = [
+            generate_oas_component(
+                "zrc",
+                "schemas/Zaak",
+                url=url,
+                zaaktype=zaaktype["url"],
+                identificatie=identificatie,
+                vertrouwelijkheidaanduiding="zaakvertrouwelijk",
+                status=None,
+            )
+            for url, identificatie in ((ZAAK_1, "ZAAK-002"), (ZAAK_2, "ZAAK-001"))
+        ]
+        m.get(
+            f"{ZAKEN_ROOT}zaken",
+            json={
+                "count": 2,
+                "previous": None,
+                "next": f"{ZAKEN_ROOT}zaken?ordering=-identificatie&page=2",
+                "results": [zaken[0]],
+            },
+        )
+        m.get(f"{ZAKEN_ROOT}rollen", json=paginated_response([]))
+        for zaak in zaken:
+            m.get(
+                f"{ZAKEN_ROOT}zaakobjecten?zaak={zaak['url']}",
+                json=paginated_response([]),
+            )
+            m.get(f"{ZAKEN_ROOT}zaakinformatieobjecten?zaak={zaak['url']}", json=[])
+        return zaken
+
+    def _mock_second_page(self, m, zaak):
+        m.get(
+            f"{ZAKEN_ROOT}zaken?page=2",
+            json={
+                "count": 2,
+                "previous": f"{ZAKEN_ROOT}zaken?ordering=-identificatie",
+                "next": None,
+                "results": [zaak],
+            },
+        )
+
+    def test_failed_page_is_recorded_and_retried(self, m, mock_eigenschappen):
+        zaken = self._mock_zaken(m)
+        m.get(f"{ZAKEN_ROOT}zaken?page=2", status_code=500)
+        stdout = StringIO()
+
+        call_command("index_zaken", stdout=stdout)
+
+        self.assertIn("--retry-failed", stdout.getvalue())
+        self.assertEqual(ZaakDocument.search().count(), 1)
+        failed_page = FailedIndexPage.objects.get()
+        self.assertEqual(failed_page.index, settings.ES_INDEX_ZAKEN)
+        self.assertEqual(failed_page.service, self.zrc)
+        self.assertEqual(failed_page.query_params["page"], [2])
+        # a completed run doesn't leave checkpoints behind
+        self.assertFalse(IndexCheckpoint.objects.exists())
+
+        self._mock_second_page(m, zaken[1])
+        call_command("index_zaken", "--retry-failed", stdout=StringIO())
+
+        self.refresh_index()
+        self.assertEqual(ZaakDocument.search().count(), 2)
+        self.assertFalse(FailedIndexPage.objects.exists())
+
+    def test_resume_from_checkpoint(self, m, mock_eigenschappen):
+        zaken = self._mock_zaken(m)
+        self._mock_second_page(m, zaken[1])
+        target_index = create_index_version(ZaakDocument)
+        IndexCheckpoint.objects.create(
+            index=settings.ES_INDEX_ZAKEN,
+            target_index=target_index,
+            service=self.zrc,
+            query_params={"ordering": "-identificatie", "page": [2]},
+            pages_indexed=1,
+            documents_indexed=1,
+        )
+
+        call_command("index_zaken", "--resume", stdout=StringIO())
+
+        self.assertEqual(get_aliased_indices(settings.ES_INDEX_ZAKEN), [target_index])
+        # only the second page is indexed in the resumed run
+        self.assertEqual(ZaakDocument.search().count(), 1)
+        self.assertEqual(
+            ZaakDocument.get(id="f3ff2713-2f53-42ff-a154-16842309ad60").url, ZAAK_2
+        )
+        self.assertFalse(IndexCheckpoint.objects.exists())
+
+    def test_checkpoint_is_saved_per_indexed_page(self, m, mock_eigenschappen):
+        zaken = self._mock_zaken(m)
+        self._mock_second_page(m, zaken[1])
+        checkpoints = []
+
+        def swap_alias(alias, name):
+            checkpoints.extend(IndexCheckpoint.objects.values())
+
+        with patch(
+            "zac.elasticsearch.management.commands.base_index.swap_alias",
+            side_effect=swap_alias,
+        ):
+            call_command("index_zaken", stdout=StringIO())
+
+        self.assertEqual(len(checkpoints), 1)
+        self.assertEqual(checkpoints[0]["pages_indexed"], 2)
+        self.assertEqual(checkpoints[0]["documents_indexed"], 2)
+        self.assertEqual(checkpoints[0]["last_key"], "ZAAK-001")
+        self.assertTrue(checkpoints[0]["finished"])
@@ -20,6 +20,7 @@ from ..documents import (
     ZaakDocument,
     ZaakInformatieObjectDocument,
 )
+from ..utils import delete_index
 from .utils import ESMixin
 
 DRC_ROOT = "https://api.drc.nl/api/v1/"
@@ -30,7 +31,7 @@ class IndexDocumentsTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
     @staticmethod
     def clear_index(init=False):
         ESMixin.clear_index(init=init)
-        Index(settings.ES_INDEX_DOCUMENTEN).delete(ignore=404)
+        delete_index(settings.ES_INDEX_DOCUMENTEN)
 
         if init:
             InformatieObjectDocument.init()
@@ -15,6 +15,7 @@ from zac.core.models import CoreConfig
 from zac.core.tests.utils import ClearCachesMixin
 
 from ..documents import ObjectDocument, ZaakDocument, ZaakObjectDocument
+from ..utils import delete_index
 from .utils import ESMixin
 
 OBJECTS_ROOT = "https://api.objects.nl/api/v1/"
@@ -26,7 +27,7 @@ class IndexObjectsTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
     @staticmethod
     def clear_index(init=False):
         ESMixin.clear_index(init=init)
-        Index(settings.ES_INDEX_OBJECTEN).delete(ignore=404)
+        delete_index(settings.ES_INDEX_OBJECTEN)
 
         if init:
             ObjectDocument.init()
@@ -184,3 +185,103 @@ class IndexObjectsTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
                 }
             ],
         )
+
+    def test_index_objecten_paginated(self, m):
+        mock_service_oas_get(m, OBJECTS_ROOT, "objects")
+        mock_service_oas_get(m, OBJECTTYPES_ROOT, "objecttypes")
+        objecttype = {
+            "url": f"{OBJECTTYPES_ROOT}objecttypes/1ddc6ea4-6d7f-4573-8f2d-6473eb1ceb5e",
+            "uuid": "1ddc6ea4-6d7f-4573-8f2d-6473eb1ceb5e",
+            "name": "Pand Utrecht NG",
+            "namePlural": "Panden Utrecht NG",
+            "description": "",
+            "dataClassification": "open",
+            "maintainerOrganization": "",
+            "maintainerDepartment": "",
+            "contactPerson": "",
+            "contactEmail": "",
+            "source": "",
+            "updateFrequency": "unknown",
+            "providerOrganization": "",
+            "documentationUrl": "",
+            "labels": {},
+            "createdAt": "2023-01-02",
+            "modifiedAt": "2023-01-02",
+            "versions": [
+                f"{OBJECTTYPES_ROOT}objecttypes/1ddc6ea4-6d7f-4573-8f2d-6473eb1ceb5e/versions/1"
+            ],
+        }
+        objects = [
+            {
+                "url": f"{OBJECTS_ROOT}objects/{uuid}",
+                "uuid": uuid,
+                "type": objecttype["url"],
+                "record": {
+                    "index": 1,
+                    "typeVersion": 1,
+                    "data": {"VELD": "1234"},
+                    "geometry": None,
+                    "startAt": "2022-12-15",
+                    "endAt": None,
+                    "registrationAt": "2022-12-15",
+                    "correctionFor": None,
+                    "correctedBy": None,
+                },
+            }
+            for uuid in (
+                "f8a7573a-758f-4a19-aa22-245bb8f4712e",
+                "0c79c41d-72ef-4ea2-8c4c-03c9945da2a2",
+            )
+        ]
+        m.get(f"{OBJECTTYPES_ROOT}objecttypes", json=[objecttype])
+        m.get(
+            f"{OBJECTS_ROOT}objects",
+            json={
+                "count": 2,
+                "next": f"{OBJECTS_ROOT}objects?page=2&pageSize=1",
+                "previous": None,
+                "results": [objects[0]],
+            },
+        )
+        m.get(
+            f"{OBJECTS_ROOT}objects?page=2",
+            json={
+                "count": 2,
+                "next": None,
+                "previous": f"{OBJECTS_ROOT}objects?pageSize=1",
+                "results": [objects[1]],
+            },
+        )
+        ZaakDocument(
+            identificatie="some-identificatie",
+            omschrijving="some-omschrijving",
+            bronorganisatie="some-bronorganisatie",
+            zaakobjecten=[
+                ZaakObjectDocument(
+                    url="https://some-url.com/", object=objects[1]["url"]
+                )
+            ],
+            vertrouwelijkheidaanduiding=VertrouwelijkheidsAanduidingen.openbaar,
+            va_order=VA_ORDER[VertrouwelijkheidsAanduidingen.openbaar],
+        ).save()
+        self.refresh_index()
+
+        call_command("index_objecten", "--chunk-size=1")
+
+        self.refresh_index()
+        index = Index(settings.ES_INDEX_OBJECTEN)
+        self.assertEqual(index.search().count(), 2)
+        self.assertEqual(
+            ObjectDocument.get(id=objects[1]["uuid"]).related_zaken[0].identificatie,
+            "some-identificatie",
+        )
+        # the objects are fetched per page
+        object_requests = [
+            request
+            for request in m.request_history
+            if request.path == "/api/v1/objects"
+        ]
+        self.assertEqual(
+            [request.qs.get("page") for request in object_requests],
+            [None, None, ["2"]],
+        )
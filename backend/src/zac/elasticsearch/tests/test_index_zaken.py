@@ -2,7 +2,7 @@ from io import StringIO
 from unittest.mock import patch
 
 from django.conf import settings
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 
 import requests_mock
 from rest_framework.test import APITransactionTestCase
@@ -16,6 +16,8 @@ from zac.core.tests.utils import ClearCachesMixin
 from zac.tests.utils import paginated_response
 
 from ..documents import ZaakDocument
+from ..models import IndexHighWaterMark
+from ..utils import get_aliased_indices, get_index_versions
 from .utils import ESMixin
 
 CATALOGI_ROOT = "https://api.catalogi.nl/api/v1/"
@@ -458,9 +460,9 @@ class IndexZakenTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
         # check zaak eigenschap mappings
         self.refresh_index()
         index = zaak_document._index
-        eigenschap_mappings = index.get_field_mapping(fields="eigenschappen.*")[
-            settings.ES_INDEX_ZAKEN
-        ]["mappings"]
+        # the alias points to a single, versioned index
+        (field_mapping,) = index.get_field_mapping(fields="eigenschappen.*").values()
+        eigenschap_mappings = field_mapping["mappings"]
 
         self.assertEqual(len(eigenschap_mappings.keys()), 4)
         self.assertEqual(
@@ -570,9 +572,9 @@ class IndexZakenTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
         # check zaak eigenschap mappings
         self.refresh_index()
         index = zaak_document._index
-        eigenschap_mappings = index.get_field_mapping(fields="eigenschappen.*")[
-            settings.ES_INDEX_ZAKEN
-        ]["mappings"]
+        # the alias points to a single, versioned index
+        (field_mapping,) = index.get_field_mapping(fields="eigenschappen.*").values()
+        eigenschap_mappings = field_mapping["mappings"]
 
         self.assertEqual(len(eigenschap_mappings.keys()), 1)
         self.assertEqual(
@@ -725,3 +727,164 @@ class IndexZakenTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
         # check zaak_document exists
         zd2 = ZaakDocument.get(id="a522d30c-6c10-47fe-82e3-e9f524c14ca9")
         self.assertEqual(zd2.identificatie, "ZAAK-002")
+
+    def test_index_zaken_from_multiple_zrcs(self, m):
+        other_zaken_root = "https://other.zaken.nl/api/v1/"
+        Service.objects.create(api_type=APITypes.zrc, api_root=other_zaken_root)
+        mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
+        mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
+        mock_service_oas_get(m, other_zaken_root, "zrc")
+        zaaktype = generate_oas_component(
+            "ztc",
+            "schemas/ZaakType",
+            url=f"{CATALOGI_ROOT}zaaktypen/a8c8bc90-defa-4548-bacd-793874c013aa",
+        )
+        zaak = generate_oas_component(
+            "zrc",
+            "schemas/Zaak",
+            url=f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8",
+            zaaktype=zaaktype["url"],
+            identificatie="ZAAK-001",
+            vertrouwelijkheidaanduiding="zaakvertrouwelijk",
+            status=None,
+        )
+        other_zaak = generate_oas_component(
+            "zrc",
+            "schemas/Zaak",
+            url=f"{other_zaken_root}zaken/4f8b4811-5d7e-4e9b-8201-b35f5101f891",
+            zaaktype=zaaktype["url"],
+            identificatie="ZAAK-002",
+            vertrouwelijkheidaanduiding="zaakvertrouwelijk",
+            status=None,
+        )
+        m.get(f"{CATALOGI_ROOT}zaaktypen", json=paginated_response([zaaktype]))
+        for root, _zaak in ((ZAKEN_ROOT, zaak), (other_zaken_root, other_zaak)):
+            m.get(f"{root}zaken", json=paginated_response([_zaak]))
+            m.get(f"{root}rollen", json=paginated_response([]))
+            m.get(
+                f"{root}zaakobjecten?zaak={_zaak['url']}",
+                json=paginated_response([]),
+            )
+            m.get(f"{root}zaakinformatieobjecten?zaak={_zaak['url']}", json=[])
+        stdout = StringIO()
+
+        with patch(
+            "zac.elasticsearch.management.commands.index_zaken.get_zaak_eigenschappen",
+            return_value=[],
+        ):
+            call_command(
+                "index_zaken", "--chunk-size=1", "--bulk-workers=2", stdout=stdout
+            )
+
+        self.assertEqual(
+            ZaakDocument.get(id="a522d30c-6c10-47fe-82e3-e9f524c14ca8").identificatie,
+            "ZAAK-001",
+        )
+        self.assertEqual(
+            ZaakDocument.get(id="4f8b4811-5d7e-4e9b-8201-b35f5101f891").identificatie,
+            "ZAAK-002",
+        )
+        output = stdout.getvalue()
+        self.assertIn("2 zaken are received.", output)
+        self.assertIn("Throughput fetch: 2 zaken", output)
+        self.assertIn("Throughput enrich: 2 zaken", output)
+        self.assertIn("Throughput index: 2 zaken", output)
+
+    def _mock_single_zaak(self, m):
+        mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
+        mock_service_oas_get(m, ZAKEN_ROOT, "zrc")
+        zaaktype = generate_oas_component(
+            "ztc",
+            "schemas/ZaakType",
+            url=f"{CATALOGI_ROOT}zaaktypen/a8c8bc90-defa-4548-bacd-793874c013aa",
+        )
+        zaak = generate_oas_component(
+            "zrc",
+            "schemas/Zaak",
+            url=f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8",
+            zaaktype=zaaktype["url"],
+            identificatie="ZAAK-001",
+            vertrouwelijkheidaanduiding="zaakvertrouwelijk",
+            status=None,
+        )
+        m.get(f"{CATALOGI_ROOT}zaaktypen", json=paginated_response([zaaktype]))
+        m.get(f"{ZAKEN_ROOT}zaken", json=paginated_response([zaak]))
+        m.get(f"{ZAKEN_ROOT}rollen", json=paginated_response([]))
+        m.get(
+            f"{ZAKEN_ROOT}zaakobjecten?zaak={zaak['url']}", json=paginated_response([])
+        )
+        m.get(f"{ZAKEN_ROOT}zaakinformatieobjecten?zaak={zaak['url']}", json=[])
+        return zaak, zaaktype
+
+    @patch(
+        "zac.elasticsearch.management.commands.index_zaken.get_zaak_eigenschappen",
+        return_value=[],
+    )
+    def test_index_zaken_swaps_alias(self, m, mock_eigenschappen):
+        self._mock_single_zaak(m)
+
+        call_command("index_zaken", stdout=StringIO())
+
+        first_indices = get_aliased_indices(settings.ES_INDEX_ZAKEN)
+        self.assertEqual(len(first_indices), 1)
+        self.assertTrue(first_indices[0].startswith(f"{settings.ES_INDEX_ZAKEN}_v"))
+
+        call_command("index_zaken", stdout=StringIO())
+
+        second_indices = get_aliased_indices(settings.ES_INDEX_ZAKEN)
+        self.assertEqual(len(second_indices), 1)
+        self.assertNotEqual(first_indices, second_indices)
+        # the previous version is cleaned up
+        self.assertEqual(get_index_versions(settings.ES_INDEX_ZAKEN), second_indices)
+        zaak_document = ZaakDocument.get(id="a522d30c-6c10-47fe-82e3-e9f524c14ca8")
+        self.assertEqual(zaak_document.identificatie, "ZAAK-001")
+
+    @patch(
+        "zac.elasticsearch.management.commands.index_zaken.get_zaak_eigenschappen",
+        return_value=[],
+    )
+    def test_index_zaken_keeps_current_index_if_incomplete(self, m, mock_eigenschappen):
+        zaak, zaaktype = self._mock_single_zaak(m)
+        for uuid in (
+            "7b1ab5d2-b8e7-4c1e-a57e-cfa5b6a6fa5c",
+            "fd2e1c26-3ad5-4e32-a6bb-5ee1e7e7f6d8",
+        ):
+            zaak_document = self.create_zaak_document(
+                {**zaak, "url": f"{ZAKEN_ROOT}zaken/{uuid}"}
+            )
+            zaak_document.zaaktype = self.create_zaaktype_document(zaaktype)
+            zaak_document.save()
+        self.refresh_index()
+
+        with self.assertRaises(CommandError):
+            call_command("index_zaken", stdout=StringIO())
+
+        # the new version is discarded, the existing index is left alone
+        self.assertEqual(get_index_versions(settings.ES_INDEX_ZAKEN), [])
+        self.assertEqual(ZaakDocument.search().count(), 2)
+
+    @patch(
+        "zac.elasticsearch.management.commands.index_zaken.get_zaak_eigenschappen",
+        return_value=[],
+    )
+    def test_index_zaken_incremental(self, m, mock_eigenschappen):
+        self._mock_single_zaak(m)
+
+        with self.assertRaises(CommandError):
+            call_command("index_zaken", "--incremental", stdout=StringIO())
+
+        call_command("index_zaken", "--incremental", "--since=2022-03-01")
+
+        zaken_requests = [
+            request
+            for request in m.request_history
+            if request.path == "/api/v1/zaken" and "page" not in request.qs
+        ]
+        self.assertTrue(zaken_requests)
+        for request in zaken_requests:
+            self.assertEqual(request.qs["startdatum__gte"], ["2022-03-01"])
+        zaak_document = ZaakDocument.get(id="a522d30c-6c10-47fe-82e3-e9f524c14ca8")
+        self.assertEqual(zaak_document.identificatie, "ZAAK-001")
+        self.assertTrue(
+            IndexHighWaterMark.objects.filter(index=settings.ES_INDEX_ZAKEN).exists()
+        )
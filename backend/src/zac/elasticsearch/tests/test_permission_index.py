@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+from django.conf import settings
+from django.test import TestCase
+
+from elasticsearch_dsl import Index
+
+from zac.accounts.tests.factories import AtomicPermissionFactory, UserFactory
+from zac.core.permissions import zaken_inzien
+from zac.core.tests.utils import ClearCachesMixin
+
+from ..documents import PermissionDocument, ZaakDocument
+from ..permission_index import sync_permission_documents
+from ..searches import query_allowed_for_requester, search_zaken
+from ..utils import delete_index
+from .utils import ESMixin
+
+ZAKEN_ROOT = "https://api.zaken.nl/api/v1/"
+ZAAK_1 = f"{ZAKEN_ROOT}zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8"
+ZAAK_2 = f"{ZAKEN_ROOT}zaken/a8c8bc90-defa-4548-bacd-793874c013ab"
+
+
+class PermissionIndexTests(ClearCachesMixin, ESMixin, TestCase):
+    @staticmethod
+    def clear_index(init=False):
+        ESMixin.clear_index(init=init)
+        delete_index(settings.ES_INDEX_PERMISSIONS)
+
+    def setUp(self):
+        super().setUp()
+
+        for url in (ZAAK_1, ZAAK_2):
+            ZaakDocument(meta={"id": url.rsplit("/", 1)[1]}, url=url, rollen=[]).save()
+        self.refresh_index()
+
+        self.user = UserFactory.create()
+        self.request = MagicMock(user=self.user, auth=None)
+        AtomicPermissionFactory.create(
+            object_url=ZAAK_1, permission=zaken_inzien.name, for_user=self.user
+        )
+
+    def test_query_looks_up_urls(self):
+        query = query_allowed_for_requester(self.request)
+
+        self.assertEqual(
+            query.to_dict(),
+            {
+                "terms": {
+                    "url": {
+                        "index": settings.ES_INDEX_PERMISSIONS,
+                        "id": str(self.user.pk),
+                        "path": f"permissions.{zaken_inzien.name}.zaak",
+                    }
+                }
+            },
+        )
+        document = PermissionDocument.get(id=self.user.pk)
+        self.assertEqual(
+            document.permissions.to_dict(), {zaken_inzien.name: {"zaak": [ZAAK_1]}}
+        )
+
+    def test_search_only_allowed(self):
+        result = search_zaken(request=self.request, only_allowed=True)
+
+        self.assertEqual([zaak.url for zaak in result], [ZAAK_1])
+
+    def test_document_is_updated_when_permissions_change(self):
+        search_zaken(request=self.request, only_allowed=True)
+
+        AtomicPermissionFactory.create(
+            object_url=ZAAK_2, permission=zaken_inzien.name, for_user=self.user
+        )
+        result = search_zaken(request=self.request, only_allowed=True)
+
+        self.assertEqual(sorted(zaak.url for zaak in result), [ZAAK_1, ZAAK_2])
+
+    def test_sync_permission_documents(self):
+        sync_permission_documents([self.user.pk])
+        Index(settings.ES_INDEX_PERMISSIONS).refresh()
+
+        document = PermissionDocument.get(id=self.user.pk)
+        self.assertEqual(document.username, self.user.username)
+        self.assertEqual(
+            document.permissions.to_dict(), {zaken_inzien.name: {"zaak": [ZAAK_1]}}
+        )
@@ -40,6 +40,7 @@ from ..documents import (
     ZaakTypeDocument,
 )
 from ..searches import quick_search
+from ..utils import delete_index
 from .utils import ESMixin
 
 CATALOGI_ROOT = "https://api.catalogi.nl/api/v1/"
@@ -52,8 +53,8 @@ class QuickSearchTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
     @staticmethod
     def clear_index(init=False):
         ESMixin.clear_index(init=init)
-        Index(settings.ES_INDEX_OBJECTEN).delete(ignore=404)
-        Index(settings.ES_INDEX_DOCUMENTEN).delete(ignore=404)
+        delete_index(settings.ES_INDEX_OBJECTEN)
+        delete_index(settings.ES_INDEX_DOCUMENTEN)
 
         if init:
             ObjectDocument.init()
@@ -8,13 +8,14 @@ from zgw.models.zrc import Zaak
 
 from ..api import create_zaak_document, create_zaaktype_document
 from ..documents import ZaakDocument
+from ..utils import delete_index
 
 
 class ESMixin:
     @staticmethod
     def clear_index(init=False):
-        zaken = Index(settings.ES_INDEX_ZAKEN)
-        zaken.delete(ignore=404)
+        # the index may be an alias for a version created by the index commands
+        delete_index(settings.ES_INDEX_ZAKEN)
         if init:
             ZaakDocument.init()
 
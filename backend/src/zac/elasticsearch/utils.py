@@ -1,7 +1,15 @@
+from typing import List, Type
+
 from django.conf import settings
+from django.utils import timezone
 
 from elasticsearch.exceptions import NotFoundError
-from elasticsearch_dsl import Index
+from elasticsearch_dsl import Document, Index
+from elasticsearch_dsl.connections import connections
+
+
+class IndexValidationError(Exception):
+    pass
 
 
 def check_if_index_exists(index=settings.ES_INDEX_ZAKEN):
@@ -12,3 +20,112 @@ def check_if_index_exists(index=settings.ES_INDEX_ZAKEN):
             "Couldn't find index: %s. Please try to create the index through a command first."
             % index,
         )
+
+
+def get_aliased_indices(alias: str) -> List[str]:
+    es_client = connections.get_connection()
+    if not es_client.indices.exists_alias(name=alias):
+        return []
+    return list(es_client.indices.get_alias(name=alias).keys())
+
+
+def get_index_versions(alias: str) -> List[str]:
+    """
+    Return the names of the versioned indices of the alias, oldest first.
+    """
+    es_client = connections.get_connection()
+    return sorted(es_client.indices.get(index=f"{alias}_v*").keys())
+
+
+def create_index_version(document: Type[Document]) -> str:
+    """
+    Create a new, empty version of the index of the document.
+
+    Replicas and refreshes are turned off so the index can be loaded as fast as
+    possible - see :func:`activate_index_version`.
+    """
+    alias = document._index._name
+    name = f"{alias}_v{timezone.now():%Y%m%d%H%M%S%f}"
+    index = document._index.clone(name=name)
+    index.settings(number_of_replicas=0, refresh_interval="-1")
+    index.create()
+    return name
+
+
+def activate_index_version(document: Type[Document], name: str) -> None:
+    """
+    Restore the replicas and refreshes of a loaded index version.
+    """
+    index_settings = document._index._settings
+    Index(name).put_settings(
+        body={
+            "index": {
+                # ``None`` resets the setting to the ES default
+                "number_of_replicas": index_settings.get("number_of_replicas"),
+                "refresh_interval": index_settings.get("refresh_interval"),
+            }
+        }
+    )
+    Index(name).refresh()
+
+
+def validate_index_version(alias: str, name: str, min_count_ratio: float) -> int:
+    """
+    Check that the loaded index version can replace the current one.
+
+    A version that holds considerably fewer documents than the live index points to
+    an incomplete indexing run, so it must not go live.
+    """
+    count = Index(name).search().count()
+    if not Index(alias).exists():
+        return count
+
+    current_count = Index(alias).search().count()
+    if count < current_count * min_count_ratio:
+        raise IndexValidationError(
+            f"Index {name} holds {count} documents while {alias} holds "
+            f"{current_count} documents."
+        )
+    return count
+
+
+def swap_alias(alias: str, name: str) -> None:
+    """
+    Point the alias to the index version in one atomic operation.
+
+    An existing (non-versioned) index with the name of the alias is removed in the
+    same operation.
+    """
+    es_client = connections.get_connection()
+    current_indices = get_aliased_indices(alias)
+    actions = [
+        {"remove": {"index": index, "alias": alias}} for index in current_indices
+    ]
+    if not current_indices and es_client.indices.exists(index=alias):
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": name, "alias": alias}})
+    es_client.indices.update_aliases(body={"actions": actions})
+
+
+def delete_old_index_versions(alias: str, keep: int = 0) -> List[str]:
+    """
+    Delete the index versions the alias doesn't point to, except for the ``keep``
+    most recent ones.
+    """
+    current_indices = get_aliased_indices(alias)
+    old_versions = [
+        name for name in get_index_versions(alias) if name not in current_indices
+    ]
+    to_delete = old_versions[: len(old_versions) - keep] if keep else old_versions
+    for name in to_delete:
+        Index(name).delete(ignore=404)
+    return to_delete
+
+
+def delete_index(name: str) -> None:
+    """
+    Delete the index, or all the versions of the index if ``name`` is an alias.
+    """
+    for index in set(get_aliased_indices(name) + get_index_versions(name)):
+        Index(index).delete(ignore=404)
+    Index(name).delete(ignore=404)
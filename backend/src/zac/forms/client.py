@@ -4,7 +4,7 @@ from urllib.parse import urljoin
 
 from django.core.exceptions import ImproperlyConfigured
 
-import requests
+from zac.utils import http
 
 from .models import FormsConfig
 
@@ -34,7 +34,7 @@ class OpenFormsClient:
             path = path[1:]
 
         url = urljoin(self.base_url, path)
-        response = requests.request(method, url, **kwargs)
+        response = http.request(method, url, **kwargs)
         response.raise_for_status()
         return response.json()
 
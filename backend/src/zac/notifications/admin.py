@@ -1,8 +1,60 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils.translation import gettext_lazy as _, ngettext
 
-from .models import Subscription
+from .models import FailedNotification, QueuedNotification, Subscription
+from .queue import requeue_failed_notifications
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("created", "url")
+
+
+@admin.register(QueuedNotification)
+class QueuedNotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "created",
+        "kanaal",
+        "resource",
+        "actie",
+        "hoofd_object",
+        "status",
+        "attempts",
+        "next_attempt",
+    )
+    list_filter = ("status", "kanaal", "resource", "actie")
+    search_fields = ("hoofd_object",)
+    date_hierarchy = "created"
+    readonly_fields = ("message", "last_error", "locked_at")
+
+
+@admin.register(FailedNotification)
+class FailedNotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "failed",
+        "kanaal",
+        "resource",
+        "actie",
+        "hoofd_object",
+        "attempts",
+    )
+    list_filter = ("kanaal", "resource", "actie")
+    search_fields = ("hoofd_object",)
+    date_hierarchy = "failed"
+    readonly_fields = ("message", "error", "attempts", "created", "failed")
+    actions = ["requeue"]
+
+    def requeue(self, request, queryset):
+        requeued = requeue_failed_notifications(queryset)
+        self.message_user(
+            request,
+            ngettext(
+                "%d notification was put back in the queue.",
+                "%d notifications were put back in the queue.",
+                requeued,
+            )
+            % requeued,
+            messages.SUCCESS,
+        )
+
+    requeue.short_description = _("Put the selected notifications back in the queue")
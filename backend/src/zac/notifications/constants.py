@@ -0,0 +1,8 @@
+from django.utils.translation import gettext_lazy as _
+
+from djchoices import ChoiceItem, DjangoChoices
+
+
+class QueuedNotificationStatuses(DjangoChoices):
+    pending = ChoiceItem("pending", _("pending"))
+    processing = ChoiceItem("processing", _("processing"))
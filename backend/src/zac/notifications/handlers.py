@@ -1,4 +1,5 @@
 import logging
+from typing import List
 
 from elasticsearch.exceptions import NotFoundError
 from zgw_consumers.api_models.base import factory
@@ -17,11 +18,12 @@ from zac.core.cache import (
     invalidate_document_cache,
     invalidate_document_url_cache,
     invalidate_fetch_object_cache,
+    invalidate_informatieobjecttype_cache,
     invalidate_informatieobjecttypen_cache,
     invalidate_rollen_cache,
     invalidate_zaak_cache,
-    invalidate_zaak_list_cache,
     invalidate_zaakobjecten_cache,
+    invalidate_zaaktype_cache,
     invalidate_zaaktypen_cache,
 )
 from zac.core.services import (
@@ -41,6 +43,7 @@ from zac.elasticsearch.api import (
     delete_object_document,
     delete_zaak_document,
     get_zaak_document,
+    reindex_zaak_document,
     update_eigenschappen_in_zaak_document,
     update_informatieobject_document,
     update_object_document,
@@ -55,10 +58,17 @@ from zac.elasticsearch.api import (
     update_zaakobjecten_in_zaak_document,
 )
 from zac.elasticsearch.documents import ZaakDocument
+from zac.utils.local_cache import invalidate_local_caches
 from zgw.models.zrc import Zaak
 
 logger = logging.getLogger(__name__)
 
+# zaak relations and the part of the zaak document they are indexed in
+RELATION_PARTS = {
+    "zaakobject": "zaakobjecten",
+    "zaakinformatieobject": "zaakinformatieobjecten",
+}
+
 
 class ZakenHandler:
     def handle(self, data: dict) -> None:
@@ -108,6 +118,114 @@ class ZakenHandler:
                     data["hoofd_object"], data["resource_url"]
                 )
 
+    def handle_many(self, messages: List[dict]) -> None:
+        """
+        Handle a burst of notifications about the same zaak in one go.
+
+        The zaak is retrieved once and only the parts of the zaak document touched by
+        the notifications are rebuilt, with a single write to ES.
+        """
+        if len(messages) == 1:
+            self.handle(messages[0])
+            return
+
+        logger.debug("ZAC notifications: %r" % messages)
+        zaak_url = messages[0]["hoofd_object"]
+        changes = {(message["resource"], message["actie"]) for message in messages}
+        if ("zaak", "destroy") in changes:
+            self._handle_zaak_destroy(zaak_url)
+            return
+
+        created = ("zaak", "create") in changes
+        updated = bool(changes & {("zaak", "update"), ("zaak", "partial_update")})
+        parts = set()
+        invalidate_zaak = updated
+        created_rollen = []
+        invalidate_rollen = False
+        created_resources = {resource: [] for resource in RELATION_PARTS}
+        destroyed_resources = {resource: [] for resource in RELATION_PARTS}
+
+        for message in messages:
+            resource, actie = message["resource"], message["actie"]
+            if resource == "zaakeigenschap":
+                invalidate_zaak = True
+                parts.add("eigenschappen")
+            elif resource == "status" and actie == "create":
+                invalidate_zaak = True
+                parts.add("status")
+            elif resource == "resultaat" and actie == "create":
+                invalidate_zaak = True
+            elif resource == "rol" and actie in ["create", "destroy"]:
+                invalidate_rollen = True
+                parts.add("rollen")
+                if actie == "create":
+                    created_rollen.append(message["resource_url"])
+            elif resource in RELATION_PARTS and actie in ["create", "destroy"]:
+                parts.add(RELATION_PARTS[resource])
+                resources = (
+                    created_resources if actie == "create" else destroyed_resources
+                )
+                resources[resource].append(message["resource_url"])
+
+        zaak = self._retrieve_zaak(zaak_url)
+        # the current state is needed to detect closing the zaak and to find the
+        # objects of destroyed relations
+        zaak_document = None if created else get_zaak_document(zaak_url)
+
+        if invalidate_zaak:
+            invalidate_zaak_cache(zaak)
+        if "zaakobjecten" in parts:
+            invalidate_zaakobjecten_cache(zaak)
+        if invalidate_rollen:
+            invalidate_rollen_cache(zaak, rol_urls=created_rollen)
+
+        for rol_url in created_rollen:
+            self._update_created_rol(rol_url)
+
+        if updated and zaak_document:
+            self._lock_review_requests_if_closed(zaak, zaak_document)
+
+        reindex_zaak_document(zaak, parts=parts, update_zaak=updated, create=created)
+
+        if updated:
+            self._update_related_zaak_documents(zaak)
+
+        object_urls = self._get_related_urls(
+            created_resources["zaakobject"],
+            destroyed_resources["zaakobject"],
+            zaak_document.zaakobjecten if zaak_document else [],
+            fetch=lambda url: fetch_zaak_object(url).object,
+            attr="object",
+        )
+        for object_url in object_urls:
+            update_related_zaken_in_object_document(object_url)
+
+        informatieobject_urls = self._get_related_urls(
+            created_resources["zaakinformatieobject"],
+            destroyed_resources["zaakinformatieobject"],
+            zaak_document.zaakinformatieobjecten if zaak_document else [],
+            fetch=lambda url: fetch_zaak_informatieobject(url).informatieobject,
+            attr="informatieobject",
+        )
+        for informatieobject_url in informatieobject_urls:
+            update_related_zaken_in_informatieobject_document(informatieobject_url)
+
+    @staticmethod
+    def _get_related_urls(
+        created: List[str], destroyed: List[str], indexed: list, fetch, attr: str
+    ) -> List[str]:
+        urls = []
+        for url in created:
+            # relations that were created and destroyed again can't be retrieved
+            if url not in destroyed:
+                urls.append(fetch(url))
+
+        for relation in indexed:
+            if relation.url in destroyed:
+                urls.append(getattr(relation, attr))
+
+        return list(dict.fromkeys(urls))
+
     @staticmethod
     def _retrieve_zaak(zaak_url) -> Zaak:
         client = _client_from_url(zaak_url)
@@ -132,22 +250,30 @@ class ZakenHandler:
         invalidate_zaak_cache(zaak)
 
         # Determine if einddatum is updated.
-        if is_closed := zaak.einddatum:
+        if zaak.einddatum:
             zaak_document = get_zaak_document(zaak_url)
-            was_closed = None if not zaak_document else zaak_document.einddatum
-
-            def _lock_review_request(rr: ReviewRequest):
-                lock_review_request(str(rr.id), "Zaak is gesloten.")
-
-            # lock all review requests related to zaak
-            if is_closed and is_closed != was_closed:
-                review_requests = get_review_requests(zaak)
-                with parallel() as executor:
-                    list(executor.map(_lock_review_request, review_requests))
+            self._lock_review_requests_if_closed(zaak, zaak_document)
 
         # index in ES
         update_zaak_document(zaak)
+        self._update_related_zaak_documents(zaak)
 
+    @staticmethod
+    def _lock_review_requests_if_closed(zaak: Zaak, zaak_document) -> None:
+        is_closed = zaak.einddatum
+        was_closed = None if not zaak_document else zaak_document.einddatum
+
+        def _lock_review_request(rr: ReviewRequest):
+            lock_review_request(str(rr.id), "Zaak is gesloten.")
+
+        # lock all review requests related to zaak
+        if is_closed and is_closed != was_closed:
+            review_requests = get_review_requests(zaak)
+            with parallel() as executor:
+                list(executor.map(_lock_review_request, review_requests))
+
+    @staticmethod
+    def _update_related_zaak_documents(zaak: Zaak) -> None:
         # Update related zaak in objecten indices
         try:
             update_related_zaak_in_object_documents(zaak)
@@ -161,9 +287,7 @@ class ZakenHandler:
             logger.warning("Could not find informatieobjecten index.")
 
     def _handle_zaak_create(self, zaak_url: str):
-        client = _client_from_url(zaak_url)
         zaak = self._retrieve_zaak(zaak_url)
-        invalidate_zaak_list_cache(client, zaak)
         # index in ES
         zaak_document = create_zaak_document(zaak)
         zaak_document.zaaktype = create_zaaktype_document(zaak.zaaktype)
@@ -194,6 +318,12 @@ class ZakenHandler:
     def _handle_rol_create(self, zaak_url: str, rol_url: str):
         zaak = self._retrieve_zaak(zaak_url)
         invalidate_rollen_cache(zaak, rol_urls=[rol_url])
+        self._update_created_rol(rol_url)
+
+        update_rollen_in_zaak_document(zaak)
+
+    @staticmethod
+    def _update_created_rol(rol_url: str) -> None:
         updated = update_medewerker_identificatie_rol(rol_url)
 
         rol = fetch_rol(rol_url=rol_url)
@@ -202,8 +332,6 @@ class ZakenHandler:
         ):
             add_permission_for_behandelaar(rol_url)
 
-        update_rollen_in_zaak_document(zaak)
-
     def _handle_rol_destroy(self, zaak_url: str):
         zaak = self._retrieve_zaak(zaak_url)
         invalidate_rollen_cache(zaak)
@@ -289,6 +417,8 @@ class ZaaktypenHandler:
             if data["actie"] in ["create", "update", "partial_update"]:
                 invalidate_zaaktypen_cache(catalogus=data["kenmerken"]["catalogus"])
                 invalidate_zaaktypen_cache()
+                invalidate_zaaktype_cache(data["resource_url"])
+                invalidate_local_caches()
 
 
 class InformatieObjecttypenHandler:
@@ -299,6 +429,8 @@ class InformatieObjecttypenHandler:
                     catalogus=data["kenmerken"]["catalogus"]
                 )
                 invalidate_informatieobjecttypen_cache()
+                invalidate_informatieobjecttype_cache(data["resource_url"])
+                invalidate_local_caches()
 
 
 class ObjectenHandler:
@@ -334,12 +466,31 @@ class RoutingHandler:
         self.config = config
         self.default = default
 
+    def get_handler(self, kanaal: str):
+        handler = self.config.get(kanaal)
+        return handler if handler is not None else self.default
+
     def handle(self, message: dict) -> None:
-        handler = self.config.get(message["kanaal"])
+        handler = self.get_handler(message["kanaal"])
         if handler is not None:
             handler.handle(message)
-        elif self.default:
-            self.default.handle(message)
+
+    def can_coalesce(self, kanaal: str) -> bool:
+        return hasattr(self.get_handler(kanaal), "handle_many")
+
+    def handle_many(self, messages: List[dict]) -> None:
+        """
+        Handle notifications about the same ``hoofd_object``, in order.
+        """
+        handler = self.get_handler(messages[0]["kanaal"])
+        if handler is None:
+            return
+
+        if hasattr(handler, "handle_many"):
+            handler.handle_many(messages)
+        else:
+            for message in messages:
+                handler.handle(message)
 
 
 handler = RoutingHandler(
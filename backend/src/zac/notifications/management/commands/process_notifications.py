@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from ...queue import process_queue, release_stale_notifications
+
+
+class Command(BaseCommand):
+    help = "Run a worker that handles the queued notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Number of notifications handled in parallel. Defaults to the NOTIFICATIONS_QUEUE_CONCURRENCY setting.",
+            default=settings.NOTIFICATIONS_QUEUE_CONCURRENCY,
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of notifications claimed from the queue at once. Defaults to 50.",
+            default=50,
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds to wait before checking an empty queue again. Defaults to 1.",
+            default=1.0,
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Stop as soon as there are no due notifications left in the queue.",
+        )
+
+    def handle(self, **options):
+        self.stdout.write(
+            f"Processing notifications with concurrency {options['concurrency']}."
+        )
+        handled = 0
+        while True:
+            release_stale_notifications()
+            claimed = process_queue(
+                max_workers=options["concurrency"], batch_size=options["batch_size"]
+            )
+            handled += claimed
+            if claimed:
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write(f"Processed {handled} notifications.")
@@ -0,0 +1,142 @@
+# Generated by Django 3.2.12 on 2026-10-18 09:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_alter_subscription_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedNotification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kanaal", models.CharField(max_length=50, verbose_name="kanaal")),
+                (
+                    "resource",
+                    models.CharField(max_length=100, verbose_name="resource"),
+                ),
+                ("actie", models.CharField(max_length=100, verbose_name="actie")),
+                (
+                    "hoofd_object",
+                    models.URLField(max_length=1000, verbose_name="hoofd object"),
+                ),
+                (
+                    "message",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="The validated notification as it was received.",
+                        verbose_name="message",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="attempts"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="created"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "failed",
+                    models.DateTimeField(auto_now_add=True, verbose_name="failed"),
+                ),
+            ],
+            options={
+                "verbose_name": "failed notification",
+                "verbose_name_plural": "failed notifications",
+                "ordering": ("-failed",),
+            },
+        ),
+        migrations.CreateModel(
+            name="QueuedNotification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kanaal", models.CharField(max_length=50, verbose_name="kanaal")),
+                (
+                    "resource",
+                    models.CharField(max_length=100, verbose_name="resource"),
+                ),
+                ("actie", models.CharField(max_length=100, verbose_name="actie")),
+                (
+                    "hoofd_object",
+                    models.URLField(max_length=1000, verbose_name="hoofd object"),
+                ),
+                (
+                    "message",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        help_text="The validated notification as it was received.",
+                        verbose_name="message",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="attempts"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="created"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "pending"), ("processing", "processing")],
+                        db_index=True,
+                        default="pending",
+                        max_length=50,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "next_attempt",
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name="next attempt",
+                    ),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="locked at"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="last error"),
+                ),
+            ],
+            options={
+                "verbose_name": "queued notification",
+                "verbose_name_plural": "queued notifications",
+                "ordering": ("next_attempt", "pk"),
+            },
+        ),
+    ]
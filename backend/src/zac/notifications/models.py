@@ -1,6 +1,11 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import JSONField
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .constants import QueuedNotificationStatuses
+
 
 class Subscription(models.Model):
     url = models.URLField()
@@ -12,3 +17,61 @@ class Subscription(models.Model):
 
     def __str__(self):
         return self.url
+
+
+class NotificationMessageMixin(models.Model):
+    kanaal = models.CharField(_("kanaal"), max_length=50)
+    resource = models.CharField(_("resource"), max_length=100)
+    actie = models.CharField(_("actie"), max_length=100)
+    hoofd_object = models.URLField(_("hoofd object"), max_length=1000)
+    message = JSONField(
+        _("message"),
+        encoder=DjangoJSONEncoder,
+        help_text=_("The validated notification as it was received."),
+    )
+    attempts = models.PositiveIntegerField(_("attempts"), default=0)
+    created = models.DateTimeField(_("created"), default=timezone.now)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.kanaal} {self.resource} {self.actie}: {self.hoofd_object}"
+
+
+class QueuedNotification(NotificationMessageMixin):
+    """
+    A received notification waiting to be handled by the notifications worker.
+    """
+
+    status = models.CharField(
+        _("status"),
+        max_length=50,
+        choices=QueuedNotificationStatuses.choices,
+        default=QueuedNotificationStatuses.pending,
+        db_index=True,
+    )
+    next_attempt = models.DateTimeField(
+        _("next attempt"), default=timezone.now, db_index=True
+    )
+    locked_at = models.DateTimeField(_("locked at"), null=True, blank=True)
+    last_error = models.TextField(_("last error"), blank=True)
+
+    class Meta:
+        verbose_name = _("queued notification")
+        verbose_name_plural = _("queued notifications")
+        ordering = ("next_attempt", "pk")
+
+
+class FailedNotification(NotificationMessageMixin):
+    """
+    A notification that could not be handled within the maximum number of attempts.
+    """
+
+    error = models.TextField(_("error"), blank=True)
+    failed = models.DateTimeField(_("failed"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("failed notification")
+        verbose_name_plural = _("failed notifications")
+        ordering = ("-failed",)
@@ -0,0 +1,256 @@
+"""
+Database-backed queue for incoming notifications.
+
+The notification callback only persists the notification, a pool of workers
+(see the ``process_notifications`` management command) drains the queue, retries
+failed notifications with exponential backoff and moves notifications that keep
+failing to the dead-letter table.
+
+Each notification - or group of coalesced notifications - is handled in its own
+memoization scope: after a notification the remote resources may have changed, so
+results are not shared between notifications.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from zgw_consumers.concurrent import parallel
+
+from zac.utils.memoization import memoization_scope
+
+from .constants import QueuedNotificationStatuses
+from .handlers import handler
+from .models import FailedNotification, QueuedNotification
+from .serializers import NotificatieSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_notification(data: dict) -> QueuedNotification:
+    # Give the notifications of a burst about the same object the chance to arrive,
+    # so they can be handled together. Every new notification postpones the ones
+    # still waiting, but no longer than the maximum delay after the oldest of them.
+    now = timezone.now()
+    next_attempt = now + timedelta(seconds=settings.NOTIFICATIONS_QUEUE_COALESCE_WINDOW)
+    waiting = QueuedNotification.objects.filter(
+        hoofd_object=data["hoofd_object"],
+        status=QueuedNotificationStatuses.pending,
+        attempts=0,
+        next_attempt__gt=now,
+    )
+    oldest = waiting.order_by("created").values_list("created", flat=True).first()
+    if oldest is not None:
+        max_delay = timedelta(seconds=settings.NOTIFICATIONS_QUEUE_COALESCE_MAX_DELAY)
+        next_attempt = min(next_attempt, oldest + max_delay)
+        waiting.update(next_attempt=next_attempt)
+
+    return QueuedNotification.objects.create(
+        kanaal=data["kanaal"],
+        resource=data["resource"],
+        actie=data["actie"],
+        hoofd_object=data["hoofd_object"],
+        message=data,
+        next_attempt=next_attempt,
+    )
+
+
+def claim_notifications(limit: int) -> List[QueuedNotification]:
+    """
+    Lock and return the notifications that are due.
+
+    Along with a due notification, all other due notifications about the same
+    ``hoofd_object`` are claimed so they can be coalesced. Notifications for a
+    ``hoofd_object`` that is being processed by another worker, or that has a
+    notification waiting for its retry, are skipped - so that notifications about
+    the same object are handled in order, and a retry keeps its backoff.
+    """
+    now = timezone.now()
+    in_progress = QueuedNotification.objects.filter(
+        status=QueuedNotificationStatuses.processing
+    ).values("hoofd_object")
+    # only retries - notifications waiting to be coalesced don't hold back the due
+    # ones, they are handled in a next batch
+    backing_off = QueuedNotification.objects.filter(
+        status=QueuedNotificationStatuses.pending,
+        attempts__gt=0,
+        next_attempt__gt=now,
+    ).values("hoofd_object")
+
+    with transaction.atomic():
+        due = (
+            QueuedNotification.objects.filter(
+                status=QueuedNotificationStatuses.pending, next_attempt__lte=now
+            )
+            .exclude(hoofd_object__in=in_progress)
+            .exclude(hoofd_object__in=backing_off)
+            .order_by("created", "pk")
+            .values_list("hoofd_object", flat=True)[:limit]
+        )
+        notifications = list(
+            QueuedNotification.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=QueuedNotificationStatuses.pending,
+                next_attempt__lte=now,
+                hoofd_object__in=set(due),
+            )
+            .order_by("created", "pk")
+        )
+        QueuedNotification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(status=QueuedNotificationStatuses.processing, locked_at=now)
+
+    return notifications
+
+
+def release_stale_notifications() -> int:
+    """
+    Put notifications claimed by a worker that died back in the queue.
+    """
+    timeout = timedelta(seconds=settings.NOTIFICATIONS_QUEUE_PROCESSING_TIMEOUT)
+    return QueuedNotification.objects.filter(
+        status=QueuedNotificationStatuses.processing,
+        locked_at__lt=timezone.now() - timeout,
+    ).update(status=QueuedNotificationStatuses.pending, locked_at=None)
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    backoff = settings.NOTIFICATIONS_QUEUE_RETRY_BACKOFF
+    return timedelta(seconds=backoff * 2 ** (attempts - 1))
+
+
+def _load_message(notification: QueuedNotification) -> dict:
+    serializer = NotificatieSerializer(data=notification.message)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def handle_queued_notification(notification: QueuedNotification) -> bool:
+    try:
+        with memoization_scope(f"notification {notification.pk}"):
+            handler.handle(_load_message(notification))
+    except Exception:
+        logger.warning(
+            "Handling notification %s failed (attempt %d).",
+            notification.pk,
+            notification.attempts + 1,
+            exc_info=True,
+        )
+        record_failure(notification, traceback.format_exc())
+        return False
+
+    notification.delete()
+    return True
+
+
+def record_failure(notification: QueuedNotification, error: str) -> None:
+    notification.attempts += 1
+    if notification.attempts >= settings.NOTIFICATIONS_QUEUE_MAX_ATTEMPTS:
+        with transaction.atomic():
+            FailedNotification.objects.create(
+                kanaal=notification.kanaal,
+                resource=notification.resource,
+                actie=notification.actie,
+                hoofd_object=notification.hoofd_object,
+                message=notification.message,
+                attempts=notification.attempts,
+                created=notification.created,
+                error=error,
+            )
+            notification.delete()
+        return
+
+    notification.status = QueuedNotificationStatuses.pending
+    notification.locked_at = None
+    notification.last_error = error
+    notification.next_attempt = timezone.now() + get_retry_delay(notification.attempts)
+    notification.save()
+
+
+def handle_coalesced_notifications(notifications: List[QueuedNotification]) -> bool:
+    try:
+        with memoization_scope(
+            f"{len(notifications)} notifications about {notifications[0].hoofd_object}"
+        ):
+            handler.handle_many(
+                [_load_message(notification) for notification in notifications]
+            )
+    except Exception:
+        logger.warning(
+            "Handling %d coalesced notifications about %s failed.",
+            len(notifications),
+            notifications[0].hoofd_object,
+            exc_info=True,
+        )
+        error = traceback.format_exc()
+        for notification in notifications:
+            record_failure(notification, error)
+        return False
+
+    QueuedNotification.objects.filter(
+        pk__in=[notification.pk for notification in notifications]
+    ).delete()
+    return True
+
+
+def _handle_group(notifications: List[QueuedNotification]) -> None:
+    if len(notifications) > 1 and handler.can_coalesce(notifications[0].kanaal):
+        handle_coalesced_notifications(notifications)
+        return
+
+    # Notifications about the same object are handled sequentially and in order -
+    # once one fails, the remaining ones are retried later as well.
+    for index, notification in enumerate(notifications):
+        if handle_queued_notification(notification):
+            continue
+
+        QueuedNotification.objects.filter(
+            pk__in=[remaining.pk for remaining in notifications[index + 1 :]]
+        ).update(
+            status=QueuedNotificationStatuses.pending,
+            locked_at=None,
+            next_attempt=notification.next_attempt,
+        )
+        return
+
+
+def process_queue(max_workers: int, batch_size: int) -> int:
+    """
+    Handle one batch of due notifications and return the number claimed.
+    """
+    notifications = claim_notifications(batch_size)
+    if not notifications:
+        return 0
+
+    groups: Dict[str, List[QueuedNotification]] = {}
+    for notification in notifications:
+        groups.setdefault(notification.hoofd_object, []).append(notification)
+
+    with parallel(max_workers=max_workers) as executor:
+        list(executor.map(_handle_group, groups.values()))
+
+    return len(notifications)
+
+
+def requeue_failed_notifications(failed_notifications) -> int:
+    """
+    Move dead-letter notifications back to the queue for another round of attempts.
+    """
+    requeued = 0
+    with transaction.atomic():
+        for failed in failed_notifications:
+            QueuedNotification.objects.create(
+                kanaal=failed.kanaal,
+                resource=failed.resource,
+                actie=failed.actie,
+                hoofd_object=failed.hoofd_object,
+                message=failed.message,
+                created=failed.created,
+            )
+            failed.delete()
+            requeued += 1
+    return requeued
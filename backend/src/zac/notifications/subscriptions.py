@@ -11,6 +11,7 @@ from zgw_consumers.constants import APITypes
 from zgw_consumers.models import Service
 
 from zac.accounts.models import User
+from zac.utils.service_resolver import resolver
 
 from .models import Subscription
 
@@ -68,7 +69,7 @@ def subscribe(service: Service, token: str, domain: str) -> List[Subscription]:
     # fetch existing subs
     abonnementen = []
     for subscription in Subscription.objects.all():
-        _client = Service.get_client(subscription.url)
+        _client = resolver.get_client(subscription.url)
         abonnementen.append(_client.retrieve("abonnement", url=subscription.url))
 
     to_create = []
@@ -0,0 +1,148 @@
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from zgw_consumers.api_models.base import factory
+from zgw_consumers.api_models.catalogi import ZaakType
+
+from zgw.models.zrc import Zaak
+
+from ..handlers import ZakenHandler
+from .utils import (
+    INFORMATIEOBJECT,
+    OBJECT,
+    ZAAK,
+    ZAAK_RESPONSE,
+    ZAAKINFORMATIEOBJECT,
+    ZAAKOBJECT,
+    ZAAKTYPE_RESPONSE,
+    ZAKEN_ROOT,
+)
+
+ROL = f"{ZAKEN_ROOT}rollen/69e98129-1f0d-497f-bbfb-84b88137edbc"
+
+
+def notification(resource: str, actie: str, resource_url: str = ZAAK) -> dict:
+    return {
+        "kanaal": "zaken",
+        "hoofd_object": ZAAK,
+        "resource": resource,
+        "resource_url": resource_url,
+        "actie": actie,
+        "kenmerken": {},
+    }
+
+
+@patch("zac.notifications.handlers.invalidate_zaakobjecten_cache")
+@patch("zac.notifications.handlers.invalidate_rollen_cache")
+@patch("zac.notifications.handlers.invalidate_zaak_cache")
+@patch("zac.notifications.handlers._client_from_url")
+class CoalescedZaakNotificationsTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+
+        zaak = factory(Zaak, ZAAK_RESPONSE)
+        zaak.zaaktype = factory(ZaakType, ZAAKTYPE_RESPONSE)
+        patcher = patch.object(ZakenHandler, "_retrieve_zaak", return_value=zaak)
+        self.mock_retrieve_zaak = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch("zac.notifications.handlers.reindex_zaak_document")
+        self.mock_reindex = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch.object(ZakenHandler, "_update_created_rol")
+        self.mock_update_created_rol = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_after_zaak_create_is_one_fetch_and_write(self, *mocks):
+        messages = [
+            notification("zaak", "create"),
+            notification("rol", "create", ROL),
+            notification("zaakeigenschap", "create"),
+            notification("status", "create"),
+        ]
+
+        with patch("zac.notifications.handlers.get_zaak_document") as mock_get_doc:
+            ZakenHandler().handle_many(messages)
+
+        self.mock_retrieve_zaak.assert_called_once_with(ZAAK)
+        mock_get_doc.assert_not_called()
+        self.mock_update_created_rol.assert_called_once_with(ROL)
+        self.mock_reindex.assert_called_once()
+        kwargs = self.mock_reindex.call_args[1]
+        self.assertEqual(kwargs["parts"], {"rollen", "eigenschappen", "status"})
+        self.assertTrue(kwargs["create"])
+        self.assertFalse(kwargs["update_zaak"])
+
+    def test_relations_update_related_documents(self, *mocks):
+        messages = [
+            notification("zaakobject", "create", ZAAKOBJECT),
+            notification("zaakinformatieobject", "create", ZAAKINFORMATIEOBJECT),
+        ]
+
+        with patch(
+            "zac.notifications.handlers.get_zaak_document"
+        ) as mock_get_doc, patch(
+            "zac.notifications.handlers.fetch_zaak_object",
+            return_value=MagicMock(object=OBJECT),
+        ), patch(
+            "zac.notifications.handlers.fetch_zaak_informatieobject",
+            return_value=MagicMock(informatieobject=INFORMATIEOBJECT),
+        ), patch(
+            "zac.notifications.handlers.update_related_zaken_in_object_document"
+        ) as mock_update_object, patch(
+            "zac.notifications.handlers.update_related_zaken_in_informatieobject_document"
+        ) as mock_update_informatieobject:
+            mock_get_doc.return_value.zaakobjecten = []
+            mock_get_doc.return_value.zaakinformatieobjecten = []
+            ZakenHandler().handle_many(messages)
+
+        self.mock_reindex.assert_called_once()
+        self.assertEqual(
+            self.mock_reindex.call_args[1]["parts"],
+            {"zaakobjecten", "zaakinformatieobjecten"},
+        )
+        mock_update_object.assert_called_once_with(OBJECT)
+        mock_update_informatieobject.assert_called_once_with(INFORMATIEOBJECT)
+
+    def test_destroyed_relation_is_looked_up_in_index(self, *mocks):
+        messages = [
+            notification("zaakobject", "destroy", ZAAKOBJECT),
+            notification("rol", "destroy", ROL),
+        ]
+        zaak_document = MagicMock(zaakinformatieobjecten=[])
+        zaak_document.zaakobjecten = [MagicMock(url=ZAAKOBJECT, object=OBJECT)]
+
+        with patch(
+            "zac.notifications.handlers.get_zaak_document", return_value=zaak_document
+        ), patch(
+            "zac.notifications.handlers.update_related_zaken_in_object_document"
+        ) as mock_update_object:
+            ZakenHandler().handle_many(messages)
+
+        self.assertEqual(
+            self.mock_reindex.call_args[1]["parts"], {"zaakobjecten", "rollen"}
+        )
+        self.mock_update_created_rol.assert_not_called()
+        mock_update_object.assert_called_once_with(OBJECT)
+
+    def test_zaak_destroy_skips_other_notifications(self, *mocks):
+        messages = [
+            notification("rol", "create", ROL),
+            notification("zaak", "destroy"),
+        ]
+
+        with patch.object(ZakenHandler, "_handle_zaak_destroy") as mock_destroy:
+            ZakenHandler().handle_many(messages)
+
+        mock_destroy.assert_called_once_with(ZAAK)
+        self.mock_retrieve_zaak.assert_not_called()
+        self.mock_reindex.assert_not_called()
+
+    def test_single_notification_is_handled_as_before(self, *mocks):
+        with patch.object(ZakenHandler, "handle") as mock_handle:
+            ZakenHandler().handle_many([notification("status", "create")])
+
+        mock_handle.assert_called_once_with(notification("status", "create"))
+        self.mock_reindex.assert_not_called()
@@ -0,0 +1,326 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from zac.accounts.tests.factories import SuperUserFactory
+from zac.utils.memoization import get_memoization_scope
+
+from ..constants import QueuedNotificationStatuses
+from ..models import FailedNotification, QueuedNotification
+from ..queue import (
+    claim_notifications,
+    enqueue_notification,
+    process_queue,
+    release_stale_notifications,
+    requeue_failed_notifications,
+)
+from .utils import ZAAK, ZAKEN_ROOT
+
+NOTIFICATION = {
+    "kanaal": "zaken",
+    "hoofdObject": ZAAK,
+    "resource": "zaak",
+    "resourceUrl": ZAAK,
+    "actie": "update",
+    "aanmaakdatum": "2020-04-15T12:00:00Z",
+    "kenmerken": {},
+}
+
+# a kanaal without coalescing, to test the handling of the individual notifications
+MESSAGE = {
+    "kanaal": "documenten",
+    "hoofd_object": ZAAK,
+    "resource": "zaak",
+    "resource_url": ZAAK,
+    "actie": "update",
+    "aanmaakdatum": "2020-04-15T12:00:00Z",
+    "kenmerken": {},
+}
+
+
+def queue_notification(**kwargs) -> QueuedNotification:
+    message = {**MESSAGE, **kwargs}
+    return QueuedNotification.objects.create(
+        kanaal=message["kanaal"],
+        resource=message["resource"],
+        actie=message["actie"],
+        hoofd_object=message["hoofd_object"],
+        message=message,
+    )
+
+
+@override_settings(NOTIFICATIONS_QUEUE_ENABLED=True)
+class NotificationCallbackQueueTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = SuperUserFactory.create()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=self.user)
+
+    @freeze_time("2020-04-15T12:00:00Z")
+    @override_settings(NOTIFICATIONS_QUEUE_COALESCE_WINDOW=2)
+    @patch("zac.notifications.views.handler.handle")
+    def test_callback_only_enqueues(self, mock_handle):
+        response = self.client.post(reverse("notifications:callback"), NOTIFICATION)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        mock_handle.assert_not_called()
+        notification = QueuedNotification.objects.get()
+        self.assertEqual(notification.kanaal, "zaken")
+        self.assertEqual(notification.hoofd_object, ZAAK)
+        self.assertEqual(notification.status, QueuedNotificationStatuses.pending)
+        self.assertEqual(notification.message["resource_url"], ZAAK)
+        self.assertEqual(
+            notification.next_attempt, timezone.now() + timedelta(seconds=2)
+        )
+
+    @override_settings(NOTIFICATIONS_QUEUE_ENABLED=False)
+    @patch("zac.notifications.views.handler.handle")
+    def test_callback_handles_inline_without_queue(self, mock_handle):
+        response = self.client.post(reverse("notifications:callback"), NOTIFICATION)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        mock_handle.assert_called_once()
+        self.assertFalse(QueuedNotification.objects.exists())
+
+
+@override_settings(
+    NOTIFICATIONS_QUEUE_MAX_ATTEMPTS=2,
+    NOTIFICATIONS_QUEUE_RETRY_BACKOFF=10,
+    NOTIFICATIONS_QUEUE_PROCESSING_TIMEOUT=60,
+)
+@patch("zac.notifications.queue.handler.handle")
+class ProcessQueueTests(TransactionTestCase):
+    """
+    The queue is drained from worker threads with their own database connections.
+    """
+
+    def test_process_queue_handles_and_removes_notification(self, mock_handle):
+        queue_notification()
+
+        claimed = process_queue(max_workers=1, batch_size=10)
+
+        self.assertEqual(claimed, 1)
+        mock_handle.assert_called_once()
+        data = mock_handle.call_args[0][0]
+        self.assertEqual(data["hoofd_object"], ZAAK)
+        self.assertEqual(data["aanmaakdatum"].year, 2020)
+        self.assertFalse(QueuedNotification.objects.exists())
+
+    def test_notifications_for_same_object_are_handled_in_order(self, mock_handle):
+        queue_notification(resource="zaak", actie="create")
+        queue_notification(resource="rol", actie="create")
+        queue_notification(resource="status", actie="create")
+
+        process_queue(max_workers=4, batch_size=10)
+
+        self.assertEqual(
+            [call[0][0]["resource"] for call in mock_handle.call_args_list],
+            ["zaak", "rol", "status"],
+        )
+
+    def test_notifications_are_handled_in_own_memoization_scope(self, mock_handle):
+        scopes = []
+        mock_handle.side_effect = lambda data: scopes.append(get_memoization_scope())
+        queue_notification(resource="zaak", actie="create")
+        queue_notification(resource="rol", actie="create")
+
+        process_queue(max_workers=1, batch_size=10)
+
+        self.assertEqual(len(scopes), 2)
+        self.assertIsNotNone(scopes[0])
+        self.assertIsNot(scopes[0], scopes[1])
+
+    def test_object_in_progress_is_not_claimed(self, mock_handle):
+        queue_notification()
+        QueuedNotification.objects.update(status=QueuedNotificationStatuses.processing)
+        other_zaak = f"{ZAKEN_ROOT}zaken/8e3b3dd3-d3c4-4a2e-9a08-63f25e5e2c24"
+        queue_notification()
+        queue_notification(hoofd_object=other_zaak)
+
+        claimed = claim_notifications(10)
+
+        self.assertEqual([n.hoofd_object for n in claimed], [other_zaak])
+
+    def test_due_notifications_for_same_object_are_claimed(self, mock_handle):
+        first = queue_notification()
+        second = queue_notification(resource="rol", actie="create")
+
+        claimed = claim_notifications(10)
+
+        self.assertEqual([n.pk for n in claimed], [first.pk, second.pk])
+
+    def test_backed_off_notification_is_not_claimed(self, mock_handle):
+        backed_off = queue_notification()
+        QueuedNotification.objects.filter(pk=backed_off.pk).update(
+            attempts=1, next_attempt=timezone.now() + timedelta(seconds=30)
+        )
+        # a new notification about the same object arrives
+        queue_notification(resource="rol", actie="create")
+
+        claimed = claim_notifications(10)
+
+        self.assertEqual(claimed, [])
+        backed_off.refresh_from_db()
+        self.assertEqual(backed_off.status, QueuedNotificationStatuses.pending)
+        self.assertEqual(backed_off.attempts, 1)
+
+    def test_waiting_notification_does_not_hold_back_due_ones(self, mock_handle):
+        due = queue_notification()
+        # a new notification about the same object, within the coalesce window
+        waiting = queue_notification(resource="rol", actie="create")
+        QueuedNotification.objects.filter(pk=waiting.pk).update(
+            next_attempt=timezone.now() + timedelta(seconds=2)
+        )
+
+        claimed = claim_notifications(10)
+
+        self.assertEqual([n.pk for n in claimed], [due.pk])
+
+    @override_settings(
+        NOTIFICATIONS_QUEUE_COALESCE_WINDOW=2,
+        NOTIFICATIONS_QUEUE_COALESCE_MAX_DELAY=3,
+    )
+    def test_coalesce_window_is_extended_up_to_max_delay(self, mock_handle):
+        with freeze_time("2020-04-15T12:00:00Z") as frozen_time:
+            first = enqueue_notification(MESSAGE)
+            frozen_time.tick(timedelta(seconds=1))
+            second = enqueue_notification({**MESSAGE, "resource": "rol"})
+            frozen_time.tick(timedelta(seconds=1))
+            third = enqueue_notification({**MESSAGE, "resource": "status"})
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        third.refresh_from_db()
+        # the window of the second notification ends at 12:00:03, the third would
+        # extend it to 12:00:04 but the burst started at 12:00:00
+        self.assertEqual(
+            {first.next_attempt, second.next_attempt, third.next_attempt},
+            {first.created + timedelta(seconds=3)},
+        )
+
+    @patch("zac.notifications.queue.handler.handle_many")
+    def test_zaken_notifications_are_coalesced(self, mock_handle_many, mock_handle):
+        queue_notification(kanaal="zaken", resource="zaak", actie="create")
+        queue_notification(kanaal="zaken", resource="rol", actie="create")
+        queue_notification(kanaal="zaken", resource="status", actie="create")
+
+        process_queue(max_workers=1, batch_size=10)
+
+        mock_handle.assert_not_called()
+        mock_handle_many.assert_called_once()
+        messages = mock_handle_many.call_args[0][0]
+        self.assertEqual(
+            [message["resource"] for message in messages], ["zaak", "rol", "status"]
+        )
+        self.assertFalse(QueuedNotification.objects.exists())
+
+    @patch("zac.notifications.queue.handler.handle_many")
+    def test_coalesced_failure_is_retried(self, mock_handle_many, mock_handle):
+        mock_handle_many.side_effect = Exception("ZRC is down")
+        queue_notification(kanaal="zaken", resource="zaak", actie="create")
+        queue_notification(kanaal="zaken", resource="rol", actie="create")
+
+        process_queue(max_workers=1, batch_size=10)
+
+        self.assertEqual(
+            list(QueuedNotification.objects.values_list("status", "attempts")),
+            [(QueuedNotificationStatuses.pending, 1)] * 2,
+        )
+
+    @freeze_time("2020-04-15T12:00:00Z")
+    def test_failure_is_retried_with_backoff(self, mock_handle):
+        mock_handle.side_effect = Exception("ZRC is down")
+        notification = queue_notification()
+
+        process_queue(max_workers=1, batch_size=10)
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, QueuedNotificationStatuses.pending)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn("ZRC is down", notification.last_error)
+        self.assertEqual(
+            notification.next_attempt, timezone.now() + timedelta(seconds=10)
+        )
+
+        # not due yet
+        self.assertEqual(process_queue(max_workers=1, batch_size=10), 0)
+
+    def test_failure_after_max_attempts_is_dead_lettered(self, mock_handle):
+        mock_handle.side_effect = Exception("ZRC is down")
+        queue_notification()
+
+        process_queue(max_workers=1, batch_size=10)
+        QueuedNotification.objects.update(next_attempt=timezone.now())
+        process_queue(max_workers=1, batch_size=10)
+
+        self.assertFalse(QueuedNotification.objects.exists())
+        failed = FailedNotification.objects.get()
+        self.assertEqual(failed.attempts, 2)
+        self.assertEqual(failed.hoofd_object, ZAAK)
+        self.assertIn("ZRC is down", failed.error)
+
+    def test_remaining_notifications_for_object_are_postponed(self, mock_handle):
+        mock_handle.side_effect = [Exception("ZRC is down"), None]
+        queue_notification(resource="zaak", actie="create")
+        queue_notification(resource="rol", actie="create")
+
+        process_queue(max_workers=1, batch_size=10)
+
+        self.assertEqual(mock_handle.call_count, 1)
+        self.assertEqual(
+            QueuedNotification.objects.filter(
+                status=QueuedNotificationStatuses.pending
+            ).count(),
+            2,
+        )
+
+    def test_release_stale_notifications(self, mock_handle):
+        notification = queue_notification()
+        QueuedNotification.objects.update(
+            status=QueuedNotificationStatuses.processing,
+            locked_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        released = release_stale_notifications()
+
+        self.assertEqual(released, 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, QueuedNotificationStatuses.pending)
+
+    def test_requeue_failed_notifications(self, mock_handle):
+        FailedNotification.objects.create(
+            kanaal="zaken",
+            resource="zaak",
+            actie="update",
+            hoofd_object=ZAAK,
+            message=MESSAGE,
+            attempts=2,
+        )
+
+        requeued = requeue_failed_notifications(FailedNotification.objects.all())
+
+        self.assertEqual(requeued, 1)
+        self.assertFalse(FailedNotification.objects.exists())
+        notification = QueuedNotification.objects.get()
+        self.assertEqual(notification.attempts, 0)
+        self.assertEqual(notification.message, MESSAGE)
+
+    def test_management_command_drains_queue(self, mock_handle):
+        queue_notification()
+        queue_notification(resource="rol", actie="create")
+
+        call_command("process_notifications", "--once", "--concurrency=2")
+
+        self.assertEqual(mock_handle.call_count, 2)
+        self.assertFalse(QueuedNotification.objects.exists())
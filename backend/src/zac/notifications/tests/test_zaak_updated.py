@@ -29,6 +29,7 @@ from zac.elasticsearch.documents import (
     ZaakDocument,
 )
 from zac.elasticsearch.tests.utils import ESMixin
+from zac.elasticsearch.utils import delete_index
 from zac.tests.utils import mock_resource_get
 from zgw.models.zrc import Zaak
 
@@ -71,8 +72,8 @@ class ZaakUpdateTests(ESMixin, APITestCase):
     @staticmethod
     def clear_index(init=False):
         ESMixin.clear_index(init=init)
-        Index(settings.ES_INDEX_OBJECTEN).delete(ignore=404)
-        Index(settings.ES_INDEX_DOCUMENTEN).delete(ignore=404)
+        delete_index(settings.ES_INDEX_OBJECTEN)
+        delete_index(settings.ES_INDEX_DOCUMENTEN)
 
         if init:
             ObjectDocument.init()
@@ -26,6 +26,7 @@ from zac.elasticsearch.api import (
 )
 from zac.elasticsearch.documents import ObjectDocument, ZaakDocument
 from zac.elasticsearch.tests.utils import ESMixin
+from zac.elasticsearch.utils import delete_index
 from zac.tests.utils import mock_resource_get, paginated_response
 from zgw.models.zrc import Zaak
 
@@ -74,7 +75,7 @@ class ZaakObjectChangedTests(ClearCachesMixin, ESMixin, APITransactionTestCase):
     @staticmethod
     def clear_index(init=False):
         ESMixin.clear_index(init=init)
-        Index(settings.ES_INDEX_OBJECTEN).delete(ignore=404)
+        delete_index(settings.ES_INDEX_OBJECTEN)
 
         if init:
             ObjectDocument.init()
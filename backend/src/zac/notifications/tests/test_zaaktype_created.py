@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.urls import reverse
 from django.utils import timezone
 
@@ -8,11 +10,12 @@ from zgw_consumers.models import APITypes, Service
 from zgw_consumers.test import mock_service_oas_get
 
 from zac.accounts.models import User
-from zac.core.services import get_zaaktypen
+from zac.core.services import fetch_zaaktype, get_zaaktypen
 from zac.core.tests.utils import ClearCachesMixin
 from zac.tests.utils import paginated_response
+from zac.utils.local_cache import INVALIDATION_CHANNEL, local_cache
 
-from .utils import CATALOGI_ROOT, CATALOGUS, ZAAKTYPE, ZAKEN_ROOT
+from .utils import CATALOGI_ROOT, CATALOGUS, ZAAKTYPE, ZAAKTYPE_RESPONSE, ZAKEN_ROOT
 
 NOTIFICATION = {
     "kanaal": "zaaktypen",
@@ -84,3 +87,29 @@ class ZaakTypeCreatedTests(ClearCachesMixin, APITestCase):
             m.request_history[1].url,
             m.request_history[2].url,
         )
+
+    @patch("zac.utils.decorators.listener")
+    @patch("zac.utils.local_cache._get_redis_connection")
+    @patch.object(local_cache, "timeout", 60)
+    def test_zaaktype_updated_invalidates_local_caches(
+        self, m, mock_get_connection, mock_listener
+    ):
+        mock_service_oas_get(m, CATALOGI_ROOT, "ztc")
+        m.get(ZAAKTYPE, json=ZAAKTYPE_RESPONSE)
+
+        # call to populate the caches
+        fetch_zaaktype(ZAAKTYPE)
+        fetch_zaaktype(ZAAKTYPE)
+        self.assertEqual(m.call_count, 2)  # 1 call for API spec
+
+        response = self.client.post(
+            reverse("notifications:callback"), {**NOTIFICATION, "actie": "update"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        mock_get_connection.return_value.publish.assert_called_once_with(
+            INVALIDATION_CHANNEL, "clear"
+        )
+        # both the local and the shared cache are invalidated
+        fetch_zaaktype(ZAAKTYPE)
+        self.assertEqual(m.call_count, 3)
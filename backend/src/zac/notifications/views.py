@@ -1,8 +1,11 @@
+from django.conf import settings
+
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .handlers import handler
+from .queue import enqueue_notification
 from .serializers import NotificatieSerializer
 
 
@@ -21,4 +24,9 @@ class BaseNotificationCallbackView(APIView):
 
 class NotificationCallbackView(BaseNotificationCallbackView):
     def handle_notification(self, data: dict) -> None:
-        handler.handle(data)
+        # defer the actual handling to the notifications worker so that Open
+        # Notificaties gets its response without waiting on the ZGW APIs
+        if settings.NOTIFICATIONS_QUEUE_ENABLED:
+            enqueue_notification(data)
+        else:
+            handler.handle(data)
@@ -1,6 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
+from .http import use_pooled_sessions
+from .memoization import propagate_context_to_threads
 from .oas_cache import replace_cache
+from .oas_index import use_operation_index
 
 
 class UtilsConfig(AppConfig):
@@ -10,3 +14,13 @@ class UtilsConfig(AppConfig):
         from . import checks, schema_extensions  # noqa
 
         replace_cache()
+        use_operation_index()
+        propagate_context_to_threads()
+        use_pooled_sessions()
+
+        from zgw_consumers.models import Service
+
+        from .service_resolver import invalidate_service_resolvers
+
+        post_save.connect(invalidate_service_resolvers, sender=Service)
+        post_delete.connect(invalidate_service_resolvers, sender=Service)
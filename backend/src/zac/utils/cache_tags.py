@@ -0,0 +1,113 @@
+"""
+Invalidate cached values by tag.
+
+Every tag has a version counter in the cache. A tagged value is stored together with
+the versions of its tags at the time it was computed, and is only served while those
+are still the current versions. Invalidating a tag bumps its version - a single
+``INCR``, no matter how many (or which) keys were cached with the tag. The values of
+older versions are no longer served and expire with their own timeout.
+
+The versions expire after ``CACHE_TAG_TIMEOUT`` seconds, so the tags of zaken and
+documents that are no longer used don't stay in Redis forever. The timeout is
+renewed whenever a value is cached with the version, so a version outlives the
+values cached with it - and a version that did expire only causes a cache miss.
+
+The versions are read in the same round-trip as the value itself.
+"""
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+TAG_KEY_PREFIX = "tag"
+
+Versions = Tuple[int, ...]
+
+
+def get_tag_keys(tags: Iterable[str]) -> List[str]:
+    return [f"{TAG_KEY_PREFIX}:{tag}" for tag in tags]
+
+
+def get_versions_key(cache_key: str) -> str:
+    return f"{cache_key}:tags"
+
+
+def get_current_versions(cached: Dict, tag_keys: Sequence[str]) -> Optional[Versions]:
+    """
+    Return the versions of the tags from the result of a ``get_many``.
+
+    ``None`` if a tag has no version yet (or it was evicted).
+    """
+    try:
+        return tuple(cached[key] for key in tag_keys)
+    except KeyError:
+        return None
+
+
+def is_current(cached: Dict, cache_key: str, tag_keys: Sequence[str]) -> bool:
+    versions = get_current_versions(cached, tag_keys)
+    return versions is not None and cached.get(get_versions_key(cache_key)) == versions
+
+
+def ensure_versions(tag_keys: Sequence[str], alias: str = "default") -> Versions:
+    """
+    Return the current versions of the tags, starting a version for new tags.
+    """
+    _cache = caches[alias]
+    timeout = settings.CACHE_TAG_TIMEOUT
+    versions = _cache.get_many(tag_keys)
+    for key in tag_keys:
+        if key in versions:
+            _cache.touch(key, timeout)
+            continue
+        # Start at the clock rather than at 1: if a version was evicted, the values
+        # stored with the old version must not become current again.
+        _cache.add(key, time.time_ns(), timeout=timeout)
+        versions[key] = _cache.get(key)
+    return tuple(versions[key] for key in tag_keys)
+
+
+def get_tagged(key: str, tags: Sequence[str], alias: str = "default"):
+    """
+    Return the value cached with :func:`set_tagged`, if none of its tags changed.
+    """
+    tag_keys = get_tag_keys(tags)
+    cached = caches[alias].get_many([key, get_versions_key(key), *tag_keys])
+    if not is_current(cached, key, tag_keys):
+        return None
+    return cached.get(key)
+
+
+def set_tagged(
+    key: str,
+    value,
+    tags: Sequence[str],
+    timeout: Optional[float] = None,
+    versions: Optional[Versions] = None,
+    alias: str = "default",
+) -> None:
+    """
+    Cache ``value`` under ``key``, until one of the ``tags`` is invalidated.
+
+    :param versions: the versions of the tags read before the value was computed.
+      Read them now if not given.
+    """
+    if versions is None:
+        versions = ensure_versions(get_tag_keys(tags), alias=alias)
+    caches[alias].set_many(
+        {key: value, get_versions_key(key): versions}, timeout=timeout
+    )
+
+
+def invalidate_tags(*tags: str, alias: str = "default") -> None:
+    """
+    Invalidate all values cached with any of the ``tags``.
+    """
+    _cache = caches[alias]
+    for key in get_tag_keys(tags):
+        try:
+            _cache.incr(key)
+        except ValueError:  # nothing was cached with the tag (anymore)
+            continue
+        _cache.touch(key, settings.CACHE_TAG_TIMEOUT)
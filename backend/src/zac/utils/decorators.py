@@ -1,25 +1,213 @@
 import functools
 import inspect
 import logging
+import math
+import random
+import re
+import string
 import time
 from functools import wraps
+from typing import Optional, Sequence, Tuple
 
 from django.core.cache import caches
 
 import requests
 
+from .cache_tags import ensure_versions, get_tag_keys, get_versions_key, is_current
+from .local_cache import listener, local_cache, stats
+from .memoization import get_memoization_scope
+
 logger = logging.getLogger(__name__)
 
 
-def cache(key: str, alias: str = "default", **set_options):
+# how long a worker waits for another worker to compute a missing value, before it
+# computes the value itself
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+
+class _NoneResult:
+    """
+    Cached marker for a ``None`` result, which can't be told apart from a miss.
+    """
+
+
+def _unwrap(result):
+    return None if isinstance(result, _NoneResult) else result
+
+
+def _should_refresh(meta: Optional[Tuple[float, float]], beta: float) -> bool:
+    if meta is None:
+        return False
+
+    expires_at, delta = meta
+    now = time.time()
+    if now >= expires_at:
+        return True
+
+    # Probabilistic early refresh (XFetch): the closer to the expiry and the more
+    # expensive the computation, the more likely a worker recomputes the value early.
+    return beta > 0 and now - delta * beta * math.log(1.0 - random.random()) >= (
+        expires_at
+    )
+
+
+def _arguments_builder(func: callable) -> callable:
+    """
+    Return a callable returning the named arguments of a call to ``func``.
+    """
+    # look through other decorators, e.g. ``memoize`` on top of ``cache``
+    argspec = inspect.getfullargspec(inspect.unwrap(func))
+
+    if argspec.defaults:
+        positional_count = len(argspec.args) - len(argspec.defaults)
+        defaults = dict(zip(argspec.args[positional_count:], argspec.defaults))
+    else:
+        defaults = {}
+
+    def get_arguments(args, kwargs) -> dict:
+        key_kwargs = defaults.copy()
+        named_args = dict(zip(argspec.args, args), **kwargs)
+        key_kwargs.update(**named_args)
+
+        if argspec.varkw:
+            var_kwargs = {
+                key: value
+                for key, value in named_args.items()
+                if key not in argspec.args
+            }
+            key_kwargs[argspec.varkw] = var_kwargs
+
+        return key_kwargs
+
+    return get_arguments
+
+
+def _key_builder(key: str, func: callable) -> callable:
+    """
+    Return a callable formatting ``key`` with the arguments of a call to ``func``.
+    """
+    get_arguments = _arguments_builder(func)
+
+    def get_key(args, kwargs) -> str:
+        return key.format(**get_arguments(args, kwargs))
+
+    return get_key
+
+
+def _tag_builder(tag: str, func: callable) -> callable:
+    """
+    Like :func:`_key_builder`, but return ``None`` if an argument used in the tag is
+    ``None`` - e.g. ``zaak:{zaak_uuid}`` when the zaak is retrieved by URL.
+    """
+    get_arguments = _arguments_builder(func)
+    names = {
+        re.split(r"[.\[]", name, 1)[0]
+        for _, name, _, _ in string.Formatter().parse(tag)
+        if name
+    }
+
+    def get_tag(args, kwargs) -> Optional[str]:
+        arguments = get_arguments(args, kwargs)
+        if any(arguments.get(name) is None for name in names):
+            return None
+        return tag.format(**arguments)
+
+    return get_tag
+
+
+def cache(
+    key: str,
+    alias: str = "default",
+    stale_ttl: Optional[int] = None,
+    negative_timeout: Optional[int] = None,
+    early_refresh: float = 1.0,
+    lock_timeout: int = 30,
+    local: bool = False,
+    tags: Sequence[str] = (),
+    **set_options,
+):
+    """
+    Cache the result of the decorated callable under the formatted ``key``.
+
+    Only one worker computes a missing or expired value, the others wait for it to
+    appear in the cache (a stampede on the APIs is prevented).
+
+    :param stale_ttl: number of seconds an expired value is still served while a
+      single worker refreshes it.
+    :param negative_timeout: number of seconds to cache a ``None`` result. ``None``
+      results are not cached by default.
+    :param early_refresh: the ``beta`` of the probabilistic early refresh. ``0``
+      disables the early refresh.
+    :param lock_timeout: number of seconds after which the refresh lock expires.
+    :param local: also cache the result in process memory, in front of the shared
+      cache. Only use this for data that hardly changes, see
+      :mod:`zac.utils.local_cache`.
+    :param tags: formatted like the ``key``. The shared cache entry is dropped when
+      any of the tags is invalidated, see :mod:`zac.utils.cache_tags`. The local
+      cache is cleared by broadcast instead. A tag using an argument that is
+      ``None`` is left out.
+    """
+    # hit ratios are counted per prefix, e.g. ``zt:statustypen``
+    prefix = key.split("{", 1)[0].rstrip(":") or key
+
     def decorator(func: callable):
-        argspec = inspect.getfullargspec(func)
+        get_key = _key_builder(key, func)
+        get_tags = [_tag_builder(tag, func) for tag in tags]
+
+        def get_timeout(_cache) -> Optional[int]:
+            return set_options.get("timeout", _cache.default_timeout)
+
+        def compute_and_set(_cache, cache_key: str, tag_keys, args, kwargs):
+            # the versions from before the computation - if a tag is invalidated in
+            # the meantime, the result is outdated right away
+            versions = ensure_versions(tag_keys, alias=alias) if tag_keys else None
+
+            start = time.time()
+            result = func(*args, **kwargs)
+            delta = time.time() - start
+
+            options = {k: v for k, v in set_options.items() if k != "timeout"}
+            if result is None:
+                if negative_timeout is None:
+                    return result
+                value, timeout = _NoneResult(), negative_timeout
+            else:
+                value, timeout = result, get_timeout(_cache)
+
+            values = {cache_key: value}
+            if versions is not None:
+                values[get_versions_key(cache_key)] = versions
+
+            if timeout is None:
+                _cache.set_many(values, timeout=None, **options)
+                return result
+
+            fresh_until = start + delta + timeout
+            # the value outlives its expiry, so it can be served while it's refreshed
+            if result is not None and stale_ttl:
+                timeout += stale_ttl
+            values[f"{cache_key}:meta"] = (fresh_until, delta)
+            _cache.set_many(values, timeout=timeout, **options)
+            return result
 
-        if argspec.defaults:
-            positional_count = len(argspec.args) - len(argspec.defaults)
-            defaults = dict(zip(argspec.args[positional_count:], argspec.defaults))
-        else:
-            defaults = {}
+        def wait_for_value(_cache, cache_key: str, lock_key: str, tag_keys):
+            keys = [cache_key, lock_key]
+            if tag_keys:
+                keys += [get_versions_key(cache_key), *tag_keys]
+            for _ in range(int(LOCK_WAIT / LOCK_POLL_INTERVAL)):
+                time.sleep(LOCK_POLL_INTERVAL)
+                cached = _cache.get_many(keys)
+                if cache_key in cached and (
+                    not tag_keys or is_current(cached, cache_key, tag_keys)
+                ):
+                    return cached[cache_key]
+                # the other worker is done, but didn't cache a value
+                if lock_key not in cached:
+                    break
+            return _MISSING
 
         @wraps(func)
         def wrapped(*args, **kwargs):
@@ -27,29 +215,98 @@ def cache(key: str, alias: str = "default", **set_options):
             if skip_cache:
                 return func(*args, **kwargs)
 
-            key_kwargs = defaults.copy()
-            named_args = dict(zip(argspec.args, args), **kwargs)
-            key_kwargs.update(**named_args)
+            cache_key = get_key(args, kwargs)
+            if not local:
+                return get_shared(cache_key, args, kwargs)
 
-            if argspec.varkw:
-                var_kwargs = {
-                    key: value
-                    for key, value in named_args.items()
-                    if key not in argspec.args
-                }
-                key_kwargs[argspec.varkw] = var_kwargs
+            listener.ensure_started()
+            result = local_cache.get(cache_key, _MISSING)
+            stats.record("local", prefix, hit=result is not _MISSING)
+            if result is not _MISSING:
+                return result
+
+            result = get_shared(cache_key, args, kwargs)
+            if result is not None:
+                local_cache.set(cache_key, result, timeout=set_options.get("timeout"))
+            return result
 
-            cache_key = key.format(**key_kwargs)
+        def get_shared(cache_key: str, args, kwargs):
+            lock_key = f"{cache_key}:lock"
+            tag_keys = get_tag_keys(
+                tag
+                for tag in (get_tag(args, kwargs) for get_tag in get_tags)
+                if tag is not None
+            )
 
             _cache = caches[alias]
-            result = _cache.get(cache_key)
+            keys = [cache_key, f"{cache_key}:meta"]
+            if tag_keys:
+                keys += [get_versions_key(cache_key), *tag_keys]
+            cached = _cache.get_many(keys)
+            result = cached.get(cache_key)
+            # a tag was invalidated - not even served while it's refreshed
+            if tag_keys and not is_current(cached, cache_key, tag_keys):
+                result = None
+            stats.record("shared", prefix, hit=result is not None)
             if result is not None:
-                logger.debug("Cache key '%s' hit", cache_key)
-                return result
+                if not _should_refresh(cached.get(f"{cache_key}:meta"), early_refresh):
+                    logger.debug("Cache key '%s' hit", cache_key)
+                    return _unwrap(result)
 
-            result = func(*args, **kwargs)
-            _cache.set(cache_key, result, **set_options)
-            return result
+                # another worker is refreshing the value - serve the current one
+                if not _cache.add(lock_key, 1, timeout=lock_timeout):
+                    logger.debug("Cache key '%s' is being refreshed", cache_key)
+                    return _unwrap(result)
+
+                try:
+                    return compute_and_set(_cache, cache_key, tag_keys, args, kwargs)
+                except Exception:
+                    logger.warning(
+                        "Refreshing cache key '%s' failed, serving the cached value",
+                        cache_key,
+                        exc_info=True,
+                    )
+                    return _unwrap(result)
+                finally:
+                    _cache.delete(lock_key)
+
+            # ``add`` is an atomic SET NX in Redis. If Redis is unavailable,
+            # django-redis returns ``None`` rather than ``False`` - don't wait then.
+            locked = _cache.add(lock_key, 1, timeout=lock_timeout)
+            if locked is False:
+                result = wait_for_value(_cache, cache_key, lock_key, tag_keys)
+                if result is not _MISSING:
+                    logger.debug("Cache key '%s' hit after waiting", cache_key)
+                    return _unwrap(result)
+
+            try:
+                return compute_and_set(_cache, cache_key, tag_keys, args, kwargs)
+            finally:
+                if locked:
+                    _cache.delete(lock_key)
+
+        return wrapped
+
+    return decorator
+
+
+def memoize(key: str):
+    """
+    Call the decorated callable once per key in the active memoization scope.
+
+    See :mod:`zac.utils.memoization`. Outside of a scope, the callable is called as
+    usual.
+    """
+
+    def decorator(func: callable):
+        get_key = _key_builder(key, func)
+
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            scope = get_memoization_scope()
+            if scope is None or kwargs.get("skip_cache"):
+                return func(*args, **kwargs)
+            return scope.get_or_call(get_key(args, kwargs), func, args, kwargs)
 
         return wrapped
 
@@ -0,0 +1,231 @@
+"""
+Pooled HTTP sessions for the outbound traffic to the APIs.
+
+``requests.get`` and friends open a new connection - TCP and TLS handshake - for
+every call. A zaak detail page easily makes dozens of calls, mostly to the same few
+hosts. The sessions here keep the connections to a host alive and share them between
+all threads of a process, including the ``parallel`` workers.
+
+Every host gets its own connection pool of ``settings.HTTP_POOL_MAXSIZE``
+connections, which can be overridden per host with
+``settings.HTTP_POOL_MAXSIZE_PER_HOST``.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from zds_client import client as zds_client
+
+from .revalidation import is_revalidated, revalidating_get
+
+STATS_KEY_PREFIX = "http-pool-stats"
+COUNTERS = ("requests", "connections", "waits", "wait_ms")
+
+
+class PoolStats:
+    """
+    Count the requests, new connections and waits for a free connection per host.
+
+    Like the cache statistics, the counts are periodically added to counters in the
+    shared cache so they can be aggregated over all processes - see the
+    ``http_pool_stats`` management command.
+    """
+
+    def __init__(self, flush_interval: int):
+        self.flush_interval = flush_interval
+        self._counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, host: str, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counts[(host, counter)] += value
+            if time.monotonic() - self._last_flush < self.flush_interval:
+                return
+            counts, self._counts = self._counts, defaultdict(int)
+            self._last_flush = time.monotonic()
+
+        self.flush(counts)
+
+    def flush(self, counts: Dict[Tuple[str, str], int]) -> None:
+        _cache = caches["default"]
+        hosts = set(_cache.get(f"{STATS_KEY_PREFIX}:hosts") or [])
+        for (host, counter), count in counts.items():
+            key = f"{STATS_KEY_PREFIX}:{host}:{counter}"
+            _cache.add(key, 0, timeout=None)
+            try:
+                _cache.incr(key, count)
+            except ValueError:  # evicted in between
+                _cache.set(key, count, timeout=None)
+            hosts.add(host)
+        _cache.set(f"{STATS_KEY_PREFIX}:hosts", sorted(hosts), timeout=None)
+
+
+stats = PoolStats(flush_interval=settings.HTTP_POOL_STATS_INTERVAL)
+
+
+def get_pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Return the aggregated counters per host.
+    """
+    _cache = caches["default"]
+    hosts = _cache.get(f"{STATS_KEY_PREFIX}:hosts") or []
+    counts = _cache.get_many(
+        [
+            f"{STATS_KEY_PREFIX}:{host}:{counter}"
+            for host in hosts
+            for counter in COUNTERS
+        ]
+    )
+    return {
+        host: {
+            counter: counts.get(f"{STATS_KEY_PREFIX}:{host}:{counter}", 0)
+            for counter in COUNTERS
+        }
+        for host in hosts
+    }
+
+
+class PoolStatsMixin:
+    def urlopen(self, method, url, *args, **kwargs):
+        stats.record(self.host, "requests")
+        return super().urlopen(method, url, *args, **kwargs)
+
+    def _new_conn(self):
+        stats.record(self.host, "connections")
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        # All connections are in use - depending on ``settings.HTTP_POOL_BLOCK`` this
+        # waits for one to be released, or opens one that is discarded afterwards.
+        if self.pool is None or not self.pool.empty():
+            return super()._get_conn(timeout=timeout)
+
+        start = time.monotonic()
+        try:
+            return super()._get_conn(timeout=timeout)
+        finally:
+            stats.record(self.host, "waits")
+            stats.record(self.host, "wait_ms", int((time.monotonic() - start) * 1000))
+
+
+class StatsHTTPConnectionPool(PoolStatsMixin, HTTPConnectionPool):
+    pass
+
+
+class StatsHTTPSConnectionPool(PoolStatsMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": StatsHTTPConnectionPool,
+            "https": StatsHTTPSConnectionPool,
+        }
+
+
+def get_pool_maxsize(host: str) -> int:
+    for override in settings.HTTP_POOL_MAXSIZE_PER_HOST:
+        _host, _, maxsize = override.partition("=")
+        if _host.strip().lower() == host:
+            return int(maxsize)
+    return settings.HTTP_POOL_MAXSIZE
+
+
+def create_session(host: str) -> requests.Session:
+    session = requests.Session()
+    # The session is shared by all users of the process - cookies set by an API must
+    # not be sent along with the requests of others.
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = PooledHTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=get_pool_maxsize(host),
+        pool_block=settings.HTTP_POOL_BLOCK,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class SessionRegistry:
+    """
+    One session per scheme and host, per process.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, requests.Session] = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}".lower()
+        if self._pid == os.getpid() and key in self._sessions:
+            return self._sessions[key]
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # uWSGI forks the workers after the application is loaded - the
+                # connections of the parent process must not be shared
+                self._sessions, self._pid = {}, os.getpid()
+            if key not in self._sessions:
+                self._sessions[key] = create_session(parts.hostname or "")
+            return self._sessions[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+sessions = SessionRegistry()
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Drop-in replacement for :func:`requests.request` using the pooled sessions.
+
+    The detail resources of the ZRC and DRC are revalidated with conditional GETs,
+    see :mod:`zac.utils.revalidation`.
+    """
+    session = sessions.get(url)
+    if is_revalidated(method, url, **kwargs):
+        return revalidating_get(session, url, **kwargs)
+    return session.request(method, url, **kwargs)
+
+
+def get(url: str, params=None, **kwargs) -> requests.Response:
+    return request("get", url, params=params, **kwargs)
+
+
+class _PooledRequests:
+    """
+    Stand-in for the ``requests`` module, sending the requests through the pooled
+    sessions.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(requests, name)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        return request(method, url, **kwargs)
+
+
+def use_pooled_sessions():
+    """
+    Send the requests of all ``zds_client`` clients through the pooled sessions.
+    """
+    zds_client.requests = _PooledRequests()
@@ -0,0 +1,253 @@
+"""
+Process-local cache in front of Redis.
+
+Catalog resources (zaaktypen, statustypen...) hardly ever change, but a single page
+looks up dozens of them. Serving them from process memory saves the network
+round-trip and the unpickling.
+
+Every process keeps its own copy, so invalidation is broadcast over a Redis pub/sub
+channel - each process clears its local cache when a message arrives. If the
+listener misses a message (e.g. during a reconnect), entries still expire after
+``settings.LOCAL_CACHE_TIMEOUT``. Other process-local caches can register their own
+invalidation message with :func:`register_invalidation`.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "zac:local-cache:invalidate"
+STATS_KEY_PREFIX = "cache-stats"
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int, timeout: int):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+        return shallow_copy(value)
+
+    def set(self, key: str, value, timeout=None) -> None:
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        value = shallow_copy(value)
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def shallow_copy(value):
+    # Callers resolve relations by assigning attributes on the returned objects -
+    # those must not leak into the shared cached object.
+    if isinstance(value, list):
+        return [copy.copy(item) for item in value]
+    return copy.copy(value)
+
+
+local_cache = LocalCache(
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+    timeout=settings.LOCAL_CACHE_TIMEOUT,
+)
+
+
+class CacheStats:
+    """
+    Count the cache hits and misses per tier and key prefix.
+
+    The counts are periodically added to counters in the shared cache, so they can
+    be aggregated over all processes - see the ``cache_stats`` management command.
+    """
+
+    def __init__(self, flush_interval: int):
+        self.flush_interval = flush_interval
+        self._counts: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record(self, tier: str, prefix: str, hit: bool) -> None:
+        with self._lock:
+            self._counts[(tier, prefix, "hits" if hit else "misses")] += 1
+            if time.monotonic() - self._last_flush < self.flush_interval:
+                return
+            counts, self._counts = self._counts, defaultdict(int)
+            self._last_flush = time.monotonic()
+
+        self.flush(counts)
+
+    def flush(self, counts: Dict[Tuple[str, str, str], int]) -> None:
+        _cache = caches["default"]
+        prefixes = set(_cache.get(f"{STATS_KEY_PREFIX}:prefixes") or [])
+        for (tier, prefix, counter), count in counts.items():
+            key = f"{STATS_KEY_PREFIX}:{tier}:{prefix}:{counter}"
+            _cache.add(key, 0, timeout=None)
+            try:
+                _cache.incr(key, count)
+            except ValueError:  # evicted in between
+                _cache.set(key, count, timeout=None)
+            prefixes.add(prefix)
+        _cache.set(f"{STATS_KEY_PREFIX}:prefixes", sorted(prefixes), timeout=None)
+
+
+stats = CacheStats(flush_interval=settings.LOCAL_CACHE_STATS_INTERVAL)
+
+
+def get_hit_ratios() -> Dict[str, Dict[str, Tuple[int, int]]]:
+    """
+    Return the aggregated ``(hits, misses)`` per key prefix and cache tier.
+    """
+    _cache = caches["default"]
+    prefixes = _cache.get(f"{STATS_KEY_PREFIX}:prefixes") or []
+    keys = [
+        f"{STATS_KEY_PREFIX}:{tier}:{prefix}:{counter}"
+        for prefix in prefixes
+        for tier in ("local", "shared")
+        for counter in ("hits", "misses")
+    ]
+    counts = _cache.get_many(keys)
+    return {
+        prefix: {
+            tier: (
+                counts.get(f"{STATS_KEY_PREFIX}:{tier}:{prefix}:hits", 0),
+                counts.get(f"{STATS_KEY_PREFIX}:{tier}:{prefix}:misses", 0),
+            )
+            for tier in ("local", "shared")
+        }
+        for prefix in prefixes
+    }
+
+
+def _get_redis_connection():
+    try:
+        from django_redis import get_redis_connection
+    except ImportError:  # pragma: no cover
+        return None
+
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:  # not a Redis cache backend
+        return None
+
+
+class _InvalidationListener:
+    """
+    Clear the local cache of this process on every broadcast invalidation.
+    """
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> None:
+        # uWSGI forks the workers after the application is loaded, so every process
+        # needs its own listener thread
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            if _get_redis_connection() is None:
+                return
+            thread = threading.Thread(
+                target=self.listen, name="local-cache-invalidation", daemon=True
+            )
+            thread.start()
+
+    def listen(self) -> None:
+        while True:
+            try:
+                pubsub = _get_redis_connection().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # messages may have been missed while (re)connecting
+                self.clear_all()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.handle(message["data"])
+            except Exception:
+                logger.warning(
+                    "Local cache invalidation listener failed", exc_info=True
+                )
+            self.clear_all()
+            time.sleep(1)
+
+    def handle(self, data) -> None:
+        if isinstance(data, bytes):
+            data = data.decode()
+        handler = _invalidation_handlers.get(data)
+        if handler is not None:
+            handler()
+
+    def clear_all(self) -> None:
+        for handler in list(_invalidation_handlers.values()):
+            handler()
+
+
+listener = _InvalidationListener()
+
+# broadcast message -> function clearing a process-local cache
+_invalidation_handlers: Dict[str, Callable[[], None]] = {"clear": local_cache.clear}
+
+
+def register_invalidation(message: str, handler: Callable[[], None]) -> None:
+    _invalidation_handlers[message] = handler
+
+
+def broadcast_invalidation(message: str) -> None:
+    """
+    Call the invalidation handler for ``message`` in all processes.
+    """
+    _invalidation_handlers[message]()
+    connection = _get_redis_connection()
+    if connection is None:
+        return
+
+    try:
+        connection.publish(INVALIDATION_CHANNEL, message)
+    except Exception:
+        logger.warning(
+            "Broadcasting the local cache invalidation failed", exc_info=True
+        )
+
+
+def invalidate_local_caches() -> None:
+    """
+    Clear the local caches of all processes.
+    """
+    broadcast_invalidation("clear")
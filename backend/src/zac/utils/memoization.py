@@ -0,0 +1,135 @@
+"""
+Memoize remote calls within the scope of a single request.
+
+Permission checks, serializers and views each look up the same rollen, zaakobjecten
+and zaaktypen while handling one request. Functions decorated with
+:func:`zac.utils.decorators.memoize` are called once per scope, concurrent calls for
+the same key wait for the first one to complete.
+
+The scope is kept in a context variable. The ``MemoizationMiddleware`` opens a scope
+for every request, and management commands can open one with
+:func:`memoization_scope`. Outside of a scope the decorated functions are simply
+called.
+"""
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from zgw_consumers import concurrent
+
+from .local_cache import shallow_copy
+
+perf_logger = logging.getLogger("performance")
+
+_scope: contextvars.ContextVar[Optional["MemoizationScope"]] = contextvars.ContextVar(
+    "memoization_scope", default=None
+)
+
+
+class MemoizationScope:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.saved = 0
+        self._results: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_call(self, key: str, func: Callable, args, kwargs):
+        with self._lock:
+            future = self._results.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._results[key] = Future()
+                self.calls += 1
+            else:
+                self.saved += 1
+
+        if not is_owner:
+            return shallow_copy(future.result())
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            # a later call may succeed
+            with self._lock:
+                del self._results[key]
+            future.set_exception(exc)
+            raise
+
+        future.set_result(shallow_copy(result))
+        return result
+
+    def forget(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._results if key.startswith(prefix)]:
+                del self._results[key]
+
+
+def get_memoization_scope() -> Optional[MemoizationScope]:
+    return _scope.get()
+
+
+@contextmanager
+def memoization_scope(name: str):
+    """
+    Memoize the calls of decorated functions within the block.
+
+    Nested scopes share the outer scope.
+    """
+    scope = _scope.get()
+    if scope is not None:
+        yield scope
+        return
+
+    scope = MemoizationScope(name)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+        if scope.saved:
+            perf_logger.info(
+                "%s: %d remote calls, %d saved by memoization",
+                scope.name,
+                scope.calls,
+                scope.saved,
+            )
+
+
+def forget_memoized(prefix: str) -> None:
+    """
+    Drop the memoized results with keys starting with ``prefix``.
+
+    Call this after changing the remote resources, so that they're fetched again
+    within the same scope.
+    """
+    scope = _scope.get()
+    if scope is not None:
+        scope.forget(prefix)
+
+
+def propagate_context_to_threads():
+    """
+    Run the functions submitted to ``zgw_consumers.concurrent.parallel`` in the
+    context of the submitting thread, so they share its memoization scope.
+    """
+    wrap_fn = concurrent.wrap_fn
+    if getattr(wrap_fn, "propagates_context", False):
+        return
+
+    def wrap_fn_in_context(fn):
+        # called in the submitting thread
+        context = contextvars.copy_context()
+        wrapped = wrap_fn(fn)
+
+        def run(*args, **kwargs):
+            # a context can't be entered by multiple threads at the same time
+            return context.copy().run(wrapped, *args, **kwargs)
+
+        return run
+
+    wrap_fn_in_context.propagates_context = True
+    concurrent.wrap_fn = wrap_fn_in_context
@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.http import HttpResponse
 
+from .memoization import memoization_scope
+
 
 class ReleaseHeaderMiddleware:
     """
@@ -26,3 +28,16 @@ class ReleaseHeaderMiddleware:
         response[self.GIT_SHA_HEADER] = settings.GIT_SHA
 
         return response
+
+
+class MemoizationMiddleware:
+    """
+    Memoize the remote calls made while handling a request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with memoization_scope(f"{request.method} {request.path}"):
+            return self.get_response(request)
@@ -1,10 +1,15 @@
 """
 Replace the OAS schema cache with django's cache mechanism.
+
+Only the compact form of the schemas is cached, see
+:func:`zac.utils.oas_index.compact_schema`.
 """
 from django.core.cache import caches
 
 from zds_client.oas import schema_fetcher
 
+from .oas_index import compact_schema
+
 
 class OASCache:
     KEY_PREFIX = "oas"
@@ -22,7 +27,8 @@ class OASCache:
             if schema is None:
                 return False
 
-            self._local_cache[key] = schema
+            # schemas cached before they were compacted
+            self._local_cache[key] = compact_schema(schema)
             return True
 
     def __getitem__(self, key: str):
@@ -32,6 +38,7 @@ class OASCache:
 
     def __setitem__(self, key: str, value: dict):
         key = f"{self.KEY_PREFIX}:{key}"
+        value = compact_schema(value)
         caches["oas"].set(key, value, self.DURATION)
         self._local_cache[key] = value
 
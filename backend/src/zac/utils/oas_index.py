@@ -0,0 +1,199 @@
+"""
+Compiled index of the operations in an OAS schema.
+
+``zds_client`` looks up the path of an operation, and the headers it requires, by
+walking through all paths of the schema - for every single request. The index maps
+the operation IDs to their path template and method once per schema, and computes
+the required headers once per operation.
+
+The schemas themselves are kept in a compact form: only the parts needed to build
+the requests are cached, see :func:`compact_schema`.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from zds_client import client as zds_client
+from zds_client.schema import (
+    DEFAULT_PATH_PARAMETERS,
+    DEFAULT_SERVERS,
+    filter_header_params,
+)
+
+# the number of schemas to keep an index for
+MAX_INDEXES = 64
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+
+def compact_schema(spec: dict) -> dict:
+    """
+    Strip the schema down to what's needed to build the requests.
+
+    The component schemas, responses and descriptions make up the bulk of a schema,
+    but are not used by the clients.
+    """
+    paths = {}
+    for path, methods in spec["paths"].items():
+        paths[path] = {
+            name: (
+                method
+                if name == "parameters"
+                else {
+                    key: method[key]
+                    for key in ("operationId", "parameters")
+                    if key in method
+                }
+            )
+            for name, method in methods.items()
+            if name == "parameters" or name in HTTP_METHODS
+        }
+
+    compact = {
+        key: spec[key] for key in ("openapi", "swagger", "servers") if key in spec
+    }
+    compact["paths"] = paths
+    # header parameters may be references
+    parameters = spec.get("components", {}).get("parameters")
+    if parameters:
+        compact["components"] = {"parameters": parameters}
+    return compact
+
+
+@dataclass
+class Operation:
+    path: str
+    method: str
+    # the path and method objects for the headers, an operation ID could be used in
+    # more than one path
+    sources: List[Tuple[dict, dict]] = field(default_factory=list)
+    headers: Optional[Dict[str, str]] = None
+
+
+class OperationIndex:
+    def __init__(self, spec: dict):
+        self.spec = spec
+        # servers is optional, see https://swagger.io/specification/#openapi-object
+        servers = spec.get("servers") or DEFAULT_SERVERS
+        self.base_path = urlparse(servers[0]["url"]).path
+        self.operations: Dict[str, Operation] = {}
+
+        for path, methods in spec["paths"].items():
+            for name, method in methods.items():
+                if name not in HTTP_METHODS or "operationId" not in method:
+                    continue
+                operation = self.operations.setdefault(
+                    method["operationId"], Operation(path=path, method=name.upper())
+                )
+                operation.sources.append((methods, method))
+
+    def get_operation(self, operation_id: str) -> Operation:
+        try:
+            return self.operations[operation_id]
+        except KeyError:
+            raise ValueError(f"Operation {operation_id} not found")
+
+    def get_operation_url(
+        self,
+        operation_id: str,
+        pattern_only=False,
+        base_url: str = None,
+        **kwargs,
+    ) -> str:
+        base_path = urlparse(base_url).path if base_url else self.base_path
+        path = self.get_operation(operation_id).path
+        if not pattern_only:
+            path = path.format(**{**DEFAULT_PATH_PARAMETERS, **kwargs})
+
+        # if both base_path ends with a slash and path starts with one, we need to
+        # join them together correctly, so drop one slash
+        if base_path.endswith("/") and path.startswith("/"):
+            path = path[1:]
+        return f"{base_path}{path}"
+
+    def get_headers(self, operation_id: str) -> dict:
+        operation = self.operations.get(operation_id)
+        if operation is None:
+            return {}
+
+        if operation.headers is None:
+            headers = {}
+            for methods, method in operation.sources:
+                parameters = filter_header_params(
+                    methods.get("parameters", []), self.spec
+                ) + filter_header_params(method.get("parameters", []), self.spec)
+                for param in parameters:
+                    enum = param["schema"].get("enum", [])
+                    default = param["schema"].get("default")
+                    assert (
+                        len(enum) == 1 or default
+                    ), "Can't choose an appropriate default header value"
+                    headers[param["name"]] = default or enum[0]
+            operation.headers = headers
+        return dict(operation.headers)
+
+
+class _IndexCache:
+    """
+    The indexes of the most recently used schemas, by the identity of the schema.
+
+    The schemas are shared through the OAS cache, so the same dict is used for all
+    clients of a service.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[int, OperationIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spec: dict) -> OperationIndex:
+        key = id(spec)
+        with self._lock:
+            index = self._indexes.get(key)
+            # the index keeps the schema alive, so the id can't be reused for another
+            # schema while it's in the cache
+            if index is not None and index.spec is spec:
+                self._indexes.move_to_end(key)
+                return index
+
+        index = OperationIndex(spec)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+indexes = _IndexCache(max_entries=MAX_INDEXES)
+
+
+def get_operation_url(
+    spec: dict, operation: str, pattern_only=False, base_url: str = None, **kwargs
+) -> str:
+    """
+    Drop-in replacement for :func:`zds_client.schema.get_operation_url`.
+    """
+    return indexes.get(spec).get_operation_url(
+        operation, pattern_only=pattern_only, base_url=base_url, **kwargs
+    )
+
+
+def get_headers(spec: dict, operation: str) -> dict:
+    """
+    Drop-in replacement for :func:`zds_client.schema.get_headers`.
+    """
+    return indexes.get(spec).get_headers(operation)
+
+
+def use_operation_index():
+    """
+    Look up the operations of all ``zds_client`` clients in the compiled indexes.
+    """
+    zds_client.get_operation_url = get_operation_url
+    zds_client.get_headers = get_headers
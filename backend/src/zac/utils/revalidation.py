@@ -0,0 +1,102 @@
+"""
+Revalidate the detail resources of the ZRC and DRC with conditional GETs.
+
+Open Zaak sends an ``ETag`` with every detail resource. The JSON body of those
+responses is kept together with the ETag, and the next GET of the same URL sends it along in
+``If-None-Match``. If the resource didn't change, the API answers with an empty
+``304 Not Modified`` and the kept body is used.
+
+This sits below the (shorter lived) caches of the services: once those expire, or
+when the caller explicitly needs the current state, getting the resource again is
+cheap when it didn't change.
+
+Only detail resources - a URL ending in the UUID of the resource, without query
+parameters - are revalidated. Lists, searches and the contents of documents would
+fill the cache with bodies that are rarely requested again.
+"""
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import caches
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from zgw_consumers.constants import APITypes
+
+CACHE_KEY_PREFIX = "etag"
+REVALIDATED_API_TYPES = (APITypes.zrc, APITypes.drc)
+DETAIL_PATH_RE = re.compile(
+    r"/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}/?$", re.IGNORECASE
+)
+
+# ETag, headers, body
+CachedResponse = Tuple[str, dict, bytes]
+
+
+def is_detail_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return not parsed.query and bool(DETAIL_PATH_RE.search(parsed.path))
+
+
+def is_revalidated(method: str, url: str, **kwargs) -> bool:
+    if method.upper() != "GET" or kwargs.get("stream") or kwargs.get("params"):
+        return False
+    if not is_detail_url(url):
+        return False
+
+    from .service_resolver import resolver
+
+    service = resolver.get_service(url)
+    return service is not None and service.api_type in REVALIDATED_API_TYPES
+
+
+def get_cache_key(url: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:{url}"
+
+
+def is_cacheable(response: requests.Response) -> bool:
+    content_type = response.headers.get("Content-Type", "")
+    return (
+        response.status_code == 200
+        and bool(response.headers.get("ETag"))
+        and "json" in content_type
+        and len(response.content) <= settings.ETAG_CACHE_MAX_SIZE
+    )
+
+
+def revalidating_get(
+    session: requests.Session, url: str, **kwargs
+) -> requests.Response:
+    """
+    Send a conditional GET if an earlier response for the URL is kept.
+    """
+    _cache = caches["default"]
+    cache_key = get_cache_key(url)
+    cached: Optional[CachedResponse] = _cache.get(cache_key)
+    if cached is not None:
+        headers = CaseInsensitiveDict(kwargs.get("headers") or {})
+        headers["If-None-Match"] = cached[0]
+        kwargs["headers"] = headers
+
+    response = session.request("GET", url, **kwargs)
+
+    if response.status_code == 304 and cached is not None:
+        _cache.touch(cache_key, settings.ETAG_CACHE_TIMEOUT)
+        _etag, headers, content = cached
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        return response
+
+    if is_cacheable(response):
+        _cache.set(
+            cache_key,
+            (response.headers["ETag"], dict(response.headers), response.content),
+            timeout=settings.ETAG_CACHE_TIMEOUT,
+        )
+    elif cached is not None:
+        _cache.delete(cache_key)
+    return response
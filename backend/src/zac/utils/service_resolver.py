@@ -0,0 +1,119 @@
+"""
+Resolve the configured service and API client for an URL without database queries.
+
+``Service.get_service`` queries the database for every URL, and a new client - with
+a new JWT - is built for every call. The resolver loads all services into a trie of
+API root segments once, and keeps one client per service.
+
+Saving or deleting a service clears the resolvers of all processes, see
+:func:`zac.utils.local_cache.register_invalidation`. The resolver is reloaded after
+``settings.SERVICE_RESOLVER_TIMEOUT`` seconds regardless, which also limits the age
+of the JWTs of the clients.
+"""
+import copy
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from zgw_consumers.client import ZGWClient
+from zgw_consumers.models import Service
+
+from .local_cache import broadcast_invalidation, listener, register_invalidation
+
+INVALIDATION_MESSAGE = "services"
+
+# "https://example.com/api/v1/zaken/123" -> "https:/", "/", "example.com/", "api/", ...
+_SEGMENT_RE = re.compile(r"[^/]*/")
+
+
+def _segments(url: str) -> List[str]:
+    return _SEGMENT_RE.findall(url)
+
+
+class _Node:
+    __slots__ = ("children", "service", "client")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.service: Optional[Service] = None
+        self.client: Optional[ZGWClient] = None
+
+
+class ServiceResolver:
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get_root(self) -> _Node:
+        root = self._root
+        if root is not None and (
+            time.monotonic() - self._loaded_at < settings.SERVICE_RESOLVER_TIMEOUT
+        ):
+            return root
+
+        listener.ensure_started()
+        generation = self._generation
+        root = _Node()
+        for service in Service.objects.all():
+            node = root
+            for segment in _segments(service.api_root):
+                node = node.children.setdefault(segment, _Node())
+            node.service = service
+
+        with self._lock:
+            # don't keep services that were changed while loading
+            if generation == self._generation:
+                self._root, self._loaded_at = root, time.monotonic()
+        return root
+
+    def _lookup(self, url: str) -> Optional[_Node]:
+        # the node of the longest API root that the URL starts with
+        node, match = self._get_root(), None
+        for segment in _segments(url):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.service is not None:
+                match = node
+        return match
+
+    def get_service(self, url: str) -> Optional[Service]:
+        node = self._lookup(url)
+        return copy.copy(node.service) if node is not None else None
+
+    def get_client(self, url: str) -> Optional[ZGWClient]:
+        """
+        Return the client for the service of the URL.
+
+        The client is shared by all callers and threads, it must not be modified.
+        """
+        node = self._lookup(url)
+        if node is None:
+            return None
+
+        # the clients are discarded together with the trie
+        if node.client is None:
+            node.client = node.service.build_client()
+        return node.client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root = None
+            self._generation += 1
+
+
+resolver = ServiceResolver()
+
+register_invalidation(INVALIDATION_MESSAGE, resolver.clear)
+
+
+def invalidate_service_resolvers(**kwargs) -> None:
+    """
+    Clear the resolvers of all processes, connected to the ``Service`` signals.
+    """
+    broadcast_invalidation(INVALIDATION_MESSAGE)
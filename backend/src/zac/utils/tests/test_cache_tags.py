@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from django.core.cache import cache as default_cache
+from django.test import SimpleTestCase, override_settings
+
+from freezegun import freeze_time
+
+from ..cache_tags import get_tagged, invalidate_tags, set_tagged
+from ..decorators import cache
+
+
+class CacheTagsTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+
+    def test_invalidate_tag(self):
+        set_tagged("document:1:v1", "v1", ["document:1"], timeout=60)
+        set_tagged("document:1:v2", "v2", ["document:1"], timeout=60)
+        set_tagged("document:2", "other", ["document:2"], timeout=60)
+
+        invalidate_tags("document:1")
+
+        self.assertIsNone(get_tagged("document:1:v1", ["document:1"]))
+        self.assertIsNone(get_tagged("document:1:v2", ["document:1"]))
+        self.assertEqual(get_tagged("document:2", ["document:2"]), "other")
+
+    def test_invalidate_unused_tag(self):
+        invalidate_tags("document:1")
+
+        set_tagged("document:1", "v1", ["document:1"], timeout=60)
+
+        self.assertEqual(get_tagged("document:1", ["document:1"]), "v1")
+
+    def test_evicted_version_invalidates(self):
+        set_tagged("document:1", "v1", ["document:1"], timeout=60)
+
+        default_cache.delete("tag:document:1")
+
+        self.assertIsNone(get_tagged("document:1", ["document:1"]))
+
+    def test_decorated_function_with_tags(self):
+        func = MagicMock(side_effect=["first", "second"])
+        cached_func = cache(
+            "statustypen:{zaaktype}", timeout=60, tags=("zaaktype:{zaaktype}",)
+        )(func)
+
+        self.assertEqual(cached_func(zaaktype="https://ztc.nl/zaaktypen/1"), "first")
+        self.assertEqual(cached_func(zaaktype="https://ztc.nl/zaaktypen/1"), "first")
+
+        invalidate_tags("zaaktype:https://ztc.nl/zaaktypen/1")
+
+        self.assertEqual(cached_func(zaaktype="https://ztc.nl/zaaktypen/1"), "second")
+        self.assertEqual(func.call_count, 2)
+
+    def test_invalidated_value_is_not_served_while_refreshing(self):
+        func = MagicMock(side_effect=["first", "second"])
+        cached_func = cache("stale", timeout=60, stale_ttl=60, tags=("stale",))(func)
+
+        self.assertEqual(cached_func(), "first")
+        invalidate_tags("stale")
+
+        self.assertEqual(cached_func(), "second")
+
+    def test_tag_with_none_argument_is_left_out(self):
+        calls = []
+
+        @cache(
+            "zaak:{zaak_uuid}:{zaak_url}",
+            timeout=60,
+            tags=("zaak:{zaak_uuid}", "zaak:{zaak_url}"),
+        )
+        def get_zaak(zaak_uuid=None, zaak_url=None):
+            calls.append((zaak_uuid, zaak_url))
+            return "zaak"
+
+        get_zaak(zaak_url="https://zrc.nl/zaken/1")
+        get_zaak(zaak_url="https://zrc.nl/zaken/2")
+
+        self.assertIsNone(default_cache.get("tag:zaak:None"))
+        invalidate_tags("zaak:https://zrc.nl/zaken/1")
+        get_zaak(zaak_url="https://zrc.nl/zaken/1")
+        get_zaak(zaak_url="https://zrc.nl/zaken/2")
+        self.assertEqual(len(calls), 3)
+
+    @override_settings(CACHE_TAG_TIMEOUT=60)
+    def test_version_expires_unless_used(self):
+        with freeze_time("2022-01-01T12:00:00Z") as frozen_time:
+            set_tagged("document:1:v1", "v1", ["document:1"], timeout=30)
+            frozen_time.tick(timedelta(seconds=50))
+            set_tagged("document:1:v2", "v2", ["document:1"], timeout=30)
+            frozen_time.tick(timedelta(seconds=20))
+
+            # the version was renewed when v2 was cached
+            self.assertEqual(get_tagged("document:1:v2", ["document:1"]), "v2")
+
+            frozen_time.tick(timedelta(seconds=60))
+
+            self.assertIsNone(default_cache.get("tag:document:1"))
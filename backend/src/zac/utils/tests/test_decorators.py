@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache as default_cache
+from django.test import SimpleTestCase
+
+from freezegun import freeze_time
+
+from ..decorators import cache
+
+
+class CacheDecoratorTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+
+    def test_none_is_not_cached_by_default(self):
+        func = MagicMock(return_value=None)
+        cached_func = cache("none:{url}", timeout=60)(func)
+
+        cached_func(url="https://example.com")
+        cached_func(url="https://example.com")
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_none_is_cached_with_negative_timeout(self):
+        func = MagicMock(return_value=None)
+        cached_func = cache("none:{url}", timeout=60, negative_timeout=10)(func)
+
+        with freeze_time("2021-01-01T12:00:00Z") as frozen_time:
+            self.assertIsNone(cached_func(url="https://example.com"))
+            self.assertIsNone(cached_func(url="https://example.com"))
+            self.assertEqual(func.call_count, 1)
+
+            frozen_time.tick(11)
+            cached_func(url="https://example.com")
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        func = MagicMock(side_effect=["first", "second"])
+        cached_func = cache("stale", timeout=60, stale_ttl=60)(func)
+
+        with freeze_time("2021-01-01T12:00:00Z") as frozen_time:
+            self.assertEqual(cached_func(), "first")
+            frozen_time.tick(61)
+
+            # another worker is refreshing the value
+            default_cache.add("stale:lock", 1)
+            self.assertEqual(cached_func(), "first")
+            self.assertEqual(func.call_count, 1)
+
+            default_cache.delete("stale:lock")
+            self.assertEqual(cached_func(), "second")
+            self.assertEqual(cached_func(), "second")
+
+        self.assertEqual(func.call_count, 2)
+
+    def test_failed_refresh_serves_stale_value(self):
+        func = MagicMock(side_effect=["first", Exception("ZTC is down")])
+        cached_func = cache("stale", timeout=60, stale_ttl=60)(func)
+
+        with freeze_time("2021-01-01T12:00:00Z") as frozen_time:
+            cached_func()
+            frozen_time.tick(61)
+
+            self.assertEqual(cached_func(), "first")
+
+        self.assertFalse("stale:lock" in default_cache)
+
+    def test_miss_waits_for_other_worker(self):
+        func = MagicMock(return_value="mine")
+        cached_func = cache("single-flight", timeout=60)(func)
+        default_cache.add("single-flight:lock", 1)
+
+        def other_worker_done(seconds):
+            default_cache.set("single-flight", "theirs")
+
+        with patch("zac.utils.decorators.time.sleep", side_effect=other_worker_done):
+            result = cached_func()
+
+        self.assertEqual(result, "theirs")
+        func.assert_not_called()
+
+    def test_miss_computes_when_other_worker_caches_nothing(self):
+        func = MagicMock(return_value="mine")
+        cached_func = cache("single-flight", timeout=60)(func)
+        default_cache.add("single-flight:lock", 1)
+
+        def other_worker_failed(seconds):
+            default_cache.delete("single-flight:lock")
+
+        with patch("zac.utils.decorators.time.sleep", side_effect=other_worker_failed):
+            result = cached_func()
+
+        self.assertEqual(result, "mine")
+        self.assertEqual(default_cache.get("single-flight"), "mine")
+
+    def test_early_refresh(self):
+        def slow_func():
+            frozen_time.tick(10)
+            return func()
+
+        func = MagicMock(side_effect=["first", "second"])
+        cached_func = cache("early", timeout=60)(slow_func)
+
+        with freeze_time("2021-01-01T12:00:00Z") as frozen_time:
+            cached_func()
+            frozen_time.tick(55)
+
+            with patch("zac.utils.decorators.random.random", return_value=0.0):
+                self.assertEqual(cached_func(), "first")
+            with patch("zac.utils.decorators.random.random", return_value=0.99):
+                self.assertEqual(cached_func(), "second")
@@ -0,0 +1,123 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache as default_cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+import requests_mock
+from zds_client import client as zds_client
+
+from .. import http
+from ..http import PoolStats, SessionRegistry
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.send_header("Set-Cookie", "sessionid=secret")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class SessionRegistryTests(TestCase):
+    def test_session_per_host(self):
+        sessions = SessionRegistry()
+
+        session = sessions.get("https://zaken.nl/api/v1/zaken")
+
+        self.assertIs(session, sessions.get("https://ZAKEN.nl/api/v1/statussen"))
+        self.assertIsNot(session, sessions.get("https://documenten.nl/api/v1/"))
+        self.assertIsNot(session, sessions.get("http://zaken.nl/api/v1/zaken"))
+
+    @override_settings(HTTP_POOL_MAXSIZE=10, HTTP_POOL_MAXSIZE_PER_HOST=["zaken.nl=20"])
+    def test_pool_size_per_host(self):
+        sessions = SessionRegistry()
+
+        zaken = sessions.get("https://zaken.nl/api/v1/zaken")
+        documenten = sessions.get("https://documenten.nl/api/v1/")
+
+        self.assertEqual(zaken.get_adapter("https://zaken.nl/")._pool_maxsize, 20)
+        self.assertEqual(
+            documenten.get_adapter("https://documenten.nl/")._pool_maxsize, 10
+        )
+
+    def test_new_sessions_after_fork(self):
+        sessions = SessionRegistry()
+        session = sessions.get("https://zaken.nl/api/v1/zaken")
+
+        with patch("zac.utils.http.os.getpid", return_value=-1):
+            self.assertIsNot(session, sessions.get("https://zaken.nl/api/v1/zaken"))
+
+    def test_zds_client_uses_pooled_sessions(self):
+        self.assertIsInstance(zds_client.requests, http._PooledRequests)
+
+        with requests_mock.Mocker() as m:
+            m.get("https://zaken.nl/api/v1/zaken", json={"count": 0})
+            with patch.object(
+                http.sessions, "get", wraps=http.sessions.get
+            ) as mock_get:
+                response = zds_client.requests.request(
+                    "GET", "https://zaken.nl/api/v1/zaken"
+                )
+
+        self.assertEqual(response.json(), {"count": 0})
+        mock_get.assert_called_once_with("https://zaken.nl/api/v1/zaken")
+
+
+class PoolStatsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+
+        patcher = patch("zac.utils.http.stats", PoolStats(flush_interval=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("zac.utils.http.sessions", SessionRegistry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            http.get(self.url).raise_for_status()
+
+        self.assertEqual(
+            http.get_pool_stats(),
+            {
+                "127.0.0.1": {
+                    "requests": 3,
+                    "connections": 1,
+                    "waits": 0,
+                    "wait_ms": 0,
+                }
+            },
+        )
+        stdout = StringIO()
+        call_command("http_pool_stats", stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue(),
+            "127.0.0.1: 3 requests, 1 connections opened (reuse 66.7%), "
+            "0 waits (average -)\n",
+        )
+
+    def test_cookies_are_not_shared(self):
+        http.get(self.url)
+
+        self.assertEqual(len(http.sessions.get(self.url).cookies), 0)
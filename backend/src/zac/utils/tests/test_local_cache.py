@@ -0,0 +1,65 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache as default_cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..local_cache import CacheStats, LocalCache
+
+
+class LocalCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        local_cache = LocalCache(max_entries=2, timeout=60)
+        local_cache.set("a", 1)
+        local_cache.set("b", 2)
+        local_cache.get("a")
+
+        local_cache.set("c", 3)
+
+        self.assertEqual(local_cache.get("a"), 1)
+        self.assertIsNone(local_cache.get("b"))
+        self.assertEqual(local_cache.get("c"), 3)
+
+    def test_entries_expire(self):
+        local_cache = LocalCache(max_entries=2, timeout=60)
+
+        with patch("zac.utils.local_cache.time.monotonic", return_value=100):
+            local_cache.set("a", 1, timeout=10)
+            local_cache.set("b", 2, timeout=3600)
+        with patch("zac.utils.local_cache.time.monotonic", return_value=111):
+            self.assertIsNone(local_cache.get("a"))
+            # the timeout is capped by the local cache timeout
+            self.assertEqual(local_cache.get("b"), 2)
+        with patch("zac.utils.local_cache.time.monotonic", return_value=161):
+            self.assertIsNone(local_cache.get("b"))
+
+    def test_cached_objects_are_not_shared(self):
+        local_cache = LocalCache(max_entries=2, timeout=60)
+        local_cache.set("a", [{"url": "https://example.com"}])
+
+        local_cache.get("a").append("mutated")
+
+        self.assertEqual(local_cache.get("a"), [{"url": "https://example.com"}])
+
+
+class CacheStatsTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        default_cache.clear()
+        self.addCleanup(default_cache.clear)
+
+    def test_hit_ratios_are_exported(self):
+        stats = CacheStats(flush_interval=0)
+
+        stats.record("local", "zaaktype", hit=True)
+        stats.record("local", "zaaktype", hit=True)
+        stats.record("local", "zaaktype", hit=False)
+        stats.record("shared", "zaaktype", hit=True)
+        stdout = StringIO()
+
+        call_command("cache_stats", stdout=stdout)
+
+        self.assertEqual(
+            stdout.getvalue(), "zaaktype: local 66.7% of 3, shared 100.0% of 1\n"
+        )
@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from zgw_consumers.concurrent import parallel
+
+from ..decorators import memoize
+from ..memoization import forget_memoized, memoization_scope
+from ..middleware import MemoizationMiddleware
+
+ZAAK = "https://api.zaken.nl/api/v1/zaken/a522d30c-6c10-47fe-82e3-e9f524c14ca8"
+
+
+class MemoizationTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.func = MagicMock(return_value=["rol"])
+        self.memoized_func = memoize("rollen:{zaak_url}")(self.func)
+
+    def test_no_memoization_outside_scope(self):
+        self.memoized_func(ZAAK)
+        self.memoized_func(ZAAK)
+
+        self.assertEqual(self.func.call_count, 2)
+
+    def test_calls_are_memoized_within_scope(self):
+        with memoization_scope("test") as scope:
+            first = self.memoized_func(ZAAK)
+            second = self.memoized_func(zaak_url=ZAAK)
+            self.memoized_func("https://api.zaken.nl/api/v1/zaken/other")
+
+        self.assertEqual(first, second)
+        # callers can't change each other's results
+        self.assertIsNot(first, second)
+        self.assertEqual(self.func.call_count, 2)
+        self.assertEqual(scope.calls, 2)
+        self.assertEqual(scope.saved, 1)
+
+    def test_scope_is_shared_with_parallel_threads(self):
+        with memoization_scope("test") as scope:
+            with parallel(max_workers=4) as executor:
+                list(executor.map(self.memoized_func, [ZAAK] * 8))
+
+        self.func.assert_called_once_with(ZAAK)
+        self.assertEqual(scope.saved, 7)
+
+    def test_failed_calls_are_not_memoized(self):
+        self.func.side_effect = [Exception("ZRC is down"), ["rol"]]
+
+        with memoization_scope("test"):
+            with self.assertRaises(Exception):
+                self.memoized_func(ZAAK)
+            self.assertEqual(self.memoized_func(ZAAK), ["rol"])
+
+    def test_forget_memoized(self):
+        with memoization_scope("test"):
+            self.memoized_func(ZAAK)
+            forget_memoized("rollen:")
+            self.memoized_func(ZAAK)
+
+        self.assertEqual(self.func.call_count, 2)
+
+    def test_middleware_opens_scope_per_request(self):
+        def view(request):
+            self.memoized_func(ZAAK)
+            self.memoized_func(ZAAK)
+            return HttpResponse()
+
+        middleware = MemoizationMiddleware(view)
+        middleware(RequestFactory().get("/"))
+        middleware(RequestFactory().get("/"))
+
+        self.assertEqual(self.func.call_count, 2)
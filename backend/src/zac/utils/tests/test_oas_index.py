@@ -0,0 +1,97 @@
+import os
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+import yaml
+from zds_client import client as zds_client, schema as zds_schema
+
+from .. import oas_index
+from ..oas_index import OperationIndex, compact_schema
+
+ZRC_SCHEMA = os.path.join(settings.ZGW_CONSUMERS_TEST_SCHEMA_DIRS[0], "zrc.yaml")
+
+
+class OperationIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(ZRC_SCHEMA) as schema_file:
+            cls.spec = yaml.safe_load(schema_file)
+
+    def test_compact_schema(self):
+        compact = compact_schema(self.spec)
+
+        self.assertNotIn("schemas", compact.get("components", {}))
+        self.assertEqual(compact["servers"], self.spec["servers"])
+        self.assertEqual(
+            compact["paths"]["/zaken/{uuid}"]["get"]["operationId"], "zaak_read"
+        )
+        self.assertNotIn("responses", compact["paths"]["/zaken/{uuid}"]["get"])
+
+    def test_same_results_as_zds_client(self):
+        compact = compact_schema(self.spec)
+        index = OperationIndex(compact)
+
+        for operation_id in index.operations:
+            with self.subTest(operation_id=operation_id):
+                self.assertEqual(
+                    index.get_operation_url(operation_id, pattern_only=True),
+                    zds_schema.get_operation_url(
+                        self.spec, operation_id, pattern_only=True
+                    ),
+                )
+                self.assertEqual(
+                    index.get_operation_url(
+                        operation_id,
+                        base_url="https://zaken.nl/api/v1/",
+                        pattern_only=True,
+                    ),
+                    zds_schema.get_operation_url(
+                        self.spec,
+                        operation_id,
+                        base_url="https://zaken.nl/api/v1/",
+                        pattern_only=True,
+                    ),
+                )
+                self.assertEqual(
+                    index.get_headers(operation_id),
+                    zds_schema.get_headers(self.spec, operation_id),
+                )
+
+    def test_path_parameters(self):
+        index = OperationIndex(compact_schema(self.spec))
+
+        self.assertEqual(
+            index.get_operation_url("zaak_read", uuid="1234"),
+            "/zaken/api/v1/zaken/1234",
+        )
+
+    def test_unknown_operation(self):
+        index = OperationIndex(compact_schema(self.spec))
+
+        with self.assertRaises(ValueError):
+            index.get_operation_url("zaak_foo")
+        self.assertEqual(index.get_headers("zaak_foo"), {})
+
+    def test_index_is_compiled_once_per_schema(self):
+        compact = compact_schema(self.spec)
+
+        self.assertIs(oas_index.indexes.get(compact), oas_index.indexes.get(compact))
+        self.assertIsNot(
+            oas_index.indexes.get(compact),
+            oas_index.indexes.get(compact_schema(self.spec)),
+        )
+
+    def test_clients_use_index(self):
+        self.assertIs(zds_client.get_operation_url, oas_index.get_operation_url)
+        self.assertIs(zds_client.get_headers, oas_index.get_headers)
+
+    def test_benchmark(self):
+        stdout = StringIO()
+
+        call_command("benchmark_oas", ZRC_SCHEMA, "--repeat=1", stdout=stdout)
+
+        self.assertTrue(stdout.getvalue().startswith("zrc.yaml (41 operations)"))
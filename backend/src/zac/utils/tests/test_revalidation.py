@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+import requests_mock
+from zgw_consumers.constants import APITypes
+from zgw_consumers.models import Service
+
+from zac.core.tests.utils import ClearCachesMixin
+
+from .. import http
+from ..revalidation import get_cache_key
+
+ZAKEN_ROOT = "https://api.zaken.nl/api/v1/"
+CATALOGI_ROOT = "https://api.catalogi.nl/api/v1/"
+ZAAK_URL = f"{ZAKEN_ROOT}zaken/e3f5c6d2-0e49-4293-8428-26139f630950"
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Content-Type": "application/json"}
+
+
+@requests_mock.Mocker()
+class RevalidationTests(ClearCachesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        Service.objects.create(api_type=APITypes.zrc, api_root=ZAKEN_ROOT)
+        Service.objects.create(api_type=APITypes.ztc, api_root=CATALOGI_ROOT)
+
+    def test_not_modified_uses_kept_body(self, m):
+        m.get(
+            ZAAK_URL,
+            [
+                {"json": {"url": ZAAK_URL}, "headers": etag_headers('"abc"')},
+                {"status_code": 304, "headers": {"ETag": '"abc"'}},
+            ],
+        )
+
+        first = http.get(ZAAK_URL)
+        second = http.get(ZAAK_URL)
+
+        self.assertNotIn("If-None-Match", m.request_history[0].headers)
+        self.assertEqual(m.request_history[1].headers["If-None-Match"], '"abc"')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second.headers["ETag"], '"abc"')
+
+    def test_changed_resource_replaces_kept_body(self, m):
+        m.get(
+            ZAAK_URL,
+            [
+                {"json": {"omschrijving": "old"}, "headers": etag_headers('"abc"')},
+                {"json": {"omschrijving": "new"}, "headers": etag_headers('"def"')},
+                {"status_code": 304},
+            ],
+        )
+
+        http.get(ZAAK_URL)
+        http.get(ZAAK_URL)
+        response = http.get(ZAAK_URL)
+
+        self.assertEqual(m.request_history[2].headers["If-None-Match"], '"def"')
+        self.assertEqual(response.json(), {"omschrijving": "new"})
+
+    def test_errors_drop_kept_body(self, m):
+        m.get(
+            ZAAK_URL,
+            [
+                {"json": {"url": ZAAK_URL}, "headers": etag_headers('"abc"')},
+                {"status_code": 404, "json": {}},
+                {"json": {"url": ZAAK_URL}},
+            ],
+        )
+
+        http.get(ZAAK_URL)
+        http.get(ZAAK_URL)
+        http.get(ZAAK_URL)
+
+        self.assertNotIn("If-None-Match", m.request_history[2].headers)
+
+    def test_only_zrc_and_drc_are_revalidated(self, m):
+        zaaktype_url = f"{CATALOGI_ROOT}zaaktypen/7b3e2f4c-8d5a-4b6e-9f1c-2a3d4e5f6a7b"
+        m.get(zaaktype_url, json={}, headers=etag_headers('"abc"'))
+
+        http.get(zaaktype_url)
+        http.get(zaaktype_url)
+
+        self.assertNotIn("If-None-Match", m.last_request.headers)
+        self.assertIsNone(cache.get(get_cache_key(zaaktype_url)))
+
+    def test_only_detail_resources_are_revalidated(self, m):
+        list_url = f"{ZAKEN_ROOT}zaken"
+        download_url = f"{ZAAK_URL}/download"
+        m.get(list_url, json={"results": []}, headers=etag_headers('"abc"'))
+        m.get(download_url, content=b"PDF", headers={"ETag": '"abc"'})
+        m.get(ZAAK_URL, json={}, headers=etag_headers('"abc"'))
+
+        for _ in range(2):
+            http.get(list_url)
+            http.get(download_url)
+            http.get(ZAAK_URL, params={"expand": "status"})
+
+        for request in m.request_history:
+            self.assertNotIn("If-None-Match", request.headers)
+        self.assertIsNone(cache.get(get_cache_key(list_url)))
+        self.assertIsNone(cache.get(get_cache_key(download_url)))
+        self.assertIsNone(cache.get(get_cache_key(ZAAK_URL)))
+
+    def test_binary_body_is_not_kept(self, m):
+        zaak_url = f"{ZAKEN_ROOT}zaken/2b9c7b3e-6e5d-4f2a-9d1b-8c7a6e5f4d3c"
+        m.get(
+            zaak_url,
+            content=b"PDF",
+            headers={"ETag": '"abc"', "Content-Type": "application/pdf"},
+        )
+
+        http.get(zaak_url)
+
+        self.assertIsNone(cache.get(get_cache_key(zaak_url)))
+
+    @override_settings(ETAG_CACHE_MAX_SIZE=10)
+    def test_large_body_is_not_kept(self, m):
+        m.get(
+            ZAAK_URL,
+            json={"omschrijving": "more than ten bytes"},
+            headers=etag_headers('"abc"'),
+        )
+
+        http.get(ZAAK_URL)
+        http.get(ZAAK_URL)
+
+        self.assertNotIn("If-None-Match", m.last_request.headers)
+        self.assertIsNone(cache.get(get_cache_key(ZAAK_URL)))
@@ -0,0 +1,82 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from zgw_consumers.constants import APITypes
+from zgw_consumers.models import Service
+
+from ..local_cache import INVALIDATION_CHANNEL, listener
+from ..service_resolver import resolver
+
+ZAKEN_ROOT = "https://api.zaken.nl/api/v1/"
+
+
+@override_settings(SERVICE_RESOLVER_TIMEOUT=60)
+class ServiceResolverTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.zrc = Service.objects.create(api_type=APITypes.zrc, api_root=ZAKEN_ROOT)
+        cls.drc = Service.objects.create(
+            api_type=APITypes.drc, api_root=f"{ZAKEN_ROOT}documenten/"
+        )
+
+    def setUp(self):
+        super().setUp()
+        resolver.clear()
+        self.addCleanup(resolver.clear)
+
+        patcher = patch.object(listener, "ensure_started")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_longest_api_root_wins(self):
+        self.assertEqual(resolver.get_service(f"{ZAKEN_ROOT}zaken/1").pk, self.zrc.pk)
+        self.assertEqual(
+            resolver.get_service(
+                f"{ZAKEN_ROOT}documenten/enkelvoudiginformatieobjecten/1"
+            ).pk,
+            self.drc.pk,
+        )
+        # not a prefix of the path segments
+        self.assertEqual(
+            resolver.get_service(f"{ZAKEN_ROOT}documentenlijst/1").pk, self.zrc.pk
+        )
+        self.assertIsNone(resolver.get_service("https://api.zaken.nl/api/v2/zaken/1"))
+        self.assertIsNone(resolver.get_service("https://other.nl/api/v1/zaken/1"))
+
+    def test_resolving_without_queries(self):
+        client = resolver.get_client(f"{ZAKEN_ROOT}zaken/1")
+
+        with self.assertNumQueries(0):
+            self.assertIs(resolver.get_client(f"{ZAKEN_ROOT}zaken/2"), client)
+            self.assertIsNone(resolver.get_client("https://other.nl/api/v1/zaken/1"))
+
+    @patch("zac.utils.local_cache._get_redis_connection")
+    def test_saving_service_clears_resolvers(self, mock_get_connection):
+        self.assertIsNone(resolver.get_client("https://other.nl/api/v1/zaken/1"))
+
+        Service.objects.create(
+            api_type=APITypes.zrc, api_root="https://other.nl/api/v1/"
+        )
+
+        self.assertIsNotNone(resolver.get_client("https://other.nl/api/v1/zaken/1"))
+        mock_get_connection.return_value.publish.assert_called_once_with(
+            INVALIDATION_CHANNEL, "services"
+        )
+
+    @patch("zac.utils.local_cache._get_redis_connection", return_value=None)
+    def test_deleting_service_clears_resolvers(self, mock_get_connection):
+        self.assertIsNotNone(resolver.get_client(f"{ZAKEN_ROOT}documenten/1"))
+
+        self.drc.delete()
+
+        self.assertEqual(
+            resolver.get_service(f"{ZAKEN_ROOT}documenten/1").pk, self.zrc.pk
+        )
+
+    def test_broadcast_clears_resolver(self):
+        client = resolver.get_client(f"{ZAKEN_ROOT}zaken/1")
+
+        listener.handle(b"services")
+
+        self.assertIsNot(resolver.get_client(f"{ZAKEN_ROOT}zaken/1"), client)
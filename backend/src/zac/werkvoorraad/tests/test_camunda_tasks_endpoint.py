@@ -111,8 +111,8 @@ class CamundaTasksTests(ESMixin, APITestCase):
 
     def test_user_tasks_endpoint(self):
         with patch(
-            "zac.werkvoorraad.views.get_zaak_url_from_context",
-            return_value=(self.task.id, self.zaak["url"]),
+            "zac.werkvoorraad.views.get_zaak_urls_from_context",
+            return_value={self.task.id: self.zaak["url"]},
         ):
             with patch(
                 "zac.werkvoorraad.views.get_camunda_user_tasks",
@@ -162,8 +162,8 @@ class CamundaTasksTests(ESMixin, APITestCase):
 
     def test_group_tasks_endpoint(self):
         with patch(
-            "zac.werkvoorraad.views.get_zaak_url_from_context",
-            return_value=(self.task.id, self.zaak["url"]),
+            "zac.werkvoorraad.views.get_zaak_urls_from_context",
+            return_value={self.task.id: self.zaak["url"]},
         ):
             with patch(
                 "zac.werkvoorraad.views.get_camunda_group_tasks",
@@ -208,8 +208,8 @@ class CamundaTasksTests(ESMixin, APITestCase):
 
     def test_user_tasks_endpoint_zaak_cant_be_found(self):
         with patch(
-            "zac.werkvoorraad.views.get_zaak_url_from_context",
-            return_value=(self.task.id, self.zaak["url"]),
+            "zac.werkvoorraad.views.get_zaak_urls_from_context",
+            return_value={self.task.id: self.zaak["url"]},
         ):
             with patch(
                 "zac.werkvoorraad.views.get_camunda_user_tasks",
@@ -42,8 +42,10 @@ def get_camunda_tasks(assignee: str) -> List[Task]:
     tasks = client.get("task", {"assignee": assignee})
 
     tasks = factory(Task, tasks)
-    for task in tasks:
-        task.assignee = resolve_assignee(assignee)
+    if tasks:
+        user_or_group = resolve_assignee(assignee)
+        for task in tasks:
+            task.assignee = user_or_group
 
     return tasks
 
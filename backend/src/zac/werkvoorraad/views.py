@@ -7,10 +7,9 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import authentication, permissions, views
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
-from zgw_consumers.concurrent import parallel
 
 from zac.activities.models import Activity
-from zac.api.context import get_zaak_url_from_context
+from zac.api.context import get_zaak_urls_from_context
 from zac.camunda.data import Task
 from zac.camunda.user_tasks.api import get_killable_camunda_tasks
 from zac.contrib.objects.services import (
@@ -117,20 +116,19 @@ class WorkStackUserTasksView(ListAPIView):
 
     def get_queryset(self):
         tasks = self.get_camunda_tasks()
-        with parallel() as executor:
-            task_ids_and_zaak_urls = list(
-                executor.map(get_zaak_url_from_context, tasks)
-            )
-
-        zaken = {
-            zaak.url: zaak
-            for zaak in search_zaken(
-                request=self.request,
-                urls=list({tzu[1] for tzu in task_ids_and_zaak_urls}),
-            )
-        }
+        task_zaak_urls = get_zaak_urls_from_context(tasks)
+
+        zaak_urls = list({url for url in task_zaak_urls.values() if url})
+        zaken = (
+            {
+                zaak.url: zaak
+                for zaak in search_zaken(request=self.request, urls=zaak_urls)
+            }
+            if zaak_urls
+            else {}
+        )
         task_zaken = {}
-        for task_id, zaak_url in task_ids_and_zaak_urls:
+        for task_id, zaak_url in task_zaak_urls.items():
             if not (zaak := zaken.get(zaak_url)):
                 logger.warning(
                     "Couldn't find a ZAAK in Elasticsearch for task with id %s."